@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Build the mathparser LALR parser and inline the package into
+solve_problem.html and create_problem.html.
+
+First, mathparser/grammar.py is compiled with Lark's standalone generator
+into mathparser/_lalr_parser.py (parse tables serialized, no grammar
+construction at runtime, no lark dependency). Lark is only needed here.
+
+The pages run their Python in Pyodide from a single <script type="py">, so
+they can't import mathparser/ from disk. This script copies the package
+sources into a generated block (between the BEGIN/END markers below) that
+writes them to a temp directory on sys.path when the page starts. Both
+pages then subclass mathparser.MathParser for their own popups.
+
+Run it after every change to mathparser/:
+
+    python embed_mathparser.py          # Rebuild the parser, update both pages
+    python embed_mathparser.py --check  # Exit 1 if the parser or a page is out of date
+"""
+import hashlib
+import io
+import os
+import re
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.join(BASE_DIR, 'mathparser')
+PAGES = ['solve_problem.html', 'create_problem.html']
+GRAMMAR_FILE = os.path.join(PACKAGE_DIR, 'grammar.py')
+PARSER_FILE = os.path.join(PACKAGE_DIR, '_lalr_parser.py')
+
+BEGIN = '# ==== BEGIN mathparser (generated by embed_mathparser.py - do not edit) ===='
+END = '# ==== END mathparser ===='
+
+def read_file(path):
+    # newline='' keeps each page's own line endings (create_problem.html is CRLF)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+def load_grammar():
+    # Executed standalone: importing mathparser would need the parser we are building
+    namespace = {}
+    exec(read_file(GRAMMAR_FILE), namespace)
+    return namespace['GRAMMAR']
+
+def grammar_stamp(grammar):
+    return '# grammar sha256: ' + hashlib.sha256(grammar.encode('utf-8')).hexdigest()
+
+def parser_is_current(grammar):
+    """Compare stamps, not text, so a different Lark version doesn't count as stale."""
+    if not os.path.exists(PARSER_FILE):
+        return False
+    with open(PARSER_FILE, 'r', encoding='utf-8') as f:
+        return f.readline().rstrip('\n') == grammar_stamp(grammar)
+
+def build_parser(grammar):
+    from lark import Lark
+    from lark.tools.standalone import gen_standalone
+
+    parser = Lark(grammar, parser='lalr', lexer='contextual', start='start')
+    out = io.StringIO()
+    gen_standalone(parser, out=out, compress=True)
+    with open(PARSER_FILE, 'w', encoding='utf-8') as f:
+        f.write(grammar_stamp(grammar) + '\n')
+        f.write('# Generated from mathparser/grammar.py by embed_mathparser.py - do not edit\n')
+        f.write(out.getvalue())
+
+def package_sources():
+    """Package files in a stable order, as {name: source}."""
+    return {
+        name: read_file(os.path.join(PACKAGE_DIR, name))
+        for name in sorted(os.listdir(PACKAGE_DIR))
+        if name.endswith('.py')
+    }
+
+def build_block():
+    sources = package_sources()
+    for name, source in sources.items():
+        if '</script' in source.lower():
+            raise ValueError(f"mathparser/{name} contains '</script', which would end the page's script tag")
+
+    lines = [
+        BEGIN,
+        'def _install_mathparser():',
+        '    import os, sys, tempfile',
+        '    sources = {',
+    ]
+    lines += [f'        {name!r}: {source!r},' for name, source in sources.items()]
+    lines += [
+        '    }',
+        '    root = os.path.join(tempfile.gettempdir(), "mathparser_embedded")',
+        '    os.makedirs(os.path.join(root, "mathparser"), exist_ok=True)',
+        '    for name, source in sources.items():',
+        '        with open(os.path.join(root, "mathparser", name), "w", encoding="utf-8") as f:',
+        '            f.write(source)',
+        '    if root not in sys.path:',
+        '        sys.path.insert(0, root)',
+        '',
+        '_install_mathparser()',
+        END,
+    ]
+    return '\n'.join(lines)
+
+def embed(html, block):
+    pattern = re.compile(re.escape(BEGIN) + r'.*?' + re.escape(END), re.DOTALL)
+    if not pattern.search(html):
+        raise ValueError("generated mathparser block markers not found")
+    if '\r\n' in html:
+        block = block.replace('\n', '\r\n')
+    return pattern.sub(lambda _: block, html, count=1)
+
+def main():
+    check = '--check' in sys.argv[1:]
+    stale = []
+
+    grammar = load_grammar()
+    if parser_is_current(grammar):
+        print("✓ mathparser/_lalr_parser.py is up to date")
+    elif check:
+        stale.append('mathparser/_lalr_parser.py')
+        print("✗ mathparser/_lalr_parser.py is out of date")
+    else:
+        print("Building LALR parser...")
+        build_parser(grammar)
+        print("✓ Built mathparser/_lalr_parser.py")
+
+    block = build_block()
+
+    for page in PAGES:
+        path = os.path.join(BASE_DIR, page)
+        html = read_file(path)
+        updated = embed(html, block)
+        if updated == html:
+            print(f"✓ {page} is up to date")
+            continue
+        if check:
+            stale.append(page)
+            print(f"✗ {page} is out of date")
+            continue
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(updated)
+        print(f"✓ Updated {page}")
+
+    if stale:
+        print("Run: python embed_mathparser.py")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
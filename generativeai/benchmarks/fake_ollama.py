@@ -0,0 +1,271 @@
+"""
+Fake Ollama Server - Offline Benchmarks
+---------------------------------------
+A small HTTP server that speaks enough of the Ollama API for the
+benchmarks to run without a GPU or network:
+
+- POST /api/generate: streamed (NDJSON) or single JSON responses.
+  An empty prompt only loads the model; keep_alive 0 unloads it.
+- GET /api/ps: models currently resident
+
+Each model has a simulated load time and generation speed. Only
+`capacity` models fit in memory at once; loading another one evicts
+the least recently used, as on a memory-limited GPU host. Requests are
+served one at a time, like a single-GPU Ollama.
+
+Responses are canned C++ questions picked from the prompt's requested
+output format, so every generation strategy parses them. With
+fail_rate > 0 some responses are unusable prose instead, to exercise
+retries and success rates.
+
+Usage:
+    python benchmarks/fake_ollama.py --port 11435 --capacity 1
+
+    server = FakeOllama(capacity=1).start()
+    ... call_ollama(prompt, base_url=server.url) ...
+    server.stop()
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+CHARS_PER_TOKEN = 4
+CHUNK_CHARS = 16  # Characters per streamed chunk
+
+
+@dataclass
+class ModelProfile:
+    """Simulated timings for one model (seconds and tokens/second)."""
+    load_seconds: float
+    tokens_per_second: float
+    prompt_tokens_per_second: float = 50000.0
+
+
+# Scaled down from the measurements in the README so benchmarks finish quickly
+DEFAULT_MODELS: Dict[str, ModelProfile] = {
+    "qwen2.5:1.5b": ModelProfile(load_seconds=0.2, tokens_per_second=1500.0),
+    "llama3.1:8b": ModelProfile(load_seconds=0.5, tokens_per_second=700.0),
+    "qwen2.5:14b": ModelProfile(load_seconds=0.8, tokens_per_second=400.0),
+}
+
+CODE = """#include <iostream>
+#include <vector>
+
+int main() {
+    std::vector<int> numbers = {1, 2, 3, 4, 5};
+    int sum = 0;
+    for (int n : numbers) {
+        sum += n;
+    }
+    std::cout << "Sum: " << sum << std::endl;
+    return 0;
+}"""
+
+CODE_RESPONSE = f"```cpp\n{CODE}\n```"
+
+TARGETS_RESPONSE = """TARGETS:
+1. vector
+2. for
+3. return
+
+DISTRACTORS:
+For Target 1:
+1. list
+2. array
+3. deque
+
+For Target 2:
+1. while
+2. foreach
+3. loop
+
+For Target 3:
+1. exit
+2. break
+3. yield
+"""
+
+MULTI_BLANK_RESPONSE = f"CODE:\n```cpp\n{CODE}\n```\n\n{TARGETS_RESPONSE}"
+
+SINGLE_BLANK_RESPONSE = f"""CODE:
+```cpp
+{CODE}
+```
+
+TARGET:
+vector
+
+DISTRACTORS:
+1. list
+2. array
+3. deque
+"""
+
+
+def canned_response(prompt: str) -> str:
+    """Pick a response in the output format the prompt asks for."""
+    if "Given this C++ code" in prompt:
+        return TARGETS_RESPONSE
+    # RAG prompts embed example questions; only the format section counts
+    instructions = prompt[max(prompt.rfind("OUTPUT FORMAT"), 0):]
+    if "TARGETS" in instructions and "CODE:" in instructions:
+        return MULTI_BLANK_RESPONSE
+    if "TARGET:" in instructions:
+        return SINGLE_BLANK_RESPONSE
+    return CODE_RESPONSE
+
+
+UNUSABLE_RESPONSE = "Sure! Fill-in-the-blank questions are a great way to practice C++."
+
+
+class FakeOllama:
+    """Simulated single-GPU Ollama host."""
+
+    def __init__(self, models: Optional[Dict[str, ModelProfile]] = None,
+                 capacity: int = 1, fail_rate: float = 0.0, seed: Optional[int] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.models = dict(models or DEFAULT_MODELS)
+        self.capacity = capacity
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self.resident: List[str] = []  # Least recently used first
+        self.loads = 0
+        self.requests = 0
+        self._gpu = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # Simulation -----------------------------------------------------------
+
+    def profile(self, model: str) -> ModelProfile:
+        return self.models.get(model) or ModelProfile(load_seconds=0.3, tokens_per_second=800.0)
+
+    def ensure_loaded(self, model: str):
+        """Load `model` (evicting the LRU model if memory is full). Call with the GPU lock held."""
+        if model in self.resident:
+            self.resident.remove(model)
+        else:
+            time.sleep(self.profile(model).load_seconds)
+            self.loads += 1
+            while len(self.resident) >= self.capacity:
+                self.resident.pop(0)
+        self.resident.append(model)
+
+    def respond(self, prompt: str) -> str:
+        if self.fail_rate and self._rng.random() < self.fail_rate:
+            return UNUSABLE_RESPONSE
+        return canned_response(prompt)
+
+    def unload(self, model: str):
+        with self._gpu:
+            if model in self.resident:
+                self.resident.remove(model)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _json(self, obj: Dict, status: int = 200):
+                data = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path != "/api/ps":
+                    return self._json({"error": "not found"}, 404)
+                self._json({"models": [{"name": m, "model": m} for m in server.resident]})
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    return self._json({"error": "not found"}, 404)
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                server.requests += 1
+                model, prompt = body.get("model", ""), body.get("prompt", "")
+
+                if body.get("keep_alive") in (0, "0", "0s"):
+                    server.unload(model)
+                    return self._json({"model": model, "response": "", "done": True})
+
+                with server._gpu:
+                    server.ensure_loaded(model)
+                    if not prompt:
+                        return self._json({"model": model, "response": "", "done": True})
+                    profile = server.profile(model)
+                    time.sleep(len(prompt) / CHARS_PER_TOKEN / profile.prompt_tokens_per_second)
+                    self._generate(model, server.respond(prompt), profile, body.get("stream", True))
+
+            def _generate(self, model: str, text: str, profile: ModelProfile, stream: bool):
+                chunks = [text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS)]
+                delay = CHUNK_CHARS / CHARS_PER_TOKEN / profile.tokens_per_second
+                eval_count = len(text) // CHARS_PER_TOKEN
+                if not stream:
+                    time.sleep(delay * len(chunks))
+                    return self._json({"model": model, "response": text, "done": True,
+                                       "eval_count": eval_count})
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                try:
+                    for chunk in chunks:
+                        time.sleep(delay)
+                        self.wfile.write((json.dumps({"model": model, "response": chunk,
+                                                      "done": False}) + "\n").encode())
+                        self.wfile.flush()
+                    self.wfile.write((json.dumps({"model": model, "response": "", "done": True,
+                                                  "eval_count": eval_count}) + "\n").encode())
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client stopped reading (e.g. streamed code block already complete)
+                self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline benchmarks")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--capacity", type=int, default=1,
+                        help="Models that fit in memory at once (default: 1)")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="Fraction of unusable responses (default: 0)")
+    args = parser.parse_args()
+
+    server = FakeOllama(capacity=args.capacity, fail_rate=args.fail_rate, port=args.port).start()
+    print(f"🧪 Fake Ollama listening on {server.url} (capacity {args.capacity})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""
+Generation Benchmark - Latency and Throughput per Strategy
+----------------------------------------------------------
+Runs every generation strategy over TestDataset.get_all_cases() and
+records, per strategy:
+
+- TTFT: time from request to the first streamed token (for strategies
+  without a model call, the time until the question is ready)
+- total latency per question, with p50/p95/p99
+- tokens/second while the model was generating (tokens estimated from
+  streamed characters, as everywhere else in the repo)
+- success rate (a validated question came back) and retries used
+
+Strategies:
+    template       pre-written code (quiz_app_templates), no LLM
+    deterministic  1.5b code, rule-based targets and distractors
+    full           14b code, targets and distractors
+    hybrid         1.5b code, 14b targets and distractors
+    rag_validated  RAG context + 14b single-blank validated question
+    multi_blank    RAG context + 14b multi-blank validated question
+
+By default it runs offline against the fake Ollama server (simulated
+load times and token rates), so CI can track regressions in the
+pipeline overhead. Pass --url to benchmark a real Ollama host.
+
+Writes a JSON report (for tracking) and a markdown report (for
+reading). With --baseline, exits with code 1 when a strategy's success
+rate drops or its p95 latency grows beyond --tolerance.
+
+Usage:
+    python benchmarks/generation_benchmark.py
+    python benchmarks/generation_benchmark.py --strategies template hybrid --cases 5
+    python benchmarks/generation_benchmark.py --baseline generation_benchmark.json
+    python benchmarks/generation_benchmark.py --url http://localhost:11434
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+GENAI_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(GENAI_DIR))
+sys.path.insert(0, str(GENAI_DIR / "midterm_projects"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from question_engine import ollama
+from question_engine.config import AVG_CHARS_PER_TOKEN
+
+STRATEGIES = ("template", "deterministic", "full", "hybrid", "rag_validated", "multi_blank")
+
+# Test case keywords -> template topic id (first match wins)
+TEMPLATE_TOPICS = [
+    ("hello world", "L1_01"),
+    ("integer variable", "L1_03"),
+    ("array", "L5_02"),
+    ("vector", "L7_01"),
+    ("class", "L8_01"),
+    ("if statement", "L2_01"),
+    ("for loop", "L3_01"),
+    ("while loop", "L3_02"),
+]
+
+CONTEXT_FILE = "context_with_validation.txt"
+DEFAULT_JSON = "generation_benchmark.json"
+DEFAULT_MARKDOWN = "generation_benchmark.md"
+DEFAULT_TOLERANCE = 0.25
+
+
+class CallRecorder:
+    """Times every Ollama request by wrapping question_engine.ollama.stream_ollama."""
+
+    def __init__(self):
+        self.calls: List[Dict] = []
+        self._original = None
+
+    def __enter__(self):
+        self._original = ollama.stream_ollama
+        original, calls = self._original, self.calls
+
+        def timed_stream(prompt, *args, **kwargs):
+            call = {'start': time.perf_counter(), 'first': None, 'end': None, 'chars': 0}
+            calls.append(call)
+            try:
+                for chunk in original(prompt, *args, **kwargs):
+                    if call['first'] is None:
+                        call['first'] = time.perf_counter()
+                    call['chars'] += len(chunk)
+                    yield chunk
+            finally:
+                call['end'] = time.perf_counter()
+
+        ollama.stream_ollama = timed_stream
+        return self
+
+    def __exit__(self, *exc):
+        ollama.stream_ollama = self._original
+
+
+def template_topic(case: str) -> Optional[str]:
+    lowered = case.lower()
+    for keyword, topic_id in TEMPLATE_TOPICS:
+        if keyword in lowered:
+            return topic_id
+    return None
+
+
+def build_strategies(names: List[str], base_url: str, num_blanks: int) -> Dict[str, Callable[[str], Optional[Dict]]]:
+    """Strategy name -> callable(test case) returning a question dict or None."""
+    from question_engine import FAST_MODEL, QUALITY_MODEL
+    from genai_ollama_hybrid_1_5b_14b import HybridQuestionGenerator
+
+    hybrid = HybridQuestionGenerator(base_url, FAST_MODEL, QUALITY_MODEL)
+    strategies = {
+        "template": lambda case: hybrid.generate_template_question(template_topic(case), num_blanks),
+        "deterministic": lambda case: hybrid.generate_deterministic_question(case, num_blanks, verbose=False),
+        "full": lambda case: hybrid.generate_full_question(case, num_blanks, verbose=False),
+        "hybrid": lambda case: hybrid.generate_hybrid_question(case, num_blanks, verbose=False),
+    }
+
+    context_file = str(GENAI_DIR / CONTEXT_FILE)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if "rag_validated" in names:
+            import genai_ollama_client_with_rag_validated as single
+            rag = single.OllamaRAGClient(base_url, QUALITY_MODEL, context_file)
+            strategies["rag_validated"] = lambda case: rag.generate_validated_question(case, verbose=False)
+        if "multi_blank" in names:
+            import genai_ollama_client_with_rag_validated_multi_blank as multi
+            rag_multi = multi.OllamaRAGClient(base_url, QUALITY_MODEL, context_file)
+            strategies["multi_blank"] = lambda case: rag_multi.generate_validated_multi_blank_question(
+                case, num_blanks=num_blanks, verbose=False)
+
+    return {name: strategies[name] for name in names}
+
+
+def run_case(generate: Callable[[str], Optional[Dict]], case: str, retries: int,
+             recorder: CallRecorder, show_output: bool = False) -> Dict:
+    """Generate one question (retrying failures) and collect its timings."""
+    first_call = len(recorder.calls)
+    start = time.perf_counter()
+    question, attempts, error = None, 0, None
+    while attempts <= retries and not question:
+        attempts += 1
+        output = contextlib.nullcontext() if show_output else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with output:
+                question = generate(case)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    end = time.perf_counter()
+
+    calls = recorder.calls[first_call:]
+    streamed = [call for call in calls if call['first'] is not None]
+    tokens = sum(math.ceil(call['chars'] / AVG_CHARS_PER_TOKEN) for call in streamed)
+    generating = sum(call['end'] - call['first'] for call in streamed)
+    if streamed:
+        ttft = streamed[0]['first'] - start
+    else:
+        ttft = end - start if question else None
+
+    return {
+        'case': case,
+        'success': bool(question),
+        'latency_s': round(end - start, 4),
+        'ttft_s': round(ttft, 4) if ttft is not None else None,
+        'tokens': tokens,
+        'tokens_per_s': round(tokens / generating, 1) if generating > 0 else None,
+        'retries': attempts - 1,
+        'model_calls': len(calls),
+        'error': error,
+    }
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Linear-interpolated percentile (pct in 0..100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(cases: List[Dict]) -> Dict:
+    latencies = [c['latency_s'] for c in cases]
+    ttfts = [c['ttft_s'] for c in cases if c['ttft_s'] is not None]
+    rates = [c['tokens_per_s'] for c in cases if c['tokens_per_s'] is not None]
+
+    def rounded(value):
+        return round(value, 4) if value is not None else None
+
+    return {
+        'cases': len(cases),
+        'success_rate': round(sum(c['success'] for c in cases) / len(cases), 4) if cases else 0.0,
+        'retries': sum(c['retries'] for c in cases),
+        'model_calls': sum(c['model_calls'] for c in cases),
+        'latency_mean_s': rounded(sum(latencies) / len(latencies)) if latencies else None,
+        **{f'latency_p{p}_s': rounded(percentile(latencies, p)) for p in (50, 95, 99)},
+        **{f'ttft_p{p}_s': rounded(percentile(ttfts, p)) for p in (50, 95, 99)},
+        'tokens_per_s': round(sum(rates) / len(rates), 1) if rates else None,
+    }
+
+
+def write_markdown(report: Dict, path: str):
+    def cell(value, fmt="{:.2f}"):
+        return "-" if value is None else fmt.format(value)
+
+    meta = report['meta']
+    lines = [
+        "# Generation Benchmark",
+        "",
+        f"- Server: {meta['server']}",
+        f"- Cases: {meta['cases']} (TestDataset.get_all_cases), retries per case: {meta['retries']}",
+        f"- Run: {meta['timestamp']}",
+        "",
+        "| Strategy | Success | Retries | p50 (s) | p95 (s) | p99 (s) | TTFT p50 (s) | TTFT p95 (s) | Tokens/s |",
+        "|---|---|---|---|---|---|---|---|---|",
+    ]
+    for name, data in report['strategies'].items():
+        s = data['summary']
+        lines.append(
+            f"| {name} | {s['success_rate']:.0%} | {s['retries']} | {cell(s['latency_p50_s'])} | "
+            f"{cell(s['latency_p95_s'])} | {cell(s['latency_p99_s'])} | {cell(s['ttft_p50_s'])} | "
+            f"{cell(s['ttft_p95_s'])} | {cell(s['tokens_per_s'], '{:.0f}')} |"
+        )
+    failures = [(name, c) for name, data in report['strategies'].items()
+                for c in data['cases'] if not c['success']]
+    if failures:
+        lines += ["", "## Failed cases", ""]
+        lines += [f"- {name}: {c['case']}" + (f" ({c['error']})" if c['error'] else "")
+                  for name, c in failures]
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def compare_to_baseline(report: Dict, baseline_file: str, tolerance: float) -> List[str]:
+    """Regressions against an earlier JSON report (empty list = none)."""
+    baseline = json.loads(Path(baseline_file).read_text(encoding="utf-8"))
+    regressions = []
+    for name, data in report['strategies'].items():
+        old = baseline.get('strategies', {}).get(name, {}).get('summary')
+        if not old:
+            continue
+        new = data['summary']
+        if new['success_rate'] < old['success_rate']:
+            regressions.append(f"{name}: success rate {old['success_rate']:.0%} → {new['success_rate']:.0%}")
+        if old['latency_p95_s'] and new['latency_p95_s'] and \
+                new['latency_p95_s'] > old['latency_p95_s'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 latency {old['latency_p95_s']:.2f}s → {new['latency_p95_s']:.2f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency/throughput benchmark for all generation strategies")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--cases", type=int, help="Only the first N test cases")
+    parser.add_argument("--blanks", type=int, default=3, help="Blanks per question (default: 3)")
+    parser.add_argument("--retries", type=int, default=1, help="Retries after a failed generation (default: 1)")
+    parser.add_argument("--url", help="Benchmark a real Ollama host instead of the fake server")
+    parser.add_argument("--capacity", type=int, default=2,
+                        help="Fake server: models resident at once (default: 2)")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="Fake server: fraction of unusable responses (default: 0)")
+    parser.add_argument("--json", default=DEFAULT_JSON, help=f"JSON report (default: {DEFAULT_JSON})")
+    parser.add_argument("--markdown", default=DEFAULT_MARKDOWN,
+                        help=f"Markdown report (default: {DEFAULT_MARKDOWN})")
+    parser.add_argument("--baseline", help="Earlier JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed p95 latency growth vs baseline (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--show-output", action="store_true", help="Show the strategies' own output")
+    args = parser.parse_args()
+
+    from midterm_project_starter import TestDataset
+    cases = TestDataset.get_all_cases()[:args.cases]
+
+    server = None
+    if args.url:
+        base_url = args.url
+    else:
+        from fake_ollama import FakeOllama
+        server = FakeOllama(capacity=args.capacity, fail_rate=args.fail_rate, seed=0).start()
+        base_url = server.url
+
+    print(f"{'='*60}")
+    print("⏱️  Generation Benchmark")
+    print(f"{'='*60}")
+    print(f"Server: {base_url}{' (fake)' if server else ''}")
+    print(f"Cases: {len(cases)}, strategies: {', '.join(args.strategies)}\n")
+
+    report = {
+        'meta': {'server': 'fake' if server else base_url, 'cases': len(cases),
+                 'retries': args.retries, 'blanks': args.blanks,
+                 'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S")},
+        'strategies': {},
+    }
+    try:
+        strategies = build_strategies(args.strategies, base_url, args.blanks)
+        with CallRecorder() as recorder:
+            for name, generate in strategies.items():
+                results = [run_case(generate, case, args.retries, recorder, args.show_output)
+                           for case in cases]
+                summary = summarize(results)
+                report['strategies'][name] = {'summary': summary, 'cases': results}
+                print(f"  {name:<14} success {summary['success_rate']:>4.0%}  "
+                      f"p50 {summary['latency_p50_s']:.2f}s  p95 {summary['latency_p95_s']:.2f}s  "
+                      f"TTFT p50 {summary['ttft_p50_s'] or 0:.2f}s")
+    finally:
+        if server:
+            server.stop()
+
+    Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    write_markdown(report, args.markdown)
+    print(f"\n📄 Reports: {args.json}, {args.markdown}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, args.baseline, args.tolerance)
+        print(f"\n{'='*60}")
+        if regressions:
+            print("❌ Regressions against baseline:")
+            for line in regressions:
+                print(f"  - {line}")
+        else:
+            print("✅ No regressions against baseline")
+        print(f"{'='*60}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
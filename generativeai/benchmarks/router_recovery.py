@@ -0,0 +1,113 @@
+"""
+Router Benchmark - Recovery of Paths over the SLO
+-------------------------------------------------
+Simulates routed requests for one topic (no Ollama needed) and checks
+that a path whose latency estimate went over the SLO comes back once it
+is fast again:
+
+- hybrid spike: hybrid is the cheapest reliable path (20s), then one
+  request takes 90s and pushes its latency EWMA over the 30s SLO
+- fast 14b: the 1.5b paths fail validation and the full path, assumed
+  to take 70s, actually answers in 20s
+
+Only exploration can retry a path over the SLO, so each scenario counts
+the requests until normal routing picks the path again.
+
+Fails (exit code 1) when a path does not recover within --requests.
+
+Usage:
+    python benchmarks/router_recovery.py
+    python benchmarks/router_recovery.py --seed 7 --requests 500
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import Optional
+
+GENAI_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(GENAI_DIR))
+
+from question_engine.router import (
+    ModelRouter, DEFAULT_SLO, DETERMINISTIC, HYBRID, FULL, TEMPLATE, MODEL_PATHS,
+)
+
+TOPIC = "L3_01"
+AVAILABLE = MODEL_PATHS + (TEMPLATE,)
+NORMAL_REASON = "cheapest path meeting quality target"
+
+
+def run_scenario(name: str, path: str, outcomes: dict, seed: int, requests: int,
+                 warmup: int = 0, spike: Optional[float] = None) -> dict:
+    """
+    outcomes: path -> (success, latency) of every simulated request.
+    Returns the requests until `path` is routed normally again.
+    """
+    router = ModelRouter(rng=random.Random(seed))
+
+    def serve(decision):
+        success, latency = outcomes.get(decision.path, (True, 0.1))
+        router.record(decision, success, latency)
+        return latency
+
+    for _ in range(warmup):
+        serve(router.choose(TOPIC, AVAILABLE))
+    if spike is not None:
+        decision = router.choose(TOPIC, AVAILABLE)
+        decision.path = path
+        router.record(decision, True, spike)
+
+    pushed_out = router._expected_latency(TOPIC, path)
+    recovered_after, over_slo = None, 0
+    for i in range(1, requests + 1):
+        decision = router.choose(TOPIC, AVAILABLE)
+        if decision.path == path and decision.reason == NORMAL_REASON:
+            recovered_after = i
+            break
+        if serve(decision) > DEFAULT_SLO:
+            over_slo += 1
+
+    return {'name': name, 'path': path, 'pushed_out': pushed_out,
+            'recovered_after': recovered_after, 'over_slo': over_slo,
+            'latency': router._expected_latency(TOPIC, path)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recovery benchmark for ModelRouter")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--requests", type=int, default=300,
+                        help="Requests allowed for a path to come back (default: 300)")
+    args = parser.parse_args()
+
+    results = [
+        run_scenario("hybrid spike", HYBRID,
+                     {DETERMINISTIC: (False, 8.0), HYBRID: (True, 20.0), FULL: (True, 70.0)},
+                     args.seed, args.requests, warmup=30, spike=90.0),
+        run_scenario("fast 14b", FULL,
+                     {DETERMINISTIC: (False, 8.0), HYBRID: (False, 20.0), FULL: (True, 20.0)},
+                     args.seed, args.requests),
+    ]
+
+    print(f"{'='*60}")
+    print(f"🧭 Router Recovery Benchmark (SLO {DEFAULT_SLO:.0f}s)")
+    print(f"{'='*60}")
+    ok = True
+    for r in results:
+        print(f"\n{r['name']}: {r['path']} estimated at {r['pushed_out']:.1f}s")
+        if r['recovered_after'] is None:
+            ok = False
+            print(f"  ❌ Not routed again within {args.requests} requests "
+                  f"(estimate now {r['latency']:.1f}s)")
+        else:
+            print(f"  ✅ Routed again after {r['recovered_after']} requests "
+                  f"(estimate {r['latency']:.1f}s, {r['over_slo']} requests over the SLO meanwhile)")
+
+    print(f"\n{'='*60}")
+    print("✅ Paths over the SLO recover" if ok else "❌ A path stayed excluded")
+    print(f"{'='*60}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Scheduler Benchmark - Model Swaps on a Shared Host
+--------------------------------------------------
+Replays a mixed workload against the fake Ollama server (simulated load
+times, one model fits in memory) twice:
+
+- fifo: requests served in arrival order, as when every component calls
+  Ollama directly
+- scheduled: requests go through ModelScheduler
+
+Workload: a background question bank refill alternating between
+qwen2.5:14b and llama3.1:8b, while a student's interactive qwen2.5:1.5b
+requests arrive every --interval seconds.
+
+Fails (exit code 1) when the scheduler needs more model loads than
+FIFO or makes the student wait longer on average.
+
+Usage:
+    python benchmarks/scheduler_swaps.py
+    python benchmarks/scheduler_swaps.py --background 20 --interactive 8
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+GENAI_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(GENAI_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_ollama import FakeOllama
+from question_engine.residency import ModelResidency
+from question_engine.scheduler import ModelScheduler, INTERACTIVE, BACKGROUND
+
+BACKGROUND_MODELS = ("qwen2.5:14b", "llama3.1:8b")
+INTERACTIVE_MODEL = "qwen2.5:1.5b"
+PROMPT = "Write a simple, complete C++ code example for: vector basics"
+
+
+class FifoScheduler(ModelScheduler):
+    """Baseline: arrival order, no batching."""
+
+    def next_job(self, now=None):
+        jobs = [job for queue in self._queues.values() for job in queue if not job.cancelled()]
+        return min(jobs, key=lambda job: job.seq) if jobs else None
+
+
+def run_workload(scheduler_class, background: int, interactive: int, interval: float) -> dict:
+    server = FakeOllama(capacity=1).start()
+    try:
+        residency = ModelResidency(server.url, poll_interval=0.0)
+        scheduler = scheduler_class(server.url, residency=residency)
+        start = time.perf_counter()
+
+        jobs = [scheduler.submit(PROMPT, BACKGROUND_MODELS[i % 2], priority=BACKGROUND)
+                for i in range(background)]
+
+        def student():
+            for _ in range(interactive):
+                jobs.append(scheduler.submit(PROMPT, INTERACTIVE_MODEL, priority=INTERACTIVE))
+                time.sleep(interval)
+
+        thread = threading.Thread(target=student)
+        thread.start()
+        thread.join()
+        scheduler.close(wait=True)
+        failed = sum(1 for job in jobs if not job.result())
+
+        report = scheduler.metrics()
+        report['loads'] = server.loads
+        report['failed'] = failed
+        report['wall_s'] = round(time.perf_counter() - start, 2)
+        return report
+    finally:
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model swap benchmark for ModelScheduler")
+    parser.add_argument("--background", type=int, default=12, help="Background refill requests")
+    parser.add_argument("--interactive", type=int, default=6, help="Student requests")
+    parser.add_argument("--interval", type=float, default=0.4,
+                        help="Seconds between student requests (default: 0.4)")
+    args = parser.parse_args()
+
+    results = {}
+    for name, scheduler_class in (("fifo", FifoScheduler), ("scheduled", ModelScheduler)):
+        results[name] = run_workload(scheduler_class, args.background, args.interactive, args.interval)
+
+    print(f"{'='*60}")
+    print("🗂️  Model Swap Benchmark (fake Ollama, 1 model in memory)")
+    print(f"{'='*60}")
+    for name, report in results.items():
+        student = report['waits'].get('interactive', {})
+        print(f"\n{name}:")
+        print(f"  Model loads: {report['loads']} (swaps: {report['swaps']})")
+        print(f"  Wall time: {report['wall_s']:.2f}s, failed: {report['failed']}")
+        print(f"  Student wait: avg {student.get('avg_wait_s', 0):.2f}s, "
+              f"max {student.get('max_wait_s', 0):.2f}s")
+
+    fifo, scheduled = results['fifo'], results['scheduled']
+    ok = (scheduled['loads'] <= fifo['loads']
+          and scheduled['failed'] == 0
+          and scheduled['waits']['interactive']['avg_wait_s'] <= fifo['waits']['interactive']['avg_wait_s'])
+    print(f"\n{'='*60}")
+    print("✅ Scheduler beats arrival order" if ok else "❌ Scheduler regression")
+    print(f"{'='*60}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Startup Benchmark - Cold Start to First Prompt
+-----------------------------------------------
+Launches each quiz CLI in a fresh interpreter with `python -X importtime`,
+waits until its first interactive prompt appears and then kills it.
+
+Fails (exit code 1) when:
+- the time to first prompt exceeds the budget, or
+- a heavy module (requests, numpy, ...) was imported before the first prompt
+
+Usage:
+    python benchmarks/startup_importtime.py
+    python benchmarks/startup_importtime.py --budget-ms 400 --runs 5
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+GENAI_DIR = Path(__file__).resolve().parent.parent
+
+# (script relative to generativeai/, arguments, text of the first prompt)
+# Prefetch is off so background generation (which imports requests on its
+# worker thread) cannot race the heavy-module check
+ENTRY_POINTS = [
+    ("quiz_apps/quiz_app_1_5b_variations.py", ["--no-prefetch"], "Select topic"),
+    ("quiz_apps/quiz_app_14b_variations.py", ["--no-prefetch"], "Select topic"),
+    ("quiz_apps/quiz_app_templates.py", ["--questions", "1"], "Press Enter to start"),
+    ("genai_ollama_client_with_rag_validated_multi_blank.py", ["--help"], "usage:"),
+]
+
+# Modules that must only be imported once a question is actually generated
+HEAVY_MODULES = ("requests", "urllib3", "charset_normalizer", "numpy")
+
+DEFAULT_BUDGET_MS = 500
+DEFAULT_RUNS = 3
+PROMPT_TIMEOUT = 30
+
+
+def _drain(stream, chunks: List[bytes]):
+    """Read a pipe until EOF (runs in a thread so the child never blocks)."""
+    for chunk in iter(lambda: stream.read1(4096), b""):
+        chunks.append(chunk)
+
+
+def run_to_first_prompt(script: str, args: List[str], marker: str,
+                        timeout: float = PROMPT_TIMEOUT) -> Tuple[Optional[float], str]:
+    """
+    Start a CLI and measure the wall time until `marker` appears on stdout.
+
+    Returns:
+        (seconds or None if the prompt never appeared, importtime stderr)
+    """
+    cmd = [sys.executable, "-X", "importtime", "-u", str(GENAI_DIR / script)] + args
+    out_chunks, err_chunks = [], []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # A scratch cwd keeps progress files out of the repository
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=workdir, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        readers = [
+            threading.Thread(target=_drain, args=(proc.stdout, out_chunks), daemon=True),
+            threading.Thread(target=_drain, args=(proc.stderr, err_chunks), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        elapsed = None
+        needle = marker.encode("utf-8")
+        while time.perf_counter() - start < timeout:
+            if needle in b"".join(out_chunks):
+                elapsed = time.perf_counter() - start
+                break
+            if proc.poll() is not None and not readers[0].is_alive():
+                break
+            time.sleep(0.002)
+
+        # The CLI is now blocked on input(), so every import it did is on stderr
+        proc.kill()
+        proc.wait()
+        for reader in readers:
+            reader.join(timeout=5)
+
+    return elapsed, b"".join(err_chunks).decode("utf-8", errors="replace")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Parse `-X importtime` output into {module, self_us, cumulative_us, depth}."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        module = name.strip()
+        imports.append({
+            'module': module,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(name) - len(name.lstrip())) // 2,
+        })
+    return imports
+
+
+def benchmark_entry_point(script: str, args: List[str], marker: str, runs: int) -> Dict:
+    """Run one entry point `runs` times and keep the fastest run."""
+    best_time, best_imports = None, []
+    for _ in range(runs):
+        elapsed, stderr = run_to_first_prompt(script, args, marker)
+        if elapsed is None:
+            return {'script': script, 'time': None, 'imports': parse_importtime(stderr), 'heavy': []}
+        if best_time is None or elapsed < best_time:
+            best_time, best_imports = elapsed, parse_importtime(stderr)
+
+    heavy = sorted({imp['module'] for imp in best_imports
+                    if imp['module'].split('.')[0] in HEAVY_MODULES})
+    return {'script': script, 'time': best_time, 'imports': best_imports, 'heavy': heavy}
+
+
+def print_report(result: Dict, budget_ms: float, top: int = 5) -> bool:
+    """Print one entry point's result and return True if it passed."""
+    print(f"\n📦 {result['script']}")
+
+    if result['time'] is None:
+        print("   ❌ First prompt never appeared")
+        return False
+
+    elapsed_ms = result['time'] * 1000
+    import_ms = sum(imp['self_us'] for imp in result['imports']) / 1000
+    print(f"   ⏱️  First prompt: {elapsed_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    print(f"   📥 Imports: {len(result['imports'])} modules, {import_ms:.0f} ms")
+
+    top_level = [imp for imp in result['imports'] if imp['depth'] == 0]
+    top_level.sort(key=lambda imp: imp['cumulative_us'], reverse=True)
+    for imp in top_level[:top]:
+        print(f"      {imp['cumulative_us'] / 1000:7.1f} ms  {imp['module']}")
+
+    passed = True
+    if elapsed_ms > budget_ms:
+        print(f"   ❌ Over budget by {elapsed_ms - budget_ms:.0f} ms")
+        passed = False
+    if result['heavy']:
+        print(f"   ❌ Heavy modules imported before first prompt: {', '.join(result['heavy'])}")
+        passed = False
+    if passed:
+        print("   ✅ OK")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Cold start to first prompt benchmark for the quiz CLIs'
+    )
+    parser.add_argument('--budget-ms', type=float,
+                        default=float(os.environ.get('STARTUP_BUDGET_MS', DEFAULT_BUDGET_MS)),
+                        help=f'Maximum time to first prompt (default: {DEFAULT_BUDGET_MS})')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS,
+                        help=f'Runs per entry point, fastest is kept (default: {DEFAULT_RUNS})')
+    args = parser.parse_args()
+
+    print("="*60)
+    print("🚀 Startup Benchmark (python -X importtime)")
+    print("="*60)
+
+    all_passed = True
+    for script, script_args, marker in ENTRY_POINTS:
+        result = benchmark_entry_point(script, script_args, marker, args.runs)
+        all_passed &= print_report(result, args.budget_ms)
+
+    print("\n" + "="*60)
+    print("✅ All entry points within budget" if all_passed else "❌ Startup regression detected")
+    print("="*60)
+    sys.exit(0 if all_passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,13 @@ Used for generating progressive fill-in-the-blank questions.
 
 import sys
 import io
-from typing import List, Dict
+from types import MappingProxyType
+from typing import TYPE_CHECKING, List, Dict, Mapping, Optional, Sequence, Tuple
 from dataclasses import dataclass
 
+if TYPE_CHECKING:
+    from curriculum.prerequisite_graph import PrerequisiteGraph
+
 # Note: Encoding wrapper is handled by the main application
 # to avoid double-wrapping issues
 
@@ -17,6 +21,8 @@ from dataclasses import dataclass
 @dataclass
 class Topic:
     """Represents a curriculum topic"""
+    __slots__ = ('id', 'name', 'description', 'difficulty', 'prerequisites', 'examples')
+
     id: str
     name: str
     description: str
@@ -671,31 +677,17 @@ class CppCurriculum:
         ),
     ]
 
-    @classmethod
-    def get_all_topics(cls) -> List[Topic]:
-        """Get all curriculum topics"""
-        return (
-            cls.LEVEL_1_BASICS +
-            cls.LEVEL_2_CONTROL +
-            cls.LEVEL_3_LOOPS +
-            cls.LEVEL_4_FUNCTIONS +
-            cls.LEVEL_5_ARRAYS +
-            cls.LEVEL_6_STRINGS +
-            cls.LEVEL_7_VECTORS +
-            cls.LEVEL_8_CLASSES +
-            cls.LEVEL_9_CONTAINERS +
-            cls.LEVEL_10_ADVANCED
-        )
-
-    @classmethod
-    def get_by_difficulty(cls, difficulty: int) -> List[Topic]:
-        """Get topics by difficulty level (1-5)"""
-        return [t for t in cls.get_all_topics() if t.difficulty == difficulty]
+    # Lookup indexes, built once by _build_indexes() (read-only)
+    _LEVELS: Tuple[Tuple[Topic, ...], ...] = ()
+    _ALL_TOPICS: Tuple[Topic, ...] = ()
+    _BY_ID: Mapping[str, Topic] = MappingProxyType({})
+    _BY_DIFFICULTY: Mapping[int, Tuple[Topic, ...]] = MappingProxyType({})
+    _PREREQUISITES: Optional['PrerequisiteGraph'] = None
 
     @classmethod
-    def get_by_level(cls, level: int) -> List[Topic]:
-        """Get topics by curriculum level (1-10)"""
-        levels = [
+    def _build_indexes(cls):
+        """Precompute id, difficulty and level lookups over all topics."""
+        levels = (
             cls.LEVEL_1_BASICS,
             cls.LEVEL_2_CONTROL,
             cls.LEVEL_3_LOOPS,
@@ -706,18 +698,49 @@ class CppCurriculum:
             cls.LEVEL_8_CLASSES,
             cls.LEVEL_9_CONTAINERS,
             cls.LEVEL_10_ADVANCED,
-        ]
-        if 1 <= level <= 10:
-            return levels[level - 1]
-        return []
+        )
+        cls._LEVELS = tuple(tuple(level) for level in levels)
+        cls._ALL_TOPICS = tuple(topic for level in cls._LEVELS for topic in level)
+
+        by_id = {}
+        by_difficulty = {}
+        for topic in cls._ALL_TOPICS:
+            # First definition wins, matching the old linear scan
+            by_id.setdefault(topic.id, topic)
+            by_difficulty.setdefault(topic.difficulty, []).append(topic)
+
+        cls._BY_ID = MappingProxyType(by_id)
+        cls._BY_DIFFICULTY = MappingProxyType({d: tuple(ts) for d, ts in by_difficulty.items()})
 
     @classmethod
-    def get_topic_by_id(cls, topic_id: str) -> Topic:
+    def get_prerequisite_graph(cls) -> 'PrerequisiteGraph':
+        """Compiled prerequisite DAG for unlock checks (built on first use)"""
+        if cls._PREREQUISITES is None:
+            from curriculum.prerequisite_graph import PrerequisiteGraph
+            cls._PREREQUISITES = PrerequisiteGraph(cls._ALL_TOPICS)
+        return cls._PREREQUISITES
+
+    @classmethod
+    def get_all_topics(cls) -> Sequence[Topic]:
+        """Get all curriculum topics"""
+        return cls._ALL_TOPICS
+
+    @classmethod
+    def get_by_difficulty(cls, difficulty: int) -> Sequence[Topic]:
+        """Get topics by difficulty level (1-5)"""
+        return cls._BY_DIFFICULTY.get(difficulty, ())
+
+    @classmethod
+    def get_by_level(cls, level: int) -> Sequence[Topic]:
+        """Get topics by curriculum level (1-10)"""
+        if 1 <= level <= len(cls._LEVELS):
+            return cls._LEVELS[level - 1]
+        return ()
+
+    @classmethod
+    def get_topic_by_id(cls, topic_id: str) -> Optional[Topic]:
         """Get specific topic by ID"""
-        for topic in cls.get_all_topics():
-            if topic.id == topic_id:
-                return topic
-        return None
+        return cls._BY_ID.get(topic_id)
 
     @classmethod
     def get_learning_path(cls, start_level: int = 1, end_level: int = 10) -> List[Topic]:
@@ -759,6 +782,9 @@ class CppCurriculum:
                 print(f"      Examples: {len(topic.examples)} variations")
 
 
+CppCurriculum._build_indexes()
+
+
 def main():
     """Demo curriculum"""
     curriculum = CppCurriculum()
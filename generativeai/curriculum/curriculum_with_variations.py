@@ -7,10 +7,14 @@ Students must complete minimum difficulty before advancing.
 
 import sys
 import io
-from typing import List, Dict
+from types import MappingProxyType
+from typing import TYPE_CHECKING, List, Dict, Mapping, Optional, Sequence, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+if TYPE_CHECKING:
+    from curriculum.prerequisite_graph import PrerequisiteGraph
+
 # Note: Encoding wrapper is handled by the main application
 # to avoid double-wrapping issues
 
@@ -26,6 +30,8 @@ class DifficultyLevel(Enum):
 @dataclass
 class SpecificationVariation:
     """A specific way to ask for a programming task"""
+    __slots__ = ('difficulty', 'specification', 'description', 'min_score')
+
     difficulty: DifficultyLevel
     specification: str
     description: str
@@ -35,6 +41,9 @@ class SpecificationVariation:
 @dataclass
 class TopicWithVariations:
     """Enhanced topic with multiple difficulty variations"""
+    __slots__ = ('id', 'name', 'description', 'base_difficulty', 'prerequisites', 'variations',
+                 '_by_difficulty')
+
     id: str
     name: str
     description: str
@@ -42,9 +51,16 @@ class TopicWithVariations:
     prerequisites: List[str]
     variations: List[SpecificationVariation]
 
-    def get_variations_by_difficulty(self, level: DifficultyLevel) -> List[SpecificationVariation]:
+    def __post_init__(self):
+        # Variations grouped by difficulty once, in definition order
+        by_difficulty = {}
+        for variation in self.variations:
+            by_difficulty.setdefault(variation.difficulty, []).append(variation)
+        self._by_difficulty = {level: tuple(vs) for level, vs in by_difficulty.items()}
+
+    def get_variations_by_difficulty(self, level: DifficultyLevel) -> Sequence[SpecificationVariation]:
         """Get all variations for a specific difficulty level"""
-        return [v for v in self.variations if v.difficulty == level]
+        return self._by_difficulty.get(level, ())
 
 
 class EnhancedCurriculum:
@@ -271,22 +287,61 @@ class EnhancedCurriculum:
         ),
     ]
 
+    # Lookup indexes, built once by _build_indexes() (read-only)
+    _ALL_TOPICS: Tuple[TopicWithVariations, ...] = ()
+    _BY_ID: Mapping[str, TopicWithVariations] = MappingProxyType({})
+    _VARIATIONS: Mapping[Tuple[str, DifficultyLevel], Tuple[SpecificationVariation, ...]] = MappingProxyType({})
+    _PREREQUISITES: Optional['PrerequisiteGraph'] = None
+
     @classmethod
-    def get_all_topics(cls) -> List[TopicWithVariations]:
-        """Get all topics with variations"""
-        return (
+    def _build_indexes(cls):
+        """Precompute topic and (topic, difficulty) -> variations lookups."""
+        cls._ALL_TOPICS = tuple(
             cls.LEVEL_1_BASICS +
             cls.LEVEL_3_LOOPS +
             cls.LEVEL_7_VECTORS
         )
 
+        by_id = {}
+        variations = {}
+        for topic in cls._ALL_TOPICS:
+            by_id.setdefault(topic.id, topic)
+            for level in DifficultyLevel:
+                level_variations = topic.get_variations_by_difficulty(level)
+                if level_variations:
+                    variations.setdefault((topic.id, level), level_variations)
+
+        cls._BY_ID = MappingProxyType(by_id)
+        cls._VARIATIONS = MappingProxyType(variations)
+
     @classmethod
-    def get_topic_by_id(cls, topic_id: str) -> TopicWithVariations:
+    def get_prerequisite_graph(cls) -> 'PrerequisiteGraph':
+        """
+        Compiled prerequisite DAG for unlock checks (built on first use).
+
+        Prerequisites outside this curriculum are resolved through the full
+        CppCurriculum, e.g. L7_01 -> L5_01 -> L1_03.
+        """
+        if cls._PREREQUISITES is None:
+            from curriculum.cpp_curriculum_progression import CppCurriculum
+            from curriculum.prerequisite_graph import PrerequisiteGraph
+            cls._PREREQUISITES = PrerequisiteGraph(cls._ALL_TOPICS, reference=CppCurriculum.get_all_topics())
+        return cls._PREREQUISITES
+
+    @classmethod
+    def get_all_topics(cls) -> Sequence[TopicWithVariations]:
+        """Get all topics with variations"""
+        return cls._ALL_TOPICS
+
+    @classmethod
+    def get_topic_by_id(cls, topic_id: str) -> Optional[TopicWithVariations]:
         """Get specific topic by ID"""
-        for topic in cls.get_all_topics():
-            if topic.id == topic_id:
-                return topic
-        return None
+        return cls._BY_ID.get(topic_id)
+
+    @classmethod
+    def get_variations(cls, topic_id: str, level: DifficultyLevel) -> Sequence[SpecificationVariation]:
+        """Get the variations of a topic at one difficulty level"""
+        return cls._VARIATIONS.get((topic_id, level), ())
 
     @classmethod
     def get_variation_count(cls) -> Dict:
@@ -312,6 +367,9 @@ class EnhancedCurriculum:
         return stats
 
 
+EnhancedCurriculum._build_indexes()
+
+
 def main():
     """Demo enhanced curriculum"""
     curriculum = EnhancedCurriculum()
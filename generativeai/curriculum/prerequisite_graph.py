@@ -0,0 +1,200 @@
+"""
+Prerequisite Graph
+------------------
+Compiles topic prerequisites into a DAG with a topological order and
+bitset masks, so the unlock status of every topic is computed in one
+pass and updated incrementally after each completed topic.
+
+Works with any topic objects that have `id` and `prerequisites`
+(Topic and TopicWithVariations).
+"""
+
+import heapq
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+
+class CurriculumCycleError(ValueError):
+    """Raised when topic prerequisites form a cycle."""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__("Prerequisite cycle: " + " -> ".join(cycle))
+
+
+class PrerequisiteGraph:
+    """
+    Compiled prerequisite DAG.
+
+    Bit i of a mask stands for topic `order[i]`. Prerequisites that are not
+    part of `topics` are resolved through `reference` (e.g. the full
+    CppCurriculum) to their nearest ancestors that are; anything still
+    unknown is ignored and listed in `unresolved`.
+    """
+
+    def __init__(self, topics: Sequence, reference: Optional[Sequence] = None):
+        ids = []
+        prerequisites = {}
+        for topic in topics:
+            if topic.id not in prerequisites:
+                ids.append(topic.id)
+                prerequisites[topic.id] = list(topic.prerequisites)
+
+        reference_map = {t.id: list(t.prerequisites) for t in (reference or ())}
+        self.unresolved: Dict[str, List[str]] = {}
+        edges = {
+            topic_id: self._resolve(topic_id, prereqs, prerequisites, reference_map)
+            for topic_id, prereqs in prerequisites.items()
+        }
+
+        self.order: Tuple[str, ...] = self._topological_order(ids, edges)
+        self.index: Dict[str, int] = {topic_id: i for i, topic_id in enumerate(self.order)}
+
+        self._prereq_masks: List[int] = [0] * len(self.order)
+        dependents = [[] for _ in self.order]
+        for topic_id, prereqs in edges.items():
+            i = self.index[topic_id]
+            for prereq in prereqs:
+                j = self.index[prereq]
+                self._prereq_masks[i] |= 1 << j
+                dependents[j].append(i)
+        self._dependents: List[Tuple[int, ...]] = [tuple(d) for d in dependents]
+
+    def _resolve(self, topic_id: str, prereqs: List[str], known: Dict[str, List[str]],
+                 reference: Dict[str, List[str]]) -> List[str]:
+        """Map prerequisites onto topics in this graph (deduplicated, ordered)."""
+        resolved = []
+        seen = set()
+        pending = list(prereqs)
+        while pending:
+            prereq = pending.pop(0)
+            if prereq in seen:
+                continue
+            seen.add(prereq)
+            if prereq in known:
+                if prereq not in resolved:
+                    resolved.append(prereq)
+            elif prereq in reference:
+                pending.extend(reference[prereq])
+            else:
+                self.unresolved.setdefault(topic_id, []).append(prereq)
+        return resolved
+
+    @staticmethod
+    def _topological_order(ids: List[str], edges: Dict[str, List[str]]) -> Tuple[str, ...]:
+        """Kahn's algorithm; ties keep curriculum order. Raises on cycles."""
+        position = {topic_id: i for i, topic_id in enumerate(ids)}
+        remaining = {topic_id: len(edges[topic_id]) for topic_id in ids}
+        dependents = {topic_id: [] for topic_id in ids}
+        for topic_id in ids:
+            for prereq in edges[topic_id]:
+                dependents[prereq].append(topic_id)
+
+        ready = [position[topic_id] for topic_id in ids if remaining[topic_id] == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            topic_id = ids[heapq.heappop(ready)]
+            order.append(topic_id)
+            for dependent in dependents[topic_id]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(ready, position[dependent])
+
+        if len(order) < len(ids):
+            blocked = [topic_id for topic_id in ids if remaining[topic_id] > 0]
+            raise CurriculumCycleError(PrerequisiteGraph._find_cycle(blocked, edges))
+        return tuple(order)
+
+    @staticmethod
+    def _find_cycle(blocked: List[str], edges: Dict[str, List[str]]) -> List[str]:
+        """Follow unresolved prerequisites until a topic repeats."""
+        blocked_set = set(blocked)
+        path = [blocked[0]]
+        while True:
+            nxt = next(p for p in edges[path[-1]] if p in blocked_set)
+            if nxt in path:
+                return path[path.index(nxt):] + [nxt]
+            path.append(nxt)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __contains__(self, topic_id: str) -> bool:
+        return topic_id in self.index
+
+    def mask(self, topic_ids: Iterable[str]) -> int:
+        """Bitset for the given topic IDs (unknown IDs are skipped)."""
+        result = 0
+        for topic_id in topic_ids:
+            i = self.index.get(topic_id)
+            if i is not None:
+                result |= 1 << i
+        return result
+
+    def ids(self, mask: int) -> List[str]:
+        """Topic IDs set in a mask, in topological order."""
+        return [topic_id for i, topic_id in enumerate(self.order) if mask >> i & 1]
+
+    def prerequisites_of(self, topic_id: str) -> List[str]:
+        """Direct prerequisites of a topic within this graph."""
+        return self.ids(self._prereq_masks[self.index[topic_id]])
+
+    def unlocked_mask(self, completed: int) -> int:
+        """All topics whose prerequisites are completed, in one pass."""
+        unlocked = 0
+        for i, prereq_mask in enumerate(self._prereq_masks):
+            if prereq_mask & ~completed == 0:
+                unlocked |= 1 << i
+        return unlocked
+
+    def is_unlocked(self, topic_id: str, completed: int) -> bool:
+        """Check a single topic against a completed mask."""
+        return self._prereq_masks[self.index[topic_id]] & ~completed == 0
+
+
+class UnlockState:
+    """A student's completed and unlocked topic sets for one graph."""
+
+    def __init__(self, graph: PrerequisiteGraph, completed: Iterable[str] = ()):
+        self.graph = graph
+        self.completed = graph.mask(completed)
+        self.unlocked = graph.unlocked_mask(self.completed)
+
+    def complete(self, topic_id: str) -> List[str]:
+        """
+        Mark a topic completed and return the topics it newly unlocks.
+
+        Only the topic's dependents are re-checked.
+        """
+        i = self.graph.index.get(topic_id)
+        if i is None or self.completed >> i & 1:
+            return []
+
+        self.completed |= 1 << i
+        newly_unlocked = []
+        for j in self.graph._dependents[i]:
+            if not self.unlocked >> j & 1 and self.graph._prereq_masks[j] & ~self.completed == 0:
+                self.unlocked |= 1 << j
+                newly_unlocked.append(self.graph.order[j])
+        return newly_unlocked
+
+    def is_unlocked(self, topic_id: str) -> bool:
+        """Check whether a topic is unlocked (unknown topics are)."""
+        i = self.graph.index.get(topic_id)
+        return i is None or bool(self.unlocked >> i & 1)
+
+    def is_completed(self, topic_id: str) -> bool:
+        """Check whether a topic is completed."""
+        i = self.graph.index.get(topic_id)
+        return i is not None and bool(self.completed >> i & 1)
+
+    def missing_prerequisites(self, topic_id: str) -> List[str]:
+        """Prerequisites of a topic that are not completed yet."""
+        i = self.graph.index.get(topic_id)
+        if i is None:
+            return []
+        return self.graph.ids(self.graph._prereq_masks[i] & ~self.completed)
+
+    def unlocked_ids(self) -> Set[str]:
+        """All unlocked topic IDs."""
+        return set(self.graph.ids(self.unlocked))
@@ -8,22 +8,21 @@ This client uses a two-stage approach to ensure consistency:
 Usage: python genai_ollama_client_with_rag_validated.py "Your question here"
 """
 
-import requests
-import json
-import math
+import os
 import time
 import re
-from pathlib import Path
-from typing import List, Dict, Tuple, Optional
-from collections import Counter
+from typing import Dict, Optional
 import sys
-import io
 import argparse
 
-# Fix encoding for Windows console to support emojis
-if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+from question_engine import (
+    ContextParser,
+    RAGRetriever,
+    call_ollama,
+    estimate_tokens,
+    configure_console,
+)
+
 
 # =======================================================
 # 🔧 CONFIGURATION
@@ -33,7 +32,6 @@ GEN_MODEL = "qwen2.5:14b"
 TIMEOUT = 600
 CONTEXT_FILE = "context_with_validation.txt"  # New validation-formatted context
 MODEL_CONTEXT_SIZE = 128_000  # in tokens
-AVG_CHARS_PER_TOKEN = 4.0
 KEEP_ALIVE = "60m"
 
 # RAG Configuration
@@ -42,146 +40,6 @@ MAX_CONTEXT_TOKENS = 30_000    # Maximum tokens for context
 # =======================================================
 
 
-class ContextParser:
-    """Parses context.txt file into structured examples."""
-
-    def __init__(self, filepath: str):
-        self.filepath = filepath
-        self.examples = []
-        self.instructions = ""
-
-    def parse(self):
-        """Parse the context file into examples and instructions."""
-        path = Path(self.filepath)
-        if not path.exists():
-            raise FileNotFoundError(f"Context file not found: {self.filepath}")
-
-        content = path.read_text(encoding="utf-8")
-
-        # Extract instructions section
-        instructions_match = re.search(
-            r'HOW TO CREATE ACCURATE FILL-IN-THE-BLANK QUESTIONS.*?(?=SIMPLE FILL-IN-THE-BLANK EXAMPLES)',
-            content,
-            re.DOTALL
-        )
-        if instructions_match:
-            self.instructions = instructions_match.group(0).strip()
-
-        # Parse individual examples
-        example_pattern = r'------------------\s*Fill-in-the-Blank Question Example ([^(]+)\(([^)]+)\)\s*------------------\s*(.*?)(?=------------------\s*Fill-in-the-Blank Question Example|END OF EXAMPLES|$)'
-
-        matches = re.finditer(example_pattern, content, re.DOTALL)
-
-        for match in matches:
-            example_id = match.group(1).strip()
-            description = match.group(2).strip()
-            full_text = match.group(3).strip()
-
-            # Extract keywords from description and content
-            keywords = self._extract_keywords(description + " " + full_text)
-
-            example = {
-                'id': example_id,
-                'description': description,
-                'text': match.group(0),  # Full example text
-                'keywords': keywords
-            }
-            self.examples.append(example)
-
-        print(f"📚 Parsed {len(self.examples)} examples from context file")
-        return self
-
-    def _extract_keywords(self, text: str) -> List[str]:
-        """Extract important keywords from text."""
-        cpp_keywords = {
-            'int', 'float', 'double', 'char', 'string', 'bool', 'void',
-            'if', 'else', 'for', 'while', 'do', 'switch', 'case', 'break', 'continue',
-            'class', 'struct', 'public', 'private', 'protected',
-            'new', 'delete', 'nullptr', 'NULL',
-            'return', 'cout', 'cin', 'endl', 'namespace', 'using', 'std',
-            'include', 'iostream', 'vector', 'map', 'set', 'list', 'queue', 'stack',
-            'template', 'typename', 'virtual', 'override', 'final',
-            'const', 'static', 'extern', 'inline', 'volatile', 'mutable',
-            'try', 'catch', 'throw', 'exception',
-            'array', 'pointer', 'reference', 'loop', 'function', 'method',
-            'constructor', 'destructor', 'inheritance', 'polymorphism',
-            'operator', 'assignment', 'comparison', 'arithmetic',
-            'fstream', 'ofstream', 'ifstream', 'file',
-            'algorithm', 'sort', 'find', 'reverse', 'swap',
-            'push_back', 'pop_back', 'size', 'empty', 'clear', 'insert', 'erase',
-            'semicolon', 'brace', 'bracket', 'parenthesis'
-        }
-
-        words = re.findall(r'\b\w+\b', text.lower())
-        keywords = [w for w in words if w in cpp_keywords or len(w) > 3]
-        return list(set(keywords))
-
-
-class RAGRetriever:
-    """Retrieves relevant examples using keyword-based similarity."""
-
-    def __init__(self, examples: List[Dict]):
-        self.examples = examples
-
-    def retrieve(self, query: str, top_k: int = 20) -> List[Dict]:
-        """Retrieve top-k most relevant examples for the query."""
-        query_keywords = self._extract_query_keywords(query)
-
-        scored_examples = []
-        for example in self.examples:
-            score = self._calculate_relevance(query_keywords, example['keywords'])
-            scored_examples.append((score, example))
-
-        scored_examples.sort(reverse=True, key=lambda x: x[0])
-        top_examples = [ex for score, ex in scored_examples[:top_k] if score > 0]
-
-        if not top_examples:
-            top_examples = [ex for ex in self.examples if ex['id'].startswith('S')][:top_k]
-
-        return top_examples
-
-    def _extract_query_keywords(self, query: str) -> List[str]:
-        """Extract keywords from query."""
-        patterns = {
-            'for loop': ['for', 'loop', 'iteration'],
-            'while loop': ['while', 'loop'],
-            'if statement': ['if', 'condition', 'conditional'],
-            'function': ['function', 'void', 'return'],
-            'class': ['class', 'object', 'oop'],
-            'array': ['array', 'bracket'],
-            'pointer': ['pointer', 'new', 'delete'],
-            'vector': ['vector', 'push_back', 'size'],
-            'string': ['string', 'text'],
-            'file': ['file', 'fstream', 'ifstream', 'ofstream'],
-            'output': ['cout', 'output', 'print'],
-            'input': ['cin', 'input', 'read'],
-        }
-
-        query_lower = query.lower()
-        keywords = []
-
-        for pattern, kws in patterns.items():
-            if pattern in query_lower:
-                keywords.extend(kws)
-
-        words = re.findall(r'\b\w+\b', query_lower)
-        keywords.extend([w for w in words if len(w) > 3])
-
-        return list(set(keywords))
-
-    def _calculate_relevance(self, query_keywords: List[str], example_keywords: List[str]) -> float:
-        """Calculate relevance score between query and example."""
-        if not query_keywords or not example_keywords:
-            return 0.0
-
-        matches = len(set(query_keywords) & set(example_keywords))
-        total = len(set(query_keywords) | set(example_keywords))
-        jaccard = matches / total if total > 0 else 0
-        score = jaccard * (1 + matches * 0.1)
-
-        return score
-
-
 class QuestionValidator:
     """Validates and creates consistent fill-in-the-blank questions."""
 
@@ -323,7 +181,7 @@ class OllamaRAGClient:
 
     def estimate_tokens(self, text: str) -> int:
         """Rough estimate of token count."""
-        return math.ceil(len(text) / AVG_CHARS_PER_TOKEN)
+        return estimate_tokens(text)
 
     def generate_validated_question(self, question: str, top_k: int = 20, verbose: bool = True) -> Optional[Dict]:
         """Generate a validated fill-in-the-blank question using two-stage approach."""
@@ -414,48 +272,22 @@ Remember:
             print(f"\n🚀 Generating structured output...\n")
 
         start_time = time.time()
-        response_text = ""
-
-        try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": True,
-                "keep_alive": self.keep_alive
-            }
-
-            with requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                stream=True,
-                timeout=TIMEOUT,
-            ) as r:
-                r.raise_for_status()
-
-                for line in r.iter_lines(decode_unicode=True):
-                    if not line or not line.strip():
-                        continue
-
-                    try:
-                        data = json.loads(line)
-
-                        if "response" in data:
-                            chunk = data["response"]
-                            if verbose:
-                                print(chunk, end='', flush=True)
-                            response_text += chunk
-
-                    except json.JSONDecodeError:
-                        continue
-
-        except Exception as e:
-            print(f"\n❌ Error during generation: {e}")
+        response_text = call_ollama(
+            prompt,
+            model=self.model,
+            base_url=self.base_url,
+            keep_alive=self.keep_alive,
+            timeout=TIMEOUT,
+            verbose=verbose,
+            error_prefix="❌ Error during generation"
+        )
+        if response_text is None:
             return None
 
         elapsed_time = time.time() - start_time
 
         if verbose:
-            print(f"\n\n⏱️  Response time: {elapsed_time:.2f}s")
+            print(f"\n⏱️  Response time: {elapsed_time:.2f}s")
 
         # Parse and validate the model output
         if verbose:
@@ -502,6 +334,14 @@ Examples:
 
     args = parser.parse_args()
 
+    # Validate arguments before the (large) context file is parsed
+    if args.examples < 1:
+        parser.error('--examples must be at least 1')
+    if not os.path.isfile(args.context):
+        parser.error(f'context file not found: {args.context}')
+
+    configure_console()
+
     verbose = not args.quiet
 
     if verbose:
@@ -8,23 +8,39 @@ Strategy:
 2. Use 14b for validation and structuring (15s)
 3. Total: 25s vs 70s for 14b alone (64% faster)
 
+With --route, an adaptive router (question_engine/router.py) picks the
+cheapest path per topic instead: 1.5b + deterministic, hybrid, 14b full
+or a pre-written template.
+
+All requests go through one in-process model scheduler
+(question_engine/scheduler.py), so a pipelined batch drains one model
+before switching to the other; --no-scheduler calls Ollama directly.
+
+With --compile-check, generated code must pass `g++ -fsyntax-only`
+(question_engine/compile_check.py) before it becomes a question; in the
+hybrid path this happens before 14b is called, so broken code costs no
+14b time.
+
 Usage: python genai_ollama_hybrid_1_5b_14b.py "Create a for loop example"
+       python genai_ollama_hybrid_1_5b_14b.py "Vector basics" --route --topic-id L3_01
 """
 
-import requests
-import json
+import os
+import random
 import time
-import re
-from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 import sys
-import io
 import argparse
 
-# Fix encoding
-if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+from question_engine import (
+    MultiBlankValidator,
+    call_ollama,
+    create_blank_question,
+    create_deterministic_question,
+    extract_code_block,
+    configure_console,
+)
+
 
 # Configuration
 OLLAMA_URL = "https://unpatented-saylor-nonirate.ngrok-free.dev"
@@ -33,65 +49,70 @@ QUALITY_MODEL = "qwen2.5:14b"  # Validation and structuring
 TIMEOUT = 300
 KEEP_ALIVE = "60m"
 
+ROUTER_STATE_FILE = "router_state.json"
+ROUTER_LOG_FILE = "router_decisions.jsonl"
+COMPILE_CACHE_FILE = "compile_cache.json"
+
+
+def load_code_templates() -> Dict[str, List[str]]:
+    """Pre-written code templates of the template quiz app (loaded on first use)."""
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'quiz_apps'))
+    from quiz_app_templates import CODE_TEMPLATES
+    return CODE_TEMPLATES
+
 
 class HybridQuestionGenerator:
     """
     Hybrid generator using 1.5b for speed and 14b for quality.
     """
 
-    def __init__(self, base_url: str, fast_model: str, quality_model: str):
+    def __init__(self, base_url: str, fast_model: str, quality_model: str, residency=None,
+                 scheduler=None, priority: int = 0, compile_checker=None):
         self.base_url = base_url.rstrip('/')
         self.fast_model = fast_model
         self.quality_model = quality_model
         self.keep_alive = KEEP_ALIVE
+        self.residency = residency  # Optional ModelResidency (swap accounting, warm-up)
+        # Optional shared ModelScheduler; requests then queue with this priority
+        self.scheduler = scheduler
+        self.priority = priority
+        # Optional CompileChecker; code that doesn't compile is rejected
+        self.compile_checker = compile_checker
 
     def call_model(self, model: str, prompt: str, verbose: bool = False) -> Optional[str]:
         """Call Ollama model and return response."""
         if verbose:
             print(f"\n🤖 Calling {model}...")
 
-        start_time = time.time()
-        response_text = ""
-
-        try:
-            payload = {
-                "model": model,
-                "prompt": prompt,
-                "stream": True,
-                "keep_alive": self.keep_alive
-            }
-
-            with requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                stream=True,
-                timeout=TIMEOUT
-            ) as r:
-                r.raise_for_status()
-
-                for line in r.iter_lines(decode_unicode=True):
-                    if not line or not line.strip():
-                        continue
-
-                    try:
-                        data = json.loads(line)
-                        if "response" in data:
-                            chunk = data["response"]
-                            if verbose:
-                                print(chunk, end='', flush=True)
-                            response_text += chunk
-                    except json.JSONDecodeError:
-                        continue
-
-            elapsed = time.time() - start_time
-            if verbose:
-                print(f"\n⏱️  Time: {elapsed:.2f}s")
+        if self.scheduler is not None:
+            # The scheduler does its own residency accounting
+            start_time = time.time()
+            response_text = self.scheduler.call(prompt, model, priority=self.priority, verbose=verbose)
+            if response_text is not None and verbose:
+                print(f"⏱️  Time (including queue): {time.time() - start_time:.2f}s")
+            return response_text
 
-            return response_text.strip()
+        cold = self.residency.before_call(model) if self.residency else False
+        if cold and verbose:
+            print(f"🧊 {model} is not loaded, this call includes the model load")
 
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
-            return None
+        start_time = time.time()
+        response_text = call_ollama(
+            prompt,
+            model=model,
+            base_url=self.base_url,
+            keep_alive=self.keep_alive,
+            timeout=TIMEOUT,
+            verbose=verbose
+        )
+        elapsed = time.time() - start_time
+
+        if self.residency and response_text is not None:
+            self.residency.after_call(model, elapsed, cold)
+        if response_text is not None and verbose:
+            print(f"⏱️  Time: {elapsed:.2f}s")
+
+        return response_text
 
     def generate_code_with_1_5b(self, topic: str, verbose: bool = False) -> Optional[str]:
         """
@@ -117,6 +138,16 @@ Just write the code, nothing else:"""
         code = self.call_model(self.fast_model, prompt, verbose)
         return code
 
+    def code_compiles(self, code: str, verbose: bool = False) -> bool:
+        """True without a compile checker; otherwise whether g++ accepts the code."""
+        if self.compile_checker is None:
+            return True
+        if self.compile_checker.accepts({'code': code}):
+            return True
+        if verbose:
+            print("❌ Generated code does not compile, rejected")
+        return False
+
     def extract_targets_with_14b(
         self,
         code: str,
@@ -178,45 +209,7 @@ Remember:
 
     def parse_targets_response(self, response: str) -> Optional[Dict]:
         """Parse 14b response to extract targets and distractors."""
-        try:
-            # Extract TARGETS
-            targets_match = re.search(r'TARGETS?:\s*(.*?)(?=DISTRACTORS?:|$)', response, re.DOTALL | re.IGNORECASE)
-            if not targets_match:
-                return None
-
-            targets_text = targets_match.group(1)
-            targets = []
-            for line in targets_text.split('\n'):
-                match = re.match(r'\d+\.\s*([^\n]+)', line.strip())
-                if match:
-                    targets.append(match.group(1).strip())
-
-            # Extract DISTRACTORS
-            distractors_match = re.search(r'DISTRACTORS?:\s*(.*?)$', response, re.DOTALL | re.IGNORECASE)
-            if not distractors_match:
-                return None
-
-            distractors_text = distractors_match.group(1)
-            all_distractors = []
-
-            target_sections = re.split(r'For Target \d+:', distractors_text, flags=re.IGNORECASE)
-            for section in target_sections[1:]:
-                target_distractors = []
-                for line in section.split('\n'):
-                    match = re.match(r'\d+\.\s*(.+)', line.strip())
-                    if match:
-                        target_distractors.append(match.group(1).strip())
-                if target_distractors:
-                    all_distractors.append(target_distractors[:3])
-
-            return {
-                'targets': targets,
-                'distractors': all_distractors
-            }
-
-        except Exception as e:
-            print(f"⚠️  Parse error: {e}")
-            return None
+        return MultiBlankValidator.parse_targets_and_distractors(response)
 
     def generate_hybrid_question(
         self,
@@ -246,9 +239,9 @@ Remember:
             return None
 
         # Extract code block if wrapped
-        code_match = re.search(r'```(?:cpp)?\s*(.*?)\s*```', code, re.DOTALL)
-        if code_match:
-            code = code_match.group(1).strip()
+        code = extract_code_block(code)
+        if not self.code_compiles(code, verbose):
+            return None
 
         # Phase 2: Extract targets with 14b (accurate)
         parsed = self.extract_targets_with_14b(code, num_blanks, verbose)
@@ -276,8 +269,6 @@ Remember:
         verbose: bool = False
     ) -> Optional[Dict]:
         """Create validated question from code and parsed targets."""
-        import random
-
         targets = parsed['targets']
         all_distractors = parsed['distractors']
 
@@ -297,38 +288,193 @@ Remember:
             print("❌ No valid targets found in code")
             return None
 
-        # Create question code with numbered blanks
-        question_code = code
-        for i, target in enumerate(validated_targets):
-            blank = f"_____({i+1})_____"
-            question_code = question_code.replace(target, blank, 1)
-
-        # Create sub-questions
-        sub_questions = []
-        for i, (target, distractors) in enumerate(zip(validated_targets, validated_distractors)):
-            options = [target] + distractors
-            random.shuffle(options)
-
-            try:
-                answer_pos = options.index(target) + 1
-            except ValueError:
-                options = [target] + distractors
-                answer_pos = 1
-
-            sub_questions.append({
-                'number': i + 1,
-                'target': target,
-                'options': options,
-                'answer': answer_pos
-            })
-
-        return {
-            'code': code,
-            'question_code': question_code,
-            'sub_questions': sub_questions,
-            'num_blanks': len(validated_targets)
+        return create_blank_question(code, validated_targets, validated_distractors)
+
+    def generate_hybrid_batch(
+        self,
+        topics: List[str],
+        num_blanks: int = 3,
+        queue_size: int = 2,
+        verbose: bool = True
+    ):
+        """
+        Generate several hybrid questions with the two models overlapped:
+        1.5b writes code for question N+1 while 14b extracts targets for
+        question N. The bounded queue between them applies backpressure
+        when 14b falls behind.
+
+        With a residency manager, both models are warmed first. If they
+        don't fit in memory together, interleaving them would reload a
+        model for every question, so the stages run one after the other
+        instead (all code first, then all targets: one swap in total).
+
+        Returns:
+            (list of questions or None, in topic order; the pipeline with
+            its metrics, or None when the stages ran one after the other)
+        """
+        from question_engine.pipeline import TwoStagePipeline
+
+        def write_code(topic: str) -> Optional[str]:
+            code = self.generate_code_with_1_5b(topic)
+            code = extract_code_block(code) if code else None
+            return code if code and self.code_compiles(code) else None
+
+        def add_targets(topic: str, code: str) -> Optional[Dict]:
+            parsed = self.extract_targets_with_14b(code, num_blanks)
+            return self.create_validated_question(code, parsed) if parsed else None
+
+        models = [self.fast_model, self.quality_model]
+        if self.residency:
+            # Fast model last: if only one fits, it is the one the first stage needs
+            self.residency.prepare(reversed(models))
+            if not self.residency.can_hold(models):
+                if verbose:
+                    print("🧠 Models don't fit in memory together, running the stages one after the other")
+                return self._staged_batch(topics, write_code, add_targets, verbose), None
+
+        # Stage output stays quiet: two threads would interleave it
+        pipeline = TwoStagePipeline(write_code, add_targets, queue_size=queue_size,
+                                    names=(f"{self.fast_model} code", f"{self.quality_model} targets"))
+        results = []
+        for i, (topic, question) in enumerate(pipeline.run(topics), 1):
+            if verbose:
+                status = "✅" if question else "❌"
+                print(f"{status} [{i}/{len(topics)}] {topic}")
+            results.append(question)
+        return results, pipeline
+
+    def _staged_batch(self, topics: List[str], write_code, add_targets, verbose: bool) -> List[Optional[Dict]]:
+        """All 1.5b calls, then all 14b calls, so each model is loaded once."""
+        codes = [write_code(topic) for topic in topics]
+        # The fast model isn't needed any more; unload it instead of waiting for eviction
+        self.residency.release(self.fast_model)
+
+        results = []
+        for i, (topic, code) in enumerate(zip(topics, codes), 1):
+            question = add_targets(topic, code) if code else None
+            if verbose:
+                status = "✅" if question else "❌"
+                print(f"{status} [{i}/{len(topics)}] {topic}")
+            results.append(question)
+        return results
+
+    def generate_deterministic_question(self, topic: str, num_blanks: int = 3,
+                                        verbose: bool = False) -> Optional[Dict]:
+        """1.5b generates code, targets and distractors are rule-based."""
+        code = self.generate_code_with_1_5b(topic, verbose)
+        if not code:
+            return None
+        code = extract_code_block(code)
+        if not self.code_compiles(code, verbose):
+            return None
+        return create_deterministic_question(code, num_blanks)
+
+    def generate_full_question(self, topic: str, num_blanks: int = 3,
+                               verbose: bool = False) -> Optional[Dict]:
+        """14b generates code, targets and distractors in one response."""
+        prompt = f"""Create a C++ fill-in-the-blank question for: {topic}
+
+Generate in this EXACT format:
+
+CODE:
+```cpp
+[complete, working C++ code here]
+```
+
+TARGETS (keywords to blank out, exactly {num_blanks}):
+1. [keyword 1]
+2. [keyword 2]
+3. [keyword 3]
+
+DISTRACTORS (3 wrong options for each target):
+For Target 1:
+1. [wrong option 1]
+2. [wrong option 2]
+3. [wrong option 3]
+
+IMPORTANT:
+- Each TARGET must appear EXACTLY in the CODE
+- DISTRACTORS must be similar but wrong
+- Use modern C++ (C++11+)"""
+
+        if verbose:
+            print(f"\n{'='*60}")
+            print(f"🧠 Full Generation (14b)")
+            print(f"{'='*60}")
+
+        response = self.call_model(self.quality_model, prompt, verbose)
+        if not response:
+            return None
+        parsed = MultiBlankValidator.parse_model_output(response)
+        if not parsed or not self.code_compiles(parsed['code'], verbose):
+            return None
+        return MultiBlankValidator.create_validated_multi_blank_question(parsed, verbose=verbose)
+
+    def generate_template_question(self, topic_id: Optional[str], num_blanks: int = 3) -> Optional[Dict]:
+        """Pre-written code for a curriculum topic, no LLM call."""
+        templates = load_code_templates().get(topic_id or "")
+        if not templates:
+            return None
+        return create_deterministic_question(random.choice(templates), num_blanks)
+
+    def generate_routed_question(self, topic: str, router, topic_id: Optional[str] = None,
+                                 num_blanks: int = 3, verbose: bool = True) -> Optional[Dict]:
+        """
+        Let the router pick the generation path for this topic, run it and
+        feed the outcome (validated or not, latency) back into the router.
+        """
+        from question_engine.router import DETERMINISTIC, HYBRID, FULL, TEMPLATE, MODEL_PATHS
+
+        key = topic_id or topic.strip().lower()
+        available = list(MODEL_PATHS)
+        if topic_id and topic_id in load_code_templates():
+            available.append(TEMPLATE)
+
+        runners = {
+            DETERMINISTIC: lambda: self.generate_deterministic_question(topic, num_blanks, verbose),
+            HYBRID: lambda: self.generate_hybrid_question(topic, num_blanks, verbose),
+            FULL: lambda: self.generate_full_question(topic, num_blanks, verbose),
+            TEMPLATE: lambda: self.generate_template_question(topic_id, num_blanks),
         }
 
+        decision = router.choose(key, available)
+        start = time.time()
+        question = runners[decision.path]()
+        router.record(decision, question is not None, time.time() - start)
+
+        if question is None and decision.path != TEMPLATE and TEMPLATE in available:
+            if verbose:
+                print(f"⚠️  {decision.path} path failed, using template")
+            question = self.generate_template_question(topic_id, num_blanks)
+        if question is not None:
+            question['route'] = decision.path
+        return question
+
+
+def print_final_question(result: Dict, topic: Optional[str] = None):
+    """Print a validated question with its answers marked."""
+    print(f"\n{'='*60}")
+    print("✅ FINAL VALIDATED QUESTION" + (f": {topic}" if topic else ""))
+    print(f"{'='*60}")
+    print("\nComplete Code:")
+    print("```cpp")
+    print(result['code'])
+    print("```")
+    print("\nQuestion Code:")
+    print("```cpp")
+    print(result['question_code'])
+    print("```")
+    print(f"\nNumber of Blanks: {result['num_blanks']}")
+    print("\nSub-Questions:")
+    for sq in result['sub_questions']:
+        print(f"\n--- Question {sq['number']} (Fill in blank {sq['number']}) ---")
+        print("Options:")
+        for i, option in enumerate(sq['options'], 1):
+            marker = " ✓ CORRECT" if i == sq['answer'] else ""
+            print(f"  {i}. {option}{marker}")
+        print(f"Answer: {sq['answer']}")
+    print(f"\n{'='*60}")
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -339,13 +485,35 @@ Examples:
   python genai_ollama_hybrid_1_5b_14b.py "Create a for loop"
   python genai_ollama_hybrid_1_5b_14b.py "Vector with push_back" --blanks 3
   python genai_ollama_hybrid_1_5b_14b.py "Class definition" --blanks 5 --quiet
+  python genai_ollama_hybrid_1_5b_14b.py "Vector basics" --route --topic-id L3_01 --slo 20
+  python genai_ollama_hybrid_1_5b_14b.py "For loop" "While loop" "Vector basics" --queue-size 2
+  python genai_ollama_hybrid_1_5b_14b.py "For loop" "While loop" --warm
         """
     )
-    parser.add_argument('topic', type=str, help='The topic/question')
+    parser.add_argument('topic', type=str, nargs='+',
+                        help='The topic/question (several topics run as a pipelined batch)')
     parser.add_argument('--blanks', '-b', type=int, default=3, help='Number of blanks')
     parser.add_argument('--quiet', '-q', action='store_true', help='Quiet mode')
+    parser.add_argument('--queue-size', type=int, default=2,
+                        help='Batch mode: code samples allowed to wait for the 14b stage (default: 2)')
+    parser.add_argument('--route', action='store_true',
+                        help='Let the adaptive router pick the generation path per topic')
+    parser.add_argument('--topic-id', help='Curriculum topic id for routing history and templates (e.g. L3_01)')
+    parser.add_argument('--slo', type=float, default=30.0,
+                        help='Latency SLO in seconds for routed generation (default: 30)')
+    parser.add_argument('--router-state', default=ROUTER_STATE_FILE,
+                        help=f'Router statistics file (default: {ROUTER_STATE_FILE})')
+    parser.add_argument('--router-log', default=ROUTER_LOG_FILE,
+                        help=f'Router decision log, JSON Lines (default: {ROUTER_LOG_FILE})')
+    parser.add_argument('--warm', action='store_true',
+                        help='Pre-warm both models, check residency via /api/ps and report model swaps')
+    parser.add_argument('--compile-check', action='store_true',
+                        help='Reject generated code that does not compile (g++ -fsyntax-only)')
+    parser.add_argument('--no-scheduler', action='store_true',
+                        help='Send requests straight to Ollama instead of through the model scheduler')
 
     args = parser.parse_args()
+    configure_console()
     verbose = not args.quiet
 
     if verbose:
@@ -356,48 +524,93 @@ Examples:
         print(f"Quality Model: {QUALITY_MODEL} (validation)")
         print(f"\nExpected time: ~25s (vs 70s for 14b alone)")
         print(f"Quality:       Very Good (14b validated)\n")
+        if len(args.topic) > 1 and not args.route:
+            print(f"Batch:         {len(args.topic)} topics, 1.5b and 14b stages pipelined\n")
+
+    residency = None
+    if args.warm:
+        from question_engine.residency import ModelResidency
+        residency = ModelResidency(OLLAMA_URL)
+        if len(args.topic) == 1 or args.route:
+            residency.prepare([FAST_MODEL, QUALITY_MODEL])
+
+    compile_checker = None
+    if args.compile_check:
+        from question_engine.compile_check import CompileChecker, compiler_available
+        if compiler_available():
+            compile_checker = CompileChecker(cache_file=COMPILE_CACHE_FILE)
+        else:
+            print("⚠️  g++ not found, --compile-check ignored")
+
+    # One request queue for this process (residency accounting moves into it)
+    scheduler = None
+    if not args.no_scheduler:
+        from question_engine.scheduler import ModelScheduler
+        scheduler = ModelScheduler(OLLAMA_URL, keep_alive=KEEP_ALIVE, timeout=TIMEOUT,
+                                   residency=residency)
 
     # Initialize generator
     generator = HybridQuestionGenerator(
         base_url=OLLAMA_URL,
         fast_model=FAST_MODEL,
-        quality_model=QUALITY_MODEL
+        quality_model=QUALITY_MODEL,
+        residency=residency,
+        scheduler=scheduler,
+        compile_checker=compile_checker
     )
 
-    # Generate question
-    result = generator.generate_hybrid_question(
-        topic=args.topic,
-        num_blanks=args.blanks,
-        verbose=verbose
-    )
+    # Generate questions
+    pipeline = None
+    if args.route:
+        from question_engine.router import ModelRouter
+        router = ModelRouter(slo_seconds=args.slo, state_file=args.router_state,
+                             log_file=args.router_log, verbose=verbose)
+        results = [
+            generator.generate_routed_question(
+                topic=topic,
+                router=router,
+                topic_id=args.topic_id,
+                num_blanks=args.blanks,
+                verbose=verbose
+            )
+            for topic in args.topic
+        ]
+    elif len(args.topic) > 1:
+        results, pipeline = generator.generate_hybrid_batch(
+            topics=args.topic,
+            num_blanks=args.blanks,
+            queue_size=args.queue_size,
+            verbose=verbose
+        )
+    else:
+        results = [generator.generate_hybrid_question(
+            topic=args.topic[0],
+            num_blanks=args.blanks,
+            verbose=verbose
+        )]
+
+    for topic, result in zip(args.topic, results):
+        if not result:
+            if len(args.topic) > 1:
+                print(f"\n❌ No question for: {topic}")
+            continue
+        print_final_question(result, topic if len(args.topic) > 1 else None)
+        if args.route:
+            print(f"🧭 Routed path: {result['route']} (decisions logged to {args.router_log})")
+            print(f"{'='*60}")
 
-    if result:
-        print(f"\n{'='*60}")
-        print("✅ FINAL VALIDATED QUESTION")
-        print(f"{'='*60}")
-        print("\nComplete Code:")
-        print("```cpp")
-        print(result['code'])
-        print("```")
-        print("\nQuestion Code:")
-        print("```cpp")
-        print(result['question_code'])
-        print("```")
-        print(f"\nNumber of Blanks: {result['num_blanks']}")
-        print("\nSub-Questions:")
-        for sq in result['sub_questions']:
-            print(f"\n--- Question {sq['number']} (Fill in blank {sq['number']}) ---")
-            print("Options:")
-            for i, option in enumerate(sq['options'], 1):
-                marker = " ✓ CORRECT" if i == sq['answer'] else ""
-                print(f"  {i}. {option}{marker}")
-            print(f"Answer: {sq['answer']}")
-        print(f"\n{'='*60}")
+    if pipeline is not None:
+        pipeline.print_metrics()
+    elif not args.route and len(args.topic) == 1 and results[0]:
         print("💡 Generation Strategy:")
         print(f"  Phase 1: 1.5b generated code (~10s)")
         print(f"  Phase 2: 14b extracted targets (~15s)")
         print(f"  Result: 64% faster than 14b alone!")
         print(f"{'='*60}")
+    if scheduler is not None and verbose:
+        scheduler.print_metrics()
+    if residency is not None:
+        residency.print_metrics()
 
 
 if __name__ == "__main__":
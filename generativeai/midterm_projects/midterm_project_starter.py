@@ -14,7 +14,10 @@ Due Date: [Date]
 """
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
+import os
+import statistics
 import time
 import json
 import requests
@@ -23,6 +26,12 @@ from enum import Enum
 import sys
 import io
 
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from question_engine.journal import atomic_write_json
+from question_engine.ollama import call_ollama
+from question_engine.quality import evaluate_question, question_hash
+
 # Fix encoding
 if sys.platform == "win32":
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -33,6 +42,7 @@ OLLAMA_URL = "https://unpatented-saylor-nonirate.ngrok-free.dev"
 SMALL_MODEL = "qwen2.5:1.5b"
 LARGE_MODEL = "qwen2.5:14b"
 TIMEOUT = 300
+EVALUATION_CACHE_FILE = "evaluation_cache.json"
 
 
 @dataclass
@@ -75,6 +85,20 @@ class QuestionGenerationStrategy(ABC):
         self.name = name
         self.generation_metrics: List[GenerationMetrics] = []
         self.quality_metrics: List[QualityMetrics] = []
+        # Shared ModelScheduler, set by EvaluationFramework (None = call Ollama directly)
+        self.scheduler = None
+
+    def use_scheduler(self, scheduler):
+        """Send this strategy's model calls through a shared ModelScheduler"""
+        self.scheduler = scheduler
+
+    def call_model(self, prompt: str, model: str) -> Optional[str]:
+        """Call Ollama and return the response text (None on error)"""
+        if self.scheduler is not None:
+            from question_engine.scheduler import BACKGROUND
+            return self.scheduler.call(prompt, model, priority=BACKGROUND,
+                                       base_url=OLLAMA_URL, timeout=TIMEOUT)
+        return call_ollama(prompt, model=model, base_url=OLLAMA_URL, timeout=TIMEOUT)
 
     @abstractmethod
     def generate_question(self, topic: str, num_blanks: int = 3) -> Optional[Dict]:
@@ -201,7 +225,7 @@ For Target 3:
 3. [wrong option 3]
 """
 
-        # TODO: Call Ollama API with this prompt
+        # TODO: Call Ollama API with this prompt (response = self.call_model(prompt, self.model))
         # TODO: Parse response
         # TODO: Create question structure
         # TODO: Calculate metrics
@@ -365,6 +389,11 @@ class Strategy4_SmartFallback(QuestionGenerationStrategy):
         self.fast_strategy = Strategy2_DeterministicHeavy()
         self.fallback_strategy = Strategy3_Hybrid()
 
+    def use_scheduler(self, scheduler):
+        super().use_scheduler(scheduler)
+        self.fast_strategy.use_scheduler(scheduler)
+        self.fallback_strategy.use_scheduler(scheduler)
+
     def check_quality(self, result: Dict) -> float:
         """
         TODO: Implement quality checker
@@ -531,126 +560,340 @@ class EvaluationFramework:
     """
     Comprehensive evaluation framework for comparing strategies.
 
+    - Questions are generated once per (strategy, topic) and reused by
+      the speed, quality and cost experiments.
+    - Quality checks (question_engine.quality) run in a process pool;
+      g++ compile checks dominate and parallelize well.
+    - Quality results are cached by question hash in cache_file, so
+      re-running a comparison only evaluates new questions.
+    - All strategies share one ModelScheduler (in-process), so their
+      1.5b and 14b requests queue in one place instead of each strategy
+      calling Ollama on its own.
+
     TODO for Student 3:
-    1. Implement automated quality assessment
-    2. Run batch experiments
-    3. Statistical analysis
-    4. Visualization
+    1. Statistical analysis (significance of differences)
+    2. Visualization
     """
 
-    def __init__(self, strategies: List[QuestionGenerationStrategy]):
+    def __init__(self, strategies: List[QuestionGenerationStrategy],
+                 workers: Optional[int] = None,
+                 cache_file: Optional[str] = EVALUATION_CACHE_FILE,
+                 num_blanks: int = 3, scheduler=None):
+        """
+        Args:
+            workers: Evaluation processes (default: one per CPU; 1 = no pool)
+            cache_file: JSON file for cached quality results (None = memory only)
+            scheduler: ModelScheduler given to every strategy (default: a new one)
+        """
+        if scheduler is None:
+            from question_engine.scheduler import ModelScheduler
+            scheduler = ModelScheduler(OLLAMA_URL, timeout=TIMEOUT)
+        self.scheduler = scheduler
+        for strategy in strategies:
+            strategy.use_scheduler(scheduler)
         self.strategies = strategies
         self.results = {}
+        self.workers = workers
+        self.cache_file = cache_file
+        self.num_blanks = num_blanks
+        # (strategy name, topic) -> {'question', 'time', 'error'}
+        self.generated: Dict[Tuple[str, str], Dict] = {}
+        self.quality_cache: Dict[str, Dict] = self._load_cache()
+
+    # Generation -----------------------------------------------------------
+
+    def generate(self, strategy: QuestionGenerationStrategy, topic: str) -> Dict:
+        """Generate (once) and time one question."""
+        key = (strategy.name, topic)
+        if key not in self.generated:
+            start = time.time()
+            question, error = None, None
+            try:
+                question = strategy.generate_question(topic, num_blanks=self.num_blanks)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            self.generated[key] = {'question': question, 'time': time.time() - start, 'error': error}
+        return self.generated[key]
+
+    # Quality evaluation ---------------------------------------------------
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return {}
 
-    def evaluate_single_question(self, result: Dict) -> QualityMetrics:
+    def _save_cache(self):
+        if self.cache_file:
+            atomic_write_json(self.cache_file, self.quality_cache)
+
+    def evaluate_batch(self, questions: List[Dict]) -> List[Dict]:
+        """
+        Quality metrics for many questions (see question_engine.quality),
+        in input order. Cached results are reused; the rest is evaluated
+        in a process pool.
         """
-        TODO: Implement automated quality evaluation
+        # Only the evaluated fields go to the workers (GenerationMetrics stays here)
+        payloads = [{key: q.get(key) for key in ('code', 'question_code', 'sub_questions', 'num_blanks')}
+                     for q in questions]
+        hashes = [question_hash(p) for p in payloads]
+        missing = {h: p for h, p in zip(hashes, payloads) if h not in self.quality_cache}
+
+        if missing:
+            if self.workers == 1 or len(missing) == 1:
+                evaluated = map(evaluate_question, missing.values())
+                self.quality_cache.update(zip(missing, evaluated))
+            else:
+                workers = self.workers or os.cpu_count() or 1
+                chunksize = max(1, len(missing) // (workers * 4))
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    evaluated = pool.map(evaluate_question, missing.values(), chunksize=chunksize)
+                    self.quality_cache.update(zip(missing, evaluated))
+            self._save_cache()
+
+        return [self.quality_cache[h] for h in hashes]
 
-        Metrics to calculate:
+    def evaluate_single_question(self, result: Dict) -> QualityMetrics:
+        """
+        Automated quality evaluation:
         1. Format compliance: Does output match expected format?
         2. Consistency: Do targets actually exist in code?
         3. Distractor quality: Are distractors plausible? (1-5 scale)
-        4. Code correctness: Can we compile/analyze the code?
-        5. Difficulty: Estimate question difficulty (1-5 scale)
+        4. Code correctness: Does g++ accept the code?
+        5. Difficulty: Estimated question difficulty (1-5 scale)
         """
+        metrics = self.evaluate_batch([result])[0]
+        return QualityMetrics(**{field: metrics[field] for field in QualityMetrics.__dataclass_fields__})
 
-        # TODO: Implement quality checks
-
-        # Placeholder
-        return QualityMetrics(
-            format_compliance=1.0,
-            consistency=1.0,
-            distractor_quality=4.0,
-            code_correctness=True,
-            difficulty_estimate=3
-        )
+    # Experiments ----------------------------------------------------------
 
     def run_speed_comparison(self, test_cases: List[str]) -> Dict:
         """
-        TODO: Run Experiment 1 - Speed Comparison
+        Experiment 1 - Speed Comparison
 
-        For each strategy:
-        1. Generate questions for all test cases
-        2. Measure total time, average time
-        3. Calculate variance
-        4. Create comparison chart
+        For each strategy: generate questions for all test cases, then
+        total, average, variance and range of the generation time.
         """
         print("\n" + "="*60)
         print("EXPERIMENT 1: Speed Comparison")
         print("="*60)
 
-        # TODO: Your implementation here
-
-        return {}
+        speed = {}
+        for strategy in self.strategies:
+            runs = [self.generate(strategy, topic) for topic in test_cases]
+            times = [run['time'] for run in runs]
+            successes = sum(1 for run in runs if run['question'])
+            speed[strategy.name] = {
+                'total_time': sum(times),
+                'avg_time': statistics.mean(times) if times else 0.0,
+                'variance': statistics.pvariance(times) if len(times) > 1 else 0.0,
+                'min_time': min(times, default=0.0),
+                'max_time': max(times, default=0.0),
+                'success_rate': successes / len(runs) if runs else 0.0,
+            }
+            s = speed[strategy.name]
+            print(f"  {strategy.name:<28} avg {s['avg_time']:6.2f}s  "
+                  f"var {s['variance']:6.2f}  success {s['success_rate']:.0%}")
+
+        self.results['speed'] = speed
+        return speed
 
     def run_quality_comparison(self, test_cases: List[str]) -> Dict:
         """
-        TODO: Run Experiment 2 - Quality Comparison
+        Experiment 2 - Quality Comparison
 
-        For each strategy:
-        1. Generate questions
-        2. Automated quality assessment
-        3. Manual quality review (optional)
-        4. Calculate average quality scores
+        Generates (or reuses) questions for every strategy, evaluates all
+        of them in one parallel batch and averages each metric.
         """
         print("\n" + "="*60)
         print("EXPERIMENT 2: Quality Comparison")
         print("="*60)
 
-        # TODO: Your implementation here
-
-        return {}
+        by_strategy = {}
+        questions = []
+        for strategy in self.strategies:
+            found = [run['question'] for run in (self.generate(strategy, t) for t in test_cases)
+                     if run['question']]
+            by_strategy[strategy.name] = (len(questions), len(found))
+            questions.extend(found)
+
+        start = time.time()
+        evaluated = self.evaluate_batch(questions)
+        print(f"  Evaluated {len(questions)} questions in {time.time() - start:.1f}s")
+
+        quality = {}
+        for name, (offset, count) in by_strategy.items():
+            metrics = evaluated[offset:offset + count]
+            if not metrics:
+                quality[name] = {'questions': 0}
+                print(f"  {name:<28} no questions generated")
+                continue
+            quality[name] = {
+                'questions': count,
+                'format_compliance': statistics.mean(m['format_compliance'] for m in metrics),
+                'consistency': statistics.mean(m['consistency'] for m in metrics),
+                'distractor_quality': statistics.mean(m['distractor_quality'] for m in metrics),
+                'compile_rate': statistics.mean(1.0 if m['code_correctness'] else 0.0 for m in metrics),
+                'difficulty': statistics.mean(m['difficulty_estimate'] for m in metrics),
+                'overall': statistics.mean(m['overall'] for m in metrics),
+            }
+            q = quality[name]
+            print(f"  {name:<28} overall {q['overall']:.2f}  consistency {q['consistency']:.2f}  "
+                  f"distractors {q['distractor_quality']:.1f}/5  compiles {q['compile_rate']:.0%}")
+
+        self.results['quality'] = quality
+        return quality
 
     def run_cost_analysis(self) -> Dict:
         """
-        TODO: Run Experiment 3 - Cost-Quality Trade-off
+        Experiment 3 - Cost-Quality Trade-off
 
-        1. Plot cost vs quality for each strategy
-        2. Identify Pareto frontier
-        3. Recommend best strategy for different budgets
+        Uses the speed and quality results: effective quality is the
+        average overall quality times the success rate. Strategies no
+        other strategy beats on both cost and quality form the Pareto
+        frontier.
         """
         print("\n" + "="*60)
         print("EXPERIMENT 3: Cost-Quality Trade-off")
         print("="*60)
 
-        # TODO: Your implementation here
-
-        return {}
+        speed = self.results.get('speed', {})
+        quality = self.results.get('quality', {})
+        points = {}
+        for strategy in self.strategies:
+            costs = [run['question']['metrics'].cost_estimate
+                     for (name, _), run in self.generated.items()
+                     if name == strategy.name and run['question']
+                     and isinstance(run['question'].get('metrics'), GenerationMetrics)]
+            success_rate = speed.get(strategy.name, {}).get('success_rate', 0.0)
+            points[strategy.name] = {
+                'cost': statistics.mean(costs) if costs else 0.0,
+                'quality': quality.get(strategy.name, {}).get('overall', 0.0) * success_rate,
+                'avg_time': speed.get(strategy.name, {}).get('avg_time'),
+            }
+
+        def dominated(name: str) -> bool:
+            p = points[name]
+            return any(o['cost'] <= p['cost'] and o['quality'] >= p['quality']
+                       and (o['cost'] < p['cost'] or o['quality'] > p['quality'])
+                       for other, o in points.items() if other != name)
+
+        frontier = sorted((name for name in points if not dominated(name)), key=lambda n: points[n]['cost'])
+        useful = [name for name in frontier if points[name]['quality'] > 0]
+        recommendations = {}
+        if useful:
+            recommendations = {
+                'low_budget': useful[0],
+                'best_quality': max(useful, key=lambda n: points[n]['quality']),
+                'best_value': max(useful, key=lambda n: points[n]['quality'] / (points[n]['cost'] or 1e-9)),
+            }
+
+        for name, p in points.items():
+            marker = "⭐" if name in frontier else "  "
+            print(f"  {marker} {name:<28} cost ${p['cost']:.5f}  effective quality {p['quality']:.2f}")
+        for budget, name in recommendations.items():
+            print(f"  💡 {budget}: {name}")
+
+        cost = {'points': points, 'pareto_frontier': frontier, 'recommendations': recommendations}
+        self.results['cost'] = cost
+        return cost
 
     def run_failure_analysis(self, edge_cases: List[str]) -> Dict:
         """
-        TODO: Run Experiment 4 - Failure Analysis
+        Experiment 4 - Failure Analysis
 
-        Test with edge cases:
-        - Very simple (e.g., "hello world")
-        - Very complex (e.g., "template metaprogramming")
-        - Ambiguous (e.g., "sorting")
-
-        Measure failure rates and analyze failure modes
+        Generates edge cases with every strategy and classifies each
+        failure: error (exception), no_output, bad_format,
+        inconsistent, does_not_compile.
         """
         print("\n" + "="*60)
         print("EXPERIMENT 4: Failure Analysis")
         print("="*60)
 
-        # TODO: Your implementation here
-
-        return {}
+        runs = {strategy.name: [(topic, self.generate(strategy, topic)) for topic in edge_cases]
+                for strategy in self.strategies}
+        questions = [run['question'] for entries in runs.values() for _, run in entries if run['question']]
+        metrics = iter(self.evaluate_batch(questions))
+
+        failures = {}
+        for name, entries in runs.items():
+            modes = {'error': 0, 'no_output': 0, 'bad_format': 0, 'inconsistent': 0, 'does_not_compile': 0}
+            failed_cases = []
+            for topic, run in entries:
+                if run['error']:
+                    mode = 'error'
+                elif not run['question']:
+                    mode = 'no_output'
+                else:
+                    m = next(metrics)
+                    mode = ('bad_format' if m['format_compliance'] < 1.0 else
+                            'inconsistent' if m['consistency'] < 1.0 else
+                            'does_not_compile' if not m['code_correctness'] else None)
+                if mode:
+                    modes[mode] += 1
+                    failed_cases.append({'topic': topic, 'mode': mode, 'error': run['error']})
+            failures[name] = {
+                'failure_rate': len(failed_cases) / len(entries) if entries else 0.0,
+                'modes': modes,
+                'failed_cases': failed_cases,
+            }
+            summary = ", ".join(f"{mode} {count}" for mode, count in modes.items() if count) or "none"
+            print(f"  {name:<28} failure rate {failures[name]['failure_rate']:.0%} ({summary})")
+
+        self.results['failures'] = failures
+        return failures
 
     def generate_report(self, output_file: str = "evaluation_report.md"):
-        """
-        TODO: Generate comprehensive comparison report
-
-        Include:
-        1. Summary statistics table
-        2. Performance charts
-        3. Quality comparison
-        4. Cost analysis
-        5. Recommendations
-        """
-
-        # TODO: Create markdown report
-
-        pass
+        """Write the results of the experiments that have run as a markdown report."""
+        lines = ["# Strategy Evaluation Report", ""]
+
+        speed = self.results.get('speed')
+        if speed:
+            lines += ["## Speed", "",
+                      "| Strategy | Avg (s) | Variance | Min (s) | Max (s) | Success |",
+                      "|---|---|---|---|---|---|"]
+            lines += [f"| {name} | {s['avg_time']:.2f} | {s['variance']:.2f} | {s['min_time']:.2f} | "
+                      f"{s['max_time']:.2f} | {s['success_rate']:.0%} |" for name, s in speed.items()]
+            lines.append("")
+
+        quality = self.results.get('quality')
+        if quality:
+            lines += ["## Quality", "",
+                      "| Strategy | Questions | Format | Consistency | Distractors (1-5) | Compiles | Difficulty | Overall |",
+                      "|---|---|---|---|---|---|---|---|"]
+            for name, q in quality.items():
+                if not q['questions']:
+                    lines.append(f"| {name} | 0 | - | - | - | - | - | - |")
+                    continue
+                lines.append(f"| {name} | {q['questions']} | {q['format_compliance']:.2f} | "
+                             f"{q['consistency']:.2f} | {q['distractor_quality']:.1f} | "
+                             f"{q['compile_rate']:.0%} | {q['difficulty']:.1f} | {q['overall']:.2f} |")
+            lines.append("")
+
+        cost = self.results.get('cost')
+        if cost:
+            lines += ["## Cost vs Quality", "",
+                      "| Strategy | Cost ($) | Effective quality | Pareto |", "|---|---|---|---|"]
+            lines += [f"| {name} | {p['cost']:.5f} | {p['quality']:.2f} | "
+                      f"{'yes' if name in cost['pareto_frontier'] else ''} |"
+                      for name, p in cost['points'].items()]
+            lines += [""] + [f"- **{budget}**: {name}" for budget, name in cost['recommendations'].items()]
+            lines.append("")
+
+        failures = self.results.get('failures')
+        if failures:
+            lines += ["## Failure Analysis", ""]
+            for name, f in failures.items():
+                lines.append(f"- **{name}**: {f['failure_rate']:.0%} failed")
+                lines += [f"  - {case['topic']}: {case['mode']}" for case in f['failed_cases']]
+            lines.append("")
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+        print(f"\n📄 Report written to {output_file}")
 
     def visualize_results(self):
         """
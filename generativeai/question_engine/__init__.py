@@ -0,0 +1,55 @@
+"""
+Question Engine
+---------------
+Shared components for C++ fill-in-the-blank question generation:
+
+- call_ollama / stream_ollama: Ollama client (requests imported on first call)
+- configure_console: UTF-8 console setup, called from each CLI's main()
+- CppTokenExtractor: deterministic target and distractor selection
+- ContextParser / RAGRetriever: context file parsing and keyword retrieval
+- MultiBlankValidator: parsing and validation of CODE/TARGETS/DISTRACTORS output
+
+The quiz apps and generator CLIs are thin entry points on top of this package.
+"""
+
+from .config import (
+    OLLAMA_URL,
+    TIMEOUT,
+    KEEP_ALIVE,
+    FAST_MODEL,
+    QUALITY_MODEL,
+    EMBED_MODEL,
+    estimate_tokens,
+)
+from .console import configure_console
+from .ollama import call_ollama, stream_ollama, get_embedding, extract_code_block
+from .extractor import CppTokenExtractor
+from .context import ContextParser, RAGRetriever
+from .validator import (
+    MultiBlankValidator,
+    blank_marker,
+    create_blank_question,
+    create_deterministic_question,
+)
+
+__all__ = [
+    'OLLAMA_URL',
+    'TIMEOUT',
+    'KEEP_ALIVE',
+    'FAST_MODEL',
+    'QUALITY_MODEL',
+    'EMBED_MODEL',
+    'estimate_tokens',
+    'configure_console',
+    'call_ollama',
+    'stream_ollama',
+    'get_embedding',
+    'extract_code_block',
+    'CppTokenExtractor',
+    'ContextParser',
+    'RAGRetriever',
+    'MultiBlankValidator',
+    'blank_marker',
+    'create_blank_question',
+    'create_deterministic_question',
+]
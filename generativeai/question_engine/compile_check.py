@@ -0,0 +1,301 @@
+"""
+C++ compile checking
+--------------------
+Verifies that generated code compiles before a question reaches a
+student: `g++ -std=c++17 -fsyntax-only`, optionally followed by a real
+build and a run with sample input.
+
+- Worker pool: check_many() runs checks on a thread pool (the work
+  happens in g++ processes, so threads are enough).
+- Sandbox: every check runs in its own temporary directory with a
+  minimal environment, a timeout and (on POSIX) CPU, memory and file
+  size limits; the whole process group is killed on timeout.
+- Result cache: keyed by a hash of code, flags and input, in memory
+  and optionally in a JSON file shared between runs.
+- Precompiled headers: code that includes <iostream>, <vector> and/or
+  <string> gets a precompiled header with exactly those headers (built
+  once per combination), which removes most of the per-check parse time.
+
+Usage:
+    checker = CompileChecker(cache_file="compile_cache.json")
+    checker.check(code).ok
+    checker.check(code, run=True, stdin="3\\n", expected_output="6")
+    checker.accepts(question)                  # Validator: question['code'] compiles
+    results = checker.check_many(codes)
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+from .journal import atomic_write_json
+
+STD = "c++17"
+COMPILE_TIMEOUT = 20   # Seconds per g++ run
+RUN_TIMEOUT = 5        # Seconds per program run
+COMPILE_MEMORY = 2 * 1024 ** 3
+RUN_MEMORY = 256 * 1024 ** 2
+MAX_FILE_SIZE = 64 * 1024 ** 2
+MAX_OUTPUT = 64 * 1024  # Characters of program output / errors kept
+
+PCH_HEADERS = ("iostream", "string", "vector")
+
+_INCLUDE_RE = re.compile(r'^\s*#\s*include\s*<([\w./]+)>', re.MULTILINE)
+
+
+@dataclass
+class CompileResult:
+    """Outcome of one check."""
+    ok: bool
+    stage: str            # "syntax", "run" or "unavailable"
+    errors: str = ""
+    output: Optional[str] = None
+    seconds: float = 0.0
+    cached: bool = False
+
+
+def compiler_available() -> bool:
+    return shutil.which("g++") is not None
+
+
+def _limits(cpu_seconds: int, memory: int):
+    """preexec_fn applying resource limits in the child (POSIX only)."""
+    def apply():
+        import resource
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (MAX_FILE_SIZE, MAX_FILE_SIZE))
+    return apply
+
+
+def _sandboxed_run(cmd: List[str], cwd: str, timeout: float, memory: int,
+                   stdin: str = "") -> subprocess.CompletedProcess:
+    """Run a command in `cwd` with limits; raises TimeoutExpired after killing its process group."""
+    env = {"PATH": os.environ.get("PATH", ""), "LANG": "C", "TMPDIR": cwd}
+    if sys.platform == "win32":
+        env["SYSTEMROOT"] = os.environ.get("SYSTEMROOT", "")
+        process = subprocess.Popen(cmd, cwd=cwd, env=env, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    else:
+        process = subprocess.Popen(cmd, cwd=cwd, env=env, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   start_new_session=True,
+                                   preexec_fn=_limits(int(timeout) + 1, memory))
+    try:
+        stdout, stderr = process.communicate(stdin, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        if sys.platform == "win32":
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL)
+        process.communicate()
+        raise
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+class CompileChecker:
+    """Sandboxed, cached g++ checks with precompiled standard headers."""
+
+    def __init__(self, workers: Optional[int] = None, timeout: float = COMPILE_TIMEOUT,
+                 run_timeout: float = RUN_TIMEOUT, cache_file: Optional[str] = None,
+                 use_pch: bool = True, pch_dir: Optional[str] = None, std: str = STD):
+        """
+        Args:
+            workers: Parallel checks in check_many (default: CPU count)
+            cache_file: JSON file for results shared between runs (None = memory only)
+            use_pch: Precompile <iostream>/<string>/<vector> combinations
+            pch_dir: Where precompiled headers live (default: a per-compiler temp dir)
+        """
+        self.compiler = shutil.which("g++")
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.run_timeout = run_timeout
+        self.cache_file = cache_file
+        self.std = std
+        self.use_pch = use_pch and self.compiler is not None
+        self.pch_dir = pch_dir
+        self._pch: Dict[tuple, Optional[str]] = {}  # Header combination -> header path (None = failed)
+        self._lock = threading.Lock()
+        self._pch_lock = threading.Lock()
+        self._cache: Dict[str, Dict] = self._load_cache()
+        self.hits = 0
+        self.misses = 0
+
+    # Public API -----------------------------------------------------------
+
+    def check(self, code: str, run: bool = False, stdin: str = "",
+              expected_output: Optional[str] = None) -> CompileResult:
+        """Check one program; with run=True also build it and run it on stdin."""
+        result = self._check(code, run, stdin, expected_output)
+        self._save_cache()
+        return result
+
+    def check_many(self, codes: List[str], run: bool = False) -> List[CompileResult]:
+        """Check many programs in parallel (results in input order)."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda code: self._check(code, run, "", None), codes))
+        self._save_cache()
+        return results
+
+    def accepts(self, question: Optional[Dict]) -> bool:
+        """Validator hook: False for a question whose code does not compile."""
+        if not question:
+            return False
+        if self.compiler is None:
+            return True  # Can't check here; don't reject everything
+        return self.check(question.get('code') or "").ok
+
+    def stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses, 'cached_results': len(self._cache)}
+
+    # Checking -------------------------------------------------------------
+
+    def _key(self, code: str, run: bool, stdin: str, expected_output: Optional[str]) -> str:
+        material = json.dumps([self.std, run, stdin, expected_output, code])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _check(self, code: str, run: bool, stdin: str, expected_output: Optional[str]) -> CompileResult:
+        if self.compiler is None:
+            return CompileResult(ok=False, stage="unavailable", errors="g++ not found")
+
+        key = self._key(code, run, stdin, expected_output)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return CompileResult(**dict(cached, cached=True))
+            self.misses += 1
+
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="cppcheck_") as workdir:
+            result = self._syntax(code, workdir)
+            if result.ok and run:
+                result = self._build_and_run(code, workdir, stdin, expected_output)
+        result.seconds = round(time.perf_counter() - start, 4)
+
+        if not result.errors.startswith("g++ timed out"):  # Load-dependent, check again next time
+            with self._lock:
+                self._cache[key] = asdict(result)
+        return result
+
+    def _syntax(self, code: str, workdir: str) -> CompileResult:
+        cmd = [self.compiler, f"-std={self.std}", "-fsyntax-only"]
+        header = self._pch_for(code)
+        if header:
+            cmd += ["-include", header]
+        source = os.path.join(workdir, "main.cpp")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(code)
+        try:
+            done = _sandboxed_run(cmd + [source], workdir, self.timeout, COMPILE_MEMORY)
+        except subprocess.TimeoutExpired:
+            return CompileResult(ok=False, stage="syntax", errors=f"g++ timed out after {self.timeout}s")
+        return CompileResult(ok=done.returncode == 0, stage="syntax",
+                             errors=self._clean(done.stderr, workdir))
+
+    def _build_and_run(self, code: str, workdir: str, stdin: str,
+                       expected_output: Optional[str]) -> CompileResult:
+        binary = os.path.join(workdir, "main.exe" if sys.platform == "win32" else "main")
+        try:
+            built = _sandboxed_run([self.compiler, f"-std={self.std}", "-O0", "-o", binary,
+                                    os.path.join(workdir, "main.cpp")],
+                                   workdir, self.timeout, COMPILE_MEMORY)
+        except subprocess.TimeoutExpired:
+            return CompileResult(ok=False, stage="run", errors=f"g++ timed out after {self.timeout}s")
+        if built.returncode != 0:
+            return CompileResult(ok=False, stage="run", errors=self._clean(built.stderr, workdir))
+
+        try:
+            ran = _sandboxed_run([binary], workdir, self.run_timeout, RUN_MEMORY, stdin)
+        except subprocess.TimeoutExpired:
+            return CompileResult(ok=False, stage="run", errors=f"Program timed out after {self.run_timeout}s")
+        output = ran.stdout[:MAX_OUTPUT]
+        if ran.returncode != 0:
+            return CompileResult(ok=False, stage="run", output=output,
+                                 errors=f"Exit code {ran.returncode}\n{ran.stderr[:MAX_OUTPUT]}")
+        if expected_output is not None and output.strip() != expected_output.strip():
+            return CompileResult(ok=False, stage="run", output=output, errors="Unexpected output")
+        return CompileResult(ok=True, stage="run", output=output)
+
+    @staticmethod
+    def _clean(stderr: str, workdir: str) -> str:
+        return stderr.replace(workdir + os.sep, "")[:MAX_OUTPUT]
+
+    # Precompiled headers --------------------------------------------------
+
+    def _pch_for(self, code: str) -> Optional[str]:
+        """Header path whose .gch covers exactly the code's PCH_HEADERS includes."""
+        if not self.use_pch:
+            return None
+        headers = tuple(h for h in PCH_HEADERS if h in set(_INCLUDE_RE.findall(code)))
+        if not headers:
+            return None
+        with self._pch_lock:
+            if headers not in self._pch:
+                self._pch[headers] = self._build_pch(headers)
+            return self._pch[headers]
+
+    def _build_pch(self, headers: tuple) -> Optional[str]:
+        directory = self.pch_dir or os.path.join(tempfile.gettempdir(), f"question_engine_pch_{self._compiler_id()}")
+        os.makedirs(directory, exist_ok=True)
+        header = os.path.join(directory, f"pch_{'_'.join(headers)}_{self.std.replace('+', 'p')}.hpp")
+        if os.path.exists(header + ".gch"):
+            return header
+
+        with open(header, "w", encoding="utf-8") as f:
+            f.write("".join(f"#include <{h}>\n" for h in headers))
+        # Build next to the final name, then rename: other processes may build the same one
+        partial = f"{header}.{os.getpid()}.{threading.get_ident()}.gch"
+        try:
+            subprocess.run([self.compiler, f"-std={self.std}", "-x", "c++-header", header, "-o", partial],
+                           capture_output=True, timeout=self.timeout * 3, check=True)
+            os.replace(partial, header + ".gch")
+        except (subprocess.SubprocessError, OSError):
+            if os.path.exists(partial):
+                os.remove(partial)
+            return None  # Checks still work, just without the speed-up
+        return header
+
+    def _compiler_id(self) -> str:
+        version = subprocess.run([self.compiler, "--version"], capture_output=True, text=True).stdout
+        return hashlib.sha256(f"{self.compiler}\n{version}".encode()).hexdigest()[:12]
+
+    # Cache file -----------------------------------------------------------
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return {}
+
+    def _save_cache(self):
+        if not self.cache_file:
+            return
+        with self._lock:
+            snapshot = dict(self._cache)
+        atomic_write_json(self.cache_file, snapshot)
+
+
+_default_checker: Optional[CompileChecker] = None
+
+
+def default_checker() -> Optional[CompileChecker]:
+    """Shared in-process checker (None when g++ is not installed)."""
+    global _default_checker
+    if _default_checker is None and compiler_available():
+        _default_checker = CompileChecker()
+    return _default_checker
@@ -0,0 +1,29 @@
+"""
+Shared configuration for the question engine.
+
+CLIs may override any of these by passing explicit arguments; the values
+here are the defaults used across the quiz apps and generators.
+"""
+
+import math
+
+# Ollama server
+OLLAMA_URL = "https://unpatented-saylor-nonirate.ngrok-free.dev"
+TIMEOUT = 300
+KEEP_ALIVE = "60m"
+
+# Models
+FAST_MODEL = "qwen2.5:1.5b"    # Fast code generation
+QUALITY_MODEL = "qwen2.5:14b"  # Validation and structuring
+EMBED_MODEL = "llama3.1:8b"
+
+# RAG
+CONTEXT_FILE = "context_with_validation.txt"
+AVG_CHARS_PER_TOKEN = 4.0
+MAX_EXAMPLES_TO_RETRIEVE = 20
+MAX_CONTEXT_TOKENS = 30_000
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough estimate of token count."""
+    return math.ceil(len(text) / AVG_CHARS_PER_TOKEN)
@@ -0,0 +1,24 @@
+"""
+Console setup
+-------------
+UTF-8 console output for the emoji-heavy CLIs. Entry points call
+configure_console() from main() instead of rewrapping sys.stdout at
+import time, so importing a CLI module has no side effects.
+"""
+
+import sys
+
+_configured = False
+
+
+def configure_console():
+    """Switch stdout/stderr to UTF-8 on Windows consoles (safe to call twice)."""
+    global _configured
+    if _configured or sys.platform != "win32":
+        return
+    _configured = True
+
+    for stream in (sys.stdout, sys.stderr):
+        # reconfigure() keeps the existing buffer instead of wrapping it again
+        if hasattr(stream, 'reconfigure'):
+            stream.reconfigure(encoding='utf-8')
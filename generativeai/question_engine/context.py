@@ -0,0 +1,165 @@
+"""
+RAG context parsing and retrieval
+---------------------------------
+Parses context.txt / context_with_validation.txt into examples and
+retrieves the most relevant ones with keyword (Jaccard) similarity.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List
+
+_INSTRUCTIONS_RE = re.compile(
+    r'HOW TO CREATE ACCURATE FILL-IN-THE-BLANK QUESTIONS.*?(?=(?:SIMPLE )?FILL-IN-THE-BLANK EXAMPLES)',
+    re.DOTALL
+)
+
+# Pattern: Fill-in-the-Blank Question Example [ID] ([Description])
+_EXAMPLE_RE = re.compile(
+    r'------------------\s*Fill-in-the-Blank Question Example ([^(]+)\(([^)]+)\)\s*------------------\s*'
+    r'(.*?)(?=------------------\s*Fill-in-the-Blank Question Example|END OF EXAMPLES|$)',
+    re.DOTALL
+)
+
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Common C++ keywords and concepts
+CPP_KEYWORDS = frozenset({
+    'int', 'float', 'double', 'char', 'string', 'bool', 'void',
+    'if', 'else', 'for', 'while', 'do', 'switch', 'case', 'break', 'continue',
+    'class', 'struct', 'public', 'private', 'protected',
+    'new', 'delete', 'nullptr', 'NULL',
+    'return', 'cout', 'cin', 'endl', 'namespace', 'using', 'std',
+    'include', 'iostream', 'vector', 'map', 'set', 'list', 'queue', 'stack',
+    'template', 'typename', 'virtual', 'override', 'final',
+    'const', 'static', 'extern', 'inline', 'volatile', 'mutable',
+    'try', 'catch', 'throw', 'exception',
+    'array', 'pointer', 'reference', 'loop', 'function', 'method',
+    'constructor', 'destructor', 'inheritance', 'polymorphism',
+    'operator', 'assignment', 'comparison', 'arithmetic',
+    'fstream', 'ofstream', 'ifstream', 'file',
+    'algorithm', 'sort', 'find', 'reverse', 'swap',
+    'push_back', 'pop_back', 'size', 'empty', 'clear', 'insert', 'erase',
+    'semicolon', 'brace', 'bracket', 'parenthesis'
+})
+
+# Common question patterns
+QUERY_PATTERNS = {
+    'for loop': ['for', 'loop', 'iteration'],
+    'while loop': ['while', 'loop'],
+    'if statement': ['if', 'condition', 'conditional'],
+    'function': ['function', 'void', 'return'],
+    'class': ['class', 'object', 'oop'],
+    'array': ['array', 'bracket'],
+    'pointer': ['pointer', 'new', 'delete'],
+    'vector': ['vector', 'push_back', 'size'],
+    'string': ['string', 'text'],
+    'file': ['file', 'fstream', 'ifstream', 'ofstream'],
+    'output': ['cout', 'output', 'print'],
+    'input': ['cin', 'input', 'read'],
+}
+
+
+class ContextParser:
+    """Parses context.txt file into structured examples."""
+
+    def __init__(self, filepath: str, verbose: bool = True):
+        self.filepath = filepath
+        self.verbose = verbose
+        self.examples = []
+        self.instructions = ""
+
+    def parse(self):
+        """Parse the context file into examples and instructions."""
+        path = Path(self.filepath)
+        if not path.exists():
+            raise FileNotFoundError(f"Context file not found: {self.filepath}")
+
+        content = path.read_text(encoding="utf-8")
+
+        # Extract instructions section
+        instructions_match = _INSTRUCTIONS_RE.search(content)
+        if instructions_match:
+            self.instructions = instructions_match.group(0).strip()
+
+        # Parse individual examples
+        for match in _EXAMPLE_RE.finditer(content):
+            example_id = match.group(1).strip()
+            description = match.group(2).strip()
+            full_text = match.group(3).strip()
+
+            # Extract keywords from description and content
+            keywords = self._extract_keywords(description + " " + full_text)
+
+            self.examples.append({
+                'id': example_id,
+                'description': description,
+                'text': match.group(0),  # Full example text
+                'keywords': keywords
+            })
+
+        if self.verbose:
+            print(f"📚 Parsed {len(self.examples)} examples from context file")
+        return self
+
+    def _extract_keywords(self, text: str) -> List[str]:
+        """Extract important keywords from text."""
+        words = set(_WORD_RE.findall(text.lower()))
+        return [w for w in words if w in CPP_KEYWORDS or len(w) > 3]
+
+
+class RAGRetriever:
+    """Retrieves relevant examples using keyword-based similarity."""
+
+    def __init__(self, examples: List[Dict]):
+        self.examples = examples
+        # Keyword sets are computed once instead of on every query
+        self._keyword_sets = [frozenset(ex['keywords']) for ex in examples]
+
+    def retrieve(self, query: str, top_k: int = 20) -> List[Dict]:
+        """Retrieve top-k most relevant examples for the query."""
+        query_keywords = set(self._extract_query_keywords(query))
+
+        scored_examples = []
+        for example, keywords in zip(self.examples, self._keyword_sets):
+            score = self._score(query_keywords, keywords)
+            scored_examples.append((score, example))
+
+        # Sort by score (descending); the sort is stable so ties keep file order
+        scored_examples.sort(reverse=True, key=lambda x: x[0])
+        top_examples = [ex for score, ex in scored_examples[:top_k] if score > 0]
+
+        # If no matches, return some simple examples (S series)
+        if not top_examples:
+            top_examples = [ex for ex in self.examples if ex['id'].startswith('S')][:top_k]
+
+        return top_examples
+
+    def _extract_query_keywords(self, query: str) -> List[str]:
+        """Extract keywords from query."""
+        query_lower = query.lower()
+        keywords = []
+
+        for pattern, kws in QUERY_PATTERNS.items():
+            if pattern in query_lower:
+                keywords.extend(kws)
+
+        words = _WORD_RE.findall(query_lower)
+        keywords.extend([w for w in words if len(w) > 3])
+
+        return list(set(keywords))
+
+    @staticmethod
+    def _score(query_keywords: set, example_keywords: frozenset) -> float:
+        """Jaccard similarity with a boost for the number of matches."""
+        if not query_keywords or not example_keywords:
+            return 0.0
+
+        matches = len(query_keywords & example_keywords)
+        total = len(query_keywords | example_keywords)
+        jaccard = matches / total if total > 0 else 0
+        return jaccard * (1 + matches * 0.1)
+
+    def _calculate_relevance(self, query_keywords: List[str], example_keywords: List[str]) -> float:
+        """Calculate relevance score between query and example."""
+        return self._score(set(query_keywords), frozenset(example_keywords))
@@ -0,0 +1,195 @@
+"""
+Deterministic C++ token extraction
+----------------------------------
+Rule-based target selection and template distractors used by the
+1.5b deterministic pipeline and the template quiz. No AI involved.
+"""
+
+import re
+import random
+from bisect import bisect_right
+from typing import Dict, List
+
+
+class CppTokenExtractor:
+    """Deterministic token extraction"""
+
+    KEYWORDS = {
+        'types': ['int', 'float', 'double', 'char', 'bool', 'void', 'string', 'auto', 'long', 'short'],
+        'control': ['if', 'else', 'for', 'while', 'do', 'switch', 'case', 'break', 'continue', 'return'],
+        'container': ['vector', 'map', 'set', 'list', 'queue', 'stack', 'array', 'deque', 'pair'],
+        'method': ['push_back', 'pop_back', 'push', 'pop', 'insert', 'erase', 'clear', 'size', 'empty',
+                   'front', 'back', 'begin', 'end', 'find', 'count'],
+        'stream': ['cout', 'cin', 'endl', 'cerr', 'getline'],
+        'keyword': ['namespace', 'using', 'class', 'struct', 'public', 'private', 'protected',
+                    'const', 'static', 'virtual', 'new', 'delete'],
+        'operator': ['++', '--', '==', '!=', '<=', '>=', '&&', '||', '<<', '>>', '+=', '-='],
+        'include': ['#include', 'iostream', 'vector', 'string', 'algorithm', 'cmath', 'fstream'],
+    }
+
+    PRIORITY = {
+        'control': 10,
+        'types': 9,
+        'container': 8,
+        'method': 7,
+        'stream': 6,
+        'keyword': 5,
+        'include': 4,
+        'operator': 2,
+    }
+
+    DISTRACTORS = {
+        # Control flow
+        'for': ['while', 'do', 'if'],
+        'while': ['for', 'do', 'if'],
+        'if': ['while', 'for', 'switch'],
+        'else': ['elif', 'otherwise', 'then'],
+        'switch': ['if', 'select', 'case'],
+        'return': ['exit', 'end', 'yield'],
+        'break': ['continue', 'exit', 'stop'],
+        'continue': ['break', 'skip', 'next'],
+
+        # Types
+        'int': ['float', 'double', 'char'],
+        'float': ['double', 'int', 'long'],
+        'double': ['float', 'long', 'decimal'],
+        'char': ['int', 'string', 'byte'],
+        'bool': ['int', 'boolean', 'flag'],
+        'void': ['int', 'null', 'none'],
+        'string': ['text', 'str', 'char'],
+        'auto': ['var', 'type', 'dynamic'],
+
+        # Containers
+        'vector': ['array', 'list', 'container'],
+        'map': ['dict', 'hashmap', 'table'],
+        'set': ['list', 'array', 'collection'],
+        'list': ['vector', 'array', 'deque'],
+        'queue': ['stack', 'list', 'deque'],
+        'stack': ['queue', 'list', 'array'],
+
+        # Methods
+        'push_back': ['insert', 'add', 'append'],
+        'pop_back': ['remove', 'delete', 'pop'],
+        'push': ['add', 'insert', 'append'],
+        'pop': ['remove', 'delete', 'pop_back'],
+        'insert': ['add', 'push', 'append'],
+        'erase': ['remove', 'delete', 'clear'],
+        'size': ['length', 'count', 'capacity'],
+        'empty': ['isEmpty', 'null', 'zero'],
+        'clear': ['erase', 'delete', 'remove'],
+
+        # Stream
+        'cout': ['cin', 'print', 'output'],
+        'cin': ['cout', 'input', 'scanf'],
+        'endl': ['newline', '\\n', 'end'],
+        'getline': ['readline', 'gets', 'input'],
+
+        # Keywords
+        'namespace': ['package', 'module', 'scope'],
+        'using': ['import', 'include', 'require'],
+        'class': ['struct', 'type', 'object'],
+        'public': ['private', 'protected', 'visible'],
+        'const': ['final', 'readonly', 'static'],
+        'static': ['const', 'final', 'global'],
+
+        # Include
+        '#include': ['#import', '#using', 'import'],
+        'iostream': ['stdio', 'stream', 'io'],
+
+        # Operators
+        '++': ['--', '+=', '+1'],
+        '--': ['++', '-=', '-1'],
+        '<<': ['>>', '<', '<<<'],
+        '>>': ['<<', '>', '>>>'],
+        '==': ['!=', '=', '==='],
+        '!=': ['==', '<>', '!=='],
+    }
+
+    # (keyword, category, compiled pattern) in KEYWORDS order, built once
+    _PATTERNS = []
+
+    @classmethod
+    def _compile_patterns(cls):
+        """Precompile one regex per keyword (word boundaries for identifiers)."""
+        patterns = []
+        for category, keywords in cls.KEYWORDS.items():
+            for keyword in keywords:
+                if keyword[0].isalpha() or keyword[0] == '_':
+                    pattern = r'\b' + re.escape(keyword) + r'\b'
+                else:
+                    pattern = re.escape(keyword)
+                patterns.append((keyword, category, re.compile(pattern)))
+        cls._PATTERNS = patterns
+
+    @staticmethod
+    def extract_all_tokens(code: str) -> List[Dict]:
+        """Extract all tokens from code"""
+        tokens = []
+        seen = set()
+        line_starts = [i for i, ch in enumerate(code) if ch == '\n']
+
+        for keyword, category, pattern in CppTokenExtractor._PATTERNS:
+            for match in pattern.finditer(code):
+                token_key = (keyword, match.start())
+                if token_key not in seen:
+                    tokens.append({
+                        'token': keyword,
+                        'category': category,
+                        'position': match.start(),
+                        'line': bisect_right(line_starts, match.start()) + 1
+                    })
+                    seen.add(token_key)
+
+        tokens.sort(key=lambda x: x['position'])
+        return tokens
+
+    @staticmethod
+    def select_best_token_infos(tokens: List[Dict], num_targets: int = 3) -> List[Dict]:
+        """Select best targets using scoring, returning the full token dicts"""
+        if not tokens:
+            return []
+
+        scored_tokens = []
+        seen = set()
+
+        for token_info in tokens:
+            token = token_info['token']
+
+            if token in seen:
+                continue
+
+            category = token_info['category']
+            score = CppTokenExtractor.PRIORITY.get(category, 1)
+            score += len(token) * 0.1
+
+            if token in CppTokenExtractor.DISTRACTORS:
+                score += 2.0
+
+            scored_tokens.append({'token_info': token_info, 'score': score})
+            seen.add(token)
+
+        scored_tokens.sort(key=lambda x: x['score'], reverse=True)
+        return [st['token_info'] for st in scored_tokens[:num_targets]]
+
+    @staticmethod
+    def select_best_targets(tokens: List[Dict], num_targets: int = 3) -> List[str]:
+        """Select best targets using scoring"""
+        return [t['token'] for t in CppTokenExtractor.select_best_token_infos(tokens, num_targets)]
+
+    @staticmethod
+    def get_distractors(target: str) -> List[str]:
+        """Get distractors for target"""
+        if target in CppTokenExtractor.DISTRACTORS:
+            return CppTokenExtractor.DISTRACTORS[target][:3]
+
+        # Fallback: same category
+        for category, keywords in CppTokenExtractor.KEYWORDS.items():
+            if target in keywords:
+                others = [k for k in keywords if k != target]
+                if len(others) >= 3:
+                    return random.sample(others, 3)
+
+        return ['option1', 'option2', 'option3']
+
+
+CppTokenExtractor._compile_patterns()
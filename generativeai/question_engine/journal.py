@@ -0,0 +1,149 @@
+"""
+Append-only progress journal
+----------------------------
+Score updates are appended to a JSON Lines journal (one fsync'd line
+per record) instead of rewriting the whole progress file. The journal
+is periodically folded into a snapshot that is replaced atomically.
+
+Every record carries a sequence number and the snapshot remembers the
+last one it contains, so a crash between writing the snapshot and
+truncating the journal never applies a record twice. A torn or corrupt
+line only loses that line, never the rest of the history.
+"""
+
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+SNAPSHOT_FORMAT = "progress-snapshot-v1"
+COMPACT_EVERY = 200  # Journal records before the snapshot is rewritten
+TEMP_PREFIX = ".tmp-"  # atomic_write_json temp files (left behind if the process is killed)
+
+
+def atomic_write_json(path: str, data: Dict):
+    """Write JSON to a temp file in the same directory, fsync, then rename over `path`."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ProgressJournal:
+    """Snapshot + JSON Lines journal for one progress file."""
+
+    def __init__(self, snapshot_file: str, journal_file: Optional[str] = None,
+                 compact_every: int = COMPACT_EVERY):
+        self.snapshot_file = snapshot_file
+        self.journal_file = journal_file or os.path.splitext(snapshot_file)[0] + ".jsonl"
+        self.compact_every = compact_every
+        self.seq = 0            # Last sequence number written or replayed
+        self.pending = 0        # Journal records not yet folded into the snapshot
+        self.skipped_lines = 0  # Corrupt journal lines seen during load
+        self._torn_tail = False  # Journal ends without a newline (interrupted write)
+
+    def load(self, apply: Callable[[Dict, Dict], None]) -> Dict:
+        """
+        Load the snapshot and replay newer journal records onto it.
+
+        Args:
+            apply: Callback (state, record) that folds one record into the state.
+                A record it rejects with KeyError, TypeError or ValueError is
+                skipped like a torn line, so it must not change the state first
+
+        Returns:
+            The reconstructed state dict
+        """
+        state, snapshot_seq = self._load_snapshot()
+        self.seq = snapshot_seq
+        self.pending = 0
+        self.skipped_lines = 0
+        self._torn_tail = False
+
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._torn_tail = not line.endswith("\n")
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                        seq = int(record['seq'])
+                    except (ValueError, KeyError, TypeError):
+                        self.skipped_lines += 1
+                        continue
+                    if seq <= snapshot_seq:
+                        continue  # Already part of the snapshot
+                    self.seq = max(self.seq, seq)
+                    try:
+                        apply(state, record)
+                    except (ValueError, KeyError, TypeError):
+                        # Valid JSON but not a usable record (e.g. a field is missing)
+                        self.skipped_lines += 1
+                        continue
+                    self.pending += 1
+
+        if self.skipped_lines:
+            print(f"⚠️  Skipped {self.skipped_lines} corrupt line(s) in {self.journal_file}")
+        return state
+
+    def _load_snapshot(self):
+        """Return (state, last journal seq) from the snapshot file."""
+        if not os.path.exists(self.snapshot_file):
+            return {}, 0
+
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (ValueError, OSError) as e:
+            # Keep the unreadable file for manual recovery instead of dropping it
+            backup = f"{self.snapshot_file}.corrupt-{int(time.time())}"
+            os.replace(self.snapshot_file, backup)
+            print(f"⚠️  Could not read {self.snapshot_file} ({e}); moved it to {backup}")
+            return {}, 0
+
+        if isinstance(data, dict) and data.get('format') == SNAPSHOT_FORMAT:
+            return data.get('state', {}), int(data.get('journal_seq', 0))
+        # Plain progress dict written by older versions
+        return data, 0
+
+    def append(self, record: Dict) -> int:
+        """Append one record (O(1), flushed and fsync'd). Returns its sequence number."""
+        self.seq += 1
+        line = json.dumps(dict(record, seq=self.seq), separators=(',', ':'))
+        if self._torn_tail:
+            # Terminate the partial line so this record starts on its own line
+            line = "\n" + line
+            self._torn_tail = False
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending += 1
+        return self.seq
+
+    def needs_compaction(self) -> bool:
+        """Check whether enough records piled up to rewrite the snapshot."""
+        return self.pending >= self.compact_every
+
+    def compact(self, state: Dict):
+        """Atomically write `state` as the snapshot, then empty the journal."""
+        atomic_write_json(self.snapshot_file, {
+            'format': SNAPSHOT_FORMAT,
+            'journal_seq': self.seq,
+            'state': state,
+        })
+        # Records up to journal_seq are in the snapshot, so truncating is safe
+        with open(self.journal_file, 'w', encoding='utf-8'):
+            pass
+        self.pending = 0
+        self._torn_tail = False
@@ -0,0 +1,141 @@
+"""
+Ollama HTTP client
+------------------
+Single implementation of the streaming /api/generate call used by every
+quiz app and generator: stream_ollama() yields chunks as they arrive,
+call_ollama() collects them into the full response. `requests` (and `numpy` for embeddings) are
+imported on first use so that importing this module stays cheap.
+"""
+
+import json
+import re
+from typing import Iterator, Optional
+
+from .config import OLLAMA_URL, TIMEOUT, KEEP_ALIVE, FAST_MODEL, EMBED_MODEL
+
+_session = None
+
+
+def get_session():
+    """Return a shared requests session (created lazily, reuses connections)."""
+    global _session
+    if _session is None:
+        import requests
+        _session = requests.Session()
+    return _session
+
+
+def stream_ollama(
+    prompt: str,
+    model: str = FAST_MODEL,
+    base_url: str = OLLAMA_URL,
+    keep_alive: str = KEEP_ALIVE,
+    timeout: int = TIMEOUT
+) -> Iterator[str]:
+    """
+    Yield response chunks from Ollama /api/generate as they arrive.
+
+    Errors are raised to the caller. Closing the generator early closes
+    the connection, which also stops generation on the server.
+    """
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": True,
+        "keep_alive": keep_alive
+    }
+
+    with get_session().post(
+        f"{base_url.rstrip('/')}/api/generate",
+        json=payload,
+        stream=True,
+        timeout=timeout
+    ) as r:
+        r.raise_for_status()
+
+        for line in r.iter_lines(decode_unicode=True):
+            if not line or not line.strip():
+                continue
+
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            if "response" in data:
+                yield data["response"]
+
+
+def call_ollama(
+    prompt: str,
+    model: str = FAST_MODEL,
+    base_url: str = OLLAMA_URL,
+    keep_alive: str = KEEP_ALIVE,
+    timeout: int = TIMEOUT,
+    verbose: bool = False,
+    error_prefix: str = "❌ Error"
+) -> Optional[str]:
+    """
+    Call Ollama /api/generate with streaming and return the full response.
+
+    Args:
+        prompt: Prompt text
+        model: Model name (e.g. "qwen2.5:1.5b")
+        base_url: Ollama server URL
+        keep_alive: How long the server should keep the model loaded
+        timeout: Request timeout in seconds
+        verbose: Echo streamed chunks to stdout
+        error_prefix: Prefix for the printed error message
+
+    Returns:
+        Stripped response text, or None on error
+    """
+    try:
+        chunks = []
+        for chunk in stream_ollama(prompt, model=model, base_url=base_url,
+                                   keep_alive=keep_alive, timeout=timeout):
+            if verbose:
+                print(chunk, end='', flush=True)
+            chunks.append(chunk)
+
+        if verbose:
+            print()
+        return "".join(chunks).strip()
+
+    except Exception as e:
+        if verbose:
+            print()
+        print(f"{error_prefix}: {e}")
+        return None
+
+
+def get_embedding(
+    text: str,
+    model: str = EMBED_MODEL,
+    base_url: str = OLLAMA_URL,
+    timeout: int = TIMEOUT
+):
+    """Return the embedding vector for a given text as a numpy array."""
+    import numpy as np
+
+    payload = {"model": model, "prompt": text}
+    try:
+        res = get_session().post(f"{base_url.rstrip('/')}/api/embeddings", json=payload, timeout=timeout)
+        res.raise_for_status()
+        data = res.json()
+        return np.array(data["embedding"], dtype=np.float32)
+    except Exception as e:
+        print(f"❌ Error generating embedding: {e}")
+        return np.array([])
+
+
+_CODE_BLOCK_RE = re.compile(r'```(?:cpp)?\s*(.*?)\s*```', re.DOTALL)
+
+
+def extract_code_block(response: str) -> str:
+    """Return the first fenced code block in a response, or the whole response."""
+    code_match = _CODE_BLOCK_RE.search(response)
+    if code_match:
+        return code_match.group(1).strip()
+    return response.strip()
+
@@ -0,0 +1,196 @@
+"""
+Two-stage generation pipeline
+-----------------------------
+Overlaps two model stages across questions: while stage 2 (e.g. 14b
+target extraction) works on question N, stage 1 (e.g. 1.5b code
+generation) already produces question N+1.
+
+- Stage 1 runs on a worker thread, stage 2 on the caller's thread.
+- The hand-off queue is bounded: when stage 2 is slower, stage 1 blocks
+  instead of piling up work (backpressure); when stage 1 is slower,
+  stage 2 waits for input. Both waits are measured per stage.
+- Results come out in input order. A stage returning None marks that
+  item as failed without stopping the pipeline.
+
+Usage:
+    pipeline = TwoStagePipeline(generate_code, extract_targets)
+    for topic, question in pipeline.run(topics):
+        ...
+    pipeline.print_metrics()
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_QUEUE_SIZE = 2
+
+_DONE = object()
+
+
+class StageMetrics:
+    """Counters for one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.failures = 0
+        self.busy = 0.0     # Seconds spent in the stage function
+        self.starved = 0.0  # Seconds waiting for input from the previous stage
+        self.blocked = 0.0  # Seconds waiting for room in the next stage's queue
+        self.start = None
+        self.end = None
+
+    @property
+    def wall(self) -> float:
+        if self.start is None:
+            return 0.0
+        return (self.end or time.perf_counter()) - self.start
+
+    def throughput(self) -> float:
+        """Items per minute over the stage's wall time."""
+        return self.items / self.wall * 60 if self.wall else 0.0
+
+    def utilization(self) -> float:
+        """Fraction of wall time spent doing work."""
+        return self.busy / self.wall if self.wall else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'stage': self.name,
+            'items': self.items,
+            'failures': self.failures,
+            'busy_s': round(self.busy, 3),
+            'starved_s': round(self.starved, 3),
+            'blocked_s': round(self.blocked, 3),
+            'wall_s': round(self.wall, 3),
+            'per_minute': round(self.throughput(), 2),
+            'utilization': round(self.utilization(), 3),
+        }
+
+
+class TwoStagePipeline:
+    """Producer/consumer pipeline with a bounded queue between two stages."""
+
+    def __init__(self, first: Callable[[Any], Any], second: Callable[[Any, Any], Any],
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 names: Tuple[str, str] = ("stage 1", "stage 2")):
+        """
+        Args:
+            first: item -> intermediate result (None = failed)
+            second: (item, intermediate) -> final result (None = failed)
+            queue_size: Intermediate results allowed to wait for stage 2
+            names: Stage names for the metrics report
+        """
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.first = first
+        self.second = second
+        self.queue_size = queue_size
+        self.stages = (StageMetrics(names[0]), StageMetrics(names[1]))
+        self.wall = 0.0
+
+    def run(self, items: Iterable) -> Iterator[Tuple[Any, Optional[Any]]]:
+        """Yield (item, final result or None) in input order."""
+        handoff = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        producer = threading.Thread(target=self._produce, args=(items, handoff, stop),
+                                    name="pipeline-stage-1", daemon=True)
+        first, second = self.stages
+        start = time.perf_counter()
+        first.start = second.start = start
+        producer.start()
+
+        try:
+            while True:
+                waited = time.perf_counter()
+                entry = handoff.get()
+                second.starved += time.perf_counter() - waited
+                if entry is _DONE:
+                    break
+                item, intermediate, error = entry
+                if error is not None:
+                    raise error
+
+                result = None
+                if intermediate is not None:
+                    began = time.perf_counter()
+                    try:
+                        result = self.second(item, intermediate)
+                    finally:
+                        second.busy += time.perf_counter() - began
+                second.items += 1
+                if result is None:
+                    second.failures += 1
+                yield item, result
+        finally:
+            # Also reached when the caller stops iterating early; the
+            # producer notices after its current item and exits
+            stop.set()
+            second.end = time.perf_counter()
+            self.wall = second.end - start
+
+    def _produce(self, items: Iterable, handoff: queue.Queue, stop: threading.Event):
+        metrics = self.stages[0]
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                began = time.perf_counter()
+                intermediate, error = None, None
+                try:
+                    intermediate = self.first(item)
+                except Exception as e:
+                    error = e
+                metrics.busy += time.perf_counter() - began
+                metrics.items += 1
+                if intermediate is None:
+                    metrics.failures += 1
+
+                waited = time.perf_counter()
+                delivered = self._put(handoff, (item, intermediate, error), stop)
+                metrics.blocked += time.perf_counter() - waited
+                if not delivered or error is not None:
+                    return
+        finally:
+            metrics.end = time.perf_counter()
+            self._put(handoff, _DONE, stop)
+
+    @staticmethod
+    def _put(handoff: queue.Queue, entry, stop: threading.Event) -> bool:
+        """Put with backpressure; gives up once the consumer has stopped."""
+        while not stop.is_set():
+            try:
+                handoff.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def metrics(self) -> dict:
+        """Per-stage metrics plus overall wall time and overlap gain."""
+        sequential = sum(stage.busy for stage in self.stages)
+        return {
+            'stages': [stage.to_dict() for stage in self.stages],
+            'wall_s': round(self.wall, 3),
+            'sequential_s': round(sequential, 3),
+            'speedup': round(sequential / self.wall, 2) if self.wall else None,
+        }
+
+    def print_metrics(self):
+        """Print a per-stage throughput and backpressure report."""
+        report = self.metrics()
+        print(f"\n{'='*60}")
+        print("📈 Pipeline Metrics")
+        print(f"{'='*60}")
+        for stage in report['stages']:
+            print(f"  {stage['stage']}:")
+            print(f"    Items: {stage['items']} ({stage['failures']} failed)")
+            print(f"    Busy: {stage['busy_s']:.1f}s ({stage['utilization']:.0%} utilization)")
+            print(f"    Throughput: {stage['per_minute']:.1f} per minute")
+            print(f"    Waiting for input: {stage['starved_s']:.1f}s, "
+                  f"blocked by next stage: {stage['blocked_s']:.1f}s")
+        print(f"  Wall time: {report['wall_s']:.1f}s "
+              f"(sequential would take {report['sequential_s']:.1f}s, "
+              f"speedup {report['speedup'] or 0:.2f}x)")
@@ -0,0 +1,154 @@
+"""
+Question prefetch
+-----------------
+Speculative background generation for the interactive quiz apps.
+
+While the student is answering, the app predicts the next likely
+(topic, difficulty) and hands it to QuestionPrefetcher, which generates
+it on a single daemon worker thread. When the student then picks that
+topic and difficulty, the finished (or already running) generation is
+taken over instead of starting a new one.
+
+- One worker: Ollama serves one generation at a time anyway, and a
+  second concurrent request would only slow down the real one.
+- Only the latest prediction is kept. A stale prediction that has not
+  started is cancelled; one that is already running is asked to stop.
+  The generate callable gets the job's stop flag and checks it between
+  streamed chunks, and then closes its stream, which also stops
+  generation on the server.
+- A miss in take() (the student picked something else) aborts the
+  prediction the same way, so it doesn't hold the model while the
+  student's question is generated.
+- The worker is a daemon thread, so quitting never waits for an
+  in-flight speculative request.
+"""
+
+import queue
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+
+class PrefetchJob:
+    """Result slot for one speculative generation (a minimal future)."""
+
+    PENDING, RUNNING, CANCELLED, FINISHED = range(4)
+
+    def __init__(self):
+        self._state = self.PENDING
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+        self._stop = threading.Event()
+
+    def cancel(self) -> bool:
+        """Cancel the job if the worker has not started it yet."""
+        with self._lock:
+            if self._state == self.PENDING:
+                self._state = self.CANCELLED
+                self._done.set()
+            return self._state == self.CANCELLED
+
+    def abort(self):
+        """Cancel the job, or ask a running one to stop (see stopping())."""
+        if not self.cancel():
+            self._stop.set()
+
+    def cancelled(self) -> bool:
+        return self._state == self.CANCELLED
+
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self, timeout: Optional[float] = None):
+        """Wait for the question dict (or None); re-raises a generation error."""
+        if not self._done.wait(timeout):
+            raise TimeoutError("Job still running")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _start(self) -> bool:
+        with self._lock:
+            if self._state != self.PENDING:
+                return False
+            self._state = self.RUNNING
+            return True
+
+    def _finish(self, result=None, error: Optional[BaseException] = None):
+        self._result, self._error = result, error
+        self._state = self.FINISHED
+        self._done.set()
+
+
+class QuestionPrefetcher:
+    """Generate the predicted next question while the student answers."""
+
+    def __init__(self, generate: Callable[..., Optional[Dict]]):
+        """
+        Args:
+            generate: Callable (topic, variation, stop) -> question dict or None;
+                `stop` is a threading.Event set when the job is aborted
+        """
+        self._generate = generate
+        self._jobs = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        # (topic id, difficulty name) -> (variation, job)
+        self._pending: Dict[Tuple[str, str], Tuple[object, PrefetchJob]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, topic, variation):
+        """Queue speculative generation for `variation` (replaces older predictions)."""
+        key = (topic.id, variation.difficulty.name)
+        with self._lock:
+            if key in self._pending:
+                return
+            for _, stale in self._pending.values():
+                stale.abort()
+            job = PrefetchJob()
+            self._pending = {key: (variation, job)}
+
+        self._ensure_worker()
+        self._jobs.put((job, topic, variation))
+
+    def take(self, topic_id: str, difficulty) -> Optional[Tuple[object, PrefetchJob]]:
+        """
+        Claim the prefetched question for a topic/difficulty.
+
+        Returns:
+            (variation, job) if this pair was predicted, otherwise None
+            (and the wrong prediction is aborted). The job may still be
+            running; its result is the question dict or None if
+            generation failed.
+        """
+        with self._lock:
+            entry = self._pending.pop((topic_id, difficulty.name), None)
+            if entry is None:
+                for _, stale in self._pending.values():
+                    stale.abort()
+                self._pending = {}
+        if entry is None or entry[1].cancelled():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="question-prefetch", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            job, topic, variation = self._jobs.get()
+            if not job._start():
+                continue  # Cancelled while queued
+            try:
+                job._finish(result=self._generate(topic, variation, job._stop))
+            except Exception as e:
+                job._finish(error=e)
@@ -0,0 +1,181 @@
+"""
+Student progress tracking
+-------------------------
+Per-topic scores and difficulty unlocking for the variation quiz apps.
+
+Scores are appended to a journal (see journal.py) and folded into
+student_progress.json periodically, so recording a score costs the same
+no matter how long the history is.
+
+For lab deployments pass a shared store (see store.py) and a student id
+instead of a file name; every score is then a row-level write keyed by
+that student.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from curriculum.curriculum_with_variations import DifficultyLevel
+from curriculum.prerequisite_graph import PrerequisiteGraph, UnlockState
+from .journal import ProgressJournal
+
+PROGRESS_FILE = "student_progress.json"
+
+
+class StudentProgress:
+    """Track student progress through curriculum"""
+
+    def __init__(self, filename: str = PROGRESS_FILE, prerequisites: Optional[PrerequisiteGraph] = None,
+                 student_id: Optional[str] = None, store=None):
+        self.filename = filename
+        self.student_id = student_id
+        if store is not None:
+            if not student_id:
+                raise ValueError("A student id is required with a shared progress store")
+            self.journal = store.journal(student_id)
+        else:
+            self.journal = ProgressJournal(filename)
+        # Best score, best total and attempt count per (topic, difficulty)
+        self.best: Dict[Tuple[str, str], Dict] = {}
+        self.progress = self.load_progress()
+        self.unlock_state = None
+        self.newly_unlocked: List[str] = []
+        if prerequisites is not None:
+            completed = [topic_id for topic_id in self.progress if self.is_topic_completed(topic_id)]
+            self.unlock_state = UnlockState(prerequisites, completed)
+
+    def load_progress(self) -> Dict:
+        """Load progress from the snapshot and replay the journal"""
+        progress = self.journal.load(self._apply_record)
+
+        self.best = {}
+        for topic_id, topic_progress in progress.items():
+            for diff_key, scores in topic_progress.get('scores', {}).items():
+                for entry in scores:
+                    self._update_best(topic_id, diff_key, entry['score'], entry['total'])
+        return progress
+
+    def save_progress(self):
+        """Write a full snapshot of the progress and empty the journal"""
+        self.journal.compact(self.progress)
+
+    @staticmethod
+    def _new_topic_progress() -> Dict:
+        return {
+            'current_difficulty': DifficultyLevel.BEGINNER.value,
+            'completed_difficulties': [],
+            'scores': {},
+            'unlocked': False
+        }
+
+    @staticmethod
+    def _apply_record(progress: Dict, record: Dict):
+        """Fold one journal record into a progress dict (KeyError before any change if a field is missing)"""
+        topic_id, diff_key = record['topic'], record['difficulty']
+        entry = {'score': record['score'], 'total': record['total']}
+        topic_progress = progress.setdefault(topic_id, StudentProgress._new_topic_progress())
+        topic_progress['scores'].setdefault(diff_key, []).append(entry)
+
+    def _update_best(self, topic_id: str, diff_key: str, score: int, total: int) -> Dict:
+        best = self.best.get((topic_id, diff_key))
+        if best is None:
+            best = self.best[(topic_id, diff_key)] = {'score': score, 'total': total, 'attempts': 0}
+        best['score'] = max(best['score'], score)
+        best['total'] = max(best['total'], total)
+        best['attempts'] += 1
+        return best
+
+    def get_best(self, topic_id: str, difficulty: DifficultyLevel) -> Optional[Dict]:
+        """Best score, best total and attempt count for a topic/difficulty, or None"""
+        return self.best.get((topic_id, difficulty.name))
+
+    def get_topic_progress(self, topic_id: str) -> Dict:
+        """Get progress for a topic"""
+        if topic_id not in self.progress:
+            self.progress[topic_id] = self._new_topic_progress()
+        return self.progress[topic_id]
+
+    def update_score(self, topic_id: str, difficulty: DifficultyLevel, score: int, total: int):
+        """Update score for a topic/difficulty"""
+        record = {'topic': topic_id, 'difficulty': difficulty.name, 'score': score, 'total': total}
+        self.journal.append(record)
+        self._apply_record(self.progress, record)
+        best_score = self._update_best(topic_id, difficulty.name, score, total)['score']
+
+        # Attempting BEGINNER completes the topic; only its dependents are re-checked
+        self.newly_unlocked = []
+        if difficulty == DifficultyLevel.BEGINNER and self.unlock_state is not None:
+            self.newly_unlocked = self.unlock_state.complete(topic_id)
+
+        if self.journal.needs_compaction():
+            self.save_progress()
+        return best_score
+
+    def is_difficulty_unlocked(self, topic_id: str, difficulty: DifficultyLevel) -> bool:
+        """Check if difficulty is unlocked"""
+        # BEGINNER always unlocked
+        if difficulty == DifficultyLevel.BEGINNER:
+            return True
+
+        # Check if previous difficulty is passed
+        prev_levels = {
+            DifficultyLevel.INTERMEDIATE: DifficultyLevel.BEGINNER,
+            DifficultyLevel.ADVANCED: DifficultyLevel.INTERMEDIATE,
+            DifficultyLevel.EXPERT: DifficultyLevel.ADVANCED
+        }
+
+        prev_level = prev_levels.get(difficulty)
+        if not prev_level:
+            return True
+
+        # Check if previous level has any scores
+        return (topic_id, prev_level.name) in self.best
+
+    def is_topic_completed(self, topic_id: str) -> bool:
+        """Check if topic counts as done for unlocking (BEGINNER attempted)"""
+        return (topic_id, DifficultyLevel.BEGINNER.name) in self.best
+
+    def is_topic_unlocked(self, topic_id: str) -> bool:
+        """
+        Check if topic is unlocked.
+
+        With a prerequisite graph, all of the topic's prerequisites must be
+        completed. Without one, this falls back to the topic's own BEGINNER
+        attempt (the old sequential unlock check).
+        """
+        if self.unlock_state is not None:
+            return self.unlock_state.is_unlocked(topic_id)
+        return self.is_topic_completed(topic_id)
+
+    def missing_prerequisites(self, topic_id: str) -> List[str]:
+        """Prerequisites of a topic that still need their BEGINNER level"""
+        if self.unlock_state is None:
+            return []
+        return self.unlock_state.missing_prerequisites(topic_id)
+
+    def get_current_difficulty(self, topic_id: str) -> DifficultyLevel:
+        """Get current difficulty for topic"""
+        progress = self.get_topic_progress(topic_id)
+
+        # Find highest unlocked difficulty
+        for level in [DifficultyLevel.EXPERT, DifficultyLevel.ADVANCED,
+                      DifficultyLevel.INTERMEDIATE, DifficultyLevel.BEGINNER]:
+            if self.is_difficulty_unlocked(topic_id, level):
+                return level
+
+        return DifficultyLevel.BEGINNER
+
+    def predict_next_difficulty(self, topic_id: str,
+                                answering: Optional[DifficultyLevel] = None) -> DifficultyLevel:
+        """
+        Guess the difficulty the student picks next for a topic.
+
+        Students usually go for the highest unlocked level. If they are
+        still answering a question at `answering`, that attempt is counted
+        as recorded, since it unlocks the following level either way.
+        """
+        level = self.get_current_difficulty(topic_id)
+        if answering is not None and answering.value < DifficultyLevel.EXPERT.value:
+            following = DifficultyLevel(answering.value + 1)
+            if following.value > level.value:
+                level = following
+        return level
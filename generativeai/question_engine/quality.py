@@ -0,0 +1,205 @@
+"""
+Question quality checks
+-----------------------
+Automated checks for generated fill-in-the-blank questions, used by the
+evaluation framework:
+
+- format_compliance: structure of the question dict (0.0-1.0)
+- consistency: every target is in the code, and filling the blanks back
+  in gives the original code (0.0-1.0)
+- distractor_quality: plausibility of the wrong options, looked up in
+  the DistractorIndex (1-5)
+- code_correctness: `g++ -fsyntax-only` through the shared
+  CompileChecker (precompiled headers, cached); a structural check
+  (main function, balanced brackets) when g++ is not installed
+- difficulty_estimate: 1-5 from code size and the C++ features used
+
+Every check is a pure function of the question dict, so evaluation can
+run in worker processes and results can be cached by question_hash().
+"""
+
+import difflib
+import hashlib
+import json
+import re
+from typing import Dict, List, Optional, Set
+
+from .compile_check import default_checker
+from .extractor import CppTokenExtractor
+from .validator import blank_marker
+
+# Features that make a snippet harder to read, with their weight
+_DIFFICULTY_FEATURES = [
+    (re.compile(r'\btemplate\s*<'), 2),
+    (re.compile(r'\[[^\]]*\]\s*\([^)]*\)\s*(->\s*\w+\s*)?\{'), 2),  # Lambda
+    (re.compile(r'\b(unique_ptr|shared_ptr|weak_ptr)\b'), 2),
+    (re.compile(r'\b(try|catch|throw)\b'), 1),
+    (re.compile(r'\b(class|struct)\b'), 1),
+    (re.compile(r'\b(virtual|override)\b'), 1),
+    (re.compile(r'\b(map|set|unordered_map|queue|stack|deque)\b'), 1),
+    (re.compile(r'\*\s*\w+\s*=|->'), 1),  # Pointers
+    (re.compile(r'\bstd::(sort|find|transform|accumulate|for_each)\b'), 1),
+]
+
+
+def question_hash(question: Dict) -> str:
+    """Stable hash of what is evaluated (code, blanks, targets and options)."""
+    sub_questions = [
+        [sq.get('number'), sq.get('target'), sorted(map(str, sq.get('options', [])))]
+        for sq in question.get('sub_questions') or []
+    ]
+    canonical = json.dumps([question.get('code'), question.get('question_code'), sub_questions],
+                           sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class DistractorIndex:
+    """
+    Plausibility of a wrong option for a target, from the extractor's
+    curated distractor table and keyword categories:
+
+        5  curated distractor for this target
+        4  another keyword of the target's category
+        3  a known C++ keyword or curated distractor (wrong category)
+        2  lexically close to the target
+        1  anything else (placeholders, duplicates of the target)
+    """
+
+    _curated: Dict[str, Set[str]] = {}
+    _categories: Dict[str, Set[str]] = {}
+    _vocabulary: Set[str] = set()
+
+    @classmethod
+    def _build(cls):
+        cls._curated = {target: set(options) for target, options in CppTokenExtractor.DISTRACTORS.items()}
+        cls._categories = {}
+        for category, keywords in CppTokenExtractor.KEYWORDS.items():
+            for keyword in keywords:
+                cls._categories.setdefault(keyword, set()).add(category)
+        cls._vocabulary = set(cls._categories)
+        for options in cls._curated.values():
+            cls._vocabulary.update(options)
+
+    @classmethod
+    def score(cls, target: str, distractor: str) -> int:
+        target, distractor = target.strip(), distractor.strip()
+        if not distractor or distractor == target or re.fullmatch(r'option\d*', distractor):
+            return 1
+        if distractor in cls._curated.get(target, ()):
+            return 5
+        if cls._categories.get(target, set()) & cls._categories.get(distractor, set()):
+            return 4
+        if distractor in cls._vocabulary:
+            return 3
+        if difflib.SequenceMatcher(None, target.lower(), distractor.lower()).ratio() >= 0.5:
+            return 2
+        return 1
+
+    @classmethod
+    def question_score(cls, question: Dict) -> float:
+        """Average plausibility of all distractors (1.0 if there are none)."""
+        scores = [
+            cls.score(str(sq.get('target', '')), str(option))
+            for sq in question.get('sub_questions') or []
+            for option in sq.get('options', [])
+            if option != sq.get('target')
+        ]
+        return sum(scores) / len(scores) if scores else 1.0
+
+
+DistractorIndex._build()
+
+
+def format_compliance(question: Dict) -> float:
+    """Fraction of structural checks the question passes."""
+    checks: List[bool] = []
+    sub_questions = question.get('sub_questions')
+    checks.append(isinstance(question.get('code'), str) and bool(question['code'].strip()))
+    checks.append(isinstance(question.get('question_code'), str))
+    checks.append(isinstance(sub_questions, list) and bool(sub_questions))
+    if not checks[-1]:
+        return sum(checks) / (len(checks) + 1)
+
+    checks.append(question.get('num_blanks') == len(sub_questions))
+    for i, sq in enumerate(sub_questions, 1):
+        options = sq.get('options') or []
+        answer = sq.get('answer')
+        checks.append(sq.get('number') == i)
+        checks.append(len(options) == 4 and len(set(options)) == 4)
+        checks.append(isinstance(answer, int) and 1 <= answer <= len(options)
+                      and options[answer - 1] == sq.get('target'))
+        checks.append(blank_marker(i) in (question.get('question_code') or ''))
+    return sum(checks) / len(checks)
+
+
+def consistency(question: Dict) -> float:
+    """Targets found in the code, plus whether filling every blank restores the code."""
+    code = question.get('code') or ''
+    question_code = question.get('question_code') or ''
+    sub_questions = question.get('sub_questions') or []
+    if not sub_questions:
+        return 0.0
+
+    found = sum(1 for sq in sub_questions if sq.get('target') and sq['target'] in code)
+    restored = question_code
+    for sq in sub_questions:
+        restored = restored.replace(blank_marker(sq.get('number', 0)), str(sq.get('target', '')), 1)
+    return (found / len(sub_questions) + (1.0 if restored == code else 0.0)) / 2
+
+
+def compiles(code: str) -> Optional[bool]:
+    """`g++ -std=c++17 -fsyntax-only` on the code; None if g++ is not installed."""
+    checker = default_checker()
+    if checker is None:
+        return None
+    return checker.check(code).ok
+
+
+def looks_complete(code: str) -> bool:
+    """Structural fallback: a main function and balanced brackets."""
+    if not re.search(r'\bint\s+main\s*\(', code):
+        return False
+    pairs = {')': '(', ']': '[', '}': '{'}
+    stack = []
+    for ch in re.sub(r'"(\\.|[^"\\])*"|\'(\\.|[^\'\\])*\'|//[^\n]*', '', code):
+        if ch in '([{':
+            stack.append(ch)
+        elif ch in pairs:
+            if not stack or stack.pop() != pairs[ch]:
+                return False
+    return not stack
+
+
+def difficulty(code: str) -> int:
+    """1 (a few lines, basics) to 5 (long, templates/lambdas/smart pointers)."""
+    lines = [line for line in code.splitlines() if line.strip()]
+    points = 0 if len(lines) <= 10 else 1 if len(lines) <= 25 else 2
+    points += sum(weight for pattern, weight in _DIFFICULTY_FEATURES if pattern.search(code))
+    return max(1, min(5, 1 + points))
+
+
+def evaluate_question(question: Dict, compile_check: bool = True) -> Dict:
+    """
+    Run every check on one question.
+
+    Returns:
+        QualityMetrics fields plus 'compile_checked' (False when the
+        structural fallback was used) and 'overall' (0.0-1.0)
+    """
+    code = question.get('code') or ''
+    compiled = compiles(code) if compile_check and code else None
+    compile_checked = compiled is not None
+    code_correctness = compiled if compile_checked else looks_complete(code)
+
+    metrics = {
+        'format_compliance': round(format_compliance(question), 3),
+        'consistency': round(consistency(question), 3),
+        'distractor_quality': round(DistractorIndex.question_score(question), 2),
+        'code_correctness': bool(code_correctness),
+        'difficulty_estimate': difficulty(code),
+        'compile_checked': compile_checked,
+    }
+    metrics['overall'] = round((metrics['format_compliance'] + metrics['consistency']
+                                + (metrics['distractor_quality'] - 1) / 4
+                                + (1.0 if metrics['code_correctness'] else 0.0)) / 4, 3)
+    return metrics
@@ -0,0 +1,589 @@
+"""
+Interactive quiz
+----------------
+QuizApp is the interactive fill-in-the-blank quiz shared by the
+variation quiz apps: topic and difficulty menus, showing a question
+while it streams in and asking its blanks, progress tracking and
+unlocking, prefetching the next question, compile checking, and the
+command line wiring (--student / --progress-db / --compile-check /
+--no-prefetch).
+
+Each app only supplies its question generator and what differs per
+model (banner, wait message, --help text):
+
+    class QuizApp1_5b(QuizApp):
+        TITLE = "⚡ C++ PROGRAMMING QUIZ - Fast Progressive Difficulty System"
+        GENERATING_MESSAGE = "Fast generation with 1.5b model..."
+
+    run_quiz_cli(QuizApp1_5b, QuestionGenerator1_5b, description=..., epilog=...)
+
+A generator has generate_question(topic, variation, num_blanks) and
+stream_question(topic, variation, num_blanks, priority, stop) (see
+question_engine.streaming), and takes an optional scheduler. The CLI
+gives it one in-process ModelScheduler, so a prefetch (BACKGROUND) queues
+behind the question the student is waiting for (INTERACTIVE) instead of
+competing with it. Prefetching streams too, so a wrong guess is stopped
+between chunks instead of running to the end. Curriculum data and saved progress load when the app
+is created, not at import.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from .console import configure_console
+from .streaming import CODE_LINE, CODE, BLANKS, SUB_QUESTION
+
+COMPILE_CACHE_FILE = "compile_cache.json"
+COMPILE_RETRIES = 2  # New attempts when streamed code does not compile
+
+if TYPE_CHECKING:
+    from curriculum.curriculum_with_variations import DifficultyLevel, TopicWithVariations, SpecificationVariation
+
+
+class QuizApp:
+    """Interactive quiz application with difficulty progression"""
+
+    TITLE = "🎓 C++ PROGRAMMING QUIZ - Progressive Difficulty System"
+    FEATURES = ()  # Extra lines for the welcome message
+    GENERATING_MESSAGE = ""
+
+    def __init__(self, generator, student_id: Optional[str] = None, progress_db: Optional[str] = None,
+                 prefetch: bool = True, compile_check: bool = False):
+        from curriculum.curriculum_with_variations import EnhancedCurriculum
+        from .progress import StudentProgress
+
+        self.generator = generator
+        self.curriculum = EnhancedCurriculum()
+        store = None
+        if progress_db:
+            from .store import open_progress_store
+            store = open_progress_store(progress_db)
+        self.progress = StudentProgress(prerequisites=self.curriculum.get_prerequisite_graph(),
+                                        student_id=student_id, store=store)
+        self.questions = []
+        self.score = 0
+        self.total_questions = 0
+
+        # Reject generated code that g++ does not accept
+        self.compile_checker = None
+        if compile_check:
+            from .compile_check import CompileChecker, compiler_available
+            if compiler_available():
+                self.compile_checker = CompileChecker(cache_file=COMPILE_CACHE_FILE)
+            else:
+                print("⚠️  g++ not found, compile checking disabled")
+
+        # Speculative generation of the next question while the student answers
+        self.prefetcher = None
+        if prefetch:
+            from .prefetch import QuestionPrefetcher
+            self.prefetcher = QuestionPrefetcher(self.prefetch_question)
+        self.last_topic = None  # Menu cursor: the topic picked most recently
+
+    def code_compiles(self, code: str) -> bool:
+        """True unless compile checking is on and g++ rejects the code"""
+        return self.compile_checker is None or self.compile_checker.accepts({'code': code})
+
+    def checked(self, question: Optional[Dict]) -> Optional[Dict]:
+        """The question, or None if its code does not compile"""
+        return question if question and self.code_compiles(question['code']) else None
+
+    def display_welcome(self):
+        """Display welcome message"""
+        print("\n" + "="*80)
+        print(self.TITLE)
+        print("="*80)
+        print("\nWelcome to the enhanced C++ programming quiz!")
+        print("Answer fill-in-the-blank questions to unlock new difficulty levels.")
+        print("\nNew Features:")
+        print("  ✨ Multiple specification variations per topic")
+        print("  📈 Progressive difficulty (BEGINNER → INTERMEDIATE → ADVANCED → EXPERT)")
+        print("  🔓 Unlock system - pass BEGINNER to advance topics")
+        print("  🏆 Challenge mode - return to topics for EXPERT level")
+        print("  💾 Progress tracking - your scores are saved")
+        for line in self.FEATURES:
+            print(f"  {line}")
+        print("="*80)
+
+    def display_topic_menu(self):
+        """Display topic selection menu"""
+        topics = self.curriculum.get_all_topics()
+
+        print("\n" + "="*80)
+        print("📚 SELECT TOPIC")
+        print("="*80)
+
+        for i, topic in enumerate(topics, 1):
+            progress = self.progress.get_topic_progress(topic.id)
+
+            # Check if unlocked (all prerequisites have their BEGINNER level done)
+            unlocked = self.progress.is_topic_unlocked(topic.id)
+
+            # Display status
+            if unlocked:
+                # Show difficulty progress
+                difficulties_done = len(progress['scores'])
+                status = f"[{difficulties_done}/4 difficulties]"
+                print(f"  {i}. {topic.name} {'⭐' * topic.base_difficulty} {status}")
+            else:
+                print(f"  {i}. {topic.name} 🔒 (Complete BEGINNER level of: {self.prerequisite_names(topic.id)})")
+
+        print(f"  {len(topics)+1}. View Progress")
+        print(f"  0. Exit")
+        print("="*80)
+
+        while True:
+            try:
+                choice = int(input("\nSelect topic (0 to exit): ").strip())
+                if choice == 0:
+                    return None
+                elif choice == len(topics) + 1:
+                    self.display_progress_report()
+                    self.display_topic_menu()
+                    return None
+                elif 1 <= choice <= len(topics):
+                    topic = topics[choice - 1]
+                    # Check if unlocked
+                    if self.progress.is_topic_unlocked(topic.id):
+                        return topic
+                    else:
+                        print(f"❌ This topic is locked. Complete BEGINNER level of: {self.prerequisite_names(topic.id)}")
+                else:
+                    print(f"Please enter 0-{len(topics)+1}")
+            except ValueError:
+                print("Please enter a valid number")
+
+    def prerequisite_names(self, topic_id: str) -> str:
+        """Names of the prerequisites a topic is still waiting for"""
+        missing = self.progress.missing_prerequisites(topic_id)
+        return ", ".join(self.curriculum.get_topic_by_id(p).name for p in missing)
+
+    def display_difficulty_menu(self, topic: TopicWithVariations):
+        """Display difficulty selection for a topic"""
+        from curriculum.curriculum_with_variations import DifficultyLevel
+
+        print("\n" + "="*80)
+        print(f"📊 DIFFICULTY LEVELS - {topic.name}")
+        print("="*80)
+
+        for level in DifficultyLevel:
+            variations = topic.get_variations_by_difficulty(level)
+            if not variations:
+                continue
+
+            unlocked = self.progress.is_difficulty_unlocked(topic.id, level)
+
+            # Get best score if attempted
+            best = self.progress.get_best(topic.id, level)
+
+            # Display
+            if unlocked:
+                status = f"✅ Best: {best['score']}/{best['total']}" if best else "📝 Not attempted"
+                print(f"  {level.value}. {level.name} ({len(variations)} variations) - {status}")
+            else:
+                print(f"  {level.value}. {level.name} 🔒 (Complete previous difficulty first)")
+
+        print(f"  0. Back to topic selection")
+        print("="*80)
+
+        while True:
+            try:
+                choice = int(input("\nSelect difficulty (0 to go back): ").strip())
+                if choice == 0:
+                    return None
+
+                # Find difficulty by value
+                selected_diff = None
+                for level in DifficultyLevel:
+                    if level.value == choice:
+                        selected_diff = level
+                        break
+
+                if selected_diff and self.progress.is_difficulty_unlocked(topic.id, selected_diff):
+                    variations = topic.get_variations_by_difficulty(selected_diff)
+                    if variations:
+                        return random.choice(variations)  # Pick random variation
+                    else:
+                        print("No variations available for this difficulty")
+                else:
+                    print("❌ This difficulty is locked or invalid. Complete previous difficulty first.")
+            except ValueError:
+                print("Please enter a valid number")
+
+    def display_progress_report(self):
+        """Display student's overall progress"""
+        from curriculum.curriculum_with_variations import DifficultyLevel
+
+        print("\n" + "="*80)
+        print("📊 YOUR PROGRESS REPORT")
+        print("="*80)
+
+        topics = self.curriculum.get_all_topics()
+
+        for topic in topics:
+            progress = self.progress.get_topic_progress(topic.id)
+
+            print(f"\n{topic.name}:")
+
+            if not progress['scores']:
+                print("  Not started")
+                continue
+
+            for level in DifficultyLevel:
+                best = self.progress.get_best(topic.id, level)
+                if best:
+                    print(f"  {level.name}: {best['score']}/{best['total']} (best of {best['attempts']} attempts)")
+
+        print("\n" + "="*80)
+        input("\nPress Enter to continue...")
+
+    def display_topic_info(self, topic: TopicWithVariations, variation: SpecificationVariation):
+        """Display topic and variation information"""
+        print(f"\n{'='*80}")
+        print(f"📚 Topic: {topic.name}")
+        print(f"{'='*80}")
+        print(f"Description: {topic.description}")
+        print(f"Base Difficulty: {'⭐' * topic.base_difficulty} ({topic.base_difficulty}/5)")
+        print(f"\n🎯 Challenge Level: {variation.difficulty.name}")
+        print(f"Specification: {variation.specification}")
+        print(f"Minimum score to pass: {variation.min_score}/3")
+        print("="*80)
+
+    def display_question(self, question: Dict):
+        """Display a question"""
+        print(f"\n{'='*80}")
+        print(f"FILL-IN-THE-BLANK QUESTION")
+        print(f"{'='*80}")
+        print("\nComplete Code:")
+        print("```cpp")
+        print(question['code'])
+        print("```")
+        self.display_blanked_code(question['question_code'])
+
+    def ask_question(self, question: Dict) -> int:
+        """Ask all sub-questions and return score"""
+        score = 0
+
+        for sq in question['sub_questions']:
+            correct = self.ask_sub_question(sq)
+            if correct is None:
+                return score
+            score += correct
+
+        return score
+
+    def ask_sub_question(self, sq: Dict) -> Optional[int]:
+        """Ask one blank; returns 1 if correct, 0 if not, None if interrupted"""
+        print(f"\n--- Blank {sq['number']} ---")
+        print("Options:")
+        for i, option in enumerate(sq['options'], 1):
+            print(f"  {i}. {option}")
+
+        # Get user answer
+        while True:
+            try:
+                answer = input(f"\nYour answer (1-{len(sq['options'])}): ").strip()
+                answer_num = int(answer)
+                if 1 <= answer_num <= len(sq['options']):
+                    sq['user_answer'] = answer_num
+                    break
+                else:
+                    print(f"Please enter a number between 1 and {len(sq['options'])}")
+            except ValueError:
+                print("Please enter a valid number")
+            except KeyboardInterrupt:
+                print("\n\nQuiz interrupted by user.")
+                return None
+
+        # Check answer
+        if sq['user_answer'] == sq['answer']:
+            print("✅ Correct!")
+            return 1
+
+        correct_option = sq['options'][sq['answer'] - 1]
+        user_option = sq['options'][sq['user_answer'] - 1]
+        print(f"❌ Incorrect. You answered: {user_option}")
+        print(f"   Correct answer: {correct_option}")
+        return 0
+
+    def display_blanked_code(self, question_code: str):
+        """Show the code with numbered blanks"""
+        print("\nFill in the blanks:")
+        print("```cpp")
+        print(question_code)
+        print("```")
+
+    def display_question_summary(self, question: Dict, score: int, total: int):
+        """Display summary for this question"""
+        from curriculum.curriculum_with_variations import DifficultyLevel
+
+        variation = question['variation']
+        percentage = (score / total * 100) if total > 0 else 0
+
+        print(f"\n{'='*80}")
+        print(f"📊 RESULTS")
+        print(f"{'='*80}")
+        print(f"Score: {score}/{total} ({percentage:.1f}%)")
+        print(f"Required to pass: {variation.min_score}/{total}")
+
+        if score >= variation.min_score:
+            print(f"✅ PASSED! Great job!")
+
+            # Check if this unlocks next difficulty
+            topic = question['topic']
+            next_level = None
+            if variation.difficulty == DifficultyLevel.BEGINNER:
+                next_level = DifficultyLevel.INTERMEDIATE
+            elif variation.difficulty == DifficultyLevel.INTERMEDIATE:
+                next_level = DifficultyLevel.ADVANCED
+            elif variation.difficulty == DifficultyLevel.ADVANCED:
+                next_level = DifficultyLevel.EXPERT
+
+            if next_level:
+                print(f"🔓 {next_level.name} difficulty unlocked for this topic!")
+        else:
+            print(f"❌ Need {variation.min_score - score} more correct to pass")
+            print(f"💪 Try again to improve your score!")
+
+        for topic_id in self.progress.newly_unlocked:
+            print(f"🔓 New topic unlocked: {self.curriculum.get_topic_by_id(topic_id).name}")
+
+        print(f"{'='*80}")
+
+    def prefetch_question(self, topic: TopicWithVariations, variation: SpecificationVariation,
+                          stop: threading.Event) -> Optional[Dict]:
+        """Speculative generation for the prefetcher; gives up once `stop` is set"""
+        from .scheduler import BACKGROUND
+
+        events = self.generator.stream_question(topic, variation, num_blanks=3,
+                                                priority=BACKGROUND, stop=stop)
+        question = None
+        try:
+            for kind, payload in events:
+                if kind == CODE and not self.code_compiles(payload):
+                    break
+                if kind == 'question':
+                    question = payload
+        finally:
+            events.close()
+        return self.checked(question)
+
+    def prefetch_next(self, answering: Optional[DifficultyLevel] = None):
+        """Start generating the question the student most likely picks next"""
+        if self.prefetcher is None:
+            return
+
+        topic = self.last_topic
+        if topic is None:
+            # Nothing picked yet: the first unlocked topic not completed so far
+            topics = self.curriculum.get_all_topics()
+            topic = next((t for t in topics
+                          if self.progress.is_topic_unlocked(t.id)
+                          and not self.progress.is_topic_completed(t.id)), None)
+            if topic is None:
+                return
+
+        level = self.progress.predict_next_difficulty(topic.id, answering)
+        variations = topic.get_variations_by_difficulty(level)
+        if variations:
+            self.prefetcher.prefetch(topic, random.choice(variations))
+
+    def take_prefetched(self, topic: TopicWithVariations, variation: SpecificationVariation):
+        """Return (variation, question) from the prefetcher, or (variation, None) on a miss"""
+        if self.prefetcher is None:
+            return variation, None
+        prefetched = self.prefetcher.take(topic.id, variation.difficulty)
+        if prefetched is None:
+            return variation, None
+
+        prefetched_variation, job = prefetched
+        if not job.done():
+            print("\n⏳ Finishing prefetched question...")
+        try:
+            question = job.result()
+        except Exception as e:
+            print(f"⚠️  Prefetch failed ({e}), generating again...")
+            return variation, None
+        if question is None:
+            return variation, None
+        # The prefetched variation was also picked at random from this level
+        return prefetched_variation, question
+
+    def run_streamed_question(self, topic: TopicWithVariations, variation: SpecificationVariation,
+                              retries: int = COMPILE_RETRIES) -> Tuple[Optional[Dict], int]:
+        """
+        Generate a question while showing it: code lines are printed as they
+        stream in and each blank is asked as soon as it is ready. With
+        compile checking, code that does not compile is dropped before
+        any blank is asked and generated again (up to `retries` times).
+
+        Returns:
+            (question, score), or (None, 0) if generation failed. If the
+            student quit early, score covers the blanks answered so far
+        """
+        print(f"\n{'='*80}")
+        print(f"FILL-IN-THE-BLANK QUESTION")
+        print(f"{'='*80}")
+        print("\nComplete Code:")
+        print("```cpp")
+
+        events = self.generator.stream_question(topic, variation, num_blanks=3)
+        code_open, interrupted, rejected = True, False, False
+        question, blanks, score, asked = None, None, 0, {}
+        try:
+            for kind, payload in events:
+                if kind == CODE_LINE:
+                    print(payload, flush=True)
+                    continue
+                if code_open and kind != CODE_LINE:
+                    print("```")
+                    code_open = False
+                if kind == CODE and not self.code_compiles(payload):
+                    rejected = True
+                    break
+                if kind == BLANKS:
+                    self.display_blanked_code(payload['question_code'])
+                    blanks = payload
+                elif kind == SUB_QUESTION:
+                    correct = self.ask_sub_question(payload)
+                    asked[payload['number']] = payload
+                    if correct is None:
+                        interrupted = True
+                        break
+                    score += correct
+                elif kind == 'question':
+                    question = payload
+                    # Generation is done; the next one can start while the rest is answered
+                    self.prefetch_next(answering=variation.difficulty)
+        finally:
+            events.close()  # Stops generation if the student quit early
+
+        if code_open:
+            print("```")
+        if rejected:
+            if retries <= 0:
+                return None, 0
+            print("\n⚠️  This code does not compile, generating another version...")
+            return self.run_streamed_question(topic, variation, retries - 1)
+        if interrupted:
+            # Record what was answered, like ask_question() does. Before
+            # generation finished only the blanks are known: the ones not
+            # asked yet count as wrong
+            if question is None:
+                question = {'code': blanks['code'],
+                            'question_code': blanks['question_code'],
+                            'sub_questions': [asked[n] for n in sorted(asked)],
+                            'num_blanks': len(blanks['targets']),
+                            'topic': topic, 'variation': variation}
+            return question, score
+        if question is None:
+            return None, 0
+
+        # Blanks that only became available at the end of the response
+        if blanks is None:
+            self.display_blanked_code(question['question_code'])
+        for sq in question['sub_questions']:
+            if sq['number'] in asked:
+                continue
+            correct = self.ask_sub_question(sq)
+            if correct is None:
+                break
+            score += correct
+        return question, score
+
+    def run_quiz(self):
+        """Run the interactive quiz"""
+        self.display_welcome()
+        self.prefetch_next()
+
+        while True:
+            # Select topic
+            topic = self.display_topic_menu()
+            if topic is None:
+                print("\nThank you for using the quiz! Goodbye! 👋")
+                break
+
+            self.last_topic = topic
+
+            # Select difficulty
+            variation = self.display_difficulty_menu(topic)
+            if variation is None:
+                continue
+
+            # Use the prefetched question if this pair was predicted
+            variation, question = self.take_prefetched(topic, variation)
+            self.display_topic_info(topic, variation)
+
+            if question is not None:
+                print("✅ Question ready!")
+                input("\nPress Enter to start...")
+
+                # Display and ask question
+                self.display_question(question)
+                self.prefetch_next(answering=variation.difficulty)
+                score = self.ask_question(question)
+            else:
+                # Show the question while it is generated
+                print(f"\n⏳ Generating question...")
+                print(self.GENERATING_MESSAGE)
+                question, score = self.run_streamed_question(topic, variation)
+
+                if not question:
+                    print("\n❌ Failed to generate question. Please try again.")
+                    input("\nPress Enter to continue...")
+                    continue
+
+            num_blanks = question['num_blanks']
+
+            # Update progress
+            self.progress.update_score(topic.id, variation.difficulty, score, num_blanks)
+
+            # Display summary
+            self.display_question_summary(question, score, num_blanks)
+
+            input("\nPress Enter to continue...")
+
+
+def run_quiz_cli(app_class, generator_class, description: str, epilog: str):
+    """Command line entry point of a quiz app: parse arguments and run the quiz"""
+    parser = argparse.ArgumentParser(
+        description=description,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=epilog
+    )
+    parser.add_argument('--no-prefetch', action='store_true',
+                        help='Do not generate the next question in the background')
+    parser.add_argument('--no-scheduler', action='store_true',
+                        help='Send requests straight to Ollama instead of through the model scheduler')
+    parser.add_argument('--compile-check', action='store_true',
+                        help='Reject generated code that does not compile (needs g++)')
+    parser.add_argument('--student', help='Student id (required with --progress-db)')
+    parser.add_argument('--progress-db',
+                        help='Shared SQLite progress database for lab deployments '
+                             '(falls back to file locks if WAL is unavailable)')
+    args = parser.parse_args()
+    if args.progress_db and not args.student:
+        parser.error("--student is required with --progress-db")
+    configure_console()
+
+    scheduler = None
+    if not args.no_scheduler:
+        # One queue for this process: live questions go before prefetching
+        from .scheduler import ModelScheduler
+        scheduler = ModelScheduler()
+
+    app = app_class(generator_class(scheduler=scheduler), student_id=args.student,
+                    progress_db=args.progress_db, prefetch=not args.no_prefetch,
+                    compile_check=args.compile_check)
+    try:
+        app.run_quiz()
+    except KeyboardInterrupt:
+        print("\n\nQuiz interrupted. Goodbye!")
+    except Exception as e:
+        print(f"\n❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,212 @@
+"""
+Model residency manager
+-----------------------
+Keeps track of which models the Ollama server has in memory (/api/ps)
+so clients stop paying for model swaps they could have avoided:
+
+- warm(): loads a model ahead of time with an empty, zero-token
+  generate request, so the first real request does not wait for it
+- order_jobs(): groups queued jobs by model, resident models first,
+  so each model is loaded once per batch instead of once per job
+- can_hold(): tells whether all models of a workload fit in memory at
+  the same time (otherwise stages should not be interleaved)
+- release(): unloads a model that the rest of the workload won't use
+- before_call()/after_call(): count model switches and cold loads
+
+Thread-safe: the scheduler worker and the caller's thread both use one
+instance, so the counters and the snapshot are only changed under a
+lock (never held during HTTP). The snapshot dict is replaced, not
+mutated, so readers can iterate it without the lock.
+
+Usage:
+    residency = ModelResidency(base_url)
+    residency.prepare(["qwen2.5:1.5b", "qwen2.5:14b"])
+    if not residency.can_hold(["qwen2.5:1.5b", "qwen2.5:14b"]):
+        jobs = residency.order_jobs(jobs, model_of=lambda job: job.model)
+    residency.print_metrics()
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .config import OLLAMA_URL, KEEP_ALIVE
+from .ollama import get_session
+
+POLL_INTERVAL = 5.0  # Seconds an /api/ps snapshot is trusted
+PS_TIMEOUT = 5
+LOAD_TIMEOUT = 300   # Loading a large model can take minutes
+
+
+def _same_model(name: str, model: str) -> bool:
+    """Ollama reports "llama3" as "llama3:latest"."""
+    return name == model or name == f"{model}:latest"
+
+
+class ModelResidency:
+    """Polls /api/ps, pre-warms models and counts swaps for one Ollama server."""
+
+    def __init__(self, base_url: str = OLLAMA_URL, keep_alive: str = KEEP_ALIVE,
+                 poll_interval: float = POLL_INTERVAL):
+        self.base_url = base_url.rstrip('/')
+        self.keep_alive = keep_alive
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._resident: Dict[str, Dict] = {}
+        self._polled_at: Optional[float] = None
+
+        self.last_model: Optional[str] = None
+        self.switches = 0    # Consecutive calls that changed model
+        self.cold_loads = 0  # Calls whose model was not resident
+        self.warmups = 0
+        self.releases = 0
+        self.load_seconds: Dict[str, List[float]] = {}
+
+    # /api/ps --------------------------------------------------------------
+
+    def refresh(self) -> Dict[str, Dict]:
+        """Poll /api/ps now. Keeps the previous snapshot if the server can't be reached."""
+        try:
+            response = get_session().get(f"{self.base_url}/api/ps", timeout=PS_TIMEOUT)
+            response.raise_for_status()
+            models = response.json().get('models', [])
+        except Exception as e:
+            print(f"⚠️  Could not poll {self.base_url}/api/ps: {e}")
+            return self._resident
+        with self._lock:
+            self._resident = {m.get('name') or m.get('model'): m for m in models}
+            self._polled_at = time.monotonic()
+            return self._resident
+
+    def loaded_models(self) -> Dict[str, Dict]:
+        """Resident models (name -> /api/ps entry), polled at most every poll_interval."""
+        if self._polled_at is None or time.monotonic() - self._polled_at > self.poll_interval:
+            self.refresh()
+        return self._resident
+
+    def is_loaded(self, model: str, poll: bool = True) -> bool:
+        """With poll=False only the last snapshot is read (never waits on /api/ps)."""
+        resident = self.loaded_models() if poll else self._resident
+        return any(_same_model(name, model) for name in resident)
+
+    def can_hold(self, models: Iterable[str]) -> bool:
+        """True if all models are resident at the same time (after warming them)."""
+        self.refresh()
+        return all(self.is_loaded(model) for model in models)
+
+    # Loading --------------------------------------------------------------
+
+    def warm(self, model: str, keep_alive: Optional[str] = None) -> Optional[float]:
+        """
+        Load a model without generating anything.
+
+        Returns:
+            Load time in seconds (0.0 if it was already resident), or None on error
+        """
+        if self.is_loaded(model):
+            return 0.0
+
+        payload = {"model": model, "prompt": "", "stream": False,
+                   "keep_alive": keep_alive or self.keep_alive}
+        start = time.perf_counter()
+        try:
+            response = get_session().post(f"{self.base_url}/api/generate", json=payload,
+                                          timeout=LOAD_TIMEOUT)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"⚠️  Could not warm up {model}: {e}")
+            return None
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.warmups += 1
+            self.load_seconds.setdefault(model, []).append(elapsed)
+            self._mark_resident(model)
+        return elapsed
+
+    def prepare(self, models: Iterable[str]):
+        """Warm every model the upcoming workload needs, in the order given."""
+        for model in dict.fromkeys(models):
+            self.warm(model)
+
+    def release(self, model: str):
+        """Ask the server to unload a model now (keep_alive 0)."""
+        try:
+            response = get_session().post(f"{self.base_url}/api/generate",
+                                          json={"model": model, "keep_alive": 0},
+                                          timeout=PS_TIMEOUT)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"⚠️  Could not release {model}: {e}")
+            return
+        with self._lock:
+            self.releases += 1
+            self._resident = {name: info for name, info in self._resident.items()
+                              if not _same_model(name, model)}
+
+    def _mark_resident(self, model: str):
+        # The model is loaded now even if the last /api/ps snapshot says otherwise.
+        # Call with the lock held
+        if model not in self._resident:
+            self._resident = {**self._resident, model: {'name': model}}
+
+    # Accounting -----------------------------------------------------------
+
+    def before_call(self, model: str) -> bool:
+        """Record that a request for `model` is about to start. Returns True if it is a cold load."""
+        with self._lock:
+            if self.last_model is not None and model != self.last_model:
+                self.switches += 1
+            self.last_model = model
+        cold = not self.is_loaded(model)  # May poll, so outside the lock
+        if cold:
+            with self._lock:
+                self.cold_loads += 1
+        return cold
+
+    def after_call(self, model: str, elapsed: float, cold: bool):
+        """Record a finished request (a cold call's time includes the load)."""
+        with self._lock:
+            if cold:
+                self.load_seconds.setdefault(model, []).append(elapsed)
+            self._mark_resident(model)
+
+    # Scheduling -----------------------------------------------------------
+
+    def order_jobs(self, jobs: Iterable[Any], model_of: Callable[[Any], str] = lambda job: job) -> List[Any]:
+        """
+        Group jobs by model so each model is loaded once.
+
+        Models that are already resident go first; otherwise groups keep the
+        order in which their first job was queued, and jobs keep their order
+        within a group.
+        """
+        groups: Dict[str, List[Any]] = {}
+        for job in jobs:
+            groups.setdefault(model_of(job), []).append(job)
+
+        order = sorted(groups, key=lambda model: not self.is_loaded(model))
+        return [job for model in order for job in groups[model]]
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                'switches': self.switches,
+                'cold_loads': self.cold_loads,
+                'warmups': self.warmups,
+                'releases': self.releases,
+                'load_seconds': {model: round(sum(times) / len(times), 2)
+                                 for model, times in self.load_seconds.items()},
+            }
+
+    def print_metrics(self):
+        report = self.metrics()
+        print(f"\n{'='*60}")
+        print("🧠 Model Residency")
+        print(f"{'='*60}")
+        print(f"  Resident now: {', '.join(self.loaded_models()) or 'none'}")
+        print(f"  Model switches: {report['switches']}")
+        print(f"  Cold loads: {report['cold_loads']} (warm-ups: {report['warmups']}, "
+              f"releases: {report['releases']})")
+        for model, seconds in report['load_seconds'].items():
+            print(f"  Avg load time {model}: {seconds:.1f}s")
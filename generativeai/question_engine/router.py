@@ -0,0 +1,251 @@
+"""
+Adaptive model router
+---------------------
+Chooses the generation path for each request from per-topic history,
+so every curriculum topic runs on the cheapest path that still produces
+valid questions within the latency SLO.
+
+Paths (cheapest first):
+- deterministic: 1.5b writes code, rule-based targets/distractors
+- hybrid: 1.5b writes code, 14b picks targets/distractors
+- full: 14b writes code, targets and distractors
+- template: pre-written code, no LLM; used when no model path is
+  expected to meet the quality target within the SLO (it always
+  validates, so it is not scored against the model paths)
+
+Each (topic, path) arm keeps decayed success/failure counts and a
+latency EWMA. A request is routed by Thompson sampling: a success rate
+is drawn from each arm's Beta posterior, and the cheapest path whose
+draw reaches the quality target and whose latency fits the SLO wins.
+Topics without history borrow a few pseudo-observations from the
+all-topics statistics of the same path.
+
+Exploration:
+- The prior is optimistic (Beta(3, 0.5), mean ~0.86), so an untried
+  path usually samples above the quality target. With a flat Beta(1, 1)
+  about two thirds of cold-start requests fell back to template.
+- A fraction MIN_EXPLORATION of requests goes to a random model path
+  regardless of the draws, so a path that failed once (or early on) is
+  still tried again now and then. This includes paths whose latency
+  estimate is over the SLO: they are never picked otherwise, so without
+  exploration one slow request would exclude a path for good (and the
+  14b full path, with its 70s prior, could never show that it got
+  faster). Each retry updates the latency EWMA, and a path that is back
+  under the SLO returns to normal routing.
+"""
+
+import json
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+from .journal import atomic_write_json
+
+DETERMINISTIC = "deterministic"
+HYBRID = "hybrid"
+FULL = "full"
+TEMPLATE = "template"
+
+MODEL_PATHS = (DETERMINISTIC, HYBRID, FULL)  # Ordered by cost
+PATHS = MODEL_PATHS + (TEMPLATE,)
+
+# Relative compute cost (one 1.5b code generation = 1)
+PATH_COST = {TEMPLATE: 0.0, DETERMINISTIC: 1.0, HYBRID: 3.0, FULL: 6.0}
+
+# Latency priors in seconds, from the measurements in the README
+PRIOR_LATENCY = {TEMPLATE: 0.1, DETERMINISTIC: 8.0, HYBRID: 25.0, FULL: 70.0}
+
+DEFAULT_SLO = 30.0            # Seconds per question
+DEFAULT_QUALITY_TARGET = 0.8  # Required validation success rate
+DECAY = 0.97                  # Per-update decay, so old outcomes fade
+LATENCY_ALPHA = 0.3           # EWMA weight of the newest latency sample
+POOLED_PRIOR = 4.0            # Max pseudo-observations borrowed from other topics
+PRIOR_SUCCESSES = 3.0         # Optimistic Beta prior of every arm, see module docstring
+PRIOR_FAILURES = 0.5
+MIN_EXPLORATION = 0.1         # Share of requests routed to a random model path (SLO or not)
+
+STATE_VERSION = 1
+
+
+class ArmStats:
+    """Decayed outcome counts and latency estimate for one (topic, path)."""
+
+    __slots__ = ('successes', 'failures', 'latency', 'count')
+
+    def __init__(self, successes: float = 0.0, failures: float = 0.0,
+                 latency: Optional[float] = None, count: int = 0):
+        self.successes = successes
+        self.failures = failures
+        self.latency = latency
+        self.count = count
+
+    def update(self, success: bool, latency: float, decay: float = DECAY):
+        self.successes = self.successes * decay + (1.0 if success else 0.0)
+        self.failures = self.failures * decay + (0.0 if success else 1.0)
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_ALPHA * (latency - self.latency)
+        self.count += 1
+
+    def success_rate(self) -> Optional[float]:
+        total = self.successes + self.failures
+        return self.successes / total if total else None
+
+    def to_dict(self) -> Dict:
+        return {'successes': self.successes, 'failures': self.failures,
+                'latency': self.latency, 'count': self.count}
+
+
+@dataclass
+class RouteDecision:
+    """One routing decision (kept for the outcome update and the log)."""
+    topic: str
+    path: str
+    reason: str
+    samples: Dict[str, float] = field(default_factory=dict)
+    latencies: Dict[str, float] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+class ModelRouter:
+    """Per-topic bandit over the generation paths."""
+
+    def __init__(self, slo_seconds: float = DEFAULT_SLO,
+                 quality_target: float = DEFAULT_QUALITY_TARGET,
+                 state_file: Optional[str] = None,
+                 log_file: Optional[str] = None,
+                 decay: float = DECAY,
+                 exploration: float = MIN_EXPLORATION,
+                 rng: Optional[random.Random] = None,
+                 verbose: bool = False):
+        self.slo_seconds = slo_seconds
+        self.quality_target = quality_target
+        self.state_file = state_file
+        self.log_file = log_file
+        self.decay = decay
+        self.exploration = exploration
+        self.rng = rng or random.Random()
+        self.verbose = verbose
+        self.arms: Dict[str, Dict[str, ArmStats]] = {}
+        self.pooled: Dict[str, ArmStats] = {path: ArmStats() for path in PATHS}
+        if state_file and os.path.exists(state_file):
+            self.load()
+
+    # Routing --------------------------------------------------------------
+
+    def choose(self, topic: str, available: Optional[Iterable[str]] = None) -> RouteDecision:
+        """
+        Pick a path for one request.
+
+        Args:
+            topic: Curriculum topic id (or any key that groups similar requests)
+            available: Paths the caller can run (default: all model paths)
+        """
+        available = [p for p in PATHS if p in set(available or MODEL_PATHS)]
+        model_paths = [p for p in available if p != TEMPLATE]
+
+        samples = {path: self._sample_quality(topic, path) for path in model_paths}
+        latencies = {path: self._expected_latency(topic, path) for path in model_paths}
+        within_slo = [p for p in model_paths if latencies[p] <= self.slo_seconds]
+        good = [p for p in within_slo if samples[p] >= self.quality_target]
+
+        if model_paths and self.rng.random() < self.exploration:
+            path = self.rng.choice(model_paths)
+            reason = "exploration" if path in within_slo else "exploration (over SLO)"
+        elif good:
+            path = min(good, key=lambda p: PATH_COST[p])
+            reason = "cheapest path meeting quality target"
+        elif TEMPLATE in available:
+            path = TEMPLATE
+            reason = "no model path meets quality within SLO"
+        elif within_slo:
+            path = max(within_slo, key=lambda p: samples[p])
+            reason = "best sampled quality within SLO"
+        elif model_paths:
+            path = min(model_paths, key=lambda p: latencies[p])
+            reason = "SLO unreachable, fastest model path"
+        else:
+            raise ValueError("No generation path available")
+
+        decision = RouteDecision(topic=topic, path=path, reason=reason,
+                                 samples={p: round(s, 3) for p, s in samples.items()},
+                                 latencies={p: round(l, 2) for p, l in latencies.items()})
+        self._log({'event': 'route', 'topic': topic, 'path': path, 'reason': reason,
+                   'samples': decision.samples, 'latencies': decision.latencies,
+                   'slo': self.slo_seconds, 'time': decision.timestamp})
+        if self.verbose:
+            print(f"🧭 Route [{topic}] → {path} ({reason})")
+        return decision
+
+    def record(self, decision: RouteDecision, success: bool, latency: float):
+        """Feed the outcome of a routed request back into its arm."""
+        arm = self.arms.setdefault(decision.topic, {}).setdefault(decision.path, ArmStats())
+        arm.update(success, latency, self.decay)
+        self.pooled[decision.path].update(success, latency, self.decay)
+        self._log({'event': 'outcome', 'topic': decision.topic, 'path': decision.path,
+                   'success': success, 'latency': round(latency, 3), 'time': time.time()})
+        if self.state_file:
+            self.save()
+
+    def _sample_quality(self, topic: str, path: str) -> float:
+        arm = self.arms.get(topic, {}).get(path) or ArmStats()
+        pooled = self.pooled[path]
+        # Borrow at most POOLED_PRIOR observations from the path's overall record
+        pooled_total = pooled.successes + pooled.failures
+        scale = min(1.0, POOLED_PRIOR / pooled_total) if pooled_total else 0.0
+        alpha = PRIOR_SUCCESSES + arm.successes + pooled.successes * scale
+        beta = PRIOR_FAILURES + arm.failures + pooled.failures * scale
+        return self.rng.betavariate(alpha, beta)
+
+    def _expected_latency(self, topic: str, path: str) -> float:
+        arm = self.arms.get(topic, {}).get(path)
+        if arm is not None and arm.latency is not None:
+            return arm.latency
+        if self.pooled[path].latency is not None:
+            return self.pooled[path].latency
+        return PRIOR_LATENCY[path]
+
+    # Reporting / persistence ----------------------------------------------
+
+    def summary(self) -> Dict[str, Dict[str, Dict]]:
+        """Per-topic, per-path success rate, latency and request count."""
+        return {
+            topic: {path: {'success_rate': arm.success_rate(), 'latency': arm.latency,
+                           'count': arm.count}
+                    for path, arm in arms.items()}
+            for topic, arms in self.arms.items()
+        }
+
+    def save(self):
+        atomic_write_json(self.state_file, {
+            'version': STATE_VERSION,
+            'arms': {topic: {path: arm.to_dict() for path, arm in arms.items()}
+                     for topic, arms in self.arms.items()},
+            'pooled': {path: arm.to_dict() for path, arm in self.pooled.items()},
+        })
+
+    def load(self):
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (ValueError, OSError) as e:
+            print(f"⚠️  Could not read router state {self.state_file} ({e}); starting fresh")
+            return
+        if data.get('version') != STATE_VERSION:
+            return
+        self.arms = {
+            topic: {path: ArmStats(**stats) for path, stats in arms.items() if path in PATHS}
+            for topic, arms in data.get('arms', {}).items()
+        }
+        for path, stats in data.get('pooled', {}).items():
+            if path in PATHS:
+                self.pooled[path] = ArmStats(**stats)
+
+    def _log(self, entry: Dict):
+        if not self.log_file:
+            return
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, separators=(',', ':')) + "\n")
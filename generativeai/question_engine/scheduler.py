@@ -0,0 +1,335 @@
+"""
+Model-aware request scheduler
+-----------------------------
+One queue in front of a shared Ollama host, so components that use
+different models (quiz apps, hybrid generator, evaluation runs) don't
+alternate between them and force a model load on every request.
+
+- Per-model queues. The worker keeps serving the current model while it
+  has work of the highest waiting priority (drain before switching),
+  because every switch costs a model load on a memory-limited host.
+- Priorities: INTERACTIVE (a student is waiting) always goes before
+  BACKGROUND (question bank refill, prefetch, evaluation). A background
+  job that has waited longer than max_wait is treated as interactive,
+  so it cannot starve.
+- Fairness: after max_batch jobs in a row on one model, another model
+  with work of the same priority gets its turn.
+- When switching, resident models (per the residency manager) go
+  first, then the model whose oldest job has waited longest.
+- One worker: Ollama serves one generation at a time anyway.
+- In-process only: the queue lives in the process that created it, so
+  it orders the generators of one CLI (a quiz app's prefetch and live
+  questions, a batch, an evaluation run) but not separate processes
+  sharing the host.
+
+Usage:
+    scheduler = ModelScheduler(OLLAMA_URL, residency=ModelResidency(OLLAMA_URL))
+    job = scheduler.submit(prompt, "qwen2.5:14b", priority=BACKGROUND)
+    text = scheduler.call(prompt, "qwen2.5:1.5b")   # Interactive, blocking
+    for chunk in scheduler.stream(prompt, "qwen2.5:1.5b"):   # Like stream_ollama
+        ...
+    scheduler.print_metrics()
+"""
+
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from .config import OLLAMA_URL, TIMEOUT, KEEP_ALIVE
+from .prefetch import PrefetchJob
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+DEFAULT_MAX_BATCH = 8     # Jobs in a row on one model while others of equal priority wait
+DEFAULT_MAX_WAIT = 60.0   # Seconds before a background job is promoted
+STOP_POLL_INTERVAL = 0.2  # Seconds between stop checks of a stream waiting in the queue
+
+
+class ScheduledJob(PrefetchJob):
+    """
+    One queued request; result() returns the response text (or None on error).
+
+    A streaming job also hands each chunk to `chunks` as it arrives,
+    followed by None when the job ends. It can also watch the caller's
+    stop flag (e.g. a PrefetchJob's), so setting that flag stops it too.
+    """
+
+    def __init__(self, seq: int, prompt: str, model: str, priority: int, options: Dict,
+                 chunks: Optional[queue.Queue] = None, stop: Optional[threading.Event] = None):
+        super().__init__()
+        self.seq = seq
+        self.prompt = prompt
+        self.model = model
+        self.priority = priority
+        self.options = options
+        self.chunks = chunks
+        self.submitted = time.monotonic()
+        self.started: Optional[float] = None
+        self._caller_stop = stop
+
+    def stopping(self) -> bool:
+        return super().stopping() or (self._caller_stop is not None and self._caller_stop.is_set())
+
+    def cancel(self) -> bool:
+        cancelled = super().cancel()
+        if cancelled and self.chunks is not None:
+            self.chunks.put(None)
+        return cancelled
+
+    def _finish(self, result=None, error: Optional[BaseException] = None):
+        super()._finish(result, error)
+        if self.chunks is not None:
+            self.chunks.put(None)
+
+
+class ModelScheduler:
+    """Serves queued Ollama requests in an order that minimizes model swaps."""
+
+    def __init__(self, base_url: str = OLLAMA_URL, keep_alive: str = KEEP_ALIVE,
+                 timeout: int = TIMEOUT, residency=None,
+                 max_batch: int = DEFAULT_MAX_BATCH, max_wait: float = DEFAULT_MAX_WAIT,
+                 runner: Optional[Callable[[ScheduledJob], Optional[str]]] = None):
+        """
+        Args:
+            residency: Optional ModelResidency (resident models first, swap metrics)
+            max_batch: Fairness limit, see module docstring
+            max_wait: Seconds before a background job counts as interactive
+            runner: Executes one job (default: call_ollama)
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.residency = residency
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._runner = runner or self._call_ollama
+
+        self._queues: Dict[str, List[ScheduledJob]] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._closing = False
+
+        self.current_model: Optional[str] = None
+        self.batch = 0  # Jobs served on current_model since the last switch
+        self.swaps = 0
+        self.served: Dict[str, int] = {}
+        self.waits: Dict[int, List[float]] = {}  # Priority -> seconds queued
+
+    # Submitting -----------------------------------------------------------
+
+    def submit(self, prompt: str, model: str, priority: int = INTERACTIVE, **options) -> ScheduledJob:
+        """
+        Queue a request. Extra options are passed to call_ollama (e.g.
+        verbose, or a generator's own base_url / keep_alive / timeout).
+        """
+        return self._enqueue(ScheduledJob(next(self._seq), prompt, model, priority, options))
+
+    def call(self, prompt: str, model: str, priority: int = INTERACTIVE, **options) -> Optional[str]:
+        """Queue a request and wait for its response (drop-in for call_ollama)."""
+        return self.submit(prompt, model, priority, **options).result()
+
+    def stream(self, prompt: str, model: str, priority: int = INTERACTIVE,
+               stop: Optional[threading.Event] = None, **options) -> Iterator[str]:
+        """
+        Queue a request and yield its chunks once it is served (drop-in for
+        stream_ollama: errors are raised to the caller). Closing the
+        iterator early, or setting `stop`, cancels the job or stops it
+        between chunks.
+        """
+        job = self._enqueue(ScheduledJob(next(self._seq), prompt, model, priority, options,
+                                         chunks=queue.Queue(), stop=stop))
+        try:
+            while True:
+                try:
+                    chunk = job.chunks.get(timeout=STOP_POLL_INTERVAL)
+                except queue.Empty:
+                    if job.stopping():
+                        return  # Stopped while still queued; cancelled below
+                    continue
+                if chunk is None:
+                    break
+                yield chunk
+            job.result()  # Re-raises a request error
+        finally:
+            job.abort()
+
+    def _enqueue(self, job: ScheduledJob) -> ScheduledJob:
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("Scheduler is closed")
+            self._queues.setdefault(job.model, []).append(job)
+            self._ensure_worker()
+            self._cond.notify()
+        return job
+
+    def pending(self) -> int:
+        with self._cond:
+            return sum(not job.cancelled() for jobs in self._queues.values() for job in jobs)
+
+    def close(self, wait: bool = True):
+        """Stop accepting jobs; with wait, serve what is queued first."""
+        with self._cond:
+            self._closing = True
+            if not wait:
+                for jobs in self._queues.values():
+                    for job in jobs:
+                        job.cancel()
+                self._queues.clear()
+            self._cond.notify_all()
+        if wait and self._worker is not None:
+            self._worker.join()
+
+    # Policy ---------------------------------------------------------------
+
+    def _effective_priority(self, job: ScheduledJob, now: float) -> int:
+        if job.priority > INTERACTIVE and now - job.submitted > self.max_wait:
+            return INTERACTIVE
+        return job.priority
+
+    def next_job(self, now: Optional[float] = None) -> Optional[ScheduledJob]:
+        """
+        Pick (but don't remove) the job to serve next. Call with the lock held.
+
+        Residency comes from the last /api/ps snapshot; _take refreshes it
+        before taking the lock, so a slow poll never blocks submit().
+        """
+        now = time.monotonic() if now is None else now
+        heads: Dict[str, ScheduledJob] = {}
+        ranks: Dict[str, tuple] = {}
+        for model, jobs in self._queues.items():
+            live = [job for job in jobs if not job.cancelled()]
+            if not live:
+                continue
+            head = min(live, key=lambda job: (self._effective_priority(job, now), job.seq))
+            heads[model] = head
+            ranks[model] = (self._effective_priority(head, now), min(job.seq for job in live))
+        if not heads:
+            return None
+
+        top = min(rank[0] for rank in ranks.values())
+        candidates = [model for model in heads if ranks[model][0] == top]
+        current = self.current_model
+        if current in candidates:
+            if len(candidates) == 1 or self.batch < self.max_batch:
+                return heads[current]
+            candidates.remove(current)  # Fairness: give another model a turn
+
+        def switch_cost(model: str):
+            resident = self.residency is not None and self.residency.is_loaded(model, poll=False)
+            return (not resident, ranks[model][1])
+
+        return heads[min(candidates, key=switch_cost)]
+
+    # Worker ---------------------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="model-scheduler", daemon=True)
+            self._worker.start()
+
+    def _take(self) -> Optional[ScheduledJob]:
+        while True:
+            if self.residency is not None:
+                self.residency.loaded_models()  # Polls /api/ps if stale, outside the lock
+            with self._cond:
+                job = self.next_job()
+                while job is not None:
+                    self._queues[job.model].remove(job)
+                    if job._start():
+                        self._account(job)
+                        return job
+                    job = self.next_job()
+                # Only cancelled jobs (or nothing) left
+                self._queues = {}
+                if self._closing:
+                    return None
+                self._cond.wait()  # Then poll again before picking
+
+    def _account(self, job: ScheduledJob):
+        if job.model != self.current_model:
+            if self.current_model is not None:
+                self.swaps += 1
+            self.current_model = job.model
+            self.batch = 0
+        self.batch += 1
+        job.started = time.monotonic()
+        self.served[job.model] = self.served.get(job.model, 0) + 1
+        self.waits.setdefault(job.priority, []).append(job.started - job.submitted)
+
+    def _run(self):
+        while True:
+            job = self._take()
+            if job is None:
+                return
+            self._serve(job)
+
+    def _serve(self, job: ScheduledJob):
+        if job.stopping():
+            job._finish(result=None)  # Stopped between being taken and served
+            return
+        cold = self.residency.before_call(job.model) if self.residency else False
+        start = time.perf_counter()
+        try:
+            result = self._runner(job)
+        except Exception as e:
+            job._finish(error=e)
+            return
+        if self.residency and result is not None:
+            self.residency.after_call(job.model, time.perf_counter() - start, cold)
+        job._finish(result=result)
+
+    def _call_ollama(self, job: ScheduledJob) -> Optional[str]:
+        from .ollama import call_ollama, stream_ollama
+        options = {'base_url': self.base_url, 'keep_alive': self.keep_alive,
+                   'timeout': self.timeout, **job.options}
+        if job.chunks is None:
+            return call_ollama(job.prompt, model=job.model, **options)
+
+        for call_only in ('verbose', 'error_prefix'):
+            options.pop(call_only, None)
+        parts = []
+        chunks = stream_ollama(job.prompt, model=job.model, **options)
+        try:
+            for chunk in chunks:
+                if job.stopping():
+                    break  # The reader went away; closing stops generation
+                job.chunks.put(chunk)
+                parts.append(chunk)
+        finally:
+            chunks.close()
+        return "".join(parts)
+
+    # Reporting ------------------------------------------------------------
+
+    def metrics(self) -> Dict:
+        def summary(waits: List[float]) -> Dict:
+            ordered = sorted(waits)
+            return {'jobs': len(ordered),
+                    'avg_wait_s': round(sum(ordered) / len(ordered), 3),
+                    'max_wait_s': round(ordered[-1], 3)}
+
+        return {
+            'swaps': self.swaps,
+            'served': dict(self.served),
+            'waits': {('interactive' if p == INTERACTIVE else 'background' if p == BACKGROUND
+                       else f'priority {p}'): summary(waits)
+                      for p, waits in sorted(self.waits.items())},
+        }
+
+    def print_metrics(self):
+        report = self.metrics()
+        print(f"\n{'='*60}")
+        print("🗂️  Scheduler")
+        print(f"{'='*60}")
+        print(f"  Model swaps: {report['swaps']}")
+        for model, count in report['served'].items():
+            print(f"  {model}: {count} requests")
+        for name, waits in report['waits'].items():
+            print(f"  {name}: {waits['jobs']} jobs, queued avg {waits['avg_wait_s']:.2f}s, "
+                  f"max {waits['max_wait_s']:.2f}s")
@@ -0,0 +1,359 @@
+"""
+Multi-student progress store
+----------------------------
+Shared progress backend for lab deployments where many quiz processes
+run against the same server. Every student is keyed by a student id and
+every score is a single row-level write, so concurrent students never
+rewrite (or clobber) each other's data.
+
+- SQLiteProgressStore: one database in WAL mode. Readers never block
+  the writer; each score is one short IMMEDIATE transaction that also
+  upserts a per-(student, topic, difficulty) best-score row.
+- FileProgressStore: fallback when SQLite/WAL is unavailable (e.g. a
+  network filesystem). One snapshot + journal per student, with an
+  exclusive lock file around appends and compaction.
+
+Both stores hand out journal objects with the ProgressJournal interface
+(load / append / needs_compaction / compact), so StudentProgress works
+unchanged on top of either one.
+
+Usage:
+    store = open_progress_store("lab_progress.db")
+    progress = StudentProgress(student_id="s042", store=store)
+    store.best_scores()  # {student_id: {(topic, difficulty): {...}}}
+"""
+
+import contextlib
+import json
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from .journal import TEMP_PREFIX, ProgressJournal
+
+BUSY_TIMEOUT_MS = 10000  # How long a writer waits for the database lock
+LOCK_TIMEOUT = 10.0      # Same for the file-lock fallback, in seconds
+
+BestScores = Dict[str, Dict[Tuple[str, str], Dict]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    student_id  TEXT NOT NULL,
+    topic       TEXT NOT NULL,
+    difficulty  TEXT NOT NULL,
+    score       INTEGER NOT NULL,
+    total       INTEGER NOT NULL,
+    created_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_by_student ON attempts (student_id, id);
+CREATE TABLE IF NOT EXISTS best_scores (
+    student_id  TEXT NOT NULL,
+    topic       TEXT NOT NULL,
+    difficulty  TEXT NOT NULL,
+    score       INTEGER NOT NULL,
+    total       INTEGER NOT NULL,
+    attempts    INTEGER NOT NULL,
+    PRIMARY KEY (student_id, topic, difficulty)
+);
+"""
+
+
+class StoreUnavailable(RuntimeError):
+    """Raised when a backend cannot be used on this system or filesystem."""
+
+
+def _best_entry(best: Dict, key: Tuple[str, str], score: int, total: int):
+    entry = best.get(key)
+    if entry is None:
+        best[key] = {'score': score, 'total': total, 'attempts': 1}
+    else:
+        entry['score'] = max(entry['score'], score)
+        entry['total'] = max(entry['total'], total)
+        entry['attempts'] += 1
+
+
+# ---------------------------------------------------------------------------
+# SQLite (WAL)
+# ---------------------------------------------------------------------------
+
+class SQLiteProgressStore:
+    """Progress for many students in one SQLite database (WAL mode)."""
+
+    def __init__(self, db_path: str):
+        try:
+            import sqlite3
+        except ImportError as e:
+            raise StoreUnavailable(f"sqlite3 is not available: {e}")
+
+        self.db_path = db_path
+        try:
+            # Autocommit mode; write transactions are opened explicitly
+            self.conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000,
+                                        isolation_level=None)
+            mode = self.conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        except sqlite3.Error as e:
+            raise StoreUnavailable(f"Cannot open {db_path}: {e}")
+        if str(mode).lower() != "wal":
+            # WAL needs shared memory, which network filesystems don't provide
+            self.conn.close()
+            raise StoreUnavailable(f"WAL mode not supported for {db_path} (got {mode})")
+
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints in WAL mode
+        self.conn.executescript(_SCHEMA)
+
+    def journal(self, student_id: str) -> 'SQLiteStudentJournal':
+        """Journal view of one student's rows (plugs into StudentProgress)."""
+        return SQLiteStudentJournal(self, student_id)
+
+    def record(self, student_id: str, topic: str, difficulty: str, score: int, total: int) -> int:
+        """Insert one attempt and update the best-score row in one transaction."""
+        with self._write() as conn:
+            cursor = conn.execute(
+                "INSERT INTO attempts (student_id, topic, difficulty, score, total, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (student_id, topic, difficulty, score, total, time.time()),
+            )
+            conn.execute(
+                "INSERT INTO best_scores (student_id, topic, difficulty, score, total, attempts) "
+                "VALUES (?, ?, ?, ?, ?, 1) "
+                "ON CONFLICT (student_id, topic, difficulty) DO UPDATE SET "
+                "score = MAX(score, excluded.score), "
+                "total = MAX(total, excluded.total), "
+                "attempts = attempts + 1",
+                (student_id, topic, difficulty, score, total),
+            )
+            return cursor.lastrowid
+
+    def attempts(self, student_id: str, after_id: int = 0) -> List[Dict]:
+        """A student's attempts in insertion order (optionally only newer rows)."""
+        rows = self.conn.execute(
+            "SELECT id, topic, difficulty, score, total FROM attempts "
+            "WHERE student_id = ? AND id > ? ORDER BY id",
+            (student_id, after_id),
+        )
+        return [{'seq': row[0], 'topic': row[1], 'difficulty': row[2],
+                 'score': row[3], 'total': row[4]} for row in rows]
+
+    def best_scores(self, topic: Optional[str] = None) -> BestScores:
+        """Best score, best total and attempt count per topic for all students."""
+        query = "SELECT student_id, topic, difficulty, score, total, attempts FROM best_scores"
+        params = ()
+        if topic is not None:
+            query += " WHERE topic = ?"
+            params = (topic,)
+
+        result: BestScores = {}
+        for student_id, row_topic, difficulty, score, total, attempts in self.conn.execute(query, params):
+            result.setdefault(student_id, {})[(row_topic, difficulty)] = {
+                'score': score, 'total': total, 'attempts': attempts,
+            }
+        return result
+
+    def students(self) -> List[str]:
+        """All student ids with at least one attempt."""
+        rows = self.conn.execute("SELECT DISTINCT student_id FROM best_scores ORDER BY student_id")
+        return [row[0] for row in rows]
+
+    @contextlib.contextmanager
+    def _write(self):
+        # IMMEDIATE takes the write lock up front, so busy_timeout applies
+        # here instead of failing later with "database is locked"
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def close(self):
+        self.conn.close()
+
+
+class SQLiteStudentJournal:
+    """ProgressJournal interface over one student's rows in SQLiteProgressStore."""
+
+    def __init__(self, store: SQLiteProgressStore, student_id: str):
+        self.store = store
+        self.student_id = student_id
+        self.seq = 0
+        self.pending = 0
+        self.skipped_lines = 0
+
+    def load(self, apply: Callable[[Dict, Dict], None]) -> Dict:
+        state = {}
+        for record in self.store.attempts(self.student_id):
+            apply(state, record)
+            self.seq = record['seq']
+        return state
+
+    def append(self, record: Dict) -> int:
+        self.seq = self.store.record(self.student_id, record['topic'], record['difficulty'],
+                                     record['score'], record['total'])
+        return self.seq
+
+    def needs_compaction(self) -> bool:
+        return False  # Rows are the source of truth; there is no snapshot
+
+    def compact(self, state: Dict):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# File-lock fallback
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def file_lock(path: str, timeout: float = LOCK_TIMEOUT):
+    """Exclusive advisory lock on `path` (fcntl on POSIX, msvcrt on Windows)."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            os.lseek(fd, 0, os.SEEK_SET)
+            lock = lambda: msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            unlock = lambda: msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            lock = lambda: fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            unlock = lambda: fcntl.flock(fd, fcntl.LOCK_UN)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                lock()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Timed out waiting for lock {path}")
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            unlock()
+    finally:
+        os.close(fd)
+
+
+class LockedProgressJournal(ProgressJournal):
+    """
+    ProgressJournal that is safe to share between processes.
+
+    Appends and compaction hold an exclusive lock. Sequence numbers are
+    taken from the file rather than from this process's counter, and
+    compaction re-reads the journal under the lock, so records written
+    by other processes are never dropped from the snapshot.
+    """
+
+    def __init__(self, snapshot_file: str, **kwargs):
+        super().__init__(snapshot_file, **kwargs)
+        self.lock_file = snapshot_file + ".lock"
+        self._apply = None
+
+    def load(self, apply: Callable[[Dict, Dict], None]) -> Dict:
+        self._apply = apply
+        with file_lock(self.lock_file):
+            return super().load(apply)
+
+    def append(self, record: Dict) -> int:
+        with file_lock(self.lock_file):
+            self.seq = max(self.seq, self._last_seq_on_disk())
+            return super().append(record)
+
+    def compact(self, state: Dict):
+        with file_lock(self.lock_file):
+            if self._apply is not None:
+                # Another process may have appended since our load
+                state = super().load(self._apply)
+            super().compact(state)
+
+    def _last_seq_on_disk(self) -> int:
+        """Highest seq in the journal tail, or the snapshot's if it is empty."""
+        try:
+            with open(self.journal_file, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+
+        # Any process may have left the torn line, not just this one
+        self._torn_tail = bool(data) and not data.endswith(b"\n")
+        for line in reversed(data.splitlines()):
+            try:
+                return int(json.loads(line)['seq'])
+            except (ValueError, KeyError, TypeError):
+                continue  # Torn line; the one before it is complete
+        return self._load_snapshot()[1] if os.path.exists(self.snapshot_file) else 0
+
+
+class FileProgressStore:
+    """One locked snapshot + journal per student in a directory."""
+
+    SUFFIX = ".json"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _snapshot_file(self, student_id: str) -> str:
+        # Percent-encoding keeps ids filesystem-safe and reversible
+        return os.path.join(self.directory, quote(student_id, safe='') + self.SUFFIX)
+
+    def journal(self, student_id: str) -> LockedProgressJournal:
+        return LockedProgressJournal(self._snapshot_file(student_id))
+
+    def students(self) -> List[str]:
+        ids = set()
+        for name in os.listdir(self.directory):
+            base, ext = os.path.splitext(name)
+            if ext not in (self.SUFFIX, ".jsonl") or name.startswith(TEMP_PREFIX):
+                continue  # Not ours, or a temp file left by an interrupted compaction
+            student_id = unquote(base)
+            if quote(student_id, safe='') == base:  # Only names _snapshot_file can produce
+                ids.add(student_id)
+        return sorted(ids)
+
+    def best_scores(self, topic: Optional[str] = None) -> BestScores:
+        """Best score, best total and attempt count per topic for all students."""
+        result: BestScores = {}
+        for student_id in self.students():
+            journal = self.journal(student_id)
+            state = journal.load(self._collect)
+            best = {}
+            for topic_id, topic_progress in state.items():
+                if topic is not None and topic_id != topic:
+                    continue
+                for difficulty, scores in topic_progress.get('scores', {}).items():
+                    for entry in scores:
+                        _best_entry(best, (topic_id, difficulty), entry['score'], entry['total'])
+            if best:
+                result[student_id] = best
+        return result
+
+    @staticmethod
+    def _collect(state: Dict, record: Dict):
+        # Same shape as the StudentProgress snapshot, which may be loaded alongside
+        topic_progress = state.setdefault(record['topic'], {'scores': {}})
+        topic_progress['scores'].setdefault(record['difficulty'], []).append(
+            {'score': record['score'], 'total': record['total']}
+        )
+
+    def close(self):
+        pass
+
+
+def open_progress_store(db_path: str):
+    """
+    Open the SQLite store at `db_path`, or fall back to a locked file store
+    in `<db_path without extension>_progress/` when SQLite/WAL is unavailable.
+    """
+    try:
+        return SQLiteProgressStore(db_path)
+    except StoreUnavailable as e:
+        directory = os.path.splitext(db_path)[0] + "_progress"
+        print(f"⚠️  {e}; using file-locked store in {directory}")
+        return FileProgressStore(directory)
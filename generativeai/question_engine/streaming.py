@@ -0,0 +1,301 @@
+"""
+Streaming question rendering
+----------------------------
+Incremental parsers for streamed model output, so the quiz apps can show
+code while it is still being generated and ask the first blank before
+the response is complete. Perceived latency drops from the full
+generation time to the time to first token.
+
+- CodeStream: a plain or fenced code response (1.5b apps). The code is
+  final as soon as its fence closes, so the rest of the response can be
+  skipped.
+- MultiBlankStream: CODE / TARGETS / DISTRACTORS output (14b apps).
+  Emits every code line, the blanked code once all targets are known,
+  and each sub-question as soon as its distractors are parsed.
+
+Both take text chunks through feed() and return events as
+(kind, payload) tuples:
+
+    CODE_LINE     one line of code (str)
+    CODE          the complete code (str)
+    BLANKS        {'code', 'question_code', 'targets'} once blanks are fixed
+    SUB_QUESTION  one sub-question dict, ready to be asked
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .validator import (
+    MultiBlankValidator,
+    blank_code,
+    create_sub_question,
+    _TARGETS_HEADER,
+    _DISTRACTORS_HEADER,
+    _NUMBERED_TARGET_RE,
+    _NUMBERED_ITEM_RE,
+)
+
+CODE_LINE = "code_line"
+CODE = "code"
+BLANKS = "blanks"
+SUB_QUESTION = "sub_question"
+
+Event = Tuple[str, object]
+
+_CODE_HEADER_RE = re.compile(r'^[ \t*#]*CODE\**:\**\s*(.*)$', re.IGNORECASE)
+_TARGETS_HEADER_RE = re.compile(_TARGETS_HEADER, re.IGNORECASE)
+_DISTRACTORS_HEADER_RE = re.compile(_DISTRACTORS_HEADER, re.IGNORECASE)
+_TARGET_SECTION_RE = re.compile(r'^\W*For Target \d+\W*:', re.IGNORECASE)
+
+
+class _LineStream:
+    """Splits streamed chunks into complete lines."""
+
+    def __init__(self):
+        self.text = []     # Every chunk, for the non-streaming fallback
+        self._partial = ""
+        self.closed = False
+
+    def feed(self, chunk: str) -> List[Event]:
+        self.text.append(chunk)
+        lines = (self._partial + chunk).split("\n")
+        self._partial = lines.pop()
+        events = []
+        for line in lines:
+            events.extend(self._line(line.rstrip("\r")))
+        return events
+
+    def close(self) -> List[Event]:
+        """Process the last, unterminated line and flush what is pending."""
+        if self.closed:
+            return []
+        self.closed = True
+        events = self._line(self._partial) if self._partial else []
+        self._partial = ""
+        return events + self._finish()
+
+    def full_text(self) -> str:
+        return "".join(self.text)
+
+    def _line(self, line: str) -> List[Event]:
+        raise NotImplementedError
+
+    def _finish(self) -> List[Event]:
+        return []
+
+
+class CodeStream(_LineStream):
+    """
+    Streams a code-only response.
+
+    Lines inside the first ``` fence are emitted as they arrive and
+    `done` becomes True when the fence closes. Text before a fence is
+    held back; if no fence ever appears the whole response is the code
+    (same rule as extract_code_block).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.code: Optional[str] = None
+        self.done = False
+        self._state = "before"   # before -> fenced -> done
+        self._held: List[str] = []
+        self._lines: List[str] = []
+
+    def _line(self, line: str) -> List[Event]:
+        if self._state == "done":
+            return []
+        if line.strip().startswith("```"):
+            if self._state == "before":
+                self._state = "fenced"
+                self._held = []
+                return []
+            return self._complete()
+        if self._state == "fenced":
+            self._lines.append(line)
+            return [(CODE_LINE, line)]
+        self._held.append(line)
+        return []
+
+    def _complete(self) -> List[Event]:
+        self._state = "done"
+        self.done = True
+        self.code = "\n".join(self._lines).strip()
+        return [(CODE, self.code)] if self.code else []
+
+    def _finish(self) -> List[Event]:
+        if self._state == "done":
+            return []
+        if self._state == "before":
+            # Unfenced response: everything was code
+            self._lines = self._held
+            events = [(CODE_LINE, line) for line in self._held]
+            return events + self._complete()
+        return self._complete()  # Fence never closed
+
+
+class MultiBlankStream(_LineStream):
+    """Streams CODE / TARGETS / DISTRACTORS output into sub-questions."""
+
+    def __init__(self, verbose: bool = False):
+        super().__init__()
+        self.verbose = verbose
+        self.code: Optional[str] = None
+        self.question_code: Optional[str] = None
+        self.sub_questions: List[Dict] = []
+
+        self._state = "preamble"  # preamble, code_start, code, after_code, targets, distractors
+        self._fenced = False
+        self._code_lines: List[str] = []
+        self._raw_targets: List[str] = []
+        # Index into _raw_targets -> blank number, for targets found in the code
+        self._numbers: Dict[int, int] = {}
+        self._targets: List[str] = []
+        self._section = -1        # Distractor section being read (0-based)
+        self._section_items: List[str] = []
+        self._emitted = set()     # Sections already turned into sub-questions
+
+    # Line handling --------------------------------------------------------
+
+    def _line(self, line: str) -> List[Event]:
+        handler = getattr(self, "_in_" + self._state)
+        return handler(line)
+
+    def _in_preamble(self, line: str) -> List[Event]:
+        match = _CODE_HEADER_RE.match(line)
+        if not match:
+            return []
+        self._state = "code_start"
+        rest = match.group(1)
+        return self._in_code_start(rest) if rest.strip() else []
+
+    def _in_code_start(self, line: str) -> List[Event]:
+        if not line.strip():
+            return []
+        self._state = "code"
+        if line.strip().startswith("```"):
+            self._fenced = True
+            return []
+        return self._in_code(line)  # Unfenced code
+
+    def _in_code(self, line: str) -> List[Event]:
+        if self._fenced and line.strip().startswith("```"):
+            self._state = "after_code"
+            return self._code_done()
+        if not self._fenced:
+            if _TARGETS_HEADER_RE.match(line):
+                self._state = "targets"
+                return self._code_done()
+            if _DISTRACTORS_HEADER_RE.match(line):
+                self._state = "distractors"
+                return self._code_done() + self._resolve_blanks()
+        self._code_lines.append(line)
+        return [(CODE_LINE, line)]
+
+    def _in_after_code(self, line: str) -> List[Event]:
+        if _TARGETS_HEADER_RE.match(line):
+            self._state = "targets"
+        return []
+
+    def _in_targets(self, line: str) -> List[Event]:
+        if _DISTRACTORS_HEADER_RE.match(line):
+            self._state = "distractors"
+            return self._resolve_blanks()
+        match = _NUMBERED_TARGET_RE.match(line.strip())
+        if match:
+            self._raw_targets.append(match.group(1).strip())
+        return []
+
+    def _in_distractors(self, line: str) -> List[Event]:
+        if _TARGET_SECTION_RE.match(line):
+            events = self._flush_section()
+            self._section += 1
+            self._section_items = []
+            return events
+        if self._section < 0:
+            return []
+        match = _NUMBERED_ITEM_RE.match(line.strip())
+        if match:
+            self._section_items.append(match.group(1).strip())
+            if len(self._section_items) == 3:
+                # Only the first 3 are used, so the blank is ready now
+                return self._flush_section()
+        return []
+
+    # Events ---------------------------------------------------------------
+
+    def _code_done(self) -> List[Event]:
+        self.code = "\n".join(self._code_lines).strip()
+        return [(CODE, self.code)]
+
+    def _resolve_blanks(self) -> List[Event]:
+        """Fix blank numbering once every target is known."""
+        if self.code is None:
+            return []
+        for i, target in enumerate(self._raw_targets):
+            resolved = MultiBlankValidator.resolve_target(target, self.code, i + 1, self.verbose)
+            if resolved is not None:
+                self._targets.append(resolved)
+                self._numbers[i] = len(self._targets)
+        if not self._targets:
+            return []
+
+        self.question_code = blank_code(self.code, self._targets)
+        return [(BLANKS, {'code': self.code,
+                          'question_code': self.question_code,
+                          'targets': list(self._targets)})]
+
+    def _flush_section(self) -> List[Event]:
+        section = self._section
+        if section < 0 or section in self._emitted:
+            return []
+        self._emitted.add(section)
+        return self._sub_question(section, self._section_items)
+
+    def _sub_question(self, index: int, distractors: List[str]) -> List[Event]:
+        number = self._numbers.get(index)
+        if number is None:
+            return []  # Target was dropped (not in code) or out of range
+        distractors = MultiBlankValidator.pad_distractors(distractors, index + 1, self.verbose)
+        sub_question = create_sub_question(number, self._targets[number - 1], distractors)
+        self.sub_questions.append(sub_question)
+        return [(SUB_QUESTION, sub_question)]
+
+    def _finish(self) -> List[Event]:
+        events = []
+        if self._state == "code":
+            events += self._code_done()
+        if self.question_code is None and self._state in ("code", "targets"):
+            events += self._resolve_blanks()
+        if self._state == "distractors":
+            events += self._flush_section()
+        # Targets without a distractor section still get padded options
+        for index in sorted(self._numbers):
+            if index not in self._emitted:
+                self._emitted.add(index)
+                events += self._sub_question(index, [])
+        return events
+
+    # Result ---------------------------------------------------------------
+
+    def question(self) -> Optional[Dict]:
+        """
+        The finished question, in create_blank_question's format.
+
+        If the output never matched the streaming parser (e.g. the model
+        moved sections around), the full text is parsed the regular way.
+        """
+        self.close()
+        if self.question_code is not None and self.sub_questions:
+            sub_questions = sorted(self.sub_questions, key=lambda sq: sq['number'])
+            return {
+                'code': self.code,
+                'question_code': self.question_code,
+                'sub_questions': sub_questions,
+                'num_blanks': len(sub_questions)
+            }
+
+        parsed = MultiBlankValidator.parse_model_output(self.full_text())
+        if not parsed:
+            return None
+        return MultiBlankValidator.create_validated_multi_blank_question(parsed, verbose=self.verbose)
@@ -0,0 +1,230 @@
+"""
+Multi-blank question validation
+-------------------------------
+Parses CODE / TARGETS / DISTRACTORS model output and builds numbered
+fill-in-the-blank questions with deterministic replacement, so the
+blanks always match the correct answers.
+"""
+
+import re
+import random
+from typing import Dict, List, Optional
+
+from .extractor import CppTokenExtractor
+
+_CODE_FENCED_RE = re.compile(r'CODE:\s*```(?:cpp)?\s*(.*?)\s*```', re.DOTALL | re.IGNORECASE)
+# Section headers sit on their own line and may carry a hint or markdown,
+# e.g. "TARGETS (keywords to blank out, exactly 3):" or "**DISTRACTORS:**"
+_TARGETS_HEADER = r'^[ \t*#]*TARGETS?\b[^:\n]*:'
+_DISTRACTORS_HEADER = r'^[ \t*#]*DISTRACTORS?\b[^:\n]*:'
+_CODE_PLAIN_RE = re.compile(r'CODE:\s*(.*?)(?=' + _TARGETS_HEADER + '|' + _DISTRACTORS_HEADER + r'|\Z)',
+                            re.DOTALL | re.IGNORECASE | re.MULTILINE)
+_TARGETS_RE = re.compile(_TARGETS_HEADER + r'\**\s*(.*?)(?=' + _DISTRACTORS_HEADER + r'|\Z)',
+                         re.DOTALL | re.IGNORECASE | re.MULTILINE)
+_DISTRACTORS_RE = re.compile(_DISTRACTORS_HEADER + r'\**\s*(.*)', re.DOTALL | re.IGNORECASE | re.MULTILINE)
+_TARGET_SECTION_RE = re.compile(r'For Target \d+:', re.IGNORECASE)
+# "1. target" or "1. target - description" (the dash must be space separated
+# so operator targets such as "--" or "->" survive)
+_NUMBERED_TARGET_RE = re.compile(r'\d+\.\s*(.+?)(?:\s+-\s+.*)?$')
+_NUMBERED_ITEM_RE = re.compile(r'\d+\.\s*(.+)')
+
+
+def blank_marker(number: int) -> str:
+    """Numbered blank placeholder used in question code."""
+    return f"_____({number})_____"
+
+
+def blank_code(code: str, targets: List[str]) -> str:
+    """Replace each target's first occurrence with its numbered blank."""
+    question_code = code
+    for i, target in enumerate(targets):
+        question_code = question_code.replace(target, blank_marker(i + 1), 1)
+    return question_code
+
+
+def create_sub_question(number: int, target: str, distractors: List[str]) -> Dict:
+    """One blank: the target plus its distractors, shuffled."""
+    options = [target] + list(distractors)
+    random.shuffle(options)
+
+    return {
+        'number': number,
+        'target': target,
+        'options': options,
+        'answer': options.index(target) + 1,
+        'user_answer': None
+    }
+
+
+def create_blank_question(code: str, targets: List[str], all_distractors: List[List[str]]) -> Dict:
+    """
+    Build a multi-blank question from already validated targets.
+
+    Each target's first occurrence is replaced with a numbered blank and
+    its options are the target plus its distractors, shuffled.
+    """
+    sub_questions = [
+        create_sub_question(i + 1, target, distractors)
+        for i, (target, distractors) in enumerate(zip(targets, all_distractors))
+    ]
+
+    return {
+        'code': code,
+        'question_code': blank_code(code, targets),
+        'sub_questions': sub_questions,
+        'num_blanks': len(sub_questions)
+    }
+
+
+def create_deterministic_question(code: str, num_blanks: int = 3) -> Optional[Dict]:
+    """Create a question with rule-based targets and template distractors."""
+    tokens = CppTokenExtractor.extract_all_tokens(code)
+    if not tokens:
+        return None
+
+    targets = CppTokenExtractor.select_best_targets(tokens, num_blanks)
+    if not targets:
+        return None
+
+    all_distractors = [CppTokenExtractor.get_distractors(target) for target in targets]
+    return create_blank_question(code, targets, all_distractors)
+
+
+class MultiBlankValidator:
+    """Validates and creates consistent multi-blank fill-in-the-blank questions."""
+
+    @staticmethod
+    def parse_targets_and_distractors(output: str) -> Optional[Dict]:
+        """
+        Parse the TARGETS and DISTRACTORS sections of model output.
+
+        Expected format:
+        TARGETS:
+        1. target1 - description
+        2. target2 - description
+
+        DISTRACTORS:
+        For Target 1:
+        1. distractor1
+        2. distractor2
+        3. distractor3
+        """
+        targets_match = _TARGETS_RE.search(output)
+        if not targets_match:
+            return None
+
+        targets = []
+        for line in targets_match.group(1).split('\n'):
+            match = _NUMBERED_TARGET_RE.match(line.strip())
+            if match:
+                targets.append(match.group(1).strip())
+
+        if not targets:
+            return None
+
+        distractors_match = _DISTRACTORS_RE.search(output)
+        if not distractors_match:
+            return None
+
+        all_distractors = []
+        for section in _TARGET_SECTION_RE.split(distractors_match.group(1))[1:]:
+            target_distractors = []
+            for line in section.split('\n'):
+                match = _NUMBERED_ITEM_RE.match(line.strip())
+                if match:
+                    target_distractors.append(match.group(1).strip())
+
+            if target_distractors:
+                all_distractors.append(target_distractors[:3])  # Take first 3
+
+        # Ensure we have distractors for all targets
+        while len(all_distractors) < len(targets):
+            all_distractors.append([])
+
+        return {
+            'targets': targets,
+            'distractors': all_distractors
+        }
+
+    @staticmethod
+    def parse_model_output(output: str) -> Optional[Dict]:
+        """
+        Parse model output to extract structured data for multi-blank questions.
+        Expected format:
+        CODE:
+        [complete working code]
+
+        TARGETS:
+        ...
+
+        DISTRACTORS:
+        ...
+        """
+        try:
+            code_match = _CODE_FENCED_RE.search(output) or _CODE_PLAIN_RE.search(output)
+            if not code_match:
+                return None
+
+            # Look for the sections after the code so code text can't match a header
+            parsed = MultiBlankValidator.parse_targets_and_distractors(output[code_match.end():])
+            if not parsed:
+                return None
+
+            parsed['code'] = code_match.group(1).strip()
+            return parsed
+
+        except Exception as e:
+            print(f"⚠️  Error parsing model output: {e}")
+            return None
+
+    @staticmethod
+    def resolve_target(target: str, code: str, number: int, verbose: bool = True) -> Optional[str]:
+        """Return the target as it appears in the code (case-insensitive fallback), or None."""
+        if target in code:
+            return target
+
+        if verbose:
+            print(f"⚠️  Target {number} '{target}' not found in code. Trying case-insensitive...")
+        match = re.search(re.escape(target), code, re.IGNORECASE)
+        if match:
+            return match.group(0)
+        if verbose:
+            print(f"❌ Target {number} '{target}' not found in code!")
+        return None
+
+    @staticmethod
+    def pad_distractors(distractors: List[str], number: int, verbose: bool = True) -> List[str]:
+        """Exactly 3 distractors, padding with generic options."""
+        distractors = list(distractors)
+        if len(distractors) < 3 and verbose:
+            print(f"⚠️  Target {number} has only {len(distractors)} distractors, need 3")
+        while len(distractors) < 3:
+            distractors.append(f"option{len(distractors)+1}")
+        return distractors[:3]
+
+    @staticmethod
+    def create_validated_multi_blank_question(parsed_data: Dict, verbose: bool = True) -> Optional[Dict]:
+        """
+        Create validated multi-blank question with guaranteed consistency.
+        """
+        code = parsed_data['code']
+        targets = parsed_data['targets']
+        all_distractors = parsed_data['distractors']
+
+        validated_targets = []
+        validated_distractors = []
+
+        for i, (target, distractors) in enumerate(zip(targets, all_distractors)):
+            target = MultiBlankValidator.resolve_target(target, code, i + 1, verbose)
+            if target is None:
+                continue
+
+            validated_targets.append(target)
+            validated_distractors.append(MultiBlankValidator.pad_distractors(distractors, i + 1, verbose))
+
+        if not validated_targets:
+            if verbose:
+                print("❌ No valid targets found!")
+            return None
+
+        return create_blank_question(code, validated_targets, validated_distractors)
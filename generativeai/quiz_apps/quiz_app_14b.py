@@ -7,25 +7,21 @@ Follows curriculum progression and tracks student scores.
 Usage: python quiz_app_14b.py [--level 1-10] [--questions 5]
 """
 
-import requests
-import json
-import time
-import re
+from __future__ import annotations
+
 import random
 import sys
-import io
 import argparse
 import os
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from curriculum.cpp_curriculum_progression import CppCurriculum, Topic
+from question_engine import MultiBlankValidator, call_ollama, configure_console
+
+if TYPE_CHECKING:
+    from curriculum.cpp_curriculum_progression import Topic
 
-# Fix encoding
-if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 # Configuration
 OLLAMA_URL = "https://unpatented-saylor-nonirate.ngrok-free.dev"
@@ -43,44 +39,9 @@ class QuestionGenerator14b:
 
     def call_ollama(self, prompt: str, verbose: bool = False) -> Optional[str]:
         """Call Ollama API"""
-        try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": True,
-                "keep_alive": KEEP_ALIVE
-            }
-
-            response_text = ""
-            with requests.post(
-                f"{self.ollama_url}/api/generate",
-                json=payload,
-                stream=True,
-                timeout=TIMEOUT
-            ) as r:
-                r.raise_for_status()
-
-                for line in r.iter_lines(decode_unicode=True):
-                    if not line or not line.strip():
-                        continue
-
-                    try:
-                        data = json.loads(line)
-                        if "response" in data:
-                            chunk = data["response"]
-                            if verbose:
-                                print(chunk, end='', flush=True)
-                            response_text += chunk
-                    except json.JSONDecodeError:
-                        continue
-
-            if verbose:
-                print()
-            return response_text.strip()
-
-        except Exception as e:
-            print(f"❌ Error calling Ollama: {e}")
-            return None
+        return call_ollama(prompt, model=self.model, base_url=self.ollama_url,
+                           keep_alive=KEEP_ALIVE, timeout=TIMEOUT, verbose=verbose,
+                           error_prefix="❌ Error calling Ollama")
 
     def generate_question(self, topic: Topic, num_blanks: int = 3, verbose: bool = False) -> Optional[Dict]:
         """Generate a validated question from topic"""
@@ -146,105 +107,25 @@ IMPORTANT:
 
     def parse_response(self, response: str) -> Optional[Dict]:
         """Parse 14b model response"""
-        try:
-            # Extract CODE
-            code_match = re.search(r'CODE:\s*```(?:cpp)?\s*(.*?)\s*```', response, re.DOTALL | re.IGNORECASE)
-            if not code_match:
-                return None
-            code = code_match.group(1).strip()
-
-            # Extract TARGETS
-            targets_match = re.search(r'TARGETS?.*?:\s*(.*?)(?=DISTRACTORS?:)', response, re.DOTALL | re.IGNORECASE)
-            if not targets_match:
-                return None
-
-            targets = []
-            for line in targets_match.group(1).split('\n'):
-                match = re.match(r'\d+\.\s*(.+)', line.strip())
-                if match:
-                    targets.append(match.group(1).strip())
-
-            # Extract DISTRACTORS
-            distractors_match = re.search(r'DISTRACTORS?:\s*(.*?)$', response, re.DOTALL | re.IGNORECASE)
-            if not distractors_match:
-                return None
-
-            all_distractors = []
-            distractor_text = distractors_match.group(1)
-            sections = re.split(r'For Target \d+:', distractor_text, flags=re.IGNORECASE)
-
-            for section in sections[1:]:  # Skip first empty section
-                target_distractors = []
-                for line in section.split('\n'):
-                    match = re.match(r'\d+\.\s*(.+)', line.strip())
-                    if match:
-                        target_distractors.append(match.group(1).strip())
-                if target_distractors:
-                    all_distractors.append(target_distractors[:3])
-
-            return {
-                'code': code,
-                'targets': targets,
-                'distractors': all_distractors
-            }
-
-        except Exception as e:
-            print(f"⚠️  Parse error: {e}")
-            return None
+        return MultiBlankValidator.parse_model_output(response)
 
     def create_validated_question(self, parsed: Dict, topic: Topic) -> Optional[Dict]:
         """Create validated question with numbered blanks"""
-
-        code = parsed['code']
-        targets = parsed['targets']
-        all_distractors = parsed['distractors']
-
-        # Validate targets exist in code
-        validated_targets = []
-        validated_distractors = []
-
-        for target, distractors in zip(targets, all_distractors):
-            if target in code:
-                validated_targets.append(target)
-                validated_distractors.append(distractors)
-
-        if not validated_targets:
+        question = MultiBlankValidator.create_validated_multi_blank_question(parsed, verbose=False)
+        if not question:
             return None
 
-        # Create question code with numbered blanks
-        question_code = code
-        for i, target in enumerate(validated_targets):
-            blank = f"_____({i+1})_____"
-            question_code = question_code.replace(target, blank, 1)
-
-        # Create sub-questions
-        sub_questions = []
-        for i, (target, distractors) in enumerate(zip(validated_targets, validated_distractors)):
-            options = [target] + distractors[:3]
-            random.shuffle(options)
-
-            answer_pos = options.index(target) + 1
-
-            sub_questions.append({
-                'number': i + 1,
-                'target': target,
-                'options': options,
-                'answer': answer_pos,
-                'user_answer': None
-            })
-
-        return {
-            'topic': topic,
-            'code': code,
-            'question_code': question_code,
-            'sub_questions': sub_questions
-        }
+        question['topic'] = topic
+        return question
 
 
 class QuizApp:
     """Interactive quiz application"""
 
     def __init__(self):
+        # Curriculum data loads on first use, not at import
+        from curriculum.cpp_curriculum_progression import CppCurriculum
+
         self.generator = QuestionGenerator14b()
         self.curriculum = CppCurriculum()
         self.questions = []
@@ -473,6 +354,7 @@ Curriculum Levels:
     )
 
     args = parser.parse_args()
+    configure_console()
 
     # Run quiz
     app = QuizApp()
@@ -7,25 +7,21 @@ Follows curriculum progression and tracks student scores.
 Usage: python quiz_app_1_5b.py [--level 1-10] [--questions 5]
 """
 
-import requests
-import json
-import time
-import re
+from __future__ import annotations
+
 import random
 import sys
-import io
 import argparse
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from curriculum.cpp_curriculum_progression import CppCurriculum, Topic
+from question_engine import call_ollama, extract_code_block, create_deterministic_question, configure_console
+
+if TYPE_CHECKING:
+    from curriculum.cpp_curriculum_progression import Topic
 
-# Fix encoding
-if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 # Configuration
 OLLAMA_URL = "https://unpatented-saylor-nonirate.ngrok-free.dev"
@@ -34,175 +30,6 @@ TIMEOUT = 300
 KEEP_ALIVE = "60m"
 
 
-class CppTokenExtractor:
-    """Deterministic token extraction (same as our previous implementation)"""
-
-    KEYWORDS = {
-        'types': ['int', 'float', 'double', 'char', 'bool', 'void', 'string', 'auto', 'long', 'short'],
-        'control': ['if', 'else', 'for', 'while', 'do', 'switch', 'case', 'break', 'continue', 'return'],
-        'container': ['vector', 'map', 'set', 'list', 'queue', 'stack', 'array', 'deque', 'pair'],
-        'method': ['push_back', 'pop_back', 'push', 'pop', 'insert', 'erase', 'clear', 'size', 'empty',
-                   'front', 'back', 'begin', 'end', 'find', 'count'],
-        'stream': ['cout', 'cin', 'endl', 'cerr', 'getline'],
-        'keyword': ['namespace', 'using', 'class', 'struct', 'public', 'private', 'protected',
-                    'const', 'static', 'virtual', 'new', 'delete'],
-        'operator': ['++', '--', '==', '!=', '<=', '>=', '&&', '||', '<<', '>>', '+=', '-='],
-        'include': ['#include', 'iostream', 'vector', 'string', 'algorithm', 'cmath', 'fstream'],
-    }
-
-    PRIORITY = {
-        'control': 10,
-        'types': 9,
-        'container': 8,
-        'method': 7,
-        'stream': 6,
-        'keyword': 5,
-        'include': 4,
-        'operator': 2,
-    }
-
-    DISTRACTORS = {
-        # Control flow
-        'for': ['while', 'do', 'if'],
-        'while': ['for', 'do', 'if'],
-        'if': ['while', 'for', 'switch'],
-        'else': ['elif', 'otherwise', 'then'],
-        'switch': ['if', 'select', 'case'],
-        'return': ['exit', 'end', 'yield'],
-        'break': ['continue', 'exit', 'stop'],
-        'continue': ['break', 'skip', 'next'],
-
-        # Types
-        'int': ['float', 'double', 'char'],
-        'float': ['double', 'int', 'long'],
-        'double': ['float', 'long', 'decimal'],
-        'char': ['int', 'string', 'byte'],
-        'bool': ['int', 'boolean', 'flag'],
-        'void': ['int', 'null', 'none'],
-        'string': ['char', 'text', 'str'],
-        'auto': ['var', 'type', 'dynamic'],
-
-        # Containers
-        'vector': ['array', 'list', 'deque'],
-        'map': ['dict', 'hashmap', 'table'],
-        'set': ['list', 'array', 'collection'],
-        'list': ['vector', 'array', 'deque'],
-        'queue': ['stack', 'list', 'deque'],
-        'stack': ['queue', 'list', 'array'],
-
-        # Methods
-        'push_back': ['insert', 'add', 'append'],
-        'pop_back': ['remove', 'delete', 'pop'],
-        'push': ['add', 'insert', 'append'],
-        'pop': ['remove', 'delete', 'pop_back'],
-        'insert': ['add', 'push', 'append'],
-        'erase': ['remove', 'delete', 'clear'],
-        'size': ['length', 'count', 'capacity'],
-        'empty': ['isEmpty', 'null', 'zero'],
-        'clear': ['erase', 'delete', 'remove'],
-
-        # Stream
-        'cout': ['cin', 'print', 'output'],
-        'cin': ['cout', 'input', 'scanf'],
-        'endl': ['newline', '\\n', 'end'],
-        'getline': ['readline', 'gets', 'input'],
-
-        # Keywords
-        'namespace': ['package', 'module', 'scope'],
-        'using': ['import', 'include', 'require'],
-        'class': ['struct', 'type', 'object'],
-        'public': ['private', 'protected', 'visible'],
-        'const': ['final', 'readonly', 'static'],
-        'static': ['const', 'final', 'global'],
-
-        # Include
-        '#include': ['#import', '#using', 'import'],
-        'iostream': ['stdio', 'stream', 'io'],
-        'vector': ['array', 'list', 'container'],
-        'string': ['text', 'str', 'char'],
-
-        # Operators
-        '++': ['--', '+=', '+1'],
-        '--': ['++', '-=', '-1'],
-        '<<': ['>>', '<', '<<<'],
-        '>>': ['<<', '>', '>>>'],
-        '==': ['!=', '=', '==='],
-        '!=': ['==', '<>', '!=='],
-    }
-
-    @staticmethod
-    def extract_all_tokens(code: str) -> List[Dict]:
-        """Extract all tokens from code"""
-        tokens = []
-        seen = set()
-
-        for category, keywords in CppTokenExtractor.KEYWORDS.items():
-            for keyword in keywords:
-                # Create pattern
-                if keyword in ['++', '--', '==', '!=', '<=', '>=', '&&', '||', '<<', '>>', '+=', '-=']:
-                    pattern = re.escape(keyword)
-                elif keyword.startswith('#'):
-                    pattern = re.escape(keyword)
-                else:
-                    pattern = r'\b' + re.escape(keyword) + r'\b'
-
-                for match in re.finditer(pattern, code):
-                    token_key = f"{keyword}_{match.start()}"
-                    if token_key not in seen:
-                        tokens.append({
-                            'token': keyword,
-                            'category': category,
-                            'position': match.start()
-                        })
-                        seen.add(token_key)
-
-        tokens.sort(key=lambda x: x['position'])
-        return tokens
-
-    @staticmethod
-    def select_best_targets(tokens: List[Dict], num_targets: int = 3) -> List[str]:
-        """Select best targets using scoring"""
-        if not tokens:
-            return []
-
-        scored_tokens = []
-        seen = set()
-
-        for token_info in tokens:
-            token = token_info['token']
-
-            if token in seen:
-                continue
-
-            category = token_info['category']
-            score = CppTokenExtractor.PRIORITY.get(category, 1)
-            score += len(token) * 0.1
-
-            if token in CppTokenExtractor.DISTRACTORS:
-                score += 2.0
-
-            scored_tokens.append({'token': token, 'score': score})
-            seen.add(token)
-
-        scored_tokens.sort(key=lambda x: x['score'], reverse=True)
-        return [st['token'] for st in scored_tokens[:num_targets]]
-
-    @staticmethod
-    def get_distractors(target: str) -> List[str]:
-        """Get distractors for target"""
-        if target in CppTokenExtractor.DISTRACTORS:
-            return CppTokenExtractor.DISTRACTORS[target][:3]
-
-        # Fallback: same category
-        for category, keywords in CppTokenExtractor.KEYWORDS.items():
-            if target in keywords:
-                others = [k for k in keywords if k != target]
-                if len(others) >= 3:
-                    return random.sample(others, 3)
-
-        return ['option1', 'option2', 'option3']
-
-
 class QuestionGenerator1_5b:
     """Generate questions using 1.5b + deterministic processing"""
 
@@ -212,39 +39,8 @@ class QuestionGenerator1_5b:
 
     def call_ollama(self, prompt: str) -> Optional[str]:
         """Call Ollama API"""
-        try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": True,
-                "keep_alive": KEEP_ALIVE
-            }
-
-            response_text = ""
-            with requests.post(
-                f"{self.ollama_url}/api/generate",
-                json=payload,
-                stream=True,
-                timeout=TIMEOUT
-            ) as r:
-                r.raise_for_status()
-
-                for line in r.iter_lines(decode_unicode=True):
-                    if not line or not line.strip():
-                        continue
-
-                    try:
-                        data = json.loads(line)
-                        if "response" in data:
-                            response_text += data["response"]
-                    except json.JSONDecodeError:
-                        continue
-
-            return response_text.strip()
-
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return None
+        return call_ollama(prompt, model=self.model, base_url=self.ollama_url,
+                           keep_alive=KEEP_ALIVE, timeout=TIMEOUT)
 
     def generate_code(self, topic: Topic) -> Optional[str]:
         """Generate code using 1.5b (fast)"""
@@ -267,11 +63,7 @@ Just write the code, nothing else:"""
             return None
 
         # Extract code block if wrapped
-        code_match = re.search(r'```(?:cpp)?\s*(.*?)\s*```', response, re.DOTALL)
-        if code_match:
-            return code_match.group(1).strip()
-
-        return response
+        return extract_code_block(response)
 
     def generate_question(self, topic: Topic, num_blanks: int = 3) -> Optional[Dict]:
         """Generate question using deterministic approach"""
@@ -282,54 +74,21 @@ Just write the code, nothing else:"""
             return None
 
         # Phase 2: Deterministic processing
-        tokens = CppTokenExtractor.extract_all_tokens(code)
-        if not tokens:
-            return None
-
-        targets = CppTokenExtractor.select_best_targets(tokens, num_blanks)
-        if not targets:
+        question = create_deterministic_question(code, num_blanks)
+        if not question:
             return None
 
-        # Generate distractors
-        all_distractors = []
-        for target in targets:
-            distractors = CppTokenExtractor.get_distractors(target)
-            all_distractors.append(distractors)
-
-        # Create question code
-        question_code = code
-        for i, target in enumerate(targets):
-            blank = f"_____({i+1})_____"
-            question_code = question_code.replace(target, blank, 1)
-
-        # Create sub-questions
-        sub_questions = []
-        for i, (target, distractors) in enumerate(zip(targets, all_distractors)):
-            options = [target] + distractors
-            random.shuffle(options)
-
-            answer_pos = options.index(target) + 1
-
-            sub_questions.append({
-                'number': i + 1,
-                'target': target,
-                'options': options,
-                'answer': answer_pos,
-                'user_answer': None
-            })
-
-        return {
-            'topic': topic,
-            'code': code,
-            'question_code': question_code,
-            'sub_questions': sub_questions
-        }
+        question['topic'] = topic
+        return question
 
 
 class QuizApp:
     """Interactive quiz application"""
 
     def __init__(self):
+        # Curriculum data loads on first use, not at import
+        from curriculum.cpp_curriculum_progression import CppCurriculum
+
         self.generator = QuestionGenerator1_5b()
         self.curriculum = CppCurriculum()
         self.questions = []
@@ -558,6 +317,7 @@ Curriculum Levels:
     )
 
     args = parser.parse_args()
+    configure_console()
 
     # Run quiz
     app = QuizApp()
@@ -14,21 +14,20 @@ Performance:
 - Reliability: 100%
 """
 
+from __future__ import annotations
+
 import random
 import sys
-import io
 import argparse
 import os
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from curriculum.cpp_curriculum_progression import CppCurriculum, Topic
+from question_engine import CppTokenExtractor, create_deterministic_question, configure_console
 
-# Fix encoding
-if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+if TYPE_CHECKING:
+    from curriculum.cpp_curriculum_progression import Topic
 
 
 # ============================================================================
@@ -292,8 +291,6 @@ class TemplateQuestionGenerator:
 
     def __init__(self):
         self.templates = CODE_TEMPLATES
-        # Import deterministic tools from 1.5b app
-        from quiz_app_1_5b import CppTokenExtractor
         self.extractor = CppTokenExtractor
 
     def get_template(self, topic_id: str) -> str:
@@ -319,54 +316,21 @@ class TemplateQuestionGenerator:
             return None
 
         # Deterministic processing (same as 1.5b app)
-        tokens = self.extractor.extract_all_tokens(code)
-        if not tokens:
-            return None
-
-        targets = self.extractor.select_best_targets(tokens, num_blanks)
-        if not targets:
+        question = create_deterministic_question(code, num_blanks)
+        if not question:
             return None
 
-        # Generate distractors
-        all_distractors = []
-        for target in targets:
-            distractors = self.extractor.get_distractors(target)
-            all_distractors.append(distractors)
-
-        # Create question code
-        question_code = code
-        for i, target in enumerate(targets):
-            blank = f"_____({i+1})_____"
-            question_code = question_code.replace(target, blank, 1)
-
-        # Create sub-questions
-        sub_questions = []
-        for i, (target, distractors) in enumerate(zip(targets, all_distractors)):
-            options = [target] + distractors
-            random.shuffle(options)
-
-            answer_pos = options.index(target) + 1
-
-            sub_questions.append({
-                'number': i + 1,
-                'target': target,
-                'options': options,
-                'answer': answer_pos,
-                'user_answer': None
-            })
-
-        return {
-            'topic': topic,
-            'code': code,
-            'question_code': question_code,
-            'sub_questions': sub_questions
-        }
+        question['topic'] = topic
+        return question
 
 
 class QuizApp:
     """Quiz application using pure templates"""
 
     def __init__(self):
+        # Curriculum data loads on first use, not at import
+        from curriculum.cpp_curriculum_progression import CppCurriculum
+
         self.generator = TemplateQuestionGenerator()
         self.curriculum = CppCurriculum()
         self.questions = []
@@ -603,6 +567,7 @@ Examples:
     )
 
     args = parser.parse_args()
+    configure_console()
 
     # Run quiz
     app = QuizApp()
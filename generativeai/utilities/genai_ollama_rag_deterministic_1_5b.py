@@ -14,21 +14,19 @@ Strategy:
 Usage: python genai_ollama_rag_deterministic_1_5b.py "Create a for loop"
 """
 
-import requests
-import json
 import time
 import re
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional
 import sys
-import io
 import argparse
 import random
 
-# Fix encoding
-if sys.platform == "win32":
-    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# Add parent directory to path to import question_engine
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from question_engine import call_ollama, create_blank_question, extract_code_block, configure_console
+
 
 # Configuration
 OLLAMA_URL = "https://unpatented-saylor-nonirate.ngrok-free.dev"
@@ -339,55 +337,23 @@ Just write the code:"""
             print(f"\n🤖 Calling {self.model}...")
 
         start_time = time.time()
-        response_text = ""
-
-        try:
-            payload = {
-                "model": self.model,
-                "prompt": prompt,
-                "stream": True,
-                "keep_alive": self.keep_alive
-            }
-
-            with requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                stream=True,
-                timeout=TIMEOUT
-            ) as r:
-                r.raise_for_status()
-
-                for line in r.iter_lines(decode_unicode=True):
-                    if not line or not line.strip():
-                        continue
-
-                    try:
-                        data = json.loads(line)
-                        if "response" in data:
-                            chunk = data["response"]
-                            if verbose:
-                                print(chunk, end='', flush=True)
-                            response_text += chunk
-                    except json.JSONDecodeError:
-                        continue
-
-            elapsed = time.time() - start_time
-            if verbose:
-                print(f"\n\n⏱️  Generation time: {elapsed:.2f}s")
-
-            # Extract code block
-            code_match = re.search(r'```(?:cpp)?\s*(.*?)\s*```', response_text, re.DOTALL)
-            if code_match:
-                code = code_match.group(1).strip()
-            else:
-                # Try to extract code without markdown
-                code = response_text.strip()
+        response_text = call_ollama(
+            prompt,
+            model=self.model,
+            base_url=self.base_url,
+            keep_alive=self.keep_alive,
+            timeout=TIMEOUT,
+            verbose=verbose
+        )
+        if response_text is None:
+            return None
 
-            return code
+        elapsed = time.time() - start_time
+        if verbose:
+            print(f"\n⏱️  Generation time: {elapsed:.2f}s")
 
-        except Exception as e:
-            print(f"\n❌ Error: {e}")
-            return None
+        # Extract code block (falls back to the raw response)
+        return extract_code_block(response_text)
 
     def create_question_deterministic(
         self,
@@ -424,47 +390,21 @@ Just write the code:"""
             return None
 
         # Generate distractors deterministically
-        sub_questions = []
-        question_code = code
-
-        for i, target in enumerate(targets):
-            # Get distractors
+        all_distractors = []
+        for target in targets:
             distractors = self.extractor.get_distractors(target)
+            all_distractors.append(distractors)
 
             if verbose:
                 print(f"\n   Distractors for '{target}': {distractors}")
 
-            # Create options
-            options = [target] + distractors
-            random.shuffle(options)
-
-            try:
-                answer_pos = options.index(target) + 1
-            except ValueError:
-                options = [target] + distractors
-                answer_pos = 1
-
-            # Replace in code (first occurrence only)
-            blank_marker = f"_____({i+1})_____"
-            question_code = question_code.replace(target, blank_marker, 1)
-
-            sub_questions.append({
-                'number': i + 1,
-                'target': target,
-                'options': options,
-                'answer': answer_pos
-            })
+        question = create_blank_question(code, targets, all_distractors)
+        question['method'] = 'deterministic'
 
         if verbose:
-            print(f"\n✅ Created {len(sub_questions)} sub-questions deterministically")
-
-        return {
-            'code': code,
-            'question_code': question_code,
-            'sub_questions': sub_questions,
-            'num_blanks': len(sub_questions),
-            'method': 'deterministic'
-        }
+            print(f"\n✅ Created {question['num_blanks']} sub-questions deterministically")
+
+        return question
 
     def generate_question(
         self,
@@ -536,6 +476,7 @@ Examples:
     parser.add_argument('--context', '-c', type=str, default=CONTEXT_FILE, help='Context file')
 
     args = parser.parse_args()
+    configure_console()
     verbose = not args.quiet
 
     if verbose:
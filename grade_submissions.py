@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+Re-grade a whole class's exported submissions against a (corrected)
+problem set, offline.
+
+Students grade themselves step by step in solve_problem.html and send
+their progress as "=== STUDENT PROGRESS EXPORT ===" blocks (brotli +
+base64, usually pasted into a WhatsApp/Telegram chat, the same text the
+analytics page reads). When an answer key turns out to be wrong, this
+script re-scores every submission with the corrected key:
+
+- math-expression / step-by-step steps: every attempt is re-checked
+  with mathparser (check_answer), in a pool of worker processes that
+  are killed when a check overruns its time budget
+- identical (expected, answer) pairs are checked once, however many
+  students typed them
+- other step types are re-scored with the solver's own rules
+  (calculate_step_score in solve_problem.html)
+
+A check that can't be verified in time (or fails) never turns a correct
+answer wrong: the step keeps the verdict the student's browser gave it
+and is listed for manual review. The same goes for a step whose
+corrected expected answer doesn't parse; those steps are reported as
+"broken_keys" and the script exits with code 1.
+
+Usage:
+    python grade_submissions.py chat.txt --problem-set corrected_set.txt
+    python grade_submissions.py chat1.txt chat2.txt --problem-set set.txt --workers 8 -o scores.json --csv scores.csv
+    python grade_submissions.py chat.txt --problem-set set.txt --credit any   # Credit a step if ANY attempt matches
+"""
+import argparse
+import base64
+import json
+import os
+import queue
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mathparser import SubprocessChecker
+from mathparser.check import CORRECT, INCORRECT, UNPARSEABLE
+
+MATH_STEP_TYPES = ('math-expression', 'step-by-step')
+ANSWERED_STEP_TYPES = ('multiple-choice-single', 'multiple-choice-multiple', 'true-false', 'fill-blank', 'multi-mc')
+
+EXPORT_BLOCK = re.compile(
+    r"===\s*STUDENT\s+PROGRESS\s+EXPORT\s*===\s*(.*?)\s*===\s*END\s+EXPORT\s*===",
+    re.DOTALL | re.IGNORECASE,
+)
+TELEGRAM_PART = re.compile(
+    r"===\s*STUDENT PROGRESS EXPORT\s*\(Part\s*(\d+)\s*/\s*(\d+)\)\s*===\s*(.*?)\s*===\s*END PART\s*\1\s*===",
+    re.DOTALL | re.IGNORECASE,
+)
+STRAY_BASE64 = re.compile(r"\b[A-Za-z0-9+/=]{80,}\b")
+WHITESPACE = re.compile(r"[\s\r\n]+")
+
+
+# ============================================================
+# DECODING (same formats as analytics_for_problem.html)
+# ============================================================
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def decode_base64_data(b64_data):
+    """(data, format) for a brotli or plain JSON payload; (None, error) if neither"""
+    import brotli
+
+    try:
+        decoded = base64.b64decode(b64_data)
+    except Exception as e:
+        return (None, f"base64 decode error: {e}")
+    try:
+        return (json.loads(brotli.decompress(decoded).decode('utf-8')), 'brotli')
+    except Exception:
+        try:
+            return (json.loads(decoded.decode('utf-8')), 'json')
+        except Exception as e:
+            return (None, f"json decode error: {e}")
+
+def normalize_phone(p):
+    if not p:
+        return ""
+    p = re.sub(r"[^\d+]", "", str(p))
+    if p.startswith("0"):
+        p = "+62" + p[1:]
+    elif p.startswith("62") and not p.startswith("+"):
+        p = "+" + p
+    elif not p.startswith("+") and len(p) > 8:
+        p = "+" + p
+    return p
+
+def extract_phone_from_context(text, base64_start_pos):
+    """Sender of the chat message the export was pasted in ("[date] +62 812...: ...")"""
+    context = text[max(0, base64_start_pos - 1000):base64_start_pos]
+    for line in reversed(context.split("\n")):
+        line = line.strip()
+        if not line:
+            continue
+        bracket_end = line.find("]")
+        colon_pos = line.find(":", bracket_end) if bracket_end != -1 else -1
+        if "[" in line and colon_pos > bracket_end:
+            phone_part = line[bracket_end + 1:colon_pos].strip()
+            if phone_part and ("+62" in phone_part or phone_part.startswith("0") or phone_part.startswith("62")):
+                normalized = normalize_phone(phone_part)
+                if normalized:
+                    return normalized
+        for pattern in (r"(\+62[\s\-\d()]+):", r"(0[\s\-\d()]+):"):
+            match = re.search(pattern, line)
+            if match:
+                normalized = normalize_phone(match.group(1).strip())
+                if normalized:
+                    return normalized
+    return None
+
+def parse_submissions(text):
+    """
+    Every v2 export in `text`: ([{'phone', 'source', 'data'}], [{'error', ...}]).
+
+    Reads header/footer blocks, Telegram multi-part blocks and stray
+    base64 chunks, like ProgressAnalyzer.parse_submissions.
+    """
+    submissions, invalid = [], []
+    spans = []
+
+    def add(data, fmt, phone, source):
+        if data is None:
+            invalid.append({'error': fmt, 'student_phone': phone, 'source': source})
+        elif isinstance(data, dict) and 'problem_states' in data:
+            submissions.append({'phone': phone or 'anonymous', 'source': source, 'data': data})
+        elif isinstance(data, dict) and 'problems' in data:
+            invalid.append({'error': "Old export format (v1.0) has no step states to re-grade",
+                            'student_phone': phone, 'source': source})
+        else:
+            keys = list(data.keys()) if isinstance(data, dict) else type(data).__name__
+            invalid.append({'error': f"Unknown export format: {keys}", 'student_phone': phone, 'source': source})
+
+    for block in EXPORT_BLOCK.finditer(text):
+        spans.append(block.span())
+        data, fmt = decode_base64_data(WHITESPACE.sub("", block.group(1)))
+        add(data, fmt, extract_phone_from_context(text, block.start()), 'header_block')
+
+    # Telegram splits long exports into "(Part i/n)" messages; each "Part 1" starts a new export
+    groups = []
+    for m in TELEGRAM_PART.finditer(text):
+        spans.append(m.span())
+        if int(m.group(1)) == 1 or not groups:
+            groups.append({})
+        groups[-1][int(m.group(1))] = (int(m.group(2)), WHITESPACE.sub("", m.group(3)), m.start())
+    for parts in groups:
+        total_parts = max(total for total, _, _ in parts.values())
+        missing = [i for i in range(1, total_parts + 1) if i not in parts]
+        phone = extract_phone_from_context(text, parts[min(parts)][2])
+        if missing:
+            invalid.append({'error': f"Telegram export is missing part(s) {missing}",
+                            'student_phone': phone, 'source': 'telegram_parts'})
+        else:
+            data, fmt = decode_base64_data("".join(parts[i][1] for i in range(1, total_parts + 1)))
+            add(data, fmt, phone, 'telegram_parts')
+
+    for match in STRAY_BASE64.finditer(text):
+        if any(start <= match.start() <= end for start, end in spans):
+            continue
+        data, fmt = decode_base64_data(match.group(0))
+        if isinstance(data, dict):  # Anything else is just a long word
+            add(data, fmt, extract_phone_from_context(text, match.start()), 'stray_chunk')
+
+    return submissions, invalid
+
+def load_problem_set(path):
+    """(problems, problem_set_id) from a problem set file: exported (brotli base64) or plain JSON"""
+    text = read_text(path).strip()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        if "===" in text:
+            matches = re.findall(r"===.*?EXPORT.*?===(.*?)(?:===|$)", text, re.DOTALL)
+            if matches:
+                text = "".join(matches)
+        data, fmt = decode_base64_data(WHITESPACE.sub("", text))
+        if data is None:
+            raise ValueError(f"Could not read problem set {path}: {fmt}")
+    if isinstance(data, dict) and 'problems' in data:
+        return data['problems'], data.get('problem_set_id')
+    if isinstance(data, list):
+        return data, None
+    raise ValueError(f"No problems found in {path}")
+
+
+# ============================================================
+# SCORING RULES (mirrors calculate_step_score in solve_problem.html)
+# ============================================================
+
+def _label_value(value):
+    return (value.get("value", "") if isinstance(value, dict) else str(value)).strip().lower()
+
+def _first_answer(step_state):
+    user_answers = step_state.get("user_answers", [])
+    return user_answers[0] if isinstance(user_answers, list) and user_answers else ""
+
+def mc_multiple_score(step_data, step_state):
+    """+100/num_correct per correct option picked, -100/num_incorrect per wrong one, clamped"""
+    correct_labels = set(step_data.get("correct_answers", []))
+    options = step_data.get("options", [])
+    if not correct_labels or not options:
+        return 0.0
+    incorrect_labels = {opt.get("label", "") for opt in options} - correct_labels
+    points_per_correct = 100.0 / len(correct_labels)
+    penalty_per_incorrect = 100.0 / len(incorrect_labels) if incorrect_labels else 0.0
+    score = 0.0
+    for label in set(step_state.get("user_answers", [])):
+        if label in correct_labels:
+            score += points_per_correct
+        elif label in incorrect_labels:
+            score -= penalty_per_incorrect
+    return max(0.0, min(100.0, score))
+
+def fill_blank_score(step_data, step_state):
+    """Single blank: all or nothing. Multi-blank (dict answers): proportional."""
+    correct_answers = step_data.get("correct_answers", step_data.get("accepted_answers", []))
+    user_answers = step_state.get("user_answers", [])
+    if not correct_answers or not user_answers:
+        return 0.0
+    if isinstance(user_answers, dict):
+        if not isinstance(correct_answers, dict):
+            return 0.0
+        correct_count = 0
+        for label, correct_value in correct_answers.items():
+            accepted = correct_value if isinstance(correct_value, list) else [correct_value]
+            if str(user_answers.get(label, "")).strip().lower() in {_label_value(v) for v in accepted}:
+                correct_count += 1
+        return correct_count / len(correct_answers) * 100.0
+    user_answer = str(user_answers[0]).strip().lower()
+    return 100.0 if user_answer in {_label_value(v) for v in correct_answers} else 0.0
+
+def multi_mc_score(step_data, step_state):
+    blanks = step_data.get("blanks", {})
+    if not blanks:
+        return 100.0 if step_state.get("correct", False) else 0.0
+    user_answers = step_state.get("user_answers", {})
+    if not isinstance(user_answers, dict):
+        return 0.0
+    correct_count = sum(1 for label, blank in blanks.items()
+                        if user_answers.get(label, "") == blank.get("correct", ""))
+    return correct_count / len(blanks) * 100.0
+
+def is_step_finished(step_state):
+    """Analytics rule: math steps need Finalize, the other types are done once answered"""
+    if step_state.get("finished", step_state.get("finalized", False)):
+        return True
+    if step_state.get("step_type", "") in ANSWERED_STEP_TYPES:
+        return bool(step_state.get("correct", False) or step_state.get("user_answers"))
+    return False
+
+def math_answers(step_state):
+    """Every answer the student submitted for a math step, oldest first, final answer last"""
+    answers = [a.get("user_answer", "") for a in step_state.get("attempt_history", [])]
+    answers.append(_first_answer(step_state))
+    return [a.strip() for a in answers if isinstance(a, str) and a.strip()]
+
+def step_type_of(step_data, step_state):
+    return step_state.get("step_type") or step_data.get("step_type") or "math-expression"
+
+
+# ============================================================
+# RE-GRADING
+# ============================================================
+
+def collect_pairs(submissions, problems):
+    """Unique (expected, answer) pairs over every math attempt of every student"""
+    pairs = set()
+    attempts = 0
+    for sub in submissions:
+        for prob_idx_str, step_states in sub['data'].get('problem_states', {}).items():
+            prob_idx = int(prob_idx_str)
+            if prob_idx >= len(problems):
+                continue
+            for step_data, step_state in zip(problems[prob_idx].get("steps", []), step_states):
+                expected = step_data.get("expected", "").strip()
+                if not expected or step_type_of(step_data, step_state) not in MATH_STEP_TYPES:
+                    continue
+                for answer in math_answers(step_state):
+                    pairs.add((expected, answer))
+                    attempts += 1
+    return sorted(pairs), attempts
+
+def check_pairs(pairs, workers, timeout):
+    """{pair: outcome dict}, checked by `workers` child processes (killed past `timeout`)"""
+    checkers = queue.Queue()
+    for _ in range(workers):
+        checkers.put(SubprocessChecker(timeout=timeout))
+
+    def run(pair):
+        checker = checkers.get()
+        try:
+            return pair, checker.check(*pair)
+        finally:
+            checkers.put(checker)
+
+    results = {}
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for done, (pair, result) in enumerate(pool.map(run, pairs), 1):
+                results[pair] = result
+                if done % 100 == 0 or done == len(pairs):
+                    print(f"  🔍 Checked {done}/{len(pairs)} answers ({time.perf_counter() - start:.0f}s)",
+                          file=sys.stderr)
+    finally:
+        while not checkers.empty():
+            checkers.get().close()
+    return results
+
+def _verdict(result):
+    """True/False, or None when the answer could not be verified (timeout, error, key doesn't parse)"""
+    if result['status'] == UNPARSEABLE and result['stage'] == 'expected':
+        return None  # The corrected key is broken, not the answer
+    if result['status'] in (CORRECT, INCORRECT, UNPARSEABLE):
+        return result['status'] == CORRECT
+    return None
+
+def broken_keys(problems, results):
+    """Math steps whose expected answer doesn't parse: [{'problem', 'step', 'expected'}]"""
+    unparseable = {expected for (expected, _), r in results.items()
+                   if r['status'] == UNPARSEABLE and r['stage'] == 'expected'}
+    return [{'problem': prob_idx, 'step': step_idx, 'expected': step_data.get("expected", "")}
+            for prob_idx, problem in enumerate(problems)
+            for step_idx, step_data in enumerate(problem.get("steps", []))
+            if step_data.get("expected", "").strip() in unparseable]
+
+def regrade_math_step(step_data, step_state, results, credit):
+    """(score, unverified answers) for a math step, re-checked against step_data['expected']"""
+    expected = step_data.get("expected", "").strip()
+    answers = math_answers(step_state)
+    if not expected or not answers:
+        return (100.0 if step_state.get("finished") and step_state.get("correct") else 0.0), []
+
+    unverified = [a for a in dict.fromkeys(answers) if _verdict(results[(expected, a)]) is None]
+    final = _verdict(results[(expected, answers[-1])])
+    if final is None:
+        final = bool(step_state.get("correct", False))  # Keep the browser's verdict
+
+    if credit == 'any':
+        # A student stuck behind a wrong key never got to Finalize, so don't require it
+        history = [_verdict(results[(expected, a)]) for a in answers[:-1]]
+        return (100.0 if final or any(history) else 0.0), unverified
+    return (100.0 if step_state.get("finished", False) and final else 0.0), unverified
+
+def regrade_step(step_data, step_state, results, credit):
+    step_type = step_type_of(step_data, step_state)
+    if step_type in MATH_STEP_TYPES:
+        return regrade_math_step(step_data, step_state, results, credit)
+    if not is_step_finished(step_state):
+        return 0.0, []
+    if step_type == "multiple-choice-single":
+        return (100.0 if _first_answer(step_state) == step_data.get("correct_answer", "") else 0.0), []
+    if step_type == "multiple-choice-multiple":
+        return mc_multiple_score(step_data, step_state), []
+    if step_type == "true-false":
+        correct_answer = str(step_data.get("correct_answer", "true")).lower()
+        return (100.0 if str(_first_answer(step_state)).lower() == correct_answer else 0.0), []
+    if step_type == "fill-blank":
+        return fill_blank_score(step_data, step_state), []
+    if step_type == "multi-mc":
+        return multi_mc_score(step_data, step_state), []
+    return 0.0, []
+
+def regrade_submission(sub, problems, results, credit):
+    """Updated scores for one export, in calculate_total_score's shape, plus what changed"""
+    problem_states = {int(k): v for k, v in sub['data'].get('problem_states', {}).items()}
+    total = old_total = max_score = 0.0
+    problem_scores, changed, review = {}, [], []
+
+    for prob_idx, problem in enumerate(problems):
+        steps = problem.get("steps", [])
+        step_states = problem_states.get(prob_idx, [])
+        prob_score = 0.0
+        for step_idx, step_data in enumerate(steps):
+            if step_idx >= len(step_states):
+                continue
+            step_state = step_states[step_idx]
+            score, unverified = regrade_step(step_data, step_state, results, credit)
+            old_score = float(step_state.get("score", 100.0 if step_state.get("correct") else 0.0))
+            if not is_step_finished(step_state) and step_type_of(step_data, step_state) in MATH_STEP_TYPES:
+                old_score = 0.0
+            prob_score += score
+            old_total += old_score
+            if abs(score - old_score) > 1e-9:
+                changed.append({'problem': prob_idx, 'step': step_idx, 'old_score': old_score, 'score': score,
+                                'answer': step_state.get("user_answers", [])})
+            for answer in unverified:
+                review.append({'problem': prob_idx, 'step': step_idx, 'answer': answer,
+                               'expected': step_data.get("expected", "")})
+        prob_max = len(steps) * 100.0
+        problem_scores[prob_idx] = {
+            'score': prob_score,
+            'max_score': prob_max,
+            'percentage': (prob_score / prob_max * 100.0) if prob_max > 0 else 0.0,
+        }
+        total += prob_score
+        max_score += prob_max
+
+    return {
+        'phone': sub['phone'],
+        'source': sub['source'],
+        'problem_set_id': sub['data'].get('problem_set_id'),
+        'export_date': sub['data'].get('export_date'),
+        'total_score': total,
+        'max_score': max_score,
+        'percentage': (total / max_score * 100.0) if max_score > 0 else 0.0,
+        'old_total_score': old_total,
+        'old_percentage': (old_total / max_score * 100.0) if max_score > 0 else 0.0,
+        'problem_scores': problem_scores,
+        'changed_steps': changed,
+        'needs_review': review,
+    }
+
+def write_csv(path, graded):
+    import csv
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['phone', 'export_date', 'old_percentage', 'percentage', 'total_score', 'max_score',
+                         'changed_steps', 'needs_review'])
+        for g in graded:
+            writer.writerow([g['phone'], g['export_date'], f"{g['old_percentage']:.2f}", f"{g['percentage']:.2f}",
+                             f"{g['total_score']:.2f}", f"{g['max_score']:.2f}",
+                             len(g['changed_steps']), len(g['needs_review'])])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-grade exported student submissions against a problem set")
+    parser.add_argument("submissions", nargs="+", help="Chat exports / text files containing STUDENT PROGRESS EXPORT blocks")
+    parser.add_argument("--problem-set", required=True, help="Corrected problem set (exported file or JSON)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Answer check processes (default: one per CPU)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds per answer check (default: 10)")
+    parser.add_argument("--credit", choices=("final", "any"), default="final",
+                        help="Math steps: score the finalized answer like the solver (final), "
+                             "or credit a step if any attempt matches the corrected key (any)")
+    parser.add_argument("-o", "--output", help="Write the updated scores as JSON (default: stdout)")
+    parser.add_argument("--csv", help="Also write one summary row per submission as CSV")
+    args = parser.parse_args()
+
+    problems, problem_set_id = load_problem_set(args.problem_set)
+    print(f"📚 Problem set: {len(problems)} problems", file=sys.stderr)
+
+    submissions, invalid = [], []
+    for path in args.submissions:
+        subs, bad = parse_submissions(read_text(path))
+        submissions.extend(subs)
+        invalid.extend(dict(entry, file=path) for entry in bad)
+    print(f"📥 {len(submissions)} submissions, {len(invalid)} unreadable", file=sys.stderr)
+    for entry in invalid:
+        print(f"  ⚠️ {entry['file']}: {entry['error']} ({entry.get('student_phone') or 'unknown sender'})", file=sys.stderr)
+    other_sets = {s['data'].get('problem_set_id') for s in submissions} - {problem_set_id, None}
+    if problem_set_id and other_sets:
+        print(f"  ⚠️ Some submissions are for another problem set id {sorted(other_sets)}; "
+              f"steps are matched by position", file=sys.stderr)
+
+    pairs, attempts = collect_pairs(submissions, problems)
+    print(f"🔢 {attempts} math attempts, {len(pairs)} distinct (expected, answer) pairs", file=sys.stderr)
+    workers = max(1, min(args.workers, len(pairs)))
+    print(f"🧵 Checking with {workers} worker process(es), {args.timeout:.0f}s per check...", file=sys.stderr)
+    results = check_pairs(pairs, workers, args.timeout) if pairs else {}
+
+    graded = [regrade_submission(sub, problems, results, args.credit) for sub in submissions]
+    broken = broken_keys(problems, results)
+    for entry in broken:
+        print(f"  ❌ Problem {entry['problem']}, step {entry['step']}: expected answer does not parse "
+              f"({entry['expected']}); its answers keep the browser's verdict and are listed for review",
+              file=sys.stderr)
+
+    report = {'problem_set_id': problem_set_id, 'credit': args.credit, 'submissions': graded, 'invalid': invalid,
+              'broken_keys': broken}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"✓ Wrote {args.output}", file=sys.stderr)
+    else:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    if args.csv:
+        write_csv(args.csv, graded)
+        print(f"✓ Wrote {args.csv}", file=sys.stderr)
+
+    changed = sum(1 for g in graded if g['changed_steps'])
+    review = sum(len(g['needs_review']) for g in graded)
+    print(f"📊 {changed}/{len(graded)} submissions changed score, {review} answer(s) need manual review", file=sys.stderr)
+    if broken:
+        print(f"❌ {len(broken)} expected answer(s) in the problem set do not parse, fix them and re-run",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+mathparser - LaTeX answer checking engine
+-----------------------------------------
+The LaTeX -> SymPy parser and answer checks used by solve_problem.html
+and create_problem.html, as a plain Python package so the same code runs
+in Pyodide and in CPython (batch grading, benchmarks).
+
+The pages don't load these files at runtime: embed_mathparser.py inlines
+this package into both HTML files. It also compiles grammar.py into the
+prebuilt LALR parser (_lalr_parser.py). Edit the package, then run
+
+    python embed_mathparser.py
+
+Answer checks that must not hang (a page, batch grading) go through
+check.SubprocessChecker (CPython) or browser.WorkerChecker (Pyodide),
+which run check_answer() under a time budget in a separate process or
+Web Worker. Problem sets exported by create_problem.html carry a
+precompiled answer key per math step (answer_key), so the solver doesn't
+parse the expected answers again.
+
+Requires sympy (lark only to rebuild the parser).
+"""
+
+from .answer_key import AnswerKey, compile_answer_key, load_answer_key
+from .cache import LRUCache
+from .check import DEFAULT_CHECK_TIMEOUT, SubprocessChecker, check_answer
+from .deadline import CheckTimeout, Deadline
+from .difficulty import problem_difficulty
+from .equivalence import (
+    TIER_TIMEOUTS,
+    StrategyTimings,
+    final_eq,
+    normalize_expr,
+    numeric_probe,
+    probe_values,
+    structural_match,
+    validate_limit,
+)
+from .grammar import GRAMMAR
+from .log import DEBUG, ERROR, INFO, OFF, WARNING, StreamLogger, console, lazy, set_level, set_logger
+from .parser import MathParser
+from .preprocess import (
+    auto_fix_common_errors,
+    clean_latex,
+    expression_has_matrix_operations,
+    preprocess_derivatives,
+    preprocess_row_operations,
+)
+from .structure import extract_structure, structure_to_json_serializable, sympy_to_json_serializable
+from .transformer import Latex2Sympy, canonical_scalar
+
+__all__ = [
+    "AnswerKey",
+    "CheckTimeout",
+    "DEBUG",
+    "DEFAULT_CHECK_TIMEOUT",
+    "Deadline",
+    "ERROR",
+    "GRAMMAR",
+    "INFO",
+    "LRUCache",
+    "Latex2Sympy",
+    "MathParser",
+    "OFF",
+    "StrategyTimings",
+    "StreamLogger",
+    "SubprocessChecker",
+    "TIER_TIMEOUTS",
+    "WARNING",
+    "auto_fix_common_errors",
+    "canonical_scalar",
+    "check_answer",
+    "clean_latex",
+    "compile_answer_key",
+    "console",
+    "expression_has_matrix_operations",
+    "extract_structure",
+    "final_eq",
+    "lazy",
+    "load_answer_key",
+    "normalize_expr",
+    "numeric_probe",
+    "preprocess_derivatives",
+    "preprocess_row_operations",
+    "probe_values",
+    "problem_difficulty",
+    "set_level",
+    "set_logger",
+    "structural_match",
+    "structure_to_json_serializable",
+    "sympy_to_json_serializable",
+    "validate_limit",
+]
@@ -0,0 +1,3576 @@
+# grammar sha256: ba41a720d3adedc1f4309f7373653193f69547abb6665ff19752112c58333adc
+# Generated from mathparser/grammar.py by embed_mathparser.py - do not edit
+# The file was automatically generated by Lark v1.3.1
+__version__ = "1.3.1"
+
+#
+#
+#   Lark Stand-alone Generator Tool
+# ----------------------------------
+# Generates a stand-alone LALR(1) parser
+#
+# Git:    https://github.com/erezsh/lark
+# Author: Erez Shinan (erezshin@gmail.com)
+#
+#
+#    >>> LICENSE
+#
+#    This tool and its generated code use a separate license from Lark,
+#    and are subject to the terms of the Mozilla Public License, v. 2.0.
+#    If a copy of the MPL was not distributed with this
+#    file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#
+#    If you wish to purchase a commercial license for this tool and its
+#    generated code, you may contact me via email or otherwise.
+#
+#    If MPL2 is incompatible with your free or open-source project,
+#    contact me and we'll work it out.
+#
+#
+
+from copy import deepcopy
+from abc import ABC, abstractmethod
+from types import ModuleType
+from typing import (
+    TypeVar, Generic, Type, Tuple, List, Dict, Iterator, Collection, Callable, Optional, FrozenSet, Any,
+    Union, Iterable, IO, TYPE_CHECKING, overload, Sequence,
+    Pattern as REPattern, ClassVar, Set, Mapping
+)
+
+
+class LarkError(Exception):
+    pass
+
+
+class ConfigurationError(LarkError, ValueError):
+    pass
+
+
+def assert_config(value, options: Collection, msg='Got %r, expected one of %s'):
+    if value not in options:
+        raise ConfigurationError(msg % (value, options))
+
+
+class GrammarError(LarkError):
+    pass
+
+
+class ParseError(LarkError):
+    pass
+
+
+class LexError(LarkError):
+    pass
+
+T = TypeVar('T')
+
+class UnexpectedInput(LarkError):
+    #--
+    line: int
+    column: int
+    pos_in_stream = None
+    state: Any
+    _terminals_by_name = None
+    interactive_parser: 'InteractiveParser'
+
+    def get_context(self, text: str, span: int=40) -> str:
+        #--
+        pos = self.pos_in_stream or 0
+        start = max(pos - span, 0)
+        end = pos + span
+        if not isinstance(text, bytes):
+            before = text[start:pos].rsplit('\n', 1)[-1]
+            after = text[pos:end].split('\n', 1)[0]
+            return before + after + '\n' + ' ' * len(before.expandtabs()) + '^\n'
+        else:
+            before = text[start:pos].rsplit(b'\n', 1)[-1]
+            after = text[pos:end].split(b'\n', 1)[0]
+            return (before + after + b'\n' + b' ' * len(before.expandtabs()) + b'^\n').decode("ascii", "backslashreplace")
+
+    def match_examples(self, parse_fn: 'Callable[[str], Tree]',
+                             examples: Union[Mapping[T, Iterable[str]], Iterable[Tuple[T, Iterable[str]]]],
+                             token_type_match_fallback: bool=False,
+                             use_accepts: bool=True
+                         ) -> Optional[T]:
+        #--
+        assert self.state is not None, "Not supported for this exception"
+
+        if isinstance(examples, Mapping):
+            examples = examples.items()
+
+        candidate = (None, False)
+        for i, (label, example) in enumerate(examples):
+            assert not isinstance(example, str), "Expecting a list"
+
+            for j, malformed in enumerate(example):
+                try:
+                    parse_fn(malformed)
+                except UnexpectedInput as ut:
+                    if ut.state == self.state:
+                        if (
+                            use_accepts
+                            and isinstance(self, UnexpectedToken)
+                            and isinstance(ut, UnexpectedToken)
+                            and ut.accepts != self.accepts
+                        ):
+                            logger.debug("Different accepts with same state[%d]: %s != %s at example [%s][%s]" %
+                                         (self.state, self.accepts, ut.accepts, i, j))
+                            continue
+                        if (
+                            isinstance(self, (UnexpectedToken, UnexpectedEOF))
+                            and isinstance(ut, (UnexpectedToken, UnexpectedEOF))
+                        ):
+                            if ut.token == self.token:  ##
+
+                                logger.debug("Exact Match at example [%s][%s]" % (i, j))
+                                return label
+
+                            if token_type_match_fallback:
+                                ##
+
+                                if (ut.token.type == self.token.type) and not candidate[-1]:
+                                    logger.debug("Token Type Fallback at example [%s][%s]" % (i, j))
+                                    candidate = label, True
+
+                        if candidate[0] is None:
+                            logger.debug("Same State match at example [%s][%s]" % (i, j))
+                            candidate = label, False
+
+        return candidate[0]
+
+    def _format_expected(self, expected):
+        if self._terminals_by_name:
+            d = self._terminals_by_name
+            expected = [d[t_name].user_repr() if t_name in d else t_name for t_name in expected]
+        return "Expected one of: \n\t* %s\n" % '\n\t* '.join(expected)
+
+
+class UnexpectedEOF(ParseError, UnexpectedInput):
+    #--
+    expected: 'List[Token]'
+
+    def __init__(self, expected, state=None, terminals_by_name=None):
+        super(UnexpectedEOF, self).__init__()
+
+        self.expected = expected
+        self.state = state
+        from .lexer import Token
+        self.token = Token("<EOF>", "")  ##
+
+        self.pos_in_stream = -1
+        self.line = -1
+        self.column = -1
+        self._terminals_by_name = terminals_by_name
+
+
+    def __str__(self):
+        message = "Unexpected end-of-input. "
+        message += self._format_expected(self.expected)
+        return message
+
+
+class UnexpectedCharacters(LexError, UnexpectedInput):
+    #--
+
+    allowed: Set[str]
+    considered_tokens: Set[Any]
+
+    def __init__(self, seq, lex_pos, line, column, allowed=None, considered_tokens=None, state=None, token_history=None,
+                 terminals_by_name=None, considered_rules=None):
+        super(UnexpectedCharacters, self).__init__()
+
+        ##
+
+        self.line = line
+        self.column = column
+        self.pos_in_stream = lex_pos
+        self.state = state
+        self._terminals_by_name = terminals_by_name
+
+        self.allowed = allowed
+        self.considered_tokens = considered_tokens
+        self.considered_rules = considered_rules
+        self.token_history = token_history
+
+        if isinstance(seq, bytes):
+            self.char = seq[lex_pos:lex_pos + 1].decode("ascii", "backslashreplace")
+        else:
+            self.char = seq[lex_pos]
+        self._context = self.get_context(seq)
+
+
+    def __str__(self):
+        message = "No terminal matches '%s' in the current parser context, at line %d col %d" % (self.char, self.line, self.column)
+        message += '\n\n' + self._context
+        if self.allowed:
+            message += self._format_expected(self.allowed)
+        if self.token_history:
+            message += '\nPrevious tokens: %s\n' % ', '.join(repr(t) for t in self.token_history)
+        return message
+
+
+class UnexpectedToken(ParseError, UnexpectedInput):
+    #--
+
+    expected: Set[str]
+    considered_rules: Set[str]
+
+    def __init__(self, token, expected, considered_rules=None, state=None, interactive_parser=None, terminals_by_name=None, token_history=None):
+        super(UnexpectedToken, self).__init__()
+
+        ##
+
+        self.line = getattr(token, 'line', '?')
+        self.column = getattr(token, 'column', '?')
+        self.pos_in_stream = getattr(token, 'start_pos', None)
+        self.state = state
+
+        self.token = token
+        self.expected = expected  ##
+
+        self._accepts = NO_VALUE
+        self.considered_rules = considered_rules
+        self.interactive_parser = interactive_parser
+        self._terminals_by_name = terminals_by_name
+        self.token_history = token_history
+
+
+    @property
+    def accepts(self) -> Set[str]:
+        if self._accepts is NO_VALUE:
+            self._accepts = self.interactive_parser and self.interactive_parser.accepts()
+        return self._accepts
+
+    def __str__(self):
+        message = ("Unexpected token %r at line %s, column %s.\n%s"
+                   % (self.token, self.line, self.column, self._format_expected(self.accepts or self.expected)))
+        if self.token_history:
+            message += "Previous tokens: %r\n" % self.token_history
+
+        return message
+
+
+
+class VisitError(LarkError):
+    #--
+
+    obj: 'Union[Tree, Token]'
+    orig_exc: Exception
+
+    def __init__(self, rule, obj, orig_exc):
+        message = 'Error trying to process rule "%s":\n\n%s' % (rule, orig_exc)
+        super(VisitError, self).__init__(message)
+
+        self.rule = rule
+        self.obj = obj
+        self.orig_exc = orig_exc
+
+
+class MissingVariableError(LarkError):
+    pass
+
+
+import sys, re
+import logging
+from dataclasses import dataclass
+from typing import Generic, AnyStr
+
+logger: logging.Logger = logging.getLogger("lark")
+logger.addHandler(logging.StreamHandler())
+##
+
+##
+
+logger.setLevel(logging.CRITICAL)
+
+
+NO_VALUE = object()
+
+T = TypeVar("T")
+
+
+def classify(seq: Iterable, key: Optional[Callable] = None, value: Optional[Callable] = None) -> Dict:
+    d: Dict[Any, Any] = {}
+    for item in seq:
+        k = key(item) if (key is not None) else item
+        v = value(item) if (value is not None) else item
+        try:
+            d[k].append(v)
+        except KeyError:
+            d[k] = [v]
+    return d
+
+
+def _deserialize(data: Any, namespace: Dict[str, Any], memo: Dict) -> Any:
+    if isinstance(data, dict):
+        if '__type__' in data:  ##
+
+            class_ = namespace[data['__type__']]
+            return class_.deserialize(data, memo)
+        elif '@' in data:
+            return memo[data['@']]
+        return {key:_deserialize(value, namespace, memo) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [_deserialize(value, namespace, memo) for value in data]
+    return data
+
+
+_T = TypeVar("_T", bound="Serialize")
+
+class Serialize:
+    #--
+
+    def memo_serialize(self, types_to_memoize: List) -> Any:
+        memo = SerializeMemoizer(types_to_memoize)
+        return self.serialize(memo), memo.serialize()
+
+    def serialize(self, memo = None) -> Dict[str, Any]:
+        if memo and memo.in_types(self):
+            return {'@': memo.memoized.get(self)}
+
+        fields = getattr(self, '__serialize_fields__')
+        res = {f: _serialize(getattr(self, f), memo) for f in fields}
+        res['__type__'] = type(self).__name__
+        if hasattr(self, '_serialize'):
+            self._serialize(res, memo)
+        return res
+
+    @classmethod
+    def deserialize(cls: Type[_T], data: Dict[str, Any], memo: Dict[int, Any]) -> _T:
+        namespace = getattr(cls, '__serialize_namespace__', [])
+        namespace = {c.__name__:c for c in namespace}
+
+        fields = getattr(cls, '__serialize_fields__')
+
+        if '@' in data:
+            return memo[data['@']]
+
+        inst = cls.__new__(cls)
+        for f in fields:
+            try:
+                setattr(inst, f, _deserialize(data[f], namespace, memo))
+            except KeyError as e:
+                raise KeyError("Cannot find key for class", cls, e)
+
+        if hasattr(inst, '_deserialize'):
+            inst._deserialize()
+
+        return inst
+
+
+class SerializeMemoizer(Serialize):
+    #--
+
+    __serialize_fields__ = 'memoized',
+
+    def __init__(self, types_to_memoize: List) -> None:
+        self.types_to_memoize = tuple(types_to_memoize)
+        self.memoized = Enumerator()
+
+    def in_types(self, value: Serialize) -> bool:
+        return isinstance(value, self.types_to_memoize)
+
+    def serialize(self) -> Dict[int, Any]:  ##
+
+        return _serialize(self.memoized.reversed(), None)
+
+    @classmethod
+    def deserialize(cls, data: Dict[int, Any], namespace: Dict[str, Any], memo: Dict[Any, Any]) -> Dict[int, Any]:  ##
+
+        return _deserialize(data, namespace, memo)
+
+
+try:
+    import regex
+    _has_regex = True
+except ImportError:
+    _has_regex = False
+
+if sys.version_info >= (3, 11):
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+else:
+    import sre_parse
+    import sre_constants
+
+categ_pattern = re.compile(r'\\p{[A-Za-z_]+}')
+
+def get_regexp_width(expr: str) -> Union[Tuple[int, int], List[int]]:
+    if _has_regex:
+        ##
+
+        ##
+
+        ##
+
+        regexp_final = re.sub(categ_pattern, 'A', expr)
+    else:
+        if re.search(categ_pattern, expr):
+            raise ImportError('`regex` module must be installed in order to use Unicode categories.', expr)
+        regexp_final = expr
+    try:
+        ##
+
+        return [int(x) for x in sre_parse.parse(regexp_final).getwidth()]
+    except sre_constants.error:
+        if not _has_regex:
+            raise ValueError(expr)
+        else:
+            ##
+
+            ##
+
+            c = regex.compile(regexp_final)
+            ##
+
+            ##
+
+            MAXWIDTH = getattr(sre_parse, "MAXWIDTH", sre_constants.MAXREPEAT)
+            if c.match('') is None:
+                ##
+
+                return 1, int(MAXWIDTH)
+            else:
+                return 0, int(MAXWIDTH)
+
+
+@dataclass(frozen=True)
+class TextSlice(Generic[AnyStr]):
+    #--
+    text: AnyStr
+    start: int
+    end: int
+
+    def __post_init__(self):
+        if not isinstance(self.text, (str, bytes)):
+            raise TypeError("text must be str or bytes")
+
+        if self.start < 0:
+            object.__setattr__(self, 'start', self.start + len(self.text))
+            assert self.start >=0
+
+        if self.end is None:
+            object.__setattr__(self, 'end', len(self.text))
+        elif self.end < 0:
+            object.__setattr__(self, 'end', self.end + len(self.text))
+            assert self.end <= len(self.text)
+
+    @classmethod
+    def cast_from(cls, text: 'TextOrSlice') -> 'TextSlice[AnyStr]':
+        if isinstance(text, TextSlice):
+            return text
+
+        return cls(text, 0, len(text))
+
+    def is_complete_text(self):
+        return self.start == 0 and self.end == len(self.text)
+
+    def __len__(self):
+        return self.end - self.start
+
+    def count(self, substr: AnyStr):
+        return self.text.count(substr, self.start, self.end)
+
+    def rindex(self, substr: AnyStr):
+        return self.text.rindex(substr, self.start, self.end)
+
+
+TextOrSlice = Union[AnyStr, 'TextSlice[AnyStr]']
+LarkInput = Union[AnyStr, TextSlice[AnyStr], Any]
+
+
+
+class Meta:
+
+    empty: bool
+    line: int
+    column: int
+    start_pos: int
+    end_line: int
+    end_column: int
+    end_pos: int
+    orig_expansion: 'List[TerminalDef]'
+    match_tree: bool
+
+    def __init__(self):
+        self.empty = True
+
+
+_Leaf_T = TypeVar("_Leaf_T")
+Branch = Union[_Leaf_T, 'Tree[_Leaf_T]']
+
+
+class Tree(Generic[_Leaf_T]):
+    #--
+
+    data: str
+    children: 'List[Branch[_Leaf_T]]'
+
+    def __init__(self, data: str, children: 'List[Branch[_Leaf_T]]', meta: Optional[Meta]=None) -> None:
+        self.data = data
+        self.children = children
+        self._meta = meta
+
+    @property
+    def meta(self) -> Meta:
+        if self._meta is None:
+            self._meta = Meta()
+        return self._meta
+
+    def __repr__(self):
+        return 'Tree(%r, %r)' % (self.data, self.children)
+
+    __match_args__ = ("data", "children")
+
+    def _pretty_label(self):
+        return self.data
+
+    def _pretty(self, level, indent_str):
+        yield f'{indent_str*level}{self._pretty_label()}'
+        if len(self.children) == 1 and not isinstance(self.children[0], Tree):
+            yield f'\t{self.children[0]}\n'
+        else:
+            yield '\n'
+            for n in self.children:
+                if isinstance(n, Tree):
+                    yield from n._pretty(level+1, indent_str)
+                else:
+                    yield f'{indent_str*(level+1)}{n}\n'
+
+    def pretty(self, indent_str: str='  ') -> str:
+        #--
+        return ''.join(self._pretty(0, indent_str))
+
+    def __rich__(self, parent:Optional['rich.tree.Tree']=None) -> 'rich.tree.Tree':
+        #--
+        return self._rich(parent)
+
+    def _rich(self, parent):
+        if parent:
+            tree = parent.add(f'[bold]{self.data}[/bold]')
+        else:
+            import rich.tree
+            tree = rich.tree.Tree(self.data)
+
+        for c in self.children:
+            if isinstance(c, Tree):
+                c._rich(tree)
+            else:
+                tree.add(f'[green]{c}[/green]')
+
+        return tree
+
+    def __eq__(self, other):
+        try:
+            return self.data == other.data and self.children == other.children
+        except AttributeError:
+            return False
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __hash__(self) -> int:
+        return hash((self.data, tuple(self.children)))
+
+    def iter_subtrees(self) -> 'Iterator[Tree[_Leaf_T]]':
+        #--
+        queue = [self]
+        subtrees = dict()
+        for subtree in queue:
+            subtrees[id(subtree)] = subtree
+            queue += [c for c in reversed(subtree.children)
+                      if isinstance(c, Tree) and id(c) not in subtrees]
+
+        del queue
+        return reversed(list(subtrees.values()))
+
+    def iter_subtrees_topdown(self):
+        #--
+        stack = [self]
+        stack_append = stack.append
+        stack_pop = stack.pop
+        while stack:
+            node = stack_pop()
+            if not isinstance(node, Tree):
+                continue
+            yield node
+            for child in reversed(node.children):
+                stack_append(child)
+
+    def find_pred(self, pred: 'Callable[[Tree[_Leaf_T]], bool]') -> 'Iterator[Tree[_Leaf_T]]':
+        #--
+        return filter(pred, self.iter_subtrees())
+
+    def find_data(self, data: str) -> 'Iterator[Tree[_Leaf_T]]':
+        #--
+        return self.find_pred(lambda t: t.data == data)
+
+
+from functools import wraps, update_wrapper
+from inspect import getmembers, getmro
+
+_Return_T = TypeVar('_Return_T')
+_Return_V = TypeVar('_Return_V')
+_Leaf_T = TypeVar('_Leaf_T')
+_Leaf_U = TypeVar('_Leaf_U')
+_R = TypeVar('_R')
+_FUNC = Callable[..., _Return_T]
+_DECORATED = Union[_FUNC, type]
+
+class _DiscardType:
+    #--
+
+    def __repr__(self):
+        return "lark.visitors.Discard"
+
+Discard = _DiscardType()
+
+##
+
+
+class _Decoratable:
+    #--
+
+    @classmethod
+    def _apply_v_args(cls, visit_wrapper):
+        mro = getmro(cls)
+        assert mro[0] is cls
+        libmembers = {name for _cls in mro[1:] for name, _ in getmembers(_cls)}
+        for name, value in getmembers(cls):
+
+            ##
+
+            if name.startswith('_') or (name in libmembers and name not in cls.__dict__):
+                continue
+            if not callable(value):
+                continue
+
+            ##
+
+            if isinstance(cls.__dict__[name], _VArgsWrapper):
+                continue
+
+            setattr(cls, name, _VArgsWrapper(cls.__dict__[name], visit_wrapper))
+        return cls
+
+    def __class_getitem__(cls, _):
+        return cls
+
+
+class Transformer(_Decoratable, ABC, Generic[_Leaf_T, _Return_T]):
+    #--
+    __visit_tokens__ = True   ##
+
+
+    def __init__(self,  visit_tokens: bool=True) -> None:
+        self.__visit_tokens__ = visit_tokens
+
+    def _call_userfunc(self, tree, new_children=None):
+        ##
+
+        children = new_children if new_children is not None else tree.children
+        try:
+            f = getattr(self, tree.data)
+        except AttributeError:
+            return self.__default__(tree.data, children, tree.meta)
+        else:
+            try:
+                wrapper = getattr(f, 'visit_wrapper', None)
+                if wrapper is not None:
+                    return f.visit_wrapper(f, tree.data, children, tree.meta)
+                else:
+                    return f(children)
+            except GrammarError:
+                raise
+            except Exception as e:
+                raise VisitError(tree.data, tree, e)
+
+    def _call_userfunc_token(self, token):
+        try:
+            f = getattr(self, token.type)
+        except AttributeError:
+            return self.__default_token__(token)
+        else:
+            try:
+                return f(token)
+            except GrammarError:
+                raise
+            except Exception as e:
+                raise VisitError(token.type, token, e)
+
+    def _transform_children(self, children):
+        for c in children:
+            if isinstance(c, Tree):
+                res = self._transform_tree(c)
+            elif self.__visit_tokens__ and isinstance(c, Token):
+                res = self._call_userfunc_token(c)
+            else:
+                res = c
+
+            if res is not Discard:
+                yield res
+
+    def _transform_tree(self, tree):
+        children = list(self._transform_children(tree.children))
+        return self._call_userfunc(tree, children)
+
+    def transform(self, tree: Tree[_Leaf_T]) -> _Return_T:
+        #--
+        res = list(self._transform_children([tree]))
+        if not res:
+            return None     ##
+
+        assert len(res) == 1
+        return res[0]
+
+    def __mul__(
+            self: 'Transformer[_Leaf_T, Tree[_Leaf_U]]',
+            other: 'Union[Transformer[_Leaf_U, _Return_V], TransformerChain[_Leaf_U, _Return_V,]]'
+    ) -> 'TransformerChain[_Leaf_T, _Return_V]':
+        #--
+        return TransformerChain(self, other)
+
+    def __default__(self, data, children, meta):
+        #--
+        return Tree(data, children, meta)
+
+    def __default_token__(self, token):
+        #--
+        return token
+
+
+def merge_transformers(base_transformer=None, **transformers_to_merge):
+    #--
+    if base_transformer is None:
+        base_transformer = Transformer()
+    for prefix, transformer in transformers_to_merge.items():
+        for method_name in dir(transformer):
+            method = getattr(transformer, method_name)
+            if not callable(method):
+                continue
+            if method_name.startswith("_") or method_name == "transform":
+                continue
+            prefixed_method = prefix + "__" + method_name
+            if hasattr(base_transformer, prefixed_method):
+                raise AttributeError("Cannot merge: method '%s' appears more than once" % prefixed_method)
+
+            setattr(base_transformer, prefixed_method, method)
+
+    return base_transformer
+
+
+class InlineTransformer(Transformer):   ##
+
+    def _call_userfunc(self, tree, new_children=None):
+        ##
+
+        children = new_children if new_children is not None else tree.children
+        try:
+            f = getattr(self, tree.data)
+        except AttributeError:
+            return self.__default__(tree.data, children, tree.meta)
+        else:
+            return f(*children)
+
+
+class TransformerChain(Generic[_Leaf_T, _Return_T]):
+
+    transformers: 'Tuple[Union[Transformer, TransformerChain], ...]'
+
+    def __init__(self, *transformers: 'Union[Transformer, TransformerChain]') -> None:
+        self.transformers = transformers
+
+    def transform(self, tree: Tree[_Leaf_T]) -> _Return_T:
+        for t in self.transformers:
+            tree = t.transform(tree)
+        return cast(_Return_T, tree)
+
+    def __mul__(
+            self: 'TransformerChain[_Leaf_T, Tree[_Leaf_U]]',
+            other: 'Union[Transformer[_Leaf_U, _Return_V], TransformerChain[_Leaf_U, _Return_V]]'
+    ) -> 'TransformerChain[_Leaf_T, _Return_V]':
+        return TransformerChain(*self.transformers + (other,))
+
+
+class Transformer_InPlace(Transformer[_Leaf_T, _Return_T]):
+    #--
+    def _transform_tree(self, tree):           ##
+
+        return self._call_userfunc(tree)
+
+    def transform(self, tree: Tree[_Leaf_T]) -> _Return_T:
+        for subtree in tree.iter_subtrees():
+            subtree.children = list(self._transform_children(subtree.children))
+
+        return self._transform_tree(tree)
+
+
+class Transformer_NonRecursive(Transformer[_Leaf_T, _Return_T]):
+    #--
+
+    def transform(self, tree: Tree[_Leaf_T]) -> _Return_T:
+        ##
+
+        rev_postfix = []
+        q: List[Branch[_Leaf_T]] = [tree]
+        while q:
+            t = q.pop()
+            rev_postfix.append(t)
+            if isinstance(t, Tree):
+                q += t.children
+
+        ##
+
+        stack: List = []
+        for x in reversed(rev_postfix):
+            if isinstance(x, Tree):
+                size = len(x.children)
+                if size:
+                    args = stack[-size:]
+                    del stack[-size:]
+                else:
+                    args = []
+
+                res = self._call_userfunc(x, args)
+                if res is not Discard:
+                    stack.append(res)
+
+            elif self.__visit_tokens__ and isinstance(x, Token):
+                res = self._call_userfunc_token(x)
+                if res is not Discard:
+                    stack.append(res)
+            else:
+                stack.append(x)
+
+        result, = stack  ##
+
+        ##
+
+        ##
+
+        ##
+
+        return cast(_Return_T, result)
+
+
+class Transformer_InPlaceRecursive(Transformer[_Leaf_T, _Return_T]):
+    #--
+    def _transform_tree(self, tree):
+        tree.children = list(self._transform_children(tree.children))
+        return self._call_userfunc(tree)
+
+
+##
+
+
+class VisitorBase:
+    def _call_userfunc(self, tree):
+        return getattr(self, tree.data, self.__default__)(tree)
+
+    def __default__(self, tree):
+        #--
+        return tree
+
+    def __class_getitem__(cls, _):
+        return cls
+
+
+class Visitor(VisitorBase, ABC, Generic[_Leaf_T]):
+    #--
+
+    def visit(self, tree: Tree[_Leaf_T]) -> Tree[_Leaf_T]:
+        #--
+        for subtree in tree.iter_subtrees():
+            self._call_userfunc(subtree)
+        return tree
+
+    def visit_topdown(self, tree: Tree[_Leaf_T]) -> Tree[_Leaf_T]:
+        #--
+        for subtree in tree.iter_subtrees_topdown():
+            self._call_userfunc(subtree)
+        return tree
+
+
+class Visitor_Recursive(VisitorBase, Generic[_Leaf_T]):
+    #--
+
+    def visit(self, tree: Tree[_Leaf_T]) -> Tree[_Leaf_T]:
+        #--
+        for child in tree.children:
+            if isinstance(child, Tree):
+                self.visit(child)
+
+        self._call_userfunc(tree)
+        return tree
+
+    def visit_topdown(self,tree: Tree[_Leaf_T]) -> Tree[_Leaf_T]:
+        #--
+        self._call_userfunc(tree)
+
+        for child in tree.children:
+            if isinstance(child, Tree):
+                self.visit_topdown(child)
+
+        return tree
+
+
+class Interpreter(_Decoratable, ABC, Generic[_Leaf_T, _Return_T]):
+    #--
+
+    def visit(self, tree: Tree[_Leaf_T]) -> _Return_T:
+        ##
+
+        ##
+
+        ##
+
+        return self._visit_tree(tree)
+
+    def _visit_tree(self, tree: Tree[_Leaf_T]):
+        f = getattr(self, tree.data)
+        wrapper = getattr(f, 'visit_wrapper', None)
+        if wrapper is not None:
+            return f.visit_wrapper(f, tree.data, tree.children, tree.meta)
+        else:
+            return f(tree)
+
+    def visit_children(self, tree: Tree[_Leaf_T]) -> List:
+        return [self._visit_tree(child) if isinstance(child, Tree) else child
+                for child in tree.children]
+
+    def __getattr__(self, name):
+        return self.__default__
+
+    def __default__(self, tree):
+        return self.visit_children(tree)
+
+
+_InterMethod = Callable[[Type[Interpreter], _Return_T], _R]
+
+def visit_children_decor(func: _InterMethod) -> _InterMethod:
+    #--
+    @wraps(func)
+    def inner(cls, tree):
+        values = cls.visit_children(tree)
+        return func(cls, values)
+    return inner
+
+##
+
+
+def _apply_v_args(obj, visit_wrapper):
+    try:
+        _apply = obj._apply_v_args
+    except AttributeError:
+        return _VArgsWrapper(obj, visit_wrapper)
+    else:
+        return _apply(visit_wrapper)
+
+
+class _VArgsWrapper:
+    #--
+    base_func: Callable
+
+    def __init__(self, func: Callable, visit_wrapper: Callable[[Callable, str, list, Any], Any]):
+        if isinstance(func, _VArgsWrapper):
+            func = func.base_func
+        self.base_func = func
+        self.visit_wrapper = visit_wrapper
+        update_wrapper(self, func)
+
+    def __call__(self, *args, **kwargs):
+        return self.base_func(*args, **kwargs)
+
+    def __get__(self, instance, owner=None):
+        try:
+            ##
+
+            ##
+
+            g = type(self.base_func).__get__
+        except AttributeError:
+            return self
+        else:
+            return _VArgsWrapper(g(self.base_func, instance, owner), self.visit_wrapper)
+
+    def __set_name__(self, owner, name):
+        try:
+            f = type(self.base_func).__set_name__
+        except AttributeError:
+            return
+        else:
+            f(self.base_func, owner, name)
+
+
+def _vargs_inline(f, _data, children, _meta):
+    return f(*children)
+def _vargs_meta_inline(f, _data, children, meta):
+    return f(meta, *children)
+def _vargs_meta(f, _data, children, meta):
+    return f(meta, children)
+def _vargs_tree(f, data, children, meta):
+    return f(Tree(data, children, meta))
+
+
+def v_args(inline: bool = False, meta: bool = False, tree: bool = False, wrapper: Optional[Callable] = None) -> Callable[[_DECORATED], _DECORATED]:
+    #--
+    if tree and (meta or inline):
+        raise ValueError("Visitor functions cannot combine 'tree' with 'meta' or 'inline'.")
+
+    func = None
+    if meta:
+        if inline:
+            func = _vargs_meta_inline
+        else:
+            func = _vargs_meta
+    elif inline:
+        func = _vargs_inline
+    elif tree:
+        func = _vargs_tree
+
+    if wrapper is not None:
+        if func is not None:
+            raise ValueError("Cannot use 'wrapper' along with 'tree', 'meta' or 'inline'.")
+        func = wrapper
+
+    def _visitor_args_dec(obj):
+        return _apply_v_args(obj, func)
+    return _visitor_args_dec
+
+
+
+TOKEN_DEFAULT_PRIORITY = 0
+
+
+class Symbol(Serialize):
+    __slots__ = ('name',)
+
+    name: str
+    is_term: ClassVar[bool] = NotImplemented
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __eq__(self, other):
+        if not isinstance(other, Symbol):
+            return NotImplemented
+        return self.is_term == other.is_term and self.name == other.name
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, self.name)
+
+    fullrepr = property(__repr__)
+
+    def renamed(self, f):
+        return type(self)(f(self.name))
+
+
+class Terminal(Symbol):
+    __serialize_fields__ = 'name', 'filter_out'
+
+    is_term: ClassVar[bool] = True
+
+    def __init__(self, name: str, filter_out: bool = False) -> None:
+        self.name = name
+        self.filter_out = filter_out
+
+    @property
+    def fullrepr(self):
+        return '%s(%r, %r)' % (type(self).__name__, self.name, self.filter_out)
+
+    def renamed(self, f):
+        return type(self)(f(self.name), self.filter_out)
+
+
+class NonTerminal(Symbol):
+    __serialize_fields__ = 'name',
+
+    is_term: ClassVar[bool] = False
+
+    def serialize(self, memo=None) -> Dict[str, Any]:
+        ##
+
+        ##
+
+        return {'name': str(self.name), '__type__': 'NonTerminal'}
+
+
+class RuleOptions(Serialize):
+    __serialize_fields__ = 'keep_all_tokens', 'expand1', 'priority', 'template_source', 'empty_indices'
+
+    keep_all_tokens: bool
+    expand1: bool
+    priority: Optional[int]
+    template_source: Optional[str]
+    empty_indices: Tuple[bool, ...]
+
+    def __init__(self, keep_all_tokens: bool=False, expand1: bool=False, priority: Optional[int]=None, template_source: Optional[str]=None, empty_indices: Tuple[bool, ...]=()) -> None:
+        self.keep_all_tokens = keep_all_tokens
+        self.expand1 = expand1
+        self.priority = priority
+        self.template_source = template_source
+        self.empty_indices = empty_indices
+
+    def __repr__(self):
+        return 'RuleOptions(%r, %r, %r, %r)' % (
+            self.keep_all_tokens,
+            self.expand1,
+            self.priority,
+            self.template_source
+        )
+
+
+class Rule(Serialize):
+    #--
+    __slots__ = ('origin', 'expansion', 'alias', 'options', 'order', '_hash')
+
+    __serialize_fields__ = 'origin', 'expansion', 'order', 'alias', 'options'
+    __serialize_namespace__ = Terminal, NonTerminal, RuleOptions
+
+    origin: NonTerminal
+    expansion: Sequence[Symbol]
+    order: int
+    alias: Optional[str]
+    options: RuleOptions
+    _hash: int
+
+    def __init__(self, origin: NonTerminal, expansion: Sequence[Symbol],
+                 order: int=0, alias: Optional[str]=None, options: Optional[RuleOptions]=None):
+        self.origin = origin
+        self.expansion = expansion
+        self.alias = alias
+        self.order = order
+        self.options = options or RuleOptions()
+        self._hash = hash((self.origin, tuple(self.expansion)))
+
+    def _deserialize(self):
+        self._hash = hash((self.origin, tuple(self.expansion)))
+
+    def __str__(self):
+        return '<%s : %s>' % (self.origin.name, ' '.join(x.name for x in self.expansion))
+
+    def __repr__(self):
+        return 'Rule(%r, %r, %r, %r)' % (self.origin, self.expansion, self.alias, self.options)
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, Rule):
+            return False
+        return self.origin == other.origin and self.expansion == other.expansion
+
+
+
+from contextlib import suppress
+from copy import copy
+
+try:  ##
+
+    has_interegular = bool(interegular)
+except NameError:
+    has_interegular = False
+
+class Pattern(Serialize, ABC):
+    #--
+
+    value: str
+    flags: Collection[str]
+    raw: Optional[str]
+    type: ClassVar[str]
+
+    def __init__(self, value: str, flags: Collection[str] = (), raw: Optional[str] = None) -> None:
+        self.value = value
+        self.flags = frozenset(flags)
+        self.raw = raw
+
+    def __repr__(self):
+        return repr(self.to_regexp())
+
+    ##
+
+    def __hash__(self):
+        return hash((type(self), self.value, self.flags))
+
+    def __eq__(self, other):
+        return type(self) == type(other) and self.value == other.value and self.flags == other.flags
+
+    @abstractmethod
+    def to_regexp(self) -> str:
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def min_width(self) -> int:
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def max_width(self) -> int:
+        raise NotImplementedError()
+
+    def _get_flags(self, value):
+        for f in self.flags:
+            value = ('(?%s:%s)' % (f, value))
+        return value
+
+
+class PatternStr(Pattern):
+    __serialize_fields__ = 'value', 'flags', 'raw'
+
+    type: ClassVar[str] = "str"
+
+    def to_regexp(self) -> str:
+        return self._get_flags(re.escape(self.value))
+
+    @property
+    def min_width(self) -> int:
+        return len(self.value)
+
+    @property
+    def max_width(self) -> int:
+        return len(self.value)
+
+
+class PatternRE(Pattern):
+    __serialize_fields__ = 'value', 'flags', 'raw', '_width'
+
+    type: ClassVar[str] = "re"
+
+    def to_regexp(self) -> str:
+        return self._get_flags(self.value)
+
+    _width = None
+    def _get_width(self):
+        if self._width is None:
+            self._width = get_regexp_width(self.to_regexp())
+        return self._width
+
+    @property
+    def min_width(self) -> int:
+        return self._get_width()[0]
+
+    @property
+    def max_width(self) -> int:
+        return self._get_width()[1]
+
+
+class TerminalDef(Serialize):
+    #--
+    __serialize_fields__ = 'name', 'pattern', 'priority'
+    __serialize_namespace__ = PatternStr, PatternRE
+
+    name: str
+    pattern: Pattern
+    priority: int
+
+    def __init__(self, name: str, pattern: Pattern, priority: int = TOKEN_DEFAULT_PRIORITY) -> None:
+        assert isinstance(pattern, Pattern), pattern
+        self.name = name
+        self.pattern = pattern
+        self.priority = priority
+
+    def __repr__(self):
+        return '%s(%r, %r)' % (type(self).__name__, self.name, self.pattern)
+
+    def user_repr(self) -> str:
+        if self.name.startswith('__'):  ##
+
+            return self.pattern.raw or self.name
+        else:
+            return self.name
+
+_T = TypeVar('_T', bound="Token")
+
+class Token(str):
+    #--
+    __slots__ = ('type', 'start_pos', 'value', 'line', 'column', 'end_line', 'end_column', 'end_pos')
+
+    __match_args__ = ('type', 'value')
+
+    type: str
+    start_pos: Optional[int]
+    value: Any
+    line: Optional[int]
+    column: Optional[int]
+    end_line: Optional[int]
+    end_column: Optional[int]
+    end_pos: Optional[int]
+
+
+    @overload
+    def __new__(
+            cls,
+            type: str,
+            value: Any,
+            start_pos: Optional[int] = None,
+            line: Optional[int] = None,
+            column: Optional[int] = None,
+            end_line: Optional[int] = None,
+            end_column: Optional[int] = None,
+            end_pos: Optional[int] = None
+    ) -> 'Token':
+        ...
+
+    @overload
+    def __new__(
+            cls,
+            type_: str,
+            value: Any,
+            start_pos: Optional[int] = None,
+            line: Optional[int] = None,
+            column: Optional[int] = None,
+            end_line: Optional[int] = None,
+            end_column: Optional[int] = None,
+            end_pos: Optional[int] = None
+    ) -> 'Token':        ...
+
+    def __new__(cls, *args, **kwargs):
+        if "type_" in kwargs:
+            warnings.warn("`type_` is deprecated use `type` instead", DeprecationWarning)
+
+            if "type" in kwargs:
+                raise TypeError("Error: using both 'type' and the deprecated 'type_' as arguments.")
+            kwargs["type"] = kwargs.pop("type_")
+
+        return cls._future_new(*args, **kwargs)
+
+
+    @classmethod
+    def _future_new(cls, type, value, start_pos=None, line=None, column=None, end_line=None, end_column=None, end_pos=None):
+        inst = super(Token, cls).__new__(cls, value)
+
+        inst.type = type
+        inst.start_pos = start_pos
+        inst.value = value
+        inst.line = line
+        inst.column = column
+        inst.end_line = end_line
+        inst.end_column = end_column
+        inst.end_pos = end_pos
+        return inst
+
+    @overload
+    def update(self, type: Optional[str] = None, value: Optional[Any] = None) -> 'Token':
+        ...
+
+    @overload
+    def update(self, type_: Optional[str] = None, value: Optional[Any] = None) -> 'Token':
+        ...
+
+    def update(self, *args, **kwargs):
+        if "type_" in kwargs:
+            warnings.warn("`type_` is deprecated use `type` instead", DeprecationWarning)
+
+            if "type" in kwargs:
+                raise TypeError("Error: using both 'type' and the deprecated 'type_' as arguments.")
+            kwargs["type"] = kwargs.pop("type_")
+
+        return self._future_update(*args, **kwargs)
+
+    def _future_update(self, type: Optional[str] = None, value: Optional[Any] = None) -> 'Token':
+        return Token.new_borrow_pos(
+            type if type is not None else self.type,
+            value if value is not None else self.value,
+            self
+        )
+
+    @classmethod
+    def new_borrow_pos(cls: Type[_T], type_: str, value: Any, borrow_t: 'Token') -> _T:
+        return cls(type_, value, borrow_t.start_pos, borrow_t.line, borrow_t.column, borrow_t.end_line, borrow_t.end_column, borrow_t.end_pos)
+
+    def __reduce__(self):
+        return (self.__class__, (self.type, self.value, self.start_pos, self.line, self.column))
+
+    def __repr__(self):
+        return 'Token(%r, %r)' % (self.type, self.value)
+
+    def __deepcopy__(self, memo):
+        return Token(self.type, self.value, self.start_pos, self.line, self.column)
+
+    def __eq__(self, other):
+        if isinstance(other, Token) and self.type != other.type:
+            return False
+
+        return str.__eq__(self, other)
+
+    __hash__ = str.__hash__
+
+
+class LineCounter:
+    #--
+
+    __slots__ = 'char_pos', 'line', 'column', 'line_start_pos', 'newline_char'
+
+    def __init__(self, newline_char):
+        self.newline_char = newline_char
+        self.char_pos = 0
+        self.line = 1
+        self.column = 1
+        self.line_start_pos = 0
+
+    def __eq__(self, other):
+        if not isinstance(other, LineCounter):
+            return NotImplemented
+
+        return self.char_pos == other.char_pos and self.newline_char == other.newline_char
+
+    def feed(self, token: TextOrSlice, test_newline=True):
+        #--
+        if test_newline:
+            newlines = token.count(self.newline_char)
+            if newlines:
+                self.line += newlines
+                self.line_start_pos = self.char_pos + token.rindex(self.newline_char) + 1
+
+        self.char_pos += len(token)
+        self.column = self.char_pos - self.line_start_pos + 1
+
+
+class UnlessCallback:
+    def __init__(self, scanner: 'Scanner'):
+        self.scanner = scanner
+
+    def __call__(self, t: Token):
+        res = self.scanner.fullmatch(t.value)
+        if res is not None:
+            t.type = res
+        return t
+
+
+class CallChain:
+    def __init__(self, callback1, callback2, cond):
+        self.callback1 = callback1
+        self.callback2 = callback2
+        self.cond = cond
+
+    def __call__(self, t):
+        t2 = self.callback1(t)
+        return self.callback2(t) if self.cond(t2) else t2
+
+
+def _get_match(re_, regexp, s, flags):
+    m = re_.match(regexp, s, flags)
+    if m:
+        return m.group(0)
+
+def _create_unless(terminals, g_regex_flags, re_, use_bytes):
+    tokens_by_type = classify(terminals, lambda t: type(t.pattern))
+    assert len(tokens_by_type) <= 2, tokens_by_type.keys()
+    embedded_strs = set()
+    callback = {}
+    for retok in tokens_by_type.get(PatternRE, []):
+        unless = []
+        for strtok in tokens_by_type.get(PatternStr, []):
+            if strtok.priority != retok.priority:
+                continue
+            s = strtok.pattern.value
+            if s == _get_match(re_, retok.pattern.to_regexp(), s, g_regex_flags):
+                unless.append(strtok)
+                if strtok.pattern.flags <= retok.pattern.flags:
+                    embedded_strs.add(strtok)
+        if unless:
+            callback[retok.name] = UnlessCallback(Scanner(unless, g_regex_flags, re_, use_bytes=use_bytes))
+
+    new_terminals = [t for t in terminals if t not in embedded_strs]
+    return new_terminals, callback
+
+
+class Scanner:
+    def __init__(self, terminals, g_regex_flags, re_, use_bytes):
+        self.terminals = terminals
+        self.g_regex_flags = g_regex_flags
+        self.re_ = re_
+        self.use_bytes = use_bytes
+
+        self.allowed_types = {t.name for t in self.terminals}
+
+        self._mres = self._build_mres(terminals, len(terminals))
+
+    def _build_mres(self, terminals, max_size):
+        ##
+
+        ##
+
+        ##
+
+        mres = []
+        while terminals:
+            pattern = u'|'.join(u'(?P<%s>%s)' % (t.name, t.pattern.to_regexp()) for t in terminals[:max_size])
+            if self.use_bytes:
+                pattern = pattern.encode('latin-1')
+            try:
+                mre = self.re_.compile(pattern, self.g_regex_flags)
+            except AssertionError:  ##
+
+                return self._build_mres(terminals, max_size // 2)
+
+            mres.append(mre)
+            terminals = terminals[max_size:]
+        return mres
+
+    def match(self, text: TextSlice, pos):
+        for mre in self._mres:
+            m = mre.match(text.text, pos, text.end)
+            if m:
+                return m.group(0), m.lastgroup
+
+
+    def fullmatch(self, text: str) -> Optional[str]:
+        for mre in self._mres:
+            m = mre.fullmatch(text)
+            if m:
+                return m.lastgroup
+        return None
+
+def _regexp_has_newline(r: str):
+    #--
+    return '\n' in r or '\\n' in r or '\\s' in r or '[^' in r or ('(?s' in r and '.' in r)
+
+
+class LexerState:
+    #--
+
+    __slots__ = 'text', 'line_ctr', 'last_token'
+
+    text: TextSlice
+    line_ctr: LineCounter
+    last_token: Optional[Token]
+
+    def __init__(self, text: TextSlice, line_ctr: Optional[LineCounter] = None, last_token: Optional[Token]=None):
+        if isinstance(text, TextSlice):
+            if line_ctr is None:
+                line_ctr = LineCounter(b'\n' if isinstance(text.text, bytes) else '\n')
+
+                if text.start > 0:
+                    ##
+
+                    line_ctr.feed(TextSlice(text.text, 0, text.start))
+
+            if not (text.start <= line_ctr.char_pos <= text.end):
+                raise ValueError("LineCounter.char_pos is out of bounds")
+
+        self.text = text
+        self.line_ctr = line_ctr
+        self.last_token = last_token
+
+
+    def __eq__(self, other):
+        if not isinstance(other, LexerState):
+            return NotImplemented
+
+        return self.text == other.text and self.line_ctr == other.line_ctr and self.last_token == other.last_token
+
+    def __copy__(self):
+        return type(self)(self.text, copy(self.line_ctr), self.last_token)
+
+
+class LexerThread:
+    #--
+
+    def __init__(self, lexer: 'Lexer', lexer_state: Optional[LexerState]):
+        self.lexer = lexer
+        self.state = lexer_state
+
+    @classmethod
+    def from_text(cls, lexer: 'Lexer', text_or_slice: TextOrSlice) -> 'LexerThread':
+        text = TextSlice.cast_from(text_or_slice)
+        return cls(lexer, LexerState(text))
+
+    @classmethod
+    def from_custom_input(cls, lexer: 'Lexer', text: Any) -> 'LexerThread':
+        return cls(lexer, LexerState(text))
+
+    def lex(self, parser_state):
+        if self.state is None:
+            raise TypeError("Cannot lex: No text assigned to lexer state")
+        return self.lexer.lex(self.state, parser_state)
+
+    def __copy__(self):
+        return type(self)(self.lexer, copy(self.state))
+
+    _Token = Token
+
+
+_Callback = Callable[[Token], Token]
+
+class Lexer(ABC):
+    #--
+    @abstractmethod
+    def lex(self, lexer_state: LexerState, parser_state: Any) -> Iterator[Token]:
+        return NotImplemented
+
+    def make_lexer_state(self, text: str):
+        #--
+        return LexerState(TextSlice.cast_from(text))
+
+
+def _check_regex_collisions(terminal_to_regexp: Dict[TerminalDef, str], comparator, strict_mode, max_collisions_to_show=8):
+    if not comparator:
+        comparator = interegular.Comparator.from_regexes(terminal_to_regexp)
+
+    ##
+
+    ##
+
+    max_time = 2 if strict_mode else 0.2
+
+    ##
+
+    if comparator.count_marked_pairs() >= max_collisions_to_show:
+        return
+    for group in classify(terminal_to_regexp, lambda t: t.priority).values():
+        for a, b in comparator.check(group, skip_marked=True):
+            assert a.priority == b.priority
+            ##
+
+            comparator.mark(a, b)
+
+            ##
+
+            message = f"Collision between Terminals {a.name} and {b.name}. "
+            try:
+                example = comparator.get_example_overlap(a, b, max_time).format_multiline()
+            except ValueError:
+                ##
+
+                example = "No example could be found fast enough. However, the collision does still exists"
+            if strict_mode:
+                raise LexError(f"{message}\n{example}")
+            logger.warning("%s The lexer will choose between them arbitrarily.\n%s", message, example)
+            if comparator.count_marked_pairs() >= max_collisions_to_show:
+                logger.warning("Found 8 regex collisions, will not check for more.")
+                return
+
+
+class AbstractBasicLexer(Lexer):
+    terminals_by_name: Dict[str, TerminalDef]
+
+    @abstractmethod
+    def __init__(self, conf: 'LexerConf', comparator=None) -> None:
+        ...
+
+    @abstractmethod
+    def next_token(self, lex_state: LexerState, parser_state: Any = None) -> Token:
+        ...
+
+    def lex(self, state: LexerState, parser_state: Any) -> Iterator[Token]:
+        with suppress(EOFError):
+            while True:
+                yield self.next_token(state, parser_state)
+
+
+class BasicLexer(AbstractBasicLexer):
+    terminals: Collection[TerminalDef]
+    ignore_types: FrozenSet[str]
+    newline_types: FrozenSet[str]
+    user_callbacks: Dict[str, _Callback]
+    callback: Dict[str, _Callback]
+    re: ModuleType
+
+    def __init__(self, conf: 'LexerConf', comparator=None) -> None:
+        terminals = list(conf.terminals)
+        assert all(isinstance(t, TerminalDef) for t in terminals), terminals
+
+        self.re = conf.re_module
+
+        if not conf.skip_validation:
+            ##
+
+            terminal_to_regexp = {}
+            for t in terminals:
+                regexp = t.pattern.to_regexp()
+                try:
+                    self.re.compile(regexp, conf.g_regex_flags)
+                except self.re.error:
+                    raise LexError("Cannot compile token %s: %s" % (t.name, t.pattern))
+
+                if t.pattern.min_width == 0:
+                    raise LexError("Lexer does not allow zero-width terminals. (%s: %s)" % (t.name, t.pattern))
+                if t.pattern.type == "re":
+                    terminal_to_regexp[t] = regexp
+
+            if not (set(conf.ignore) <= {t.name for t in terminals}):
+                raise LexError("Ignore terminals are not defined: %s" % (set(conf.ignore) - {t.name for t in terminals}))
+
+            if has_interegular:
+                _check_regex_collisions(terminal_to_regexp, comparator, conf.strict)
+            elif conf.strict:
+                raise LexError("interegular must be installed for strict mode. Use `pip install 'lark[interegular]'`.")
+
+        ##
+
+        self.newline_types = frozenset(t.name for t in terminals if _regexp_has_newline(t.pattern.to_regexp()))
+        self.ignore_types = frozenset(conf.ignore)
+
+        terminals.sort(key=lambda x: (-x.priority, -x.pattern.max_width, -len(x.pattern.value), x.name))
+        self.terminals = terminals
+        self.user_callbacks = conf.callbacks
+        self.g_regex_flags = conf.g_regex_flags
+        self.use_bytes = conf.use_bytes
+        self.terminals_by_name = conf.terminals_by_name
+
+        self._scanner: Optional[Scanner] = None
+
+    def _build_scanner(self) -> Scanner:
+        terminals, self.callback = _create_unless(self.terminals, self.g_regex_flags, self.re, self.use_bytes)
+        assert all(self.callback.values())
+
+        for type_, f in self.user_callbacks.items():
+            if type_ in self.callback:
+                ##
+
+                self.callback[type_] = CallChain(self.callback[type_], f, lambda t: t.type == type_)
+            else:
+                self.callback[type_] = f
+
+        return Scanner(terminals, self.g_regex_flags, self.re, self.use_bytes)
+
+    @property
+    def scanner(self) -> Scanner:
+        if self._scanner is None:
+            self._scanner = self._build_scanner()
+        return self._scanner
+
+    def match(self, text, pos):
+        return self.scanner.match(text, pos)
+
+    def next_token(self, lex_state: LexerState, parser_state: Any = None) -> Token:
+        line_ctr = lex_state.line_ctr
+        while line_ctr.char_pos < lex_state.text.end:
+            res = self.match(lex_state.text, line_ctr.char_pos)
+            if not res:
+                allowed = self.scanner.allowed_types - self.ignore_types
+                if not allowed:
+                    allowed = {"<END-OF-FILE>"}
+                raise UnexpectedCharacters(lex_state.text.text, line_ctr.char_pos, line_ctr.line, line_ctr.column,
+                                           allowed=allowed, token_history=lex_state.last_token and [lex_state.last_token],
+                                           state=parser_state, terminals_by_name=self.terminals_by_name)
+
+            value, type_ = res
+
+            ignored = type_ in self.ignore_types
+            t = None
+            if not ignored or type_ in self.callback:
+                t = Token(type_, value, line_ctr.char_pos, line_ctr.line, line_ctr.column)
+            line_ctr.feed(value, type_ in self.newline_types)
+            if t is not None:
+                t.end_line = line_ctr.line
+                t.end_column = line_ctr.column
+                t.end_pos = line_ctr.char_pos
+                if t.type in self.callback:
+                    t = self.callback[t.type](t)
+                if not ignored:
+                    if not isinstance(t, Token):
+                        raise LexError("Callbacks must return a token (returned %r)" % t)
+                    lex_state.last_token = t
+                    return t
+
+        ##
+
+        raise EOFError(self)
+
+
+class ContextualLexer(Lexer):
+    lexers: Dict[int, AbstractBasicLexer]
+    root_lexer: AbstractBasicLexer
+
+    BasicLexer: Type[AbstractBasicLexer] = BasicLexer
+
+    def __init__(self, conf: 'LexerConf', states: Dict[int, Collection[str]], always_accept: Collection[str]=()) -> None:
+        terminals = list(conf.terminals)
+        terminals_by_name = conf.terminals_by_name
+
+        trad_conf = copy(conf)
+        trad_conf.terminals = terminals
+
+        if has_interegular and not conf.skip_validation:
+            comparator = interegular.Comparator.from_regexes({t: t.pattern.to_regexp() for t in terminals})
+        else:
+            comparator = None
+        lexer_by_tokens: Dict[FrozenSet[str], AbstractBasicLexer] = {}
+        self.lexers = {}
+        for state, accepts in states.items():
+            key = frozenset(accepts)
+            try:
+                lexer = lexer_by_tokens[key]
+            except KeyError:
+                accepts = set(accepts) | set(conf.ignore) | set(always_accept)
+                lexer_conf = copy(trad_conf)
+                lexer_conf.terminals = [terminals_by_name[n] for n in accepts if n in terminals_by_name]
+                lexer = self.BasicLexer(lexer_conf, comparator)
+                lexer_by_tokens[key] = lexer
+
+            self.lexers[state] = lexer
+
+        assert trad_conf.terminals is terminals
+        trad_conf.skip_validation = True  ##
+
+        self.root_lexer = self.BasicLexer(trad_conf, comparator)
+
+    def lex(self, lexer_state: LexerState, parser_state: 'ParserState') -> Iterator[Token]:
+        try:
+            while True:
+                lexer = self.lexers[parser_state.position]
+                yield lexer.next_token(lexer_state, parser_state)
+        except EOFError:
+            pass
+        except UnexpectedCharacters as e:
+            ##
+
+            ##
+
+            try:
+                last_token = lexer_state.last_token  ##
+
+                token = self.root_lexer.next_token(lexer_state, parser_state)
+                raise UnexpectedToken(token, e.allowed, state=parser_state, token_history=[last_token], terminals_by_name=self.root_lexer.terminals_by_name)
+            except UnexpectedCharacters:
+                raise e  ##
+
+
+
+
+_ParserArgType: 'TypeAlias' = 'Literal["earley", "lalr", "cyk", "auto"]'
+_LexerArgType: 'TypeAlias' = 'Union[Literal["auto", "basic", "contextual", "dynamic", "dynamic_complete"], Type[Lexer]]'
+_LexerCallback = Callable[[Token], Token]
+ParserCallbacks = Dict[str, Callable]
+
+class LexerConf(Serialize):
+    __serialize_fields__ = 'terminals', 'ignore', 'g_regex_flags', 'use_bytes', 'lexer_type'
+    __serialize_namespace__ = TerminalDef,
+
+    terminals: Collection[TerminalDef]
+    re_module: ModuleType
+    ignore: Collection[str]
+    postlex: 'Optional[PostLex]'
+    callbacks: Dict[str, _LexerCallback]
+    g_regex_flags: int
+    skip_validation: bool
+    use_bytes: bool
+    lexer_type: Optional[_LexerArgType]
+    strict: bool
+
+    def __init__(self, terminals: Collection[TerminalDef], re_module: ModuleType, ignore: Collection[str]=(), postlex: 'Optional[PostLex]'=None,
+                 callbacks: Optional[Dict[str, _LexerCallback]]=None, g_regex_flags: int=0, skip_validation: bool=False, use_bytes: bool=False, strict: bool=False):
+        self.terminals = terminals
+        self.terminals_by_name = {t.name: t for t in self.terminals}
+        assert len(self.terminals) == len(self.terminals_by_name)
+        self.ignore = ignore
+        self.postlex = postlex
+        self.callbacks = callbacks or {}
+        self.g_regex_flags = g_regex_flags
+        self.re_module = re_module
+        self.skip_validation = skip_validation
+        self.use_bytes = use_bytes
+        self.strict = strict
+        self.lexer_type = None
+
+    def _deserialize(self):
+        self.terminals_by_name = {t.name: t for t in self.terminals}
+
+    def __deepcopy__(self, memo=None):
+        return type(self)(
+            deepcopy(self.terminals, memo),
+            self.re_module,
+            deepcopy(self.ignore, memo),
+            deepcopy(self.postlex, memo),
+            deepcopy(self.callbacks, memo),
+            deepcopy(self.g_regex_flags, memo),
+            deepcopy(self.skip_validation, memo),
+            deepcopy(self.use_bytes, memo),
+        )
+
+class ParserConf(Serialize):
+    __serialize_fields__ = 'rules', 'start', 'parser_type'
+
+    rules: List['Rule']
+    callbacks: ParserCallbacks
+    start: List[str]
+    parser_type: _ParserArgType
+
+    def __init__(self, rules: List['Rule'], callbacks: ParserCallbacks, start: List[str]):
+        assert isinstance(start, list)
+        self.rules = rules
+        self.callbacks = callbacks
+        self.start = start
+
+
+from functools import partial, wraps
+from itertools import product
+
+
+class ExpandSingleChild:
+    def __init__(self, node_builder):
+        self.node_builder = node_builder
+
+    def __call__(self, children):
+        if len(children) == 1:
+            return children[0]
+        else:
+            return self.node_builder(children)
+
+
+
+class PropagatePositions:
+    def __init__(self, node_builder, node_filter=None):
+        self.node_builder = node_builder
+        self.node_filter = node_filter
+
+    def __call__(self, children):
+        res = self.node_builder(children)
+
+        if isinstance(res, Tree):
+            ##
+
+            ##
+
+            ##
+
+            ##
+
+
+            res_meta = res.meta
+
+            first_meta = self._pp_get_meta(children)
+            if first_meta is not None:
+                if not hasattr(res_meta, 'line'):
+                    ##
+
+                    res_meta.line = getattr(first_meta, 'container_line', first_meta.line)
+                    res_meta.column = getattr(first_meta, 'container_column', first_meta.column)
+                    res_meta.start_pos = getattr(first_meta, 'container_start_pos', first_meta.start_pos)
+                    res_meta.empty = False
+
+                res_meta.container_line = getattr(first_meta, 'container_line', first_meta.line)
+                res_meta.container_column = getattr(first_meta, 'container_column', first_meta.column)
+                res_meta.container_start_pos = getattr(first_meta, 'container_start_pos', first_meta.start_pos)
+
+            last_meta = self._pp_get_meta(reversed(children))
+            if last_meta is not None:
+                if not hasattr(res_meta, 'end_line'):
+                    res_meta.end_line = getattr(last_meta, 'container_end_line', last_meta.end_line)
+                    res_meta.end_column = getattr(last_meta, 'container_end_column', last_meta.end_column)
+                    res_meta.end_pos = getattr(last_meta, 'container_end_pos', last_meta.end_pos)
+                    res_meta.empty = False
+
+                res_meta.container_end_line = getattr(last_meta, 'container_end_line', last_meta.end_line)
+                res_meta.container_end_column = getattr(last_meta, 'container_end_column', last_meta.end_column)
+                res_meta.container_end_pos = getattr(last_meta, 'container_end_pos', last_meta.end_pos)
+
+        return res
+
+    def _pp_get_meta(self, children):
+        for c in children:
+            if self.node_filter is not None and not self.node_filter(c):
+                continue
+            if isinstance(c, Tree):
+                if not c.meta.empty:
+                    return c.meta
+            elif isinstance(c, Token):
+                return c
+            elif hasattr(c, '__lark_meta__'):
+                return c.__lark_meta__()
+
+def make_propagate_positions(option):
+    if callable(option):
+        return partial(PropagatePositions, node_filter=option)
+    elif option is True:
+        return PropagatePositions
+    elif option is False:
+        return None
+
+    raise ConfigurationError('Invalid option for propagate_positions: %r' % option)
+
+
+class ChildFilter:
+    def __init__(self, to_include, append_none, node_builder):
+        self.node_builder = node_builder
+        self.to_include = to_include
+        self.append_none = append_none
+
+    def __call__(self, children):
+        filtered = []
+
+        for i, to_expand, add_none in self.to_include:
+            if add_none:
+                filtered += [None] * add_none
+            if to_expand:
+                filtered += children[i].children
+            else:
+                filtered.append(children[i])
+
+        if self.append_none:
+            filtered += [None] * self.append_none
+
+        return self.node_builder(filtered)
+
+
+class ChildFilterLALR(ChildFilter):
+    #--
+
+    def __call__(self, children):
+        filtered = []
+        for i, to_expand, add_none in self.to_include:
+            if add_none:
+                filtered += [None] * add_none
+            if to_expand:
+                if filtered:
+                    filtered += children[i].children
+                else:   ##
+
+                    filtered = children[i].children
+            else:
+                filtered.append(children[i])
+
+        if self.append_none:
+            filtered += [None] * self.append_none
+
+        return self.node_builder(filtered)
+
+
+class ChildFilterLALR_NoPlaceholders(ChildFilter):
+    #--
+    def __init__(self, to_include, node_builder):
+        self.node_builder = node_builder
+        self.to_include = to_include
+
+    def __call__(self, children):
+        filtered = []
+        for i, to_expand in self.to_include:
+            if to_expand:
+                if filtered:
+                    filtered += children[i].children
+                else:   ##
+
+                    filtered = children[i].children
+            else:
+                filtered.append(children[i])
+        return self.node_builder(filtered)
+
+
+def _should_expand(sym):
+    return not sym.is_term and sym.name.startswith('_')
+
+
+def maybe_create_child_filter(expansion, keep_all_tokens, ambiguous, _empty_indices: List[bool]):
+    ##
+
+    if _empty_indices:
+        assert _empty_indices.count(False) == len(expansion)
+        s = ''.join(str(int(b)) for b in _empty_indices)
+        empty_indices = [len(ones) for ones in s.split('0')]
+        assert len(empty_indices) == len(expansion)+1, (empty_indices, len(expansion))
+    else:
+        empty_indices = [0] * (len(expansion)+1)
+
+    to_include = []
+    nones_to_add = 0
+    for i, sym in enumerate(expansion):
+        nones_to_add += empty_indices[i]
+        if keep_all_tokens or not (sym.is_term and sym.filter_out):
+            to_include.append((i, _should_expand(sym), nones_to_add))
+            nones_to_add = 0
+
+    nones_to_add += empty_indices[len(expansion)]
+
+    if _empty_indices or len(to_include) < len(expansion) or any(to_expand for i, to_expand,_ in to_include):
+        if _empty_indices or ambiguous:
+            return partial(ChildFilter if ambiguous else ChildFilterLALR, to_include, nones_to_add)
+        else:
+            ##
+
+            return partial(ChildFilterLALR_NoPlaceholders, [(i, x) for i,x,_ in to_include])
+
+
+class AmbiguousExpander:
+    #--
+    def __init__(self, to_expand, tree_class, node_builder):
+        self.node_builder = node_builder
+        self.tree_class = tree_class
+        self.to_expand = to_expand
+
+    def __call__(self, children):
+        def _is_ambig_tree(t):
+            return hasattr(t, 'data') and t.data == '_ambig'
+
+        ##
+
+        ##
+
+        ##
+
+        ##
+
+        ambiguous = []
+        for i, child in enumerate(children):
+            if _is_ambig_tree(child):
+                if i in self.to_expand:
+                    ambiguous.append(i)
+
+                child.expand_kids_by_data('_ambig')
+
+        if not ambiguous:
+            return self.node_builder(children)
+
+        expand = [child.children if i in ambiguous else (child,) for i, child in enumerate(children)]
+        return self.tree_class('_ambig', [self.node_builder(list(f)) for f in product(*expand)])
+
+
+def maybe_create_ambiguous_expander(tree_class, expansion, keep_all_tokens):
+    to_expand = [i for i, sym in enumerate(expansion)
+                 if keep_all_tokens or ((not (sym.is_term and sym.filter_out)) and _should_expand(sym))]
+    if to_expand:
+        return partial(AmbiguousExpander, to_expand, tree_class)
+
+
+class AmbiguousIntermediateExpander:
+    #--
+
+    def __init__(self, tree_class, node_builder):
+        self.node_builder = node_builder
+        self.tree_class = tree_class
+
+    def __call__(self, children):
+        def _is_iambig_tree(child):
+            return hasattr(child, 'data') and child.data == '_iambig'
+
+        def _collapse_iambig(children):
+            #--
+
+            ##
+
+            ##
+
+            if children and _is_iambig_tree(children[0]):
+                iambig_node = children[0]
+                result = []
+                for grandchild in iambig_node.children:
+                    collapsed = _collapse_iambig(grandchild.children)
+                    if collapsed:
+                        for child in collapsed:
+                            child.children += children[1:]
+                        result += collapsed
+                    else:
+                        new_tree = self.tree_class('_inter', grandchild.children + children[1:])
+                        result.append(new_tree)
+                return result
+
+        collapsed = _collapse_iambig(children)
+        if collapsed:
+            processed_nodes = [self.node_builder(c.children) for c in collapsed]
+            return self.tree_class('_ambig', processed_nodes)
+
+        return self.node_builder(children)
+
+
+
+def inplace_transformer(func):
+    @wraps(func)
+    def f(children):
+        ##
+
+        tree = Tree(func.__name__, children)
+        return func(tree)
+    return f
+
+
+def apply_visit_wrapper(func, name, wrapper):
+    if wrapper is _vargs_meta or wrapper is _vargs_meta_inline:
+        raise NotImplementedError("Meta args not supported for internal transformer; use YourTransformer().transform(parser.parse()) instead")
+
+    @wraps(func)
+    def f(children):
+        return wrapper(func, name, children, None)
+    return f
+
+
+class ParseTreeBuilder:
+    def __init__(self, rules, tree_class, propagate_positions=False, ambiguous=False, maybe_placeholders=False):
+        self.tree_class = tree_class
+        self.propagate_positions = propagate_positions
+        self.ambiguous = ambiguous
+        self.maybe_placeholders = maybe_placeholders
+
+        self.rule_builders = list(self._init_builders(rules))
+
+    def _init_builders(self, rules):
+        propagate_positions = make_propagate_positions(self.propagate_positions)
+
+        for rule in rules:
+            options = rule.options
+            keep_all_tokens = options.keep_all_tokens
+            expand_single_child = options.expand1
+
+            wrapper_chain = list(filter(None, [
+                (expand_single_child and not rule.alias) and ExpandSingleChild,
+                maybe_create_child_filter(rule.expansion, keep_all_tokens, self.ambiguous, options.empty_indices if self.maybe_placeholders else None),
+                propagate_positions,
+                self.ambiguous and maybe_create_ambiguous_expander(self.tree_class, rule.expansion, keep_all_tokens),
+                self.ambiguous and partial(AmbiguousIntermediateExpander, self.tree_class)
+            ]))
+
+            yield rule, wrapper_chain
+
+    def create_callback(self, transformer=None):
+        callbacks = {}
+
+        default_handler = getattr(transformer, '__default__', None)
+        if default_handler:
+            def default_callback(data, children):
+                return default_handler(data, children, None)
+        else:
+            default_callback = self.tree_class
+
+        for rule, wrapper_chain in self.rule_builders:
+
+            user_callback_name = rule.alias or rule.options.template_source or rule.origin.name
+            try:
+                f = getattr(transformer, user_callback_name)
+                wrapper = getattr(f, 'visit_wrapper', None)
+                if wrapper is not None:
+                    f = apply_visit_wrapper(f, user_callback_name, wrapper)
+                elif isinstance(transformer, Transformer_InPlace):
+                    f = inplace_transformer(f)
+            except AttributeError:
+                f = partial(default_callback, user_callback_name)
+
+            for w in wrapper_chain:
+                f = w(f)
+
+            if rule in callbacks:
+                raise GrammarError("Rule '%s' already exists" % (rule,))
+
+            callbacks[rule] = f
+
+        return callbacks
+
+
+
+class Action:
+    def __init__(self, name):
+        self.name = name
+    def __str__(self):
+        return self.name
+    def __repr__(self):
+        return str(self)
+
+Shift = Action('Shift')
+Reduce = Action('Reduce')
+
+StateT = TypeVar("StateT")
+
+class ParseTableBase(Generic[StateT]):
+    states: Dict[StateT, Dict[str, Tuple]]
+    start_states: Dict[str, StateT]
+    end_states: Dict[str, StateT]
+
+    def __init__(self, states, start_states, end_states):
+        self.states = states
+        self.start_states = start_states
+        self.end_states = end_states
+
+    def serialize(self, memo):
+        tokens = Enumerator()
+
+        states = {
+            state: {tokens.get(token): ((1, arg.serialize(memo)) if action is Reduce else (0, arg))
+                    for token, (action, arg) in actions.items()}
+            for state, actions in self.states.items()
+        }
+
+        return {
+            'tokens': tokens.reversed(),
+            'states': states,
+            'start_states': self.start_states,
+            'end_states': self.end_states,
+        }
+
+    @classmethod
+    def deserialize(cls, data, memo):
+        tokens = data['tokens']
+        states = {
+            state: {tokens[token]: ((Reduce, Rule.deserialize(arg, memo)) if action==1 else (Shift, arg))
+                    for token, (action, arg) in actions.items()}
+            for state, actions in data['states'].items()
+        }
+        return cls(states, data['start_states'], data['end_states'])
+
+class ParseTable(ParseTableBase['State']):
+    #--
+    pass
+
+
+class IntParseTable(ParseTableBase[int]):
+    #--
+
+    @classmethod
+    def from_ParseTable(cls, parse_table: ParseTable):
+        enum = list(parse_table.states)
+        state_to_idx: Dict['State', int] = {s:i for i,s in enumerate(enum)}
+        int_states = {}
+
+        for s, la in parse_table.states.items():
+            la = {k:(v[0], state_to_idx[v[1]]) if v[0] is Shift else v
+                  for k,v in la.items()}
+            int_states[ state_to_idx[s] ] = la
+
+
+        start_states = {start:state_to_idx[s] for start, s in parse_table.start_states.items()}
+        end_states = {start:state_to_idx[s] for start, s in parse_table.end_states.items()}
+        return cls(int_states, start_states, end_states)
+
+
+
+class ParseConf(Generic[StateT]):
+    __slots__ = 'parse_table', 'callbacks', 'start', 'start_state', 'end_state', 'states'
+
+    parse_table: ParseTableBase[StateT]
+    callbacks: ParserCallbacks
+    start: str
+
+    start_state: StateT
+    end_state: StateT
+    states: Dict[StateT, Dict[str, tuple]]
+
+    def __init__(self, parse_table: ParseTableBase[StateT], callbacks: ParserCallbacks, start: str):
+        self.parse_table = parse_table
+
+        self.start_state = self.parse_table.start_states[start]
+        self.end_state = self.parse_table.end_states[start]
+        self.states = self.parse_table.states
+
+        self.callbacks = callbacks
+        self.start = start
+
+class ParserState(Generic[StateT]):
+    __slots__ = 'parse_conf', 'lexer', 'state_stack', 'value_stack'
+
+    parse_conf: ParseConf[StateT]
+    lexer: LexerThread
+    state_stack: List[StateT]
+    value_stack: list
+
+    def __init__(self, parse_conf: ParseConf[StateT], lexer: LexerThread, state_stack=None, value_stack=None):
+        self.parse_conf = parse_conf
+        self.lexer = lexer
+        self.state_stack = state_stack or [self.parse_conf.start_state]
+        self.value_stack = value_stack or []
+
+    @property
+    def position(self) -> StateT:
+        return self.state_stack[-1]
+
+    ##
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ParserState):
+            return NotImplemented
+        return len(self.state_stack) == len(other.state_stack) and self.position == other.position
+
+    def __copy__(self):
+        return self.copy()
+
+    def copy(self, deepcopy_values=True) -> 'ParserState[StateT]':
+        return type(self)(
+            self.parse_conf,
+            self.lexer, ##
+
+            copy(self.state_stack),
+            deepcopy(self.value_stack) if deepcopy_values else copy(self.value_stack),
+        )
+
+    def feed_token(self, token: Token, is_end=False) -> Any:
+        state_stack = self.state_stack
+        value_stack = self.value_stack
+        states = self.parse_conf.states
+        end_state = self.parse_conf.end_state
+        callbacks = self.parse_conf.callbacks
+
+        while True:
+            state = state_stack[-1]
+            try:
+                action, arg = states[state][token.type]
+            except KeyError:
+                expected = {s for s in states[state].keys() if s.isupper()}
+                raise UnexpectedToken(token, expected, state=self, interactive_parser=None)
+
+            assert arg != end_state
+
+            if action is Shift:
+                ##
+
+                assert not is_end
+                state_stack.append(arg)
+                value_stack.append(token if token.type not in callbacks else callbacks[token.type](token))
+                return
+            else:
+                ##
+
+                rule = arg
+                size = len(rule.expansion)
+                if size:
+                    s = value_stack[-size:]
+                    del state_stack[-size:]
+                    del value_stack[-size:]
+                else:
+                    s = []
+
+                value = callbacks[rule](s) if callbacks else s
+
+                _action, new_state = states[state_stack[-1]][rule.origin.name]
+                assert _action is Shift
+                state_stack.append(new_state)
+                value_stack.append(value)
+
+                if is_end and state_stack[-1] == end_state:
+                    return value_stack[-1]
+
+
+class LALR_Parser(Serialize):
+    def __init__(self, parser_conf: ParserConf, debug: bool=False, strict: bool=False):
+        analysis = LALR_Analyzer(parser_conf, debug=debug, strict=strict)
+        analysis.compute_lalr()
+        callbacks = parser_conf.callbacks
+
+        self._parse_table = analysis.parse_table
+        self.parser_conf = parser_conf
+        self.parser = _Parser(analysis.parse_table, callbacks, debug)
+
+    @classmethod
+    def deserialize(cls, data, memo, callbacks, debug=False):
+        inst = cls.__new__(cls)
+        inst._parse_table = IntParseTable.deserialize(data, memo)
+        inst.parser = _Parser(inst._parse_table, callbacks, debug)
+        return inst
+
+    def serialize(self, memo: Any = None) -> Dict[str, Any]:
+        return self._parse_table.serialize(memo)
+
+    def parse_interactive(self, lexer: LexerThread, start: str):
+        return self.parser.parse(lexer, start, start_interactive=True)
+
+    def parse(self, lexer, start, on_error=None):
+        try:
+            return self.parser.parse(lexer, start)
+        except UnexpectedInput as e:
+            if on_error is None:
+                raise
+
+            while True:
+                if isinstance(e, UnexpectedCharacters):
+                    s = e.interactive_parser.lexer_thread.state
+                    p = s.line_ctr.char_pos
+
+                if not on_error(e):
+                    raise e
+
+                if isinstance(e, UnexpectedCharacters):
+                    ##
+
+                    if p == s.line_ctr.char_pos:
+                        s.line_ctr.feed(s.text.text[p:p+1])
+
+                try:
+                    return e.interactive_parser.resume_parse()
+                except UnexpectedToken as e2:
+                    if (isinstance(e, UnexpectedToken)
+                        and e.token.type == e2.token.type == '$END'
+                        and e.interactive_parser == e2.interactive_parser):
+                        ##
+
+                        raise e2
+                    e = e2
+                except UnexpectedCharacters as e2:
+                    e = e2
+
+
+class _Parser:
+    parse_table: ParseTableBase
+    callbacks: ParserCallbacks
+    debug: bool
+
+    def __init__(self, parse_table: ParseTableBase, callbacks: ParserCallbacks, debug: bool=False):
+        self.parse_table = parse_table
+        self.callbacks = callbacks
+        self.debug = debug
+
+    def parse(self, lexer: LexerThread, start: str, value_stack=None, state_stack=None, start_interactive=False):
+        parse_conf = ParseConf(self.parse_table, self.callbacks, start)
+        parser_state = ParserState(parse_conf, lexer, state_stack, value_stack)
+        if start_interactive:
+            return InteractiveParser(self, parser_state, parser_state.lexer)
+        return self.parse_from_state(parser_state)
+
+
+    def parse_from_state(self, state: ParserState, last_token: Optional[Token]=None):
+        #--
+        try:
+            token = last_token
+            for token in state.lexer.lex(state):
+                assert token is not None
+                state.feed_token(token)
+
+            end_token = Token.new_borrow_pos('$END', '', token) if token else Token('$END', '', 0, 1, 1)
+            return state.feed_token(end_token, True)
+        except UnexpectedInput as e:
+            try:
+                e.interactive_parser = InteractiveParser(self, state, state.lexer)
+            except NameError:
+                pass
+            raise e
+        except Exception as e:
+            if self.debug:
+                print("")
+                print("STATE STACK DUMP")
+                print("----------------")
+                for i, s in enumerate(state.state_stack):
+                    print('%d)' % i , s)
+                print("")
+
+            raise
+
+
+class InteractiveParser:
+    #--
+    def __init__(self, parser, parser_state: ParserState, lexer_thread: LexerThread):
+        self.parser = parser
+        self.parser_state = parser_state
+        self.lexer_thread = lexer_thread
+        self.result = None
+
+    @property
+    def lexer_state(self) -> LexerThread:
+        warnings.warn("lexer_state will be removed in subsequent releases. Use lexer_thread instead.", DeprecationWarning)
+        return self.lexer_thread
+
+    def feed_token(self, token: Token):
+        #--
+        return self.parser_state.feed_token(token, token.type == '$END')
+
+    def iter_parse(self) -> Iterator[Token]:
+        #--
+        for token in self.lexer_thread.lex(self.parser_state):
+            yield token
+            self.result = self.feed_token(token)
+
+    def exhaust_lexer(self) -> List[Token]:
+        #--
+        return list(self.iter_parse())
+
+
+    def feed_eof(self, last_token=None):
+        #--
+        eof = Token.new_borrow_pos('$END', '', last_token) if last_token is not None else self.lexer_thread._Token('$END', '', 0, 1, 1)
+        return self.feed_token(eof)
+
+
+    def __copy__(self):
+        #--
+        return self.copy()
+
+    def copy(self, deepcopy_values=True):
+        return type(self)(
+            self.parser,
+            self.parser_state.copy(deepcopy_values=deepcopy_values),
+            copy(self.lexer_thread),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, InteractiveParser):
+            return False
+
+        return self.parser_state == other.parser_state and self.lexer_thread == other.lexer_thread
+
+    def as_immutable(self):
+        #--
+        p = copy(self)
+        return ImmutableInteractiveParser(p.parser, p.parser_state, p.lexer_thread)
+
+    def pretty(self):
+        #--
+        out = ["Parser choices:"]
+        for k, v in self.choices().items():
+            out.append('\t- %s -> %r' % (k, v))
+        out.append('stack size: %s' % len(self.parser_state.state_stack))
+        return '\n'.join(out)
+
+    def choices(self):
+        #--
+        return self.parser_state.parse_conf.parse_table.states[self.parser_state.position]
+
+    def accepts(self):
+        #--
+        accepts = set()
+        conf_no_callbacks = copy(self.parser_state.parse_conf)
+        ##
+
+        ##
+
+        conf_no_callbacks.callbacks = {}
+        for t in self.choices():
+            if t.isupper(): ##
+
+                new_cursor = self.copy(deepcopy_values=False)
+                new_cursor.parser_state.parse_conf = conf_no_callbacks
+                try:
+                    new_cursor.feed_token(self.lexer_thread._Token(t, ''))
+                except UnexpectedToken:
+                    pass
+                else:
+                    accepts.add(t)
+        return accepts
+
+    def resume_parse(self):
+        #--
+        return self.parser.parse_from_state(self.parser_state, last_token=self.lexer_thread.state.last_token)
+
+
+
+class ImmutableInteractiveParser(InteractiveParser):
+    #--
+
+    result = None
+
+    def __hash__(self):
+        return hash((self.parser_state, self.lexer_thread))
+
+    def feed_token(self, token):
+        c = copy(self)
+        c.result = InteractiveParser.feed_token(c, token)
+        return c
+
+    def exhaust_lexer(self):
+        #--
+        cursor = self.as_mutable()
+        cursor.exhaust_lexer()
+        return cursor.as_immutable()
+
+    def as_mutable(self):
+        #--
+        p = copy(self)
+        return InteractiveParser(p.parser, p.parser_state, p.lexer_thread)
+
+
+
+def _wrap_lexer(lexer_class):
+    future_interface = getattr(lexer_class, '__future_interface__', 0)
+    if future_interface == 2:
+        return lexer_class
+    elif future_interface == 1:
+        class CustomLexerWrapper1(Lexer):
+            def __init__(self, lexer_conf):
+                self.lexer = lexer_class(lexer_conf)
+            def lex(self, lexer_state, parser_state):
+                if isinstance(lexer_state.text, TextSlice) and not lexer_state.text.is_complete_text():
+                    raise TypeError("Interface=1 Custom Lexer don't support TextSlice")
+                lexer_state.text = lexer_state.text
+                return self.lexer.lex(lexer_state, parser_state)
+        return CustomLexerWrapper1
+    elif future_interface == 0:
+        class CustomLexerWrapper0(Lexer):
+            def __init__(self, lexer_conf):
+                self.lexer = lexer_class(lexer_conf)
+
+            def lex(self, lexer_state, parser_state):
+                if isinstance(lexer_state.text, TextSlice):
+                    if not lexer_state.text.is_complete_text():
+                        raise TypeError("Interface=0 Custom Lexer don't support TextSlice")
+                    return self.lexer.lex(lexer_state.text.text)
+                return self.lexer.lex(lexer_state.text)
+        return CustomLexerWrapper0
+    else:
+        raise ValueError(f"Unknown __future_interface__ value {future_interface}, integer 0-2 expected")
+
+
+def _deserialize_parsing_frontend(data, memo, lexer_conf, callbacks, options):
+    parser_conf = ParserConf.deserialize(data['parser_conf'], memo)
+    cls = (options and options._plugins.get('LALR_Parser')) or LALR_Parser
+    parser = cls.deserialize(data['parser'], memo, callbacks, options.debug)
+    parser_conf.callbacks = callbacks
+    return ParsingFrontend(lexer_conf, parser_conf, options, parser=parser)
+
+
+_parser_creators: 'Dict[str, Callable[[LexerConf, Any, Any], Any]]' = {}
+
+
+class ParsingFrontend(Serialize):
+    __serialize_fields__ = 'lexer_conf', 'parser_conf', 'parser'
+
+    lexer_conf: LexerConf
+    parser_conf: ParserConf
+    options: Any
+
+    def __init__(self, lexer_conf: LexerConf, parser_conf: ParserConf, options, parser=None):
+        self.parser_conf = parser_conf
+        self.lexer_conf = lexer_conf
+        self.options = options
+
+        ##
+
+        if parser:  ##
+
+            self.parser = parser
+        else:
+            create_parser = _parser_creators.get(parser_conf.parser_type)
+            assert create_parser is not None, "{} is not supported in standalone mode".format(
+                    parser_conf.parser_type
+                )
+            self.parser = create_parser(lexer_conf, parser_conf, options)
+
+        ##
+
+        lexer_type = lexer_conf.lexer_type
+        self.skip_lexer = False
+        if lexer_type in ('dynamic', 'dynamic_complete'):
+            assert lexer_conf.postlex is None
+            self.skip_lexer = True
+            return
+
+        if isinstance(lexer_type, type):
+            assert issubclass(lexer_type, Lexer)
+            self.lexer = _wrap_lexer(lexer_type)(lexer_conf)
+        elif isinstance(lexer_type, str):
+            create_lexer = {
+                'basic': create_basic_lexer,
+                'contextual': create_contextual_lexer,
+            }[lexer_type]
+            self.lexer = create_lexer(lexer_conf, self.parser, lexer_conf.postlex, options)
+        else:
+            raise TypeError("Bad value for lexer_type: {lexer_type}")
+
+        if lexer_conf.postlex:
+            self.lexer = PostLexConnector(self.lexer, lexer_conf.postlex)
+
+    def _verify_start(self, start=None):
+        if start is None:
+            start_decls = self.parser_conf.start
+            if len(start_decls) > 1:
+                raise ConfigurationError("Lark initialized with more than 1 possible start rule. Must specify which start rule to parse", start_decls)
+            start ,= start_decls
+        elif start not in self.parser_conf.start:
+            raise ConfigurationError("Unknown start rule %s. Must be one of %r" % (start, self.parser_conf.start))
+        return start
+
+    def _make_lexer_thread(self, text: Optional[LarkInput]) -> Union[LarkInput, LexerThread, None]:
+        cls = (self.options and self.options._plugins.get('LexerThread')) or LexerThread
+        if self.skip_lexer:
+            return text
+        if text is None:
+            return cls(self.lexer, None)
+        if isinstance(text, (str, bytes, TextSlice)):
+            return cls.from_text(self.lexer, text)
+        return cls.from_custom_input(self.lexer, text)
+
+    def parse(self, text: Optional[LarkInput], start=None, on_error=None):
+        if self.lexer_conf.lexer_type in ("dynamic", "dynamic_complete"):
+            if isinstance(text, TextSlice) and not text.is_complete_text():
+                raise TypeError(f"Lexer {self.lexer_conf.lexer_type} does not support text slices.")
+
+        chosen_start = self._verify_start(start)
+        kw = {} if on_error is None else {'on_error': on_error}
+        stream = self._make_lexer_thread(text)
+        return self.parser.parse(stream, chosen_start, **kw)
+
+    def parse_interactive(self, text: Optional[TextOrSlice]=None, start=None):
+        ##
+
+        ##
+
+        chosen_start = self._verify_start(start)
+        if self.parser_conf.parser_type != 'lalr':
+            raise ConfigurationError("parse_interactive() currently only works with parser='lalr' ")
+        stream = self._make_lexer_thread(text)
+        return self.parser.parse_interactive(stream, chosen_start)
+
+
+def _validate_frontend_args(parser, lexer) -> None:
+    assert_config(parser, ('lalr', 'earley', 'cyk'))
+    if not isinstance(lexer, type):     ##
+
+        expected = {
+            'lalr': ('basic', 'contextual'),
+            'earley': ('basic', 'dynamic', 'dynamic_complete'),
+            'cyk': ('basic', ),
+         }[parser]
+        assert_config(lexer, expected, 'Parser %r does not support lexer %%r, expected one of %%s' % parser)
+
+
+def _get_lexer_callbacks(transformer, terminals):
+    result = {}
+    for terminal in terminals:
+        callback = getattr(transformer, terminal.name, None)
+        if callback is not None:
+            result[terminal.name] = callback
+    return result
+
+class PostLexConnector:
+    def __init__(self, lexer, postlexer):
+        self.lexer = lexer
+        self.postlexer = postlexer
+
+    def lex(self, lexer_state, parser_state):
+        i = self.lexer.lex(lexer_state, parser_state)
+        return self.postlexer.process(i)
+
+
+
+def create_basic_lexer(lexer_conf, parser, postlex, options) -> BasicLexer:
+    cls = (options and options._plugins.get('BasicLexer')) or BasicLexer
+    return cls(lexer_conf)
+
+def create_contextual_lexer(lexer_conf: LexerConf, parser, postlex, options) -> ContextualLexer:
+    cls = (options and options._plugins.get('ContextualLexer')) or ContextualLexer
+    parse_table: ParseTableBase[int] = parser._parse_table
+    states: Dict[int, Collection[str]] = {idx:list(t.keys()) for idx, t in parse_table.states.items()}
+    always_accept: Collection[str] = postlex.always_accept if postlex else ()
+    return cls(lexer_conf, states, always_accept=always_accept)
+
+def create_lalr_parser(lexer_conf: LexerConf, parser_conf: ParserConf, options=None) -> LALR_Parser:
+    debug = options.debug if options else False
+    strict = options.strict if options else False
+    cls = (options and options._plugins.get('LALR_Parser')) or LALR_Parser
+    return cls(parser_conf, debug=debug, strict=strict)
+
+_parser_creators['lalr'] = create_lalr_parser
+
+
+
+
+class PostLex(ABC):
+    @abstractmethod
+    def process(self, stream: Iterator[Token]) -> Iterator[Token]:
+        return stream
+
+    always_accept: Iterable[str] = ()
+
+class LarkOptions(Serialize):
+    #--
+
+    start: List[str]
+    debug: bool
+    strict: bool
+    transformer: 'Optional[Transformer]'
+    propagate_positions: Union[bool, str]
+    maybe_placeholders: bool
+    cache: Union[bool, str]
+    cache_grammar: bool
+    regex: bool
+    g_regex_flags: int
+    keep_all_tokens: bool
+    tree_class: Optional[Callable[[str, List], Any]]
+    parser: _ParserArgType
+    lexer: _LexerArgType
+    ambiguity: 'Literal["auto", "resolve", "explicit", "forest"]'
+    postlex: Optional[PostLex]
+    priority: 'Optional[Literal["auto", "normal", "invert"]]'
+    lexer_callbacks: Dict[str, Callable[[Token], Token]]
+    use_bytes: bool
+    ordered_sets: bool
+    edit_terminals: Optional[Callable[[TerminalDef], TerminalDef]]
+    import_paths: 'List[Union[str, Callable[[Union[None, str, PackageResource], str], Tuple[str, str]]]]'
+    source_path: Optional[str]
+
+    OPTIONS_DOC = r"""
+    **===  General Options  ===**
+
+    start
+            The start symbol. Either a string, or a list of strings for multiple possible starts (Default: "start")
+    debug
+            Display debug information and extra warnings. Use only when debugging (Default: ``False``)
+            When used with Earley, it generates a forest graph as "sppf.png", if 'dot' is installed.
+    strict
+            Throw an exception on any potential ambiguity, including shift/reduce conflicts, and regex collisions.
+    transformer
+            Applies the transformer to every parse tree (equivalent to applying it after the parse, but faster)
+    propagate_positions
+            Propagates positional attributes into the 'meta' attribute of all tree branches.
+            Sets attributes: (line, column, end_line, end_column, start_pos, end_pos,
+                              container_line, container_column, container_end_line, container_end_column)
+            Accepts ``False``, ``True``, or a callable, which will filter which nodes to ignore when propagating.
+    maybe_placeholders
+            When ``True``, the ``[]`` operator returns ``None`` when not matched.
+            When ``False``,  ``[]`` behaves like the ``?`` operator, and returns no value at all.
+            (default= ``True``)
+    cache
+            Cache the results of the Lark grammar analysis, for x2 to x3 faster loading. LALR only for now.
+
+            - When ``False``, does nothing (default)
+            - When ``True``, caches to a temporary file in the local directory
+            - When given a string, caches to the path pointed by the string
+    cache_grammar
+            For use with ``cache`` option. When ``True``, the unanalyzed grammar is also included in the cache.
+            Useful for classes that require the ``Lark.grammar`` to be present (e.g. Reconstructor).
+            (default= ``False``)
+    regex
+            When True, uses the ``regex`` module instead of the stdlib ``re``.
+    g_regex_flags
+            Flags that are applied to all terminals (both regex and strings)
+    keep_all_tokens
+            Prevent the tree builder from automagically removing "punctuation" tokens (Default: ``False``)
+    tree_class
+            Lark will produce trees comprised of instances of this class instead of the default ``lark.Tree``.
+
+    **=== Algorithm Options ===**
+
+    parser
+            Decides which parser engine to use. Accepts "earley" or "lalr". (Default: "earley").
+            (there is also a "cyk" option for legacy)
+    lexer
+            Decides whether or not to use a lexer stage
+
+            - "auto" (default): Choose for me based on the parser
+            - "basic": Use a basic lexer
+            - "contextual": Stronger lexer (only works with parser="lalr")
+            - "dynamic": Flexible and powerful (only with parser="earley")
+            - "dynamic_complete": Same as dynamic, but tries *every* variation of tokenizing possible.
+    ambiguity
+            Decides how to handle ambiguity in the parse. Only relevant if parser="earley"
+
+            - "resolve": The parser will automatically choose the simplest derivation
+              (it chooses consistently: greedy for tokens, non-greedy for rules)
+            - "explicit": The parser will return all derivations wrapped in "_ambig" tree nodes (i.e. a forest).
+            - "forest": The parser will return the root of the shared packed parse forest.
+
+    **=== Misc. / Domain Specific Options ===**
+
+    postlex
+            Lexer post-processing (Default: ``None``) Only works with the basic and contextual lexers.
+    priority
+            How priorities should be evaluated - "auto", ``None``, "normal", "invert" (Default: "auto")
+    lexer_callbacks
+            Dictionary of callbacks for the lexer. May alter tokens during lexing. Use with caution.
+    use_bytes
+            Accept an input of type ``bytes`` instead of ``str``.
+    ordered_sets
+            Should Earley use ordered-sets to achieve stable output (~10% slower than regular sets. Default: True)
+    edit_terminals
+            A callback for editing the terminals before parse.
+    import_paths
+            A List of either paths or loader functions to specify from where grammars are imported
+    source_path
+            Override the source of from where the grammar was loaded. Useful for relative imports and unconventional grammar loading
+    **=== End of Options ===**
+    """
+    if __doc__:
+        __doc__ += OPTIONS_DOC
+
+
+    ##
+
+    ##
+
+    ##
+
+    ##
+
+    ##
+
+    ##
+
+    _defaults: Dict[str, Any] = {
+        'debug': False,
+        'strict': False,
+        'keep_all_tokens': False,
+        'tree_class': None,
+        'cache': False,
+        'cache_grammar': False,
+        'postlex': None,
+        'parser': 'earley',
+        'lexer': 'auto',
+        'transformer': None,
+        'start': 'start',
+        'priority': 'auto',
+        'ambiguity': 'auto',
+        'regex': False,
+        'propagate_positions': False,
+        'lexer_callbacks': {},
+        'maybe_placeholders': True,
+        'edit_terminals': None,
+        'g_regex_flags': 0,
+        'use_bytes': False,
+        'ordered_sets': True,
+        'import_paths': [],
+        'source_path': None,
+        '_plugins': {},
+    }
+
+    def __init__(self, options_dict: Dict[str, Any]) -> None:
+        o = dict(options_dict)
+
+        options = {}
+        for name, default in self._defaults.items():
+            if name in o:
+                value = o.pop(name)
+                if isinstance(default, bool) and name not in ('cache', 'use_bytes', 'propagate_positions'):
+                    value = bool(value)
+            else:
+                value = default
+
+            options[name] = value
+
+        if isinstance(options['start'], str):
+            options['start'] = [options['start']]
+
+        self.__dict__['options'] = options
+
+
+        assert_config(self.parser, ('earley', 'lalr', 'cyk', None))
+
+        if self.parser == 'earley' and self.transformer:
+            raise ConfigurationError('Cannot specify an embedded transformer when using the Earley algorithm. '
+                             'Please use your transformer on the resulting parse tree, or use a different algorithm (i.e. LALR)')
+
+        if self.cache_grammar and not self.cache:
+            raise ConfigurationError('cache_grammar cannot be set when cache is disabled')
+
+        if o:
+            raise ConfigurationError("Unknown options: %s" % o.keys())
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.__dict__['options'][name]
+        except KeyError as e:
+            raise AttributeError(e)
+
+    def __setattr__(self, name: str, value: str) -> None:
+        assert_config(name, self.options.keys(), "%r isn't a valid option. Expected one of: %s")
+        self.options[name] = value
+
+    def serialize(self, memo = None) -> Dict[str, Any]:
+        return self.options
+
+    @classmethod
+    def deserialize(cls, data: Dict[str, Any], memo: Dict[int, Union[TerminalDef, Rule]]) -> "LarkOptions":
+        return cls(data)
+
+
+##
+
+##
+
+_LOAD_ALLOWED_OPTIONS = {'postlex', 'transformer', 'lexer_callbacks', 'use_bytes', 'debug', 'g_regex_flags', 'regex', 'propagate_positions', 'tree_class', '_plugins'}
+
+_VALID_PRIORITY_OPTIONS = ('auto', 'normal', 'invert', None)
+_VALID_AMBIGUITY_OPTIONS = ('auto', 'resolve', 'explicit', 'forest')
+
+
+_T = TypeVar('_T', bound="Lark")
+
+class Lark(Serialize):
+    #--
+
+    source_path: str
+    source_grammar: str
+    grammar: 'Grammar'
+    options: LarkOptions
+    lexer: Lexer
+    parser: 'ParsingFrontend'
+    terminals: Collection[TerminalDef]
+
+    __serialize_fields__ = ['parser', 'rules', 'options']
+
+    def __init__(self, grammar: 'Union[Grammar, str, IO[str]]', **options) -> None:
+        self.options = LarkOptions(options)
+        re_module: types.ModuleType
+
+        ##
+
+        if self.options.cache_grammar:
+            self.__serialize_fields__ = self.__serialize_fields__ + ['grammar']
+
+        ##
+
+        use_regex = self.options.regex
+        if use_regex:
+            if _has_regex:
+                re_module = regex
+            else:
+                raise ImportError('`regex` module must be installed if calling `Lark(regex=True)`.')
+        else:
+            re_module = re
+
+        ##
+
+        if self.options.source_path is None:
+            try:
+                self.source_path = grammar.name  ##
+
+            except AttributeError:
+                self.source_path = '<string>'
+        else:
+            self.source_path = self.options.source_path
+
+        ##
+
+        try:
+            read = grammar.read  ##
+
+        except AttributeError:
+            pass
+        else:
+            grammar = read()
+
+        cache_fn = None
+        cache_sha256 = None
+        if isinstance(grammar, str):
+            self.source_grammar = grammar
+            if self.options.use_bytes:
+                if not grammar.isascii():
+                    raise ConfigurationError("Grammar must be ascii only, when use_bytes=True")
+
+            if self.options.cache:
+                if self.options.parser != 'lalr':
+                    raise ConfigurationError("cache only works with parser='lalr' for now")
+
+                unhashable = ('transformer', 'postlex', 'lexer_callbacks', 'edit_terminals', '_plugins')
+                options_str = ''.join(k+str(v) for k, v in options.items() if k not in unhashable)
+                from . import __version__
+                s = grammar + options_str + __version__ + str(sys.version_info[:2])
+                cache_sha256 = sha256_digest(s)
+
+                if isinstance(self.options.cache, str):
+                    cache_fn = self.options.cache
+                else:
+                    if self.options.cache is not True:
+                        raise ConfigurationError("cache argument must be bool or str")
+
+                    try:
+                        username = getpass.getuser()
+                    except Exception:
+                        ##
+
+                        ##
+
+                        ##
+
+                        username = "unknown"
+
+
+                    cache_fn = tempfile.gettempdir() + "/.lark_%s_%s_%s_%s_%s.tmp" % (
+                        "cache_grammar" if self.options.cache_grammar else "cache", username, cache_sha256, *sys.version_info[:2])
+
+                old_options = self.options
+                try:
+                    with FS.open(cache_fn, 'rb') as f:
+                        logger.debug('Loading grammar from cache: %s', cache_fn)
+                        ##
+
+                        for name in (set(options) - _LOAD_ALLOWED_OPTIONS):
+                            del options[name]
+                        file_sha256 = f.readline().rstrip(b'\n')
+                        cached_used_files = pickle.load(f)
+                        if file_sha256 == cache_sha256.encode('utf8') and verify_used_files(cached_used_files):
+                            cached_parser_data = pickle.load(f)
+                            self._load(cached_parser_data, **options)
+                            return
+                except FileNotFoundError:
+                    ##
+
+                    pass
+                except Exception: ##
+
+                    logger.exception("Failed to load Lark from cache: %r. We will try to carry on.", cache_fn)
+
+                    ##
+
+                    ##
+
+                    self.options = old_options
+
+
+            ##
+
+            self.grammar, used_files = load_grammar(grammar, self.source_path, self.options.import_paths, self.options.keep_all_tokens)
+        else:
+            assert isinstance(grammar, Grammar)
+            self.grammar = grammar
+
+
+        if self.options.lexer == 'auto':
+            if self.options.parser == 'lalr':
+                self.options.lexer = 'contextual'
+            elif self.options.parser == 'earley':
+                if self.options.postlex is not None:
+                    logger.info("postlex can't be used with the dynamic lexer, so we use 'basic' instead. "
+                                "Consider using lalr with contextual instead of earley")
+                    self.options.lexer = 'basic'
+                else:
+                    self.options.lexer = 'dynamic'
+            elif self.options.parser == 'cyk':
+                self.options.lexer = 'basic'
+            else:
+                assert False, self.options.parser
+        lexer = self.options.lexer
+        if isinstance(lexer, type):
+            assert issubclass(lexer, Lexer)     ##
+
+        else:
+            assert_config(lexer, ('basic', 'contextual', 'dynamic', 'dynamic_complete'))
+            if self.options.postlex is not None and 'dynamic' in lexer:
+                raise ConfigurationError("Can't use postlex with a dynamic lexer. Use basic or contextual instead")
+
+        if self.options.ambiguity == 'auto':
+            if self.options.parser == 'earley':
+                self.options.ambiguity = 'resolve'
+        else:
+            assert_config(self.options.parser, ('earley', 'cyk'), "%r doesn't support disambiguation. Use one of these parsers instead: %s")
+
+        if self.options.priority == 'auto':
+            self.options.priority = 'normal'
+
+        if self.options.priority not in _VALID_PRIORITY_OPTIONS:
+            raise ConfigurationError("invalid priority option: %r. Must be one of %r" % (self.options.priority, _VALID_PRIORITY_OPTIONS))
+        if self.options.ambiguity not in _VALID_AMBIGUITY_OPTIONS:
+            raise ConfigurationError("invalid ambiguity option: %r. Must be one of %r" % (self.options.ambiguity, _VALID_AMBIGUITY_OPTIONS))
+
+        if self.options.parser is None:
+            terminals_to_keep = '*'     ##
+
+        elif self.options.postlex is not None:
+            terminals_to_keep = set(self.options.postlex.always_accept)
+        else:
+            terminals_to_keep = set()
+
+        ##
+
+        self.terminals, self.rules, self.ignore_tokens = self.grammar.compile(self.options.start, terminals_to_keep)
+
+        if self.options.edit_terminals:
+            for t in self.terminals:
+                self.options.edit_terminals(t)
+
+        self._terminals_dict = {t.name: t for t in self.terminals}
+
+        ##
+
+        if self.options.priority == 'invert':
+            for rule in self.rules:
+                if rule.options.priority is not None:
+                    rule.options.priority = -rule.options.priority
+            for term in self.terminals:
+                term.priority = -term.priority
+        ##
+
+        ##
+
+        ##
+
+        elif self.options.priority is None:
+            for rule in self.rules:
+                if rule.options.priority is not None:
+                    rule.options.priority = None
+            for term in self.terminals:
+                term.priority = 0
+
+        ##
+
+        self.lexer_conf = LexerConf(
+                self.terminals, re_module, self.ignore_tokens, self.options.postlex,
+                self.options.lexer_callbacks, self.options.g_regex_flags, use_bytes=self.options.use_bytes, strict=self.options.strict
+            )
+
+        if self.options.parser:
+            self.parser = self._build_parser()
+        elif lexer:
+            self.lexer = self._build_lexer()
+
+        if cache_fn:
+            logger.debug('Saving grammar to cache: %s', cache_fn)
+            try:
+                with FS.open(cache_fn, 'wb') as f:
+                    assert cache_sha256 is not None
+                    f.write(cache_sha256.encode('utf8') + b'\n')
+                    pickle.dump(used_files, f)
+                    self.save(f, _LOAD_ALLOWED_OPTIONS)
+            except IOError as e:
+                logger.exception("Failed to save Lark to cache: %r.", cache_fn, e)
+
+    if __doc__:
+        __doc__ += "\n\n" + LarkOptions.OPTIONS_DOC
+
+    def _build_lexer(self, dont_ignore: bool=False) -> BasicLexer:
+        lexer_conf = self.lexer_conf
+        if dont_ignore:
+            from copy import copy
+            lexer_conf = copy(lexer_conf)
+            lexer_conf.ignore = ()
+        return BasicLexer(lexer_conf)
+
+    def _prepare_callbacks(self) -> None:
+        self._callbacks = {}
+        ##
+
+        if self.options.ambiguity != 'forest':
+            self._parse_tree_builder = ParseTreeBuilder(
+                    self.rules,
+                    self.options.tree_class or Tree,
+                    self.options.propagate_positions,
+                    self.options.parser != 'lalr' and self.options.ambiguity == 'explicit',
+                    self.options.maybe_placeholders
+                )
+            self._callbacks = self._parse_tree_builder.create_callback(self.options.transformer)
+        self._callbacks.update(_get_lexer_callbacks(self.options.transformer, self.terminals))
+
+    def _build_parser(self) -> "ParsingFrontend":
+        self._prepare_callbacks()
+        _validate_frontend_args(self.options.parser, self.options.lexer)
+        parser_conf = ParserConf(self.rules, self._callbacks, self.options.start)
+        return _construct_parsing_frontend(
+            self.options.parser,
+            self.options.lexer,
+            self.lexer_conf,
+            parser_conf,
+            options=self.options
+        )
+
+    def save(self, f, exclude_options: Collection[str] = ()) -> None:
+        #--
+        if self.options.parser != 'lalr':
+            raise NotImplementedError("Lark.save() is only implemented for the LALR(1) parser.")
+        data, m = self.memo_serialize([TerminalDef, Rule])
+        if exclude_options:
+            data["options"] = {n: v for n, v in data["options"].items() if n not in exclude_options}
+        pickle.dump({'data': data, 'memo': m}, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls: Type[_T], f) -> _T:
+        #--
+        inst = cls.__new__(cls)
+        return inst._load(f)
+
+    def _deserialize_lexer_conf(self, data: Dict[str, Any], memo: Dict[int, Union[TerminalDef, Rule]], options: LarkOptions) -> LexerConf:
+        lexer_conf = LexerConf.deserialize(data['lexer_conf'], memo)
+        lexer_conf.callbacks = options.lexer_callbacks or {}
+        lexer_conf.re_module = regex if options.regex else re
+        lexer_conf.use_bytes = options.use_bytes
+        lexer_conf.g_regex_flags = options.g_regex_flags
+        lexer_conf.skip_validation = True
+        lexer_conf.postlex = options.postlex
+        return lexer_conf
+
+    def _load(self: _T, f: Any, **kwargs) -> _T:
+        if isinstance(f, dict):
+            d = f
+        else:
+            d = pickle.load(f)
+        memo_json = d['memo']
+        data = d['data']
+
+        assert memo_json
+        memo = SerializeMemoizer.deserialize(memo_json, {'Rule': Rule, 'TerminalDef': TerminalDef}, {})
+        if 'grammar' in data:
+            self.grammar = Grammar.deserialize(data['grammar'], memo)
+        options = dict(data['options'])
+        if (set(kwargs) - _LOAD_ALLOWED_OPTIONS) & set(LarkOptions._defaults):
+            raise ConfigurationError("Some options are not allowed when loading a Parser: {}"
+                             .format(set(kwargs) - _LOAD_ALLOWED_OPTIONS))
+        options.update(kwargs)
+        self.options = LarkOptions.deserialize(options, memo)
+        self.rules = [Rule.deserialize(r, memo) for r in data['rules']]
+        self.source_path = '<deserialized>'
+        _validate_frontend_args(self.options.parser, self.options.lexer)
+        self.lexer_conf = self._deserialize_lexer_conf(data['parser'], memo, self.options)
+        self.terminals = self.lexer_conf.terminals
+        self._prepare_callbacks()
+        self._terminals_dict = {t.name: t for t in self.terminals}
+        self.parser = _deserialize_parsing_frontend(
+            data['parser'],
+            memo,
+            self.lexer_conf,
+            self._callbacks,
+            self.options,  ##
+
+        )
+        return self
+
+    @classmethod
+    def _load_from_dict(cls, data, memo, **kwargs):
+        inst = cls.__new__(cls)
+        return inst._load({'data': data, 'memo': memo}, **kwargs)
+
+    @classmethod
+    def open(cls: Type[_T], grammar_filename: str, rel_to: Optional[str]=None, **options) -> _T:
+        #--
+        if rel_to:
+            basepath = os.path.dirname(rel_to)
+            grammar_filename = os.path.join(basepath, grammar_filename)
+        with open(grammar_filename, encoding='utf8') as f:
+            return cls(f, **options)
+
+    @classmethod
+    def open_from_package(cls: Type[_T], package: str, grammar_path: str, search_paths: 'Sequence[str]'=[""], **options) -> _T:
+        #--
+        package_loader = FromPackageLoader(package, search_paths)
+        full_path, text = package_loader(None, grammar_path)
+        options.setdefault('source_path', full_path)
+        options.setdefault('import_paths', [])
+        options['import_paths'].append(package_loader)
+        return cls(text, **options)
+
+    def __repr__(self):
+        return 'Lark(open(%r), parser=%r, lexer=%r, ...)' % (self.source_path, self.options.parser, self.options.lexer)
+
+
+    def lex(self, text: TextOrSlice, dont_ignore: bool=False) -> Iterator[Token]:
+        #--
+        lexer: Lexer
+        if not hasattr(self, 'lexer') or dont_ignore:
+            lexer = self._build_lexer(dont_ignore)
+        else:
+            lexer = self.lexer
+        lexer_thread = LexerThread.from_text(lexer, text)
+        stream = lexer_thread.lex(None)
+        if self.options.postlex:
+            return self.options.postlex.process(stream)
+        return stream
+
+    def get_terminal(self, name: str) -> TerminalDef:
+        #--
+        return self._terminals_dict[name]
+
+    def parse_interactive(self, text: Optional[LarkInput]=None, start: Optional[str]=None) -> 'InteractiveParser':
+        #--
+        return self.parser.parse_interactive(text, start=start)
+
+    def parse(self, text: LarkInput, start: Optional[str]=None, on_error: 'Optional[Callable[[UnexpectedInput], bool]]'=None) -> 'ParseTree':
+        #--
+        if on_error is not None and self.options.parser != 'lalr':
+            raise NotImplementedError("The on_error option is only implemented for the LALR(1) parser.")
+        return self.parser.parse(text, start=start, on_error=on_error)
+
+
+
+
+class DedentError(LarkError):
+    pass
+
+class Indenter(PostLex, ABC):
+    #--
+    paren_level: int
+    indent_level: List[int]
+
+    def __init__(self) -> None:
+        self.paren_level = 0
+        self.indent_level = [0]
+        assert self.tab_len > 0
+
+    def handle_NL(self, token: Token) -> Iterator[Token]:
+        if self.paren_level > 0:
+            return
+
+        yield token
+
+        indent_str = token.rsplit('\n', 1)[1] ##
+
+        indent = indent_str.count(' ') + indent_str.count('\t') * self.tab_len
+
+        if indent > self.indent_level[-1]:
+            self.indent_level.append(indent)
+            yield Token.new_borrow_pos(self.INDENT_type, indent_str, token)
+        else:
+            while indent < self.indent_level[-1]:
+                self.indent_level.pop()
+                yield Token.new_borrow_pos(self.DEDENT_type, indent_str, token)
+
+            if indent != self.indent_level[-1]:
+                raise DedentError('Unexpected dedent to column %s. Expected dedent to %s' % (indent, self.indent_level[-1]))
+
+    def _process(self, stream):
+        token = None
+        for token in stream:
+            if token.type == self.NL_type:
+                yield from self.handle_NL(token)
+            else:
+                yield token
+
+            if token.type in self.OPEN_PAREN_types:
+                self.paren_level += 1
+            elif token.type in self.CLOSE_PAREN_types:
+                self.paren_level -= 1
+                assert self.paren_level >= 0
+
+        while len(self.indent_level) > 1:
+            self.indent_level.pop()
+            yield Token.new_borrow_pos(self.DEDENT_type, '', token) if token else Token(self.DEDENT_type, '', 0, 0, 0, 0, 0, 0)
+
+        assert self.indent_level == [0], self.indent_level
+
+    def process(self, stream):
+        self.paren_level = 0
+        self.indent_level = [0]
+        return self._process(stream)
+
+    ##
+
+    @property
+    def always_accept(self):
+        return (self.NL_type,)
+
+    @property
+    @abstractmethod
+    def NL_type(self) -> str:
+        #--
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def OPEN_PAREN_types(self) -> List[str]:
+        #--
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def CLOSE_PAREN_types(self) -> List[str]:
+        #--
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def INDENT_type(self) -> str:
+        #--
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def DEDENT_type(self) -> str:
+        #--
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def tab_len(self) -> int:
+        #--
+        raise NotImplementedError()
+
+
+class PythonIndenter(Indenter):
+    #--
+
+    NL_type = '_NEWLINE'
+    OPEN_PAREN_types = ['LPAR', 'LSQB', 'LBRACE']
+    CLOSE_PAREN_types = ['RPAR', 'RSQB', 'RBRACE']
+    INDENT_type = '_INDENT'
+    DEDENT_type = '_DEDENT'
+    tab_len = 8
+
+
+import pickle, zlib, base64
+DATA = (
+b'eJztnXdcW+e5x4UN3iOJnThtmjhp6ibdTZrEiXFskJBAOQbb7CWEtoQmEmKZPQRpT+ngMErL6kzg7r3v7b29e++99957vu95hf1tPmnqOLEvuO0fffKAInSe3/f3e14JoYwUze2yFFjk/waNR/U9KU86E0gb8p8PxAK9gbTbl0wEzX5/VyAdjyQ8sYzhMh4dNPSCEkOzZAaN8D6tQJVdquxWpVCVIlX2qLJXlX2q7FflgCoHVTmkymFVjqhyVJU7VLlTlbtUOabKcVXuVuUeVU6ocq8qb1Dljarcp8qbVLlflQdUOanKg6o8pMqbVXlYlbeockqVt6ryiCqPqvI2Vd6uyjtUeacq71Ll3aq8R5X3qvKYKo+r8r5MQN8TCSWS6YAYvb6/ocbtrLrgrLIbHv1wyJ0OhAK97mDME8oIQfT92UzA7e3rCmSM57dE7OpLBQz9gNCyK9DblfXEDH2f2/yq2y3u8IK8kU0KndUPKgSu6V6UzsYCec3Fg3lCPaYnVXlKldOqPK3KM6qcUaVYlbOqPKvKOVXOq1KiSqkqVlVsqpSpYlfFoUq5KhWqOFV5ThVNlQuqVKpSpcpFVS6pclmValVqVKlVpU6VelUaVGlUpUmVZlVaVGlVxaVKmypuVdpV8ajiVcWnil+VgCpBVUKqhFWJqNKhSlSVmCpxVRKqJFVJqdKpSlqVjCpdqmRV6ValR5VeVfpU6VfliioDqgyqMqTKsCojqoyqMqbKuCoTqkyqklNlSpVpVZ5X5f2qfEAVXZUPqjKjyodU+bAqH1Hlo6rMqmKoMqfKvCoLqiyq8jFVllT5uCqfUGVZlRVVVlVZU2VdlU+q8ilVPq3KZ1T5rCqfU+UFVV5UZUOVTeHmokyXJ90lPBX+vOeq45RJC2OeWNoI2/QDl8wvK1uGC8x47kpGA4mMtKUw+nG3+1Jpda2z9IK7zF7trC+tddbbDa1A3+92l1ZdrHI/9l5D26XvqaqrtNqrDW23fsj9Rbcs1AsviHswtCLxDzWXrYa2Ry+qdFbV1RjaXhkQ5r08ZWj7rt3l+wxt/9VvPWFoB/R9Fy6Wu6tKK8UdHrz6ndOGdkjfX1vt3PrW4avfetrQjlxtxN0d1ffUNFVaL14wtDv0ImeVo7bJ0O68eotnDO0uvbDeKh/nsWuP4zFDO64XuqsvNhja3fquS05Du0ffc8FaXWoTP+2EfsDmrLbVVTou2BsN7d6r9yYm8ga9sKZW3tsbr371cUO7Ty+quVBaU2Fob7r6ZfEz7tcLq83JPKDvqc7f+Ul9f2nlJXt1TWlVmaE9eO0xibt5SC+yXaysLDW0N+tF9st1peKqHhb3YY75LXrhpQtyuKeu/Ttium/VC99il3f1yLUvP2loj+qHYsmQO5hN+LoiyYShvU0v9HQl44b2dn1/JhuPe9SX36HvEf+YjvQa2jv1A/IW7kTS4xW74F16USwSj3QZ2rv1g+Y3/IFQOhAwtPfo9wnouiKemPhSOtIt7qo7gB/1Xv2wuEf+8Mf0olSyRxwNtMf1fcG0J//l9+mHM53pLtzwCf2AejjuZEo8hif1PUFx46T4F5+6+p1AotvQTuv7ImIdhdJiG2lP68de9oE8o9+RSif9WV+XuKiu/BWf0Q+J68OtivXCQG9K/Iiz4j7jqVjEJy/6WX23GJOhndP35u/D0M7r+wKd2fz9lIQ/r5XqB+qqhClqbBerhbZWfbezqtbQbFchEEqUXdXlcSGx/ZpKgk3Hte8JXMqvfU84oOJaJ6B36kWedDrZY2jP6QcyPZ6UO99q1+5C4HlB+jo/J/HtjFtGheS2Ut8jejFVQ6vSD+IWhnZR323e0yVxdbFAPJDoEl+8rB+ucZZX2cvcWwFQrR9UALjVtGr0/XKOeV1rBSOy2xpVnZrytXnW63e63Vv3rx6WuOQGvVBazdAa9XuvPnAhsNub9PepW4mhNV0bhQiNZv3Y1ZsKStypWDYjw6RF3yt/pKlaq75PXq56pC79xBfdt/yOedciP9r0XXImbv3IF9/A0Nr1Q4q9LUN49Dthg62vevWjL3nY4hi0R9y9PEKZUWv+n1aQXx45kbFsdrHZzaaQTRGbPWz2stnHZj+bA2wOsjnE5jCbI2yOsrmDzZ1s7mJzjM1xNnezuQdNVv6zdkKzVFoKckZG2yXHd68Y4G5xwzeI+u2ivlHUnxD1PlETor5J1D8T9f78HXXJe7WwKWCzi81uNg+wKWRTxGYvmz1s9rE5yWY/mwNsDrE5yOYwmwfZHGHzEJsTbN7M5iibO9g8zOZONnexOcbmLWxOsTnO5q1s7mbzCJt70GS13VJ06Zr3mOOxaP3mv2zRhkV9m6jr5qQs2nOivl3USfPRWSr3FJgXYNG+RdR3iPpxc1YWLWIKZdEeEfWdot5tqmjRPmbqbNHqzcdg0d5rTt2i3SXqu0T9PVN6i3ZZ1HeL+qvm6CzaO0xFLdpT5lwt2k+J+h5Ra0V9r6hvEfUxUd8g6uOivijq+0T9G1GfEPUOUZ8U9WtMAi3av4v6lKj3i3pa1LOiPi0u6HCBSbJFO2JSY9EWRX1G1E+Y4lgqCwpMoC1as6hnRF01abdo/2PSaNHm5UAL5UBPipsfKsDkP0LpPmJOvoiTLxb1R15GgbOiXrgRJZ4V9dx1KHJO1EEos6XESxU6L2rXyyhUIurzr0KpW6eQYKKyqOCVpNpzW7B/vROVHpm+uezvHZS5btH+W66TfTeyTjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5Tjq5TjqZSZ1cJ51cJ51cJ51cJ51cJ51mqO3PE/CCJOBAvhmTzcFXMtu2ibmbbUKZ8523KN4O5cf/djn+w3L8W8o/mzEtiWYPm7eyeRObe9m8kc19bN7M5gE297OxsClgs4vNbjaFbIrY7GWzj81JNvvZHGBziM1BNofZPMjmCJuH2Jxgc5TNHWweZnMnm7vYHGNzis1xNnezeYTNPWiy2pFBZQWbROOoRGNLmBWOf4XjX6GYK9RiheNfIU4r1GKF41/hxFc45BXOdYVzXeEoVzijFc5ohSG3wotfIXUrpG6FOK3QHiskaIXcr9AeK8RphQStEJoVumiFnKzQOCvkZIWcrJCTFdKwQhpW6OMVorFCNFZo3RUTjTtIQ4ADC3BgAXISICcBchIgJwEOOUBoAoQmwPEHSFCAWgSoRYBaBAhagMIESF2AKgWIYICSBchjgDwGKGaAYgYoZoDYBqhsgMoGqGyAdAdId4B0BwhAgAAECECAAAQIQID2CJCGgEnDnTtya8st+we5nfmk5C4RzaWi+VEZzcfyK7xJNsfpzE8RxE+ZWt3N71fQuRV0bgWdW0HnVtC5FXRuBZ1bQedW0LkVdG4FnVtB51bQuRV0bgWdW0HnVtC5FXRuBZ1bQedW0LkVHFgFnVtB51bQuRV0bgWdW0HnVtC5FXRuBZ1bQedW0LkVdG4FnVtB51bQuRV0bgWdW2HScA9pWKXmq9R8lZqvUvNVyrxKmVep7ColW6VKqxRmlVqsUotVDnmV01vl9FY5vVVe/CpRXyXqq8R2lXCuksdV8rhKHleJ4CqpWyVoq8RplTitEqdVErRKglZJ0CrRWCUaq0RjlWisEo1V0rBq0nAiHySflUFyL18nX+PA1sjJGjlZIxprnOsa0VgjNGvkZI2crHGua5zrGglaI0FrJGiN0Kxxrmsc5RpxWiNOa5zeGnFaMwf2Bj5fOkt0zvJ6z1KRs0TnLJk4S8LOUp6zBOQszWg297OxsClgs4vNbjaFbIrY7GWzj81JNvvZHGBziM1BNofZPMjmCJuH2Jxgc5TNHWweZnMnm7vYHGNzis1xNnezeYTNPWiy2hsH1eHha6V97rspZ6JX+/KhPBvty107E92qVzBuxRnoTTfy0mEvLdJLi/TSIr20SC8N10u/9NIvvfRLL/3fS/P00jy9NE8vzdNL8/TSPL00Ty/N00vz9NI8vTRPL9Okl07qpZN66aReOqmXTuqlk3q5f3tpq17aqpeB2EuP9dJjvfRYr+mx+3lgCVHMEMUMUcwQxQxRzBDFDFHMEMUMUcwQYz5EZUNUNsQwDzHzQ9Q8RM1D1DxEzUPUPETNQ9Q8RM1D3C0hAhAiACECECIAIQIQIgAhAhAiACECECIAIQIQIgAhAhAiACECEOJGDJk0PCBp2Hocl/mjL3NGlynZZYp5mcJc5g+4TP0uc5SXzR998kbSZ4DADhDYAQI7QGAHCOwAgR0gsAMEdoDXOEBGB8joAEkcIIkDJHGAJA6QxAFOeYAkDpDEAcI3QPgGCN8A4RsgfAOEb4DwDRC+ARIwQPgGCN8A4RsgfAOEb4DwDZiiP7htlro1d3su9Yfo6ErqWUnWKunoStJeSUdX0tGVdHQlHV1pivtmrpZxOnWcTh2nU8fp1HE6dZxOHadTx+nUcT72cV7VOG07TtuO80LGeb3jNPQ4DT1OQ4/T0OM09DiHPE5Dj9PQ45zeON09TneP093jdPc43T1Od4/T3eN09zhpGKe7x+nucbp7nO4ep7vH6e5xcjJu0vCwOMxbBQFH5WH+LUTDRTRcRMNFNFxEw0U0XETDRTRcRMNFNFxEw0U0XETDRTRcRMNFNFxEw0U0XETDRTRcRMNFNFxEw0U0XETDRTRcRMNFNFxEw0U0XETDRTRcRMNFNFxEw0U0XETDRTRcRMNFNFwmGqckDTaBwDvFt8pETYlqlykoqkNE3C4ZceXiCz8naoWoXyeqU9RNUZ8TN9gtb6CJL/ySvL+3DqpsPyhRe+Qr6u0m171S5PtSqnI38naTR3fkLydu1qDlLz1C1zPw17DD3yYnvmWmFxlPL9KaL5pmejujNcJojTBaI4zWCKM1wmiNMFojjNYIozXCaI0wWiOM1ggfe4TRGmG0RhitEUZrhNEaYbRGGK0RRmuE0RphtEYYrRFGa4TRGmG0RhitEUZrhNEaYbRGGK0RRmuE+kUYrRFGa4TRGmG0RhitEUZrxKThHaQhShqipCFKGqKkIUoaoqQhShqipCFKGqKkIUoaoqQhShqipCFKGqKkIUoaoqQhShqipCFKGqKkIUoaoqQhShqipCFKGqKkIUoaoqQhShqipCFKGqKkIUoaoqQhShqipCFKGqImDe/kryDmCcA8AZgnAPPUfJ6az1PmeQIwT5nnqd889ZunZPMUc576zVOyeY5/nuOf58TnOfF5Tnyec53nKOc5vXlzYO+ifQzax+D0DE7P4PQM2sfgKA2O0uD0DM7VoH0MztWgfQzax6B9DI7f4PgNTtygFgbHb9A+BrUwaB+D9jFoH4P2MaifQf0M2segmAbFNCimQfsYtI9BmQ3ax6DmBu1jEACD9jFMGt7NPfw5/rTPmd9/D2lpIy1tpKWNtLSRljbS0kZa2khLG2lpIy1tpKWNtLSRljbS0kZa2khLG2lpIy1tpKWNtLSRljbS0kZa2khLG2lpIy1tpKWNtLSRljbS0kZa2khLG2lpo35tpKWNtLSRljbS0kZa2khLm0nDe796Ts69iick8iB9KPeazsmP7aiJywv+1HaY/GuY+ONy4hdEV2x626Jlc9denH+/aYP3DcqvWLQ1+WT8iVuikJzs/tvJG69BoSe5kz7DCP6MKc9T+Te+faeU5/SOMJCU98nbRJ6nKc8cjwxzPDLM8cgwxyPDHI8MczwyzPHIMMcjwxyPDHM8MszxyDDHI8McjwxzPDLM8cgwxyPDHI8MczwyzPHIMMcjwxyPDHPkdY5HhjkeGeZ4ZJjjkWGOR4Y5HhnmeGSY45FhjkeGOR4Z5nhkmOORYY5HhjkeGeZ4ZJjjkWGOR4Y504zP8PnZOgFYJwDrBGCdmq9T83XKvE4A1inzOvVbp37rlGydYq5Tv3VKts7xr3P865z4Oie+zomvc3rrHNi6OaMzr+b3xFtX/zT1eZqaPk12nqaZzOZ+Ng+zeYjNcTaPsDnJ5hSarFYsr0QuzQb8oOfNb51lLLQzFtpJRTupaCcV7bySdiLSTkTaSUU7eWlnLLSTl3ZeVjtjoZ2x0E6s2olVO0lqJ2PtxKqdsdBOxto5/3bGQjtjoZ3StpPLdnLZTmnbCWk7IW0npO1EqJ3SthOHdmLXTrDbCUo7KW9nLLSbNDwraagUCKyY923R5uRXz6n3Slq0X86pnfr1+GGnee2nCcNpYn2a136aYz3N6zhNyU/zoZ/mtZ82H+35/Lv2NHmiKOFT5s/yxp81b1z6FfnbGfnLl5/O3ZQ/BrbeyNtoEkyYBBMmwYRJMGEShCrBhEkwYRJMmAQTJsFQSZCwBKMjwehIMDoSjI4EoyPB6EgwOhJkPMG0SNAxCaZFgmmRoGMSTIsE0yLBtEgwLRI0QYIuSzAtEkyLBC2XYFokTBfZ8pb7HWm5sptiKYnsQzvAWjfBUvZt8yal78ndnm9SctxIaCUZWkmGVpKhlWRoJRlaSYZWkqGVZGglGVpJhlaSoZVkaCUZWkmGVpKhlWRoJRlaSYZWkqGVZGglGVpJhlaSoZVkaCUZWkmGVpKhlWRoJRlaSYZWkqGVZGglGVpJhlbSDK1y9TFIWrcMrYr8u4N+UzbO/Ps3vLJ5Lv8Cxedkow3Ky7Vo3yabC5Iaieu/ivt+3QPvpX7c8ttLfXmzAu6mB9tVcUt41C8h7SUUt4Sn+xKeukv4JKCE59cS8llC85XwGFpCI5XQByVEv4Tol5DpEvJZQj5LSGGJCV7loHqt8vslRFV8pmVjpNgYKTZGio2RYuNV2RgpNkaKjZFi45BtHL+N+WLjWGwcso1a2Jg8NiaPjcljY/LYmDw2TtzG5LFx/DZqbqMWNspsYwzZGEM2SmZjDNkYQzbGkI0xZKPMNspsI6k2xpCNANgYQzaSajPRuJh/sXpKonEpn0lPy+ay5ER6vFr8S1Wivk/Ui6I+Lv+96h3zwmnuJkTV63dkuCS+cDH3ao4ONXLy8sIO5L70Etg2CmzfyV//xGuZmK1MzFYmZisTs5WJ2crEbGVitjIxW5mYrUzMViZmKxOzlYnZysRsZWK2MjFbmZitTMxWJmYrE7OVidnKxGxlYrYyMVuZmK1MzFYmZisTs5WJ2crEbGVitjIxW5mYrUzMViZmKxOzlYnZysRsZWK2MjFbzcSsEyF5WTBz0Pwwy/odkYPb14UyyL7hVbmxgXtJ7qPj8quNO1IHefW/sa30uH4dmvLPZv5X2qCZEdnMiGxmRDYzIpsZkc2MyGZGZDMjspkR2cyIbGZENjMimxmRzYzIZkZkMyOymRHZzIhsZkQ2MyKbGZHNjMhmRmQzI7KZEdnMiGxmRDYzIpsZkc2MyGZGZDMjspkR2cyIbGZENjMimxmRzYzIZkZkMyOy2YzIlh1pxi0TSlP+yg4zY6taStq/SDO61KsJlXvNDdU2KIWzaH8kG/eOVub1/HTEpVukTLucuHwlb09OvbKXzKlX+v7SjAGLVppTrwCWIcwu0K4XmCsXaPELpts8r+vL39Wi/uN1aMlXhWZy1//yt3xZfWBbuetLSuf9qllezYClq4zXZhbftvnFwzfnbsdfPFw9ovXwuNXDo1MPT0s9PC318LTUw1Dq4fmmh+ebHp5veni+6eEppod518PjSQ+PJz08nvTwRNLDQ0iPGYv+/K8IK+XeC9yUXxG+Xq+Y14j6+ZcBSQLyX68CqFcNknRE4JWA+pJODe7IbJQRldmRzs1qofwrtd8keQ4PSvNYtF+UTURqIe/ok/kRtMjbd/BzEC7RYJfo3Us0/yU+o7pEv1+iwS4xFi7R75dM60Xlj5bafZ/5Uy3ahLpkLSa/G+NzxQk+V5zgc8UJPlec4HPFCYbXBJ8rTvC54gSfK07wyiZ4zRN8rjjB9JvgZU5wGhN8rjjB54oTfK44weeKE3yuOEEJJvhccYJZOsHZTjBLJ5ilE3yuOMHnihNM2Qk+V5zgQXKCzxUnyMoEw3iCYTzBMJ7gc8UJJvMEnytOkKIJk5V4/pmL+Vwlsa3eHCWPqr0vkyLbLz2+ZGgkt9VAX+k5wQM7Y6CpwWsO+ERGMtuZ/8jLHtmk84eOK7LJ8K2ALzBZXqCrXjB90DV4zU1PmHeclf+6fIGzLz+6anm77rxf7PImPdezheWy/OCtkPs2Pi9f4cq5wvVxhbpe4ca4wo1xhYF/hRl/hRl/hRl/hRl/hUl+hRF9hTBdYURfYURfYSpfYRBfMQHs5SeRnuclnufuPM/7PM9LPM8LOc9JnOdPO8+rOs+5ms39bCxsCtjsYrObTSGbIjZ72exjc5LNfjYH2Bxic5DNYTYPsjnC5iE2J9gcZXMHm4fZ3MnmLjbH2Jxic5zN3WweYXMPmqzWx0PaJ/nYP2l+vz//X3Z4TMbQlfyblJ6QzQD/pKORwjVSuEYK10jhGilcI4VrJJWNpLKRkjaSvUYi2kh9G6lvIyVtpNiN1LeR+jZS30bS30hJGylpI1VspIqN9HQjtWqkPI30UqOpxeCN/IHIGfr4DH/2GRr0DA16hgY9QzjPkJAzpO4MQTtDs50hqWfMKxnKg9QqQRomgh2Mgw5S1UGqOkhVBx97BxHrIGIdRKyDVHWQtw4i1sEL6SBvHeStg7x1kLcOItZB+DrIWwd56yBvHZx4B+HrYLh0UMwOYtlBLDsoZgcZ7SCjHUyaDkLTQTE7CEAHQesg1x1Eo4OQdxDyDhONEZyPnspIPkbJxzD5GCYfw+RjmHwMk49h8jFMPobJxzD5GCYfw+RjmHwMk49h8jFMPobJxzD5GCYfw+RjmHwMk49h8jFMPobJxzD5GCYfw+RjmHwMk49h8jFMPobJxzD5GCYfw+RjmHwMk49h8jFMPoZNPsa2zUvHv5u7HY/CWW08H85xab6JG3liKV/n/PvrGff1vrBaK+p3YNx1ov7Tqxj3Nn6BdZLp5mG6eZhuHqabh+nmYbp5mG4eppuH6eZhunmYbh6mm4fp5mG6eZhuHqabh+nmYbp5mG4eppuH6eZhunmYbh6mm4fp5mG6eZhuHqabh+nmYbp5mG4eppuH6eZhunmYbh6mm4fp5mG6eZhuHqabx0y3nKShXiDwH+Z1Wyr3SYi28PigeZspEvMBDugD5ven+YLwRT78i5zzRcp+kUBcpLgX+SAvkoGLlOOi+aOfF9Hxfj48B4F2EGgHgXYQaAeBdhBoB4F2EGgHH7+DV+Yg0A4C7eDFOHjNDgLtINAOAu0g0A4C7eCgHQTaQb0cnKCDQDsItINAOwi0g0A7CLSDQDsItINEOAi0g0A7CLSDQDsItINAO8iKwyTiA5KGUwKBv8O/9CHzW/qO+NWS/FXScu722OwfvJG/Ruunhftp4X5auJ8W7qeF+2nhflq4nxbup4X76dp+uraf3uynN/vpzX56s5/e7Kc3++nNfnqzn3bspx37acd+2rGfduynHftpx37asZ927Kcd+2nHftqxn3bspx37acd+02YzO8JmL7VXg6jf9f9ps9fhU7s+JCffKLoPmKpaKo8WQKoPm+p8WGzMJnGTv5KH7Y/wpdlz3GLnaI5zZOEcF9c5LpRz3G/nGM3niPM5etVs7mdjYVPAZheb3WwK2RSx2ctmH5uTbPazOcDmEJuDbA6zeZDNETYPsTnB5iibO9g8zOZONnexOcbmFJvjbO5m8wibe9BktY+qc5xFexaazFKTWWoyS01mqcksFZ6lQLMUaJYCzRK4WaI4S+lmKd0sgZsll7MUdZaizlLUWYo6S1FnKeosRZ2lqLPkf5YKzxL5Wco9S7lnKfcs5Z6lwrMM7VnKPUu5Z2nUWWo/S+1nqf0sjTprgjCb/83jfTIjjHzjk81c/g/5TslmPv/HxR+WzQKjpJj6FVPZYj7CYkpWzFEWU9liPsJizrWYoBUzSoqJbTGxLSa2xcS2mKQWk9RiklpMHovJYzGpKyZ1xaSumNQVk7piUldM6opJXTFBKyZbxWSrmGwVk61iRkkxQSsmW8Vkq5g4FROnYuJUbBK0mP8tzmckGh/jgUD+Afo/5P6fX0n749zt+Ura0qD6VKMflmP/uBx7s+g+qu5M24A/gvRHkP4I0h9B+iNItwVpliDNEqRZgjR/kLEQpI2CtFGQ5g8yI4I0WJAGC9JgQRosSIMFabAgDRakwYLMoiDdFmT8BGm9IK0XpPWCtF6Qbgsy1oO0XpDWCzI0g/RhkD4M0odBhmbQNOUn+EKJlwB4CYCXAHgJgJcAeAmAlwB4CYCXAHgJgJcAeAmAlwB4CYCXAHgJgJcAeAmAlwB4CYCXAHgJgJcAeAmAlwB4CYCXAHgJgJcAeJm9XtLgJQ1e0uAlDV7S4CUNXtLgJQ1e0uA1aVjO73WXzIoVorFJADYJwCYB2CQAm9R8k5pvUuZN6rdJyTap0iaF2aQwm5z4Jke5yVFucpSbnMQmud8k95tkeJOkbhLOTcK5STg3yeMmEdwkdZtka5NsbZKtTeK0SZw2idMmOdkkJ5vkZJOcbJKTTaKxaaKxShqcHJiTA3OSEyc5cZITJzlxcshOQuMkNE6O30mCnNTCSS2c1MJJ0JwUxknqnFTJSQSdlMxJHp3k0UkxnRTTSTGdxNZJZZ1U1kllnaTbSbqdpNtJAJwEwEkAnATASQCctIeTNDhNGtZIwzRpmCYN06RhmjRMk4Zp0jBNGqZJwzRpmCYN06RhmjRMk4Zp0jBNGqZJwzRpmCYN06RhmjRMk4Zp0jBNGqZJwzRpmCYN06RhmjRMk4Zp0jBNGqZJwzRpmCYN06RhmjRMk4Zp0jBNGqZNGtYlDfLPs781d+00WU4qyklFOakoJxXlpKKcVJSTinJSUU4qyklFOakoJxXlpKKcVJSTinJSUU4qyklFOakoJxXlpKKcVJSTinKCUE4QyglCOUEoJwjlBKGcIJQThHKCUE4QyglCOUEoJwjlBKGcIJSbIHzyRl7mlU++HLmvvkU4dz3P5j6V/1ucX5cntE/f0vdFtIj6+y8zZvm+iPaXGfdt9P6Iz+yIX1/I3xaEbxPOP8sDxhhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRhXyRgPGGPcK2PcK2PcK2PcK2PcK2PcK2PcK2PcK2PcK2PcK2PcK2PcK2PcK2PcK2PcK2PmXvmcpEHins7jOyS/+kL+Q2GcMgtfJDB+AuMnMH4C4ycwfgLjJzB+AuMnMH4C4ycwfgLjJzB+AuMnMH4C4ycwfgLjJzB+AuMnMH4C4ycwfgLjJzB+AuMnMH4C4ycwfgLjJzB+AuMnMH4C4ycwfgLjJzB+AuMnMH4C4zeB2dj6TPcfyuEz3TdfKcblrSpeS5y3ivqumxTr33ibxPrX0KVldGkZXVpGl5bRpWV0aRldWkaXltGlZXRpGV1aRpeW0aVldGkZXVpGl5bRpWV0aRldWkaXltGlZXRpGV1aRpeW0aVldGkZXVpGl5bRpWV0aRldWkaXltGlZXRpGV1aRpeW0aVldGkZXVpGl5aZLv1aEeDyP0z92zLAv45/yrNIGhZJwyJpWCQAiwRgkZovkoZFar5IMRcp5iL1W6SyixRzkfotUotFarHI8S9y/Isc/yKHvMi5LnKUi+b0vv6mHEplKv3JdaTXV8KTrW/IP9n6XsnnN+Z/j/awbL4p/2vu35LNN9/IO9q6GX7dxL2buHcT926GXzfZ7yb73cS9m0boJvvdzLtuGqGbRugm+910RTeN0M1U66Yruplq3QyybgZZN83TTfN0M8i66aRuOqmbTupmkHUzyLrpsW4GWTcN180g66b7uk33fcvWkfTOPOyPyq9+6y35E3j5J+zvf4kHZ+DNL+dF+bFbP7MtPfklrfhtWx9EvDf31Q8iviXh9+074tMcbvlEpfcWbgjh77iRD+d7jjn2HDP2OWbfc2YmfWd+K71RbqXvUr/LrdxvftjJd/PgPcTdM8TdM8TdM8TdM8TdM8TdM8TdM8TdM8TdM8SD9xAX0RAX0RAP3kM8eA9xRQ1xRQ1xRQ1xRQ1xRQ1xfENcUUNcUUM8eA9xXw1xXw1xXw1xXw1xXw1xXw1RsyHuqyHqPMR9NcR9NcR9NcR9NcR9NcR9NcSD95AJyvfcyIklQ2oypCZDajKkJkNqMqQmQ2oypCZDajIEJUNQMsQhQxwyxCFDHDLEIUMcMsQhQxwyJCBDAjIkIEMCMiQgQwIyJCBDAjIkIEMCMiQgQwIyJCBDAjIkIGOK/r2MgDDFDFPMMMUMU8wwxQxTzDDFDFPMMMUMMwLCVDZMZcOMgDAjIEzNw9Q8TM3D1DxMzcPUPEzNw9Q8zAgIE4AwAQgTgDABCBOAMAEIE4AwAQgTgDABCBOAMAEIE4AwAQgTgDAjIGzS8H3b5m9q/zp3W/5N7ffviN8ZvdyHFv7tKwx8O59Yf4ABN8KAG2HAjTDgRhhwIwy4EQbcCANuhAE3woAbYcCNMOBGGHAjDLgRBtwIA26EATfCgBthwI0w4EYYcCMMuBEG3AgDboQBN8KAG2HAjTDgRhhwIwy4EQbcCANuhAE3woAbYcCNMOBGGHAjDLgRBtwIA27EDLjP8/XEOgJQRwDqCEAdNa+j5nXUvI4y1xGAOmpeR5nrKHMdZa6jzHVUto6a11HmOspcR5nrqGwd9aujfnWUrI6S1VGlOo6/jhOv48TrzIn/4Lb5VIyTudvxBcmr2TbInBokjIOMmUHyN0j+BonPIINhkPgMMhgGGQyDtP8giRmkrwfp60H6epBWHiRLgyZLP8Qs36BhN2jYDU5ig+7doGE36NENenSDTtyg3zbotw1abIMD26DFNmikDWbfBme0QSNtcFFtMKc2GEAblHmDMm9Q5g3KvMFk2WCybBCADWq+Qc03qPkG82ODAGwwTDYIwAYB2CAAG0yWDdKwQRo2TBq+IGlwiSkVmtdt0YK4/Uf5Az9q3v6H83+Sdo986eNH5L8sP0vmL/DjnzRv96PyW9L44/kAOS+/+mNbb2f0QJkmKtNEIJsIZBMZbKKATQSyiWo2kc4m0tlEaZsobRO5baLOTdS5iUQ3kegmEtBEvJuIQxPxbiIBTRS9ieA3kfUm6txE8Juoc5Opx49zZzdw4g2ceAMn3sCJN3DiDZx4AyfewIk3cOINnHgDJ97AiTdw4g2ceAMn3sCJN3DiDZx4AyfewIk3cOINnHgDJ97AiTdw4g2ceAMn3mBO/Cd2xKu88kXXj+S2067+kk9CfjL/JzR/KqPnp7jFYgz6GOGOEe4Y4Y5xv8VIeoykx0h6jHDHiH2MpMe4Q2LEPkbsY8Q+RuxjJD1GD8SIfYzYx4h9jHs0Rg/EuIRiXEIxuiNGd8S4kWK0SoxWiXErx+ibGPdIjIsrxsUVo71iXFwxei1Gr8VMr/00PxOpij+6ijOqomRVFLOKwlTxB1RRvyqOssr80T9DECcJ4iRBnCSIkwRxkiBOEsRJgjhJECf52Cd5VZMEcZIgTvJCJnm9kwRxkiBOEsRJgjhJECc55EmCOEkQJzm9SYI4SRAnCeIkQZwkiJMEcZIgThLESdIwSRAnCeIkQZwkiJMEcZIgTpKTSZOGn+WarSEANQSghgDUUPMaal5DzWsocw0BqKHmNZS5hjLXUOYaylxDZWuoeQ1lrqHMNZS5hsrWUL8a6ldDyWooWQ1VquH4azjxGk68xpz4z3HiC5z4Aie+wIkvcOILnPgC57rA8S9wyAsc5QJHucBRLnCUCxzlAqe3wIEtcGALHNgCB7ZAxhdI8gKnt8DpLZgD+/lB9ffpb5Zr9Bfyb/T9Q9n8IqMsxShLca4pzjXFuaYYZSkOOcUhpzjXFCeeIuMpTjzFKEuR8RQZT1GYFIVJUYsUVUpRmBQZT1GlFKMsReBTjLIUoyxFZVNUNsUoS1HmFGVOUeYUTZJilKUIQIpRliINKUZZimikaKyUyckv0VhLBGCJACwRgCVqvkTNlyjzEgFYosxL1G+J+i1RsiWKuUT9lijZEse/xPEvceJLnPgSJ77EuS5xlEuc3pI5sF/eNi/Sncndji/SZbVfyT8DeFCm1a8yrexMKzthtRNWO2G1M63sJNdOcu2E1U6M7UwrOzG2M63sTCs708pO2u2k3U7A7UTfTtrtTCs70bczrexMKzvTys60stMudtrFzrSy0zt2esdO79iZVnamlZ2usjOt7LSYnWllp9/sTCu7ab5f2xG/E5S/AzwGM0qYf2GHm/LX6cM4fRinD+P0YZw+jNOHcfowTh/G6cM4fRinD+P0YZw+jNOHcfowTh/G6cM4fRinD+P0YZw+jNOHcfowTh/G6cM4fRinD+P0YZw+jNOHcfowTh/G6cM4fRinD+P0YZw+jNOHcfowTh/GTR/+hnpjd2Wh+d6435RstAkg3HnzPJNT/yW5e3PXfueyTDKWScYyyVgmGcuEYZmSL1PLZcq3TMWWKdIyRVrm9Jc51mWOdZmDWCb2y8R+mQgvE9RlsrlMNpfJ5jJxXCaBy4RumWgtE61lorVMmpZJ0zJpWiYmy8RkmZgsE5NlYrJMMpZNMn5rRyT0LfhvVlceKbhF0fzbXxEjl0t19jpGfysm/juD5ue6a40y/X73Rt4LmmaUpBklaeZkmjmZZk6mmZNpxk+aoZnmBk0zQdMMpjTjNM0sSjNb0wymNIM2zZRKM3XTTN00IyvNyEozj9PMrzTzK838SjO204ztNLdhmjGXZsylGXNpxlyaMZfmEkibMfd7PA65KaabYroppptiuimmm2K6KaabYroppptbxk1l3VTWzZXj5spxU3M3NXdTczc1d1NzNzV3U3M3NXdzZ7kJgJsAuAmAmwC4CYCbALgJgJsAuAmAmwC4CYCbALgJgJsAuAmAm0vPbdLw+/xP6D4o6s/nrv6ndLPaH+Sfz363TIs/zP+JwX/K5o/yzZ/L5o9fKUe28mMrT7bQyxK9LNHLEr0s0csSvSzRyxK9LNHLEr0sacuStiyZypKpLJnKkqksmcqSqSyZypKpLDHKEqMsMcoSoywxyhKjLDHKEqMsMcoSoywxyhKjLDHKEqMsMcqa5PzJqxF9a/7P8Mc9w4f4DEfxDHU2m/vZPMzmITbH2TzC5iSbU2iy2p8yEWeI5QyxnCGWM8Ryhg93hljOEMsZYjlDLGeYiDNkdIaPfYaJOMNEnCG9M6R3hvTOkN4Z0jtDemdI7wyHPMNEnCHKM9RvhijPEOUZ6jdDlGeI8gxRniEnM9RvhprPkK0ZojxDGmaI8gwTccak4c92xNsibtkLMPL9F4dzr+VtEX+e/08M/KRcFX/xFXHiv+Gpy6cKI7nX9cT/l9uKZ4lTx3bg+sZ5/qv8oeifJc9/fSN/2akx0DQmr8YQ1Mw8+htuJx+3k4/bycft5ON28nE7+bidfNxOPm4nH7eTj9vJx+3k43bycTv5uJ183E4+bicft5OP28nH7eTjjHzcTj5uJx+3k4/bycft5ON28nE7+bidfNxOPgrj43byUUwft5OP28nH7eTjdvJxO/m4nXzcTj6Thr/Nfy7FD0j4/m7rL+O/kHv1fxnvFvXd12P52yZcX8dQ/Xv+7rmWPqylD2vpw1par5bWq6X1aum2Wvqwltarpdtq6bZauq2WbqulwWppvVq6rZZuq6XbammwWtqoljaqpXNq6ZxamqWWLqgl+LUEv9YE/x+2PnTj18S3LotaLr/6j/KrW9ea47XmmJQ5XniOF57jhed44TmqmqOqOY4kx5HkOJIcR5IjCTlea47DypGRHCeX4+RypCdHenKkJ0d6cqQnx9HnOO0cucqRq5ypwz/JibeLyf7sK2TOS48TMip+7GWiZStStqLhy33C0FZ0eET98dchOm44MraS4qV/prOlVjXVqiZW1RSomgJVc9jV1KSamlQTuGpTk39+LXtgx+S/XFgfegUxX7oHvKK23Yi4V/fB1T3wZc+E/5J/m1qdXMv/yuVQyhgpZYyUMhJKafxS2ruU9i4lPaWkp5T2LiUwpeSqlMuhlIFZyowsZUaWMiNLGX6lZLGUZ6xSJmEpk7CUeVfKiCvlsaqUDirl4amU2VXKKC2laczmATb3sznJ5kE2D7E5weZhNqfYHGfzCJqs9m837bPadl2HKb8SPqvt3/P/dSm/NN9/yHHL33CdhuK6qcR/5p+4/Zu83X/RpPU0aT1NWk+T1tOk9TRpPU1aT5PW06T1NGk9TVpPk9bTpPU0aT1NWk+T1tOk9YS6no6tp2PradJ6mrSeJq2nSevpy3pasZ5WrKcV683x/3c+I98qx/8/+d8f6KKZe9cJi/k/7X/zX60RX620iH/ZPOn9oOwKCm75J55HX8Y/t/8nnlfuKhi8Fmgfz8jh7y7IfwLiJdkVFvAliVEetEdppFEaaZRGGmU2j9JVo3TVKF01SiON0mKjdNUow32UFhulxUZpsVFabJSuGqXfRmmxUVpslBYb5RIZpd9GuVFGuS5H6cRROnGUi2eUthylLUe5O0fp0VEuq1Euq1Fu1VFaeZRrbJS+HqWvZZMV4cwotZIAKwmwkgArRbdSdCtFt1JnKwmwUnQrdbZSZyt1tlJnK6W1UnQrdbZSWivVtFJAKwW0UkArNbNSMys1s1IzK5WxUhkrxbBSDCs9ZeV5x0pLWMmtlahaSaeV2FmJkJUIWQmK1cRhT0H+7zc+LbNi7yvG9rZ7TiKfRJ24jvjexsehyn07a+Q3841sB27RG9kq9xfwhagp5swU9+MUQ2eKoTPF0JmiSaeYqFNM1Clm0xSzaYpxNMU4mmIKTzFNphhUU8znKabWFINqisk9xeSeYnJPMbmnmNxTDLcp5tkUM32KmT7FcJti7E0xz6YYr1PMwCkm3RRjfIqxN8XYm2LsTTGfp5iBU2YGHviiE9Kn+ag+bd7g4M3x6I38Lc6bcrfjs8Krw+8jH32Eso9I9JG2PtLWRy/2Uco+Oq6PTPWRqT4y1Uf39BGwPgLWR8D6CFgfPdJnwnTo9gx8uYvfti3hyor7o8FbGPEtjOsWxnULo7eFXLYwbVuYqS3M1BbGaAtZbmGmthDsFoLdQrBbeDRu4cpq4WJq4cpq4ZZqoTNauItaaJMW2qSFNmmhTVq4slq4slpooBZuqRYuphbmfQt91kKftdBnLfRZC3dRC03Xwj3ZQge2mA48UpB/aWlUnnmPFuyo1+Pl6+olN+DPbejLrH4o0+VJd7nF/3cFMoaQ6PNaUUY/EEj4v+hrz2eyYZt+9JInnYkkQo50MtElbmJkw+Uu41FT2CcyZnlSladUOa3K06o8o8oZVYpVOavKs6qcU+W8KiWqlGbyT5fMYlOlTBW7Kg5VylWpUMWpynOqaKpcUKVSlSpVLqpySZXLqlSrUqNKrSp1qtSr0qBKoypNqjRn8qSbpVUVlyptqrhVaVfFo4pXFZ8qflUCqgRVCakSViWiSocqUVViqsRVSaiSVCWlSqcqaVUyqnSpklWlW5UeVXoz+e1pln5VrqgyoMqgKkOqDKsyosqoKmOqjKsyocqkKjlVplSZVuV5Vd6vygdU0VX5oCozqnxIlQ+r8hFVPqrKrCqGKnOqzKuyoMqiKh9TZUmVj6vyCVWWVVlRZVWVNVXWVfmkKp9S5dOqfEaVz6ryOVVeUOVFVTZU2cwE9L3JVFckmZCme1Qv8ge82ZDxvL4n05WO+LrEPx2NBgIptycWc3clowFxu+f1A13pQMDti3kyGaNKL/J5fOGA+PJh8x/cobQnHvekxRf2ppKZrlig16gKF4S/oBeJfwykjbBVP9iV9iQywWQ6Lvqq8Oddwu8efV8qHUmmI119hr4nIb7niRn6fk/cGwllzS8WerJdSUMvSgdC4j6f14+l0smUJyQSwy1+UERdhXjA5o9x+8RD9np8UXlh+l1xT59X3Czm8QXCyZg/kM4Y0/qRgD/S5e4KpOORhCcmriV8XrOES57XDyXT4iYBkUeBLnnDQ5F4KikiK+XpCmcMl6EfzCSzaV/A/IIYwT5xz9lQxByiDK3CC5501Mi++/8AKNh+wQ=='
+)
+DATA = pickle.loads(zlib.decompress(base64.b64decode(DATA)))
+MEMO = (
+b'eJztXF1wG9UVtv5syz9xnKRJSmgBt6R2jGOS8Jc0EBTHCcK2bGQ7ECyzXUtraxdJK6SVjUEp9IeWgPpDK0pbCrSlf7QPfer0oU996PShQ2c6PPHU6QPTzvSpT33qtHf/tPfsvSvt3l0BBTIZyXt3zznf+e655567e1dPx17cEHq0f1eb43PqRyNa4otCsxF/cJlLpuaTqdlmo6/MK4pQKTXV87FtvlBDFwyPnzuD/mdurMcnJiabjdhmgd+qNtebjUiF32mmGr3cjphT8qhlfC70XLzH+BcSGv0cp+yWBY5DZpZ01enZZq3RX66IckVUdptzPfnhxuCKUCmKJb5wQdhs1uZCyHo+3Ihy6cUHm/moetTbCKe5Zr5/vZkfaETH0txYE8kNGDqXlUqzlh9RdeX31ubChvxMMj3Tko9lsmIla6roH8tox6qa/CFMNqLLxlfSyUtcKrEw21KQyGQQC3wlWxVLdfSVlavql8KX6mqLeqj+nZWVelXI1rPV7MT4uZvW+KknElMP3zp1en3CND4z7VvVdDM/qNIdnesTEPA9mAdR3YP++UWbAzdoVgvyVr1QqguPl53g3TTd4ULTeGQuajce0433plYXzs+mW6ZHM7nJ8czxTO7YxLm6+j1pGts/TZwy1YNQstnp1e0MLycvpWYvcDZzh9cmp9bPjROaWy5eN+10hRvjfbrxSDK10jIZwXyKTbv0ol9XFF5KYnrKoqmnFwVpWSRCNK5LxZKpiytXWoK9GbG0iQaUIRtHsloDIT5gdNHylYXzi/Mt+b9kMudQP6OOdwjBOjVerSipb1b4bL0gbCr1iriVV+obwha6XCjl6mWxrmGpF8RiXZG1i/hKRd7Rr9T/VBvxw22hgjRpn9XH1I9asV6uyDmkSrFH5IRxsI41HjOpeGv6A+dau+C6/7/on97Vg0akzD6wmrB6OnS3yUxk7G4iPIaM5Lk0v7psiUxaIpOEyLBhZiGZwmWmLJkpQmaPYWZ5JWGN29AxS+QYITJiJDaOS6QWU9yteGrPyQpI7eiYkN8L5U9gQ0cRi0IVHzpaA6FhFGo42dIQzfDVFoA+JI8OCel9Bk3L84nl+yyfpy2fpwmZ/brMgDqVrS5cnJ99yBJ8xBJ8hBA8YPA7v4TzO26JjBMiHzNE0kBkwhKZIEQOGrlk/nw6MWPNNKEnLaEnCaFDhlDaJnTVErpKCB2G1J/COh+NUw7vfPWYkP84lL8N6zo0cvGuQ4eE9HVGN6ymLsyml2cW0xhszoJNmj0Czd6O5XlFxvO8IhOy10PZOzDIKE/gkNEhIf0JKH0nJo3SDS6NDgnpT0LpuzC61USF060eE/I3QPnTmLya8XB59ZiQv9EM3+UHzltUr1lUrxEiN5nhC0TWLZF1QmRMFxniONStycuJleRlq2NRa06oiNu8Im4LppY9Y3grofBTxhCfWVxYSFggbrFA3ELIfFqXOcBxaNytJBPzNDDobJmvKCJfoIA6OEY7Sxi62ShtzfyHJ1B1gsM7RT0mFBy1KTiBD0I0xYFBiI4JBZ8xuujyeTzD1C126oTIuM3mSSxra1MqnrW1BkLFhE3FKUyFNpHjKrQGQsUxmworfRwe3yjyaHJ/vF42vvUvrNR0usKcxHvJGn7SZu92bPSiqgMfveiQgHuLTdxKHeFMBs86mQwhO2XIJhaWUKpLpC5YHXXU6qijhNxxm00r4QxkWkWRqWDYiBCtkVA1bVNlZZ/BjFVGWUMyg7USym61KbNSUXjqHmtFOXUPIXkCSp60xkv47JQleZYsbk7aJK2BMpKBtaCpZp9BSBtHTtmUWiMhctbyJIbwkK7cpq7ne9GKW412I0dVkR1FXUUPpuSSuQBHa/M4Knj5UlWUS2hBb6Rx4bEayimoJT8sLYZ6emp8IyZXUK5B6/dGjC+IfLWZavTJZfWiqnb3YORRQShzfKHAKfKjAmq81ujTNOdONK/lR1KNEUUolgu8InBVuVbJCkjBMGpRdjmxlBOzqB6bUMGlawVh0dBbQw1RtaFZm7sdGZHmQ9r9DNwdHZ+0hD5N+FFkt2JBl1bQ11xIWkVfKemyrkJ6CH1fk66onwid9LB2cg19IhRSRhVE3+vq99wd0DTJjmF9nGZea8uvNgY2xYIiVDi5pjSfRX71W11AExN01D0aaswkBf+znfDfCfFDQ4C5iFYqQOJ6HInraPguaBhoh5yBUzpla1JBszEsFVuNjT61+qhlFQeeInwux0TRaT9IeS9IQwbSam2DCemZzkgdABj9GWbvz89C24QFyBRxWmdri8ZWrCzvCE7RHynWCkxcnfWCV3oZHUCoRQpU6VXsMtCn0mvqBwPMu33CrLqEGfYH8x6fMHddwoz4g3kuiCB9yn2QRo0gzYnbTEF6rzu8xtwjojlUzIrEqI6xj+qEbXojTEDGyPN6e+8mn1VkpzE8ZEpxrIP5vEuY1L7qWAR0ND9jqz+gfkARfUJon+JKwhYTKxfcwKJ3kH9OZqFxuwFgfZBX5CJarm5VBIFeYjT2aJcosnkVC6SLriCZlZpq0Dbyn3Hfd8ZUbpxkQXvJA4EQrP/J/D5bVQjUA8sDWr+UZH6jGmBxmHRtfwgZ5jZrpSxckvgO3/ttmVc141z4EafblKmD6rVdKlXngkBNzVDtUPstW+fdoW4DxH/EL0AMVCuQPeol73oZm/KKW7oj7KqUPR12KmXPhNmKr8UAoFLLWQrUsD+oSwFApZa0FKgRf1AfCDJw38XSNu0eN5bpu1DiLkMgdDOQQfo1xjl9nrZNiUEXvCseQOuXxDWCAy58VyEMig0XxS9FKqAC+LJbeN0qgh+0dRM1NgCGUawUbldWBVIQP+QB3rhzvfceFMdXPBPbplD1UTY8DHHQjMAQM3YnaVxdM7mCPdtbqhU3GHlZ84hnv/WMsBtVdMYjnCPko0tHWD56bd0jrGH1WYwjkAg7kEc8AhlS9zM44Yiy4+A84ogVxGKgk/DnPALoF0sKynt8wY6hlx0D7xFDHK1RijytJ/rYQWx4BLHXqJnQNQoVSz87lqzXYaJu33AMzzg7kJzX6FC3LNAwDLBjEDxiGNCf7HNymZhvBtlRbHqdb3QUdgRD7Ai2GHkQStt2FMPsKPKuURiV5/O06oT2NPYFeKFRsezRp+YBND8JJU4TY4EteoX9klvYr1Bhj+iwBzfQeBCq7Lglj52u7mKmljh7dUDxsshVd4sbMtvq51Gv05W+PZqKaNRckqk7d/2AKngdmsamayqqfUYp6ANPEeJxqGFgdY+96gBhBTKIjPo23kJC86vjjouSrfSnlkRwFL1Owc08tK7SH8VBH/eZqLgdUclzG3yVukLr6KwcjLMO6472rhirtOtJV1BYc3pKYXKq7Nkp7A2WLsRl2NhIY+Jgcuox6JStQoZd9AYtHn/tOkjpmUMX+E03o3pAc8pxGunIUQVyRBbxkKbf+aPJrdfUOxfdTQ+jpudoobsplkSFLTtUu8Sn/V0qWqBRb/d0luuUbY4QzPhMNsq7GXM+48tbLBlpa3+LMbHkK5pq/plyxKrfI2lcR8HKVdUb12yQtyFkyoocYv599xLv6v9ZCupHXLFn8p2PiHdedRmpbK/JsJbB5NwuE9OPd4tp76S+B7OCkeP2ASrZJ4PdDziZtmxLsuYrFJ+A7DnfeoQk/vFDMfZdJd24epo96z75UQe4Tb6jLaZ9hXy9y4y/T/KGu0ITUsqeha9+OEiFyfgIhT1fofl5yKLDwxdI4ZtdGHBmamvZZ/LmqaC8ecutN293L/kMlZR8RZZ90PE0pKPtY3pIyl9pblFvkLUbJe8Ecqd3xAabiYovQCpcbRGAlPzzfUTJIQf4TNR8EVJDPvaEPPwr+FtnweSOqPbKOQsDX4IM0HeDQxb+TfPjP9Rijro/WoqgP13osC23TWRMbn7Zu5sePHJAHgoC+TMQOfVND8YXLwaNXXLO78YyvdH7FYi4zYY8XzvjOqOHZLG48lUb+TSTbp43az+eRsuJ7UY1E/nPQsT27QsQLHWqHzT2G1TkHXs/vN1ugAI5FujXbGTTcNheF9Ze+ge7hw9wHCbHqS+yqz9uRA8Pv4ifc49Yz3x/ilq718HmQOnPUeru9Y4QnocQACMuOrtfKAhFoaR46mnNCAvYhm26JYx3fNe/McpxppTeuSecbs+2lLMg/ZpLpHq3vuPYrf9g7NavQ/u0PUDw9Yl4iD6n0vKRNGJe3D4b6bZHLNv6WgtO5ge7YNj20BRznoXLb0AuHf2BwbcHu4xMM4dbacZUo0fjyQDn0W96w60zHIs5hCIThBcgBCdOOg/bQ4AvJKvTdSpAur7lCavO1oFA2fo2fdDiGxghU/bZWW/d3+IKSXLlQq2q/sIaNcntNS7ky+XCrmaIBXfTVjOo3SOXnXpX+yFZWqLQfsKTdlssZvw6D/CyX7XSrnZTz1eEcoHPstVuL3bZq4HqDl/maK55UmZbK2hDAylmcvk70GUb73jk27e5dHzjuKPtl1zblsZD9inD/9j7rnvzx53MO78Q0dH899ybv83JvPNrEB3Nf9+9+TNO5p3ffuho/mVb4qOMDIDhXicMPuLvBx4xXOxCEL5iqxqJFOcj6cDsOKxnx02hIpQY8+OrHsFSZnUfiS6uJbosz7hv5bUuMq2fCGNzRbAMhLEJLisXN8QSGwc/hByEyclNT/VrQQ+1H7k0zAc9vn4MDEtvYssuuNal3moGa2P/9ebrLsGAM87wpDdiDr8XwITuJxDd371R1ebn8pjQ/NQlGnCmDVe/DZSrn0F0fTEndNeHqGtdx7WGf+J+7hYafqYtWOkPgXL3CwjwoCPAMQfugg61N9wCOkgw5gBReitQxn4JAd7sBJD+AMK+jPFP2K9c4gFnnBFKfwuSrdrx/wFs9sA2'
+)
+MEMO = pickle.loads(zlib.decompress(base64.b64decode(MEMO)))
+Shift = 0
+Reduce = 1
+def Lark_StandAlone(**kwargs):
+  return Lark._load_from_dict(DATA, MEMO, **kwargs)
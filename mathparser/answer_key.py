@@ -0,0 +1,247 @@
+"""
+Precompiled answer keys
+-----------------------
+create_problem.html compiles the expected answer of every math step once,
+at export, and stores the result on the step as "answer_key":
+
+    {"version": 1,
+     "expected": "2x+6",                          # LaTeX it was compiled from
+     "srepr": "Add(Mul(Integer(2), Symbol('x')), Integer(6))",
+     "probes": [{"srepr": ..., "symbols": ["x"], "values": [["8.4", "0.0"], null, ...]}],
+     "structure": {...},                          # extract_structure fingerprint
+     "difficulty": 2}                             # problem_difficulty, 1-5
+
+- srepr: the expected answer after parse_latex + normalize_expr
+- probes: its values at the numeric tier's fixed points (each side of an
+  equation, each matrix element), None where undefined
+- structure, difficulty: fingerprint and rating of the parsed answer
+
+The solver loads the key (MathParser.load_answer_key) instead of parsing
+and normalizing the expected answer, so a check only does the student's
+side. A key from another version, or compiled from LaTeX that no longer
+matches the step's "expected", is ignored and the expected answer is
+parsed as before.
+
+Problem files are data, so srepr is rebuilt by a small evaluator that
+only builds the node types the parser produces, from number literals and
+Symbol / Function names; nothing in a key is ever sympified or eval'd.
+Anything else makes the key unreadable, and the solver parses "expected".
+"""
+
+import ast
+import json
+import re
+
+import mpmath
+import sympy as sp
+from sympy.functions.elementary.piecewise import ExprCondPair
+
+from .difficulty import problem_difficulty
+from .equivalence import NUMERIC_DPS, probe_values
+from .log import console
+from .structure import extract_structure, structure_to_json_serializable
+
+ANSWER_KEY_VERSION = 1
+
+
+class AnswerKey:
+    """A loaded answer key: the normalized expected answer, ready for final_eq"""
+
+    def __init__(self, expected, probes, structure=None, difficulty=None):
+        self.expected = expected
+        self.probes = probes  # {sub-expression: probe_values}, for final_eq(probes=...)
+        self.structure = structure
+        self.difficulty = difficulty
+
+
+# srepr <-> SymPy
+#
+# Only what Latex2Sympy and normalize_expr build is rebuilt. Every SymPy
+# constructor sympifies a string argument (which evals it), so strings
+# are only accepted where srepr puts a name or a number literal:
+# Symbol('x'), Function('f'), Float('2.5', precision=53).
+
+_EXPR_CLASSES = {name: getattr(sp, name) for name in (
+    'Add', 'Mul', 'Pow', 'Equality', 'Abs', 'sign', 'floor', 'ceiling',
+    'exp', 'log', 'LambertW',
+    'sin', 'cos', 'tan', 'cot', 'sec', 'csc',
+    'asin', 'acos', 'atan', 'acot', 'asec', 'acsc', 'atan2',
+    'sinh', 'cosh', 'tanh', 'coth', 'sech', 'csch',
+    'asinh', 'acosh', 'atanh', 'acoth', 'asech', 'acsch',
+    're', 'im', 'arg', 'conjugate', 'factorial', 'binomial', 'gamma',
+    'Piecewise', 'And', 'Or', 'Not',
+    'StrictGreaterThan', 'StrictLessThan', 'GreaterThan', 'LessThan', 'Unequality',
+    'Derivative', 'Integral', 'Limit', 'Sum', 'Product', 'Tuple', 'UnevaluatedExpr',
+    'MutableDenseMatrix', 'ImmutableDenseMatrix',
+)}
+_EXPR_CLASSES['ExprCondPair'] = ExprCondPair
+_CONSTANTS = {name: getattr(sp, name) for name in ('pi', 'E', 'I', 'oo', 'zoo', 'nan', 'true', 'false')}
+_SYMBOL_ASSUMPTIONS = frozenset(('commutative', 'real', 'positive', 'negative', 'integer', 'nonnegative',
+                                 'nonpositive', 'nonzero', 'finite', 'complex', 'rational'))
+_FLOAT_LITERAL = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?|[+-]?inf|nan')
+
+
+def _reject(node):
+    raise ValueError(f"Unexpected {ast.dump(node)[:80]} in srepr")
+
+
+def _number(node):
+    """An int literal, possibly negated"""
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -_number(node.operand)
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return node.value
+    _reject(node)
+
+
+def _name(node):
+    """A string literal naming a Symbol or Function"""
+    if isinstance(node, ast.Constant) and type(node.value) is str:
+        return node.value
+    _reject(node)
+
+
+def _build_atom(func, node):
+    """Symbol / Function / Integer / Rational / Float: the calls that take literals"""
+    args, kwargs = node.args, {kw.arg: kw.value for kw in node.keywords}
+    if func == 'Symbol' and len(args) == 1 and set(kwargs) <= _SYMBOL_ASSUMPTIONS:
+        assumptions = {}
+        for key, value in kwargs.items():
+            if not (isinstance(value, ast.Constant) and type(value.value) is bool):
+                _reject(value)
+            assumptions[key] = value.value
+        return sp.Symbol(_name(args[0]), **assumptions)
+    if func == 'Function' and len(args) == 1 and not kwargs:
+        return sp.Function(_name(args[0]))
+    if func == 'Integer' and len(args) == 1 and not kwargs:
+        return sp.Integer(_number(args[0]))
+    if func == 'Rational' and len(args) == 2 and not kwargs:
+        return sp.Rational(_number(args[0]), _number(args[1]))
+    if func == 'Float' and len(args) == 1 and set(kwargs) <= {'precision'}:
+        literal = _name(args[0])
+        if not _FLOAT_LITERAL.fullmatch(literal):
+            _reject(args[0])
+        return sp.Float(literal, precision=_number(kwargs['precision'])) if kwargs else sp.Float(literal)
+    _reject(node)
+
+
+def _build(node):
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -_build(node.operand)
+    if isinstance(node, ast.Constant) and type(node.value) is int:
+        return sp.Integer(node.value)
+    if isinstance(node, ast.List):
+        return [_build(n) for n in node.elts]
+    if isinstance(node, ast.Name) and node.id in _CONSTANTS:
+        return _CONSTANTS[node.id]
+    if isinstance(node, ast.Call) and not node.keywords:
+        # Function('f')(Symbol('x')): an undefined function applied to its arguments
+        if isinstance(node.func, ast.Call) and _is_call_to(node.func, 'Function'):
+            return _build_atom('Function', node.func)(*[_build(n) for n in node.args])
+        if isinstance(node.func, ast.Name) and node.func.id in _EXPR_CLASSES:
+            return _EXPR_CLASSES[node.func.id](*[_build(n) for n in node.args])
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        return _build_atom(node.func.id, node)
+    _reject(node)
+
+
+def _is_call_to(node, name):
+    return isinstance(node.func, ast.Name) and node.func.id == name
+
+
+def expr_from_srepr(text):
+    """Inverse of sp.srepr for the expressions the parser produces; ValueError for anything else"""
+    return _build(ast.parse(text, mode='eval').body)
+
+
+def _probe_targets(expr):
+    """What final_eq probes on the expected side: the value, each side of an equation, each matrix element"""
+    if isinstance(expr, sp.Equality):
+        return [expr.lhs, expr.rhs]
+    if isinstance(expr, sp.MatrixBase):
+        return list(expr)
+    return [expr]
+
+
+def _value_to_json(value):
+    if value is None:
+        return None
+    value = mpmath.mpc(value)
+    return [str(value.real), str(value.imag)]
+
+
+def _value_from_json(pair):
+    return None if pair is None else mpmath.mpc(*pair)
+
+
+# Compile (create_problem export) / load (solver)
+
+def compile_answer_key(expected_latex, parser=None):
+    """Answer key dict for one step, or None if the expected answer doesn't parse"""
+    if parser is None:
+        from .check import _default_parser
+        parser = _default_parser()
+
+    expected_latex = expected_latex.strip()
+    parsed = parser.parse_latex(expected_latex)
+    if parsed is None:
+        return None
+    key = {
+        'version': ANSWER_KEY_VERSION,
+        'expected': expected_latex,
+        'structure': structure_to_json_serializable(extract_structure(parsed)),
+        'difficulty': problem_difficulty(parsed),
+    }
+
+    normalized = parser.normalize_expr(parsed)
+    srepr = sp.srepr(normalized)
+    try:
+        rebuilt = expr_from_srepr(srepr)
+    except Exception as e:
+        rebuilt = None
+        console.debug("🔑 srepr does not rebuild (%s): %s", e, srepr)
+    if rebuilt is None or type(rebuilt) is not type(normalized) or rebuilt != normalized:
+        console.warn("⚠️ Answer key for %s has no precompiled form, the solver will parse it", expected_latex)
+        return key
+
+    key['srepr'] = srepr
+    key['probes'] = []
+    with mpmath.workdps(NUMERIC_DPS):
+        for target in _probe_targets(normalized):
+            probe = probe_values(target)
+            if probe is not None:
+                key['probes'].append({
+                    'srepr': sp.srepr(target),
+                    'symbols': list(probe[0]),
+                    'values': [_value_to_json(v) for v in probe[1]],
+                })
+    return key
+
+
+def load_answer_key(data, expected_latex=None):
+    """
+    AnswerKey from a step's "answer_key" (dict or JSON string), or None if
+    there is none, it can't be used, or it was compiled from other LaTeX
+    than `expected_latex`.
+    """
+    if not data:
+        return None
+    try:
+        if isinstance(data, str):
+            data = json.loads(data)
+        if data.get('version') != ANSWER_KEY_VERSION or 'srepr' not in data:
+            return None
+        if expected_latex is not None and data.get('expected') != expected_latex.strip():
+            console.debug("🔑 Answer key is stale (expected answer edited after export)")
+            return None
+
+        expected = expr_from_srepr(data['srepr'])
+        probes = {}
+        with mpmath.workdps(NUMERIC_DPS):
+            for entry in data.get('probes', []):
+                target = expr_from_srepr(entry['srepr'])
+                probes[target] = (tuple(entry['symbols']), [_value_from_json(v) for v in entry['values']])
+        return AnswerKey(expected, probes, data.get('structure'), data.get('difficulty'))
+    except Exception as e:
+        console.warn("⚠️ Ignoring unreadable answer key: %s", e)
+        return None
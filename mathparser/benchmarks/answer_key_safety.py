@@ -0,0 +1,114 @@
+"""
+Answer Key Safety Check - Malicious Keys Never Run
+--------------------------------------------------
+Problem files are shared, and every solver page loads the "answer_key"
+of each step (mathparser.answer_key). This check feeds load_answer_key
+keys whose srepr tries to run Python through SymPy's string arguments
+(Poly("..."), Integral("..."), Symbol assumptions, Float literals, ...)
+and checks that:
+
+- each one is rejected (load_answer_key returns None); a payload as a
+  Symbol / Function *name* is fine, names are never evaluated
+- none of the payloads ran (they would set builtins.PWNED)
+- the keys compiled from answers.txt still load and rebuild exactly
+
+Exits with code 1 on any failure.
+
+Usage:
+    python mathparser/benchmarks/answer_key_safety.py
+"""
+
+import builtins
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from mathparser import MathParser, SubprocessChecker, load_answer_key
+from mathparser.answer_key import ANSWER_KEY_VERSION, expr_from_srepr
+from mathparser.check import TIMEOUT
+
+CORPUS_FILE = Path(__file__).resolve().parent / "answers.txt"
+
+PAYLOAD = "__import__('builtins').__setattr__('PWNED', True)"
+MALICIOUS_SREPRS = [
+    f'Poly("{PAYLOAD}")',
+    f'Integral("{PAYLOAD}")',
+    f'Add(Symbol(\'x\'), "{PAYLOAD}")',
+    f'Matrix("{PAYLOAD}")',
+    f'Symbol(\'x\', real="{PAYLOAD}")',
+    f'Float("{PAYLOAD}")',
+    f'Integer("{PAYLOAD}")',
+    f'Rational("{PAYLOAD}", 1)',
+    f'sympify("{PAYLOAD}")',
+    f'parse_expr("{PAYLOAD}")',
+    PAYLOAD,
+    "Symbol('x').__class__.__init__.__globals__",
+    "Lambda(Symbol('x'), Symbol('x'))",
+]
+# Payloads as names: these load (a symbol / function with an odd name), but must not run
+PAYLOAD_NAMES = [f'Symbol("{PAYLOAD}")', f'Function("{PAYLOAD}")(Symbol(\'x\'))']
+
+
+def malicious_keys():
+    for srepr in MALICIOUS_SREPRS:
+        yield srepr, {'version': ANSWER_KEY_VERSION, 'expected': 'x', 'srepr': srepr, 'probes': []}
+        # The same payload hidden in a probe of an otherwise valid key
+        yield f"probe {srepr}", {'version': ANSWER_KEY_VERSION, 'expected': 'x', 'srepr': "Symbol('x')",
+                                 'probes': [{'srepr': srepr, 'symbols': ['x'], 'values': [None]}]}
+
+
+def check_corpus():
+    """Keys compiled from answers.txt: (answers checked, failures)"""
+    answers = [line for line in CORPUS_FILE.read_text(encoding="utf-8").splitlines()
+               if line and not line.startswith("#")]
+    mp, failures, checked = MathParser(), [], 0
+    with SubprocessChecker(timeout=5.0) as checker:
+        for latex in answers:
+            if checker.check(latex, latex)['status'] == TIMEOUT:
+                continue  # Hangs SymPy, see check_time.py
+            key = mp.compile_answer_key(latex)
+            if not key or 'srepr' not in key:
+                continue
+            checked += 1
+            loaded = load_answer_key(key, latex)
+            if loaded is None or expr_from_srepr(key['srepr']) != loaded.expected:
+                failures.append(latex)
+    return checked, failures
+
+
+def main():
+    failed = False
+    print(f"{'='*60}")
+    print("🔐 Answer Key Safety Check")
+    print(f"{'='*60}")
+
+    keys = list(malicious_keys())
+    for name, key in keys:
+        if load_answer_key(key, 'x') is not None:
+            print(f"❌ Accepted: {name}")
+            failed = True
+    for srepr in PAYLOAD_NAMES:
+        load_answer_key({'version': ANSWER_KEY_VERSION, 'expected': 'x', 'srepr': srepr, 'probes': []}, 'x')
+    if getattr(builtins, 'PWNED', False):
+        print("❌ A payload ran while loading the keys")
+        failed = True
+    else:
+        print(f"✅ No payload ran ({len(keys)} malicious keys rejected, {len(PAYLOAD_NAMES)} payload names loaded)")
+
+    checked, failures = check_corpus()
+    for latex in failures:
+        print(f"❌ Compiled key does not load: {latex}")
+    if failures:
+        failed = True
+    else:
+        print(f"✅ {checked} compiled keys from {CORPUS_FILE.name} load and rebuild")
+
+    print(f"{'='*60}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
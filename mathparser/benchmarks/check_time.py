@@ -0,0 +1,130 @@
+"""
+Answer Check Benchmark - Debug Trace vs Level-Gated Logging
+-----------------------------------------------------------
+Times full answer checks (check_answer: parse both sides, normalize,
+final_eq) over pairs built from answers.txt, once per logging setup:
+
+- debug: level DEBUG into a console backend, i.e. what the pages did
+  before logging was level-gated (every trace message and srepr formatted)
+- default: level WARNING into the same backend, what the pages do now
+- silent: no backend at all (batch grading)
+
+Caches are off so every check does the full work. Pairs that can't be
+checked within the time budget (see mathparser.check) are screened out
+first in a subprocess and listed.
+
+Usage:
+    python mathparser/benchmarks/check_time.py
+    python mathparser/benchmarks/check_time.py --repeat 5 --pairs 200
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from mathparser import DEBUG, WARNING, MathParser, SubprocessChecker, check_answer, set_logger
+from mathparser.check import TIMEOUT
+
+CORPUS_FILE = Path(__file__).resolve().parent / "answers.txt"
+
+
+class CountingConsole:
+    """Stands in for window.console: receives the formatted messages and drops them"""
+
+    def __init__(self):
+        self.messages = 0
+
+    def log(self, *args):
+        self.messages += 1
+
+    warn = error = log
+
+
+def load_pairs(count: int):
+    answers = [line for line in CORPUS_FILE.read_text(encoding="utf-8").splitlines()
+               if line and not line.startswith("#")]
+    rng = random.Random(0)
+    pairs = [(a, a) for a in answers]
+    pairs += [tuple(rng.sample(answers, 2)) for _ in range(len(answers))]
+    return pairs[:count] if count else pairs
+
+
+def screen(pairs, timeout: float):
+    """Drop pairs that hang SymPy (a hard kill in a subprocess keeps this run alive)"""
+    kept, dropped = [], []
+    with SubprocessChecker(timeout=timeout) as checker:
+        for expected, answer in pairs:
+            if checker.check(expected, answer)['status'] == TIMEOUT:
+                dropped.append((expected, answer))
+            else:
+                kept.append((expected, answer))
+    return kept, dropped
+
+
+def time_checks(pairs, backend, level, repeat: int) -> dict:
+    set_logger(backend, level=level)
+    per_check = []
+    for expected, answer in pairs:
+        best = None
+        for _ in range(repeat):
+            parser = MathParser(cache_size=0)
+            start = time.perf_counter()
+            check_answer(expected, answer, timeout=None, parser=parser)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        per_check.append(best)
+    set_logger(None, level=WARNING)
+
+    per_check.sort()
+    return {
+        'total_ms': sum(per_check),
+        'mean_ms': statistics.mean(per_check),
+        'p50_ms': per_check[len(per_check) // 2],
+        'p95_ms': per_check[int(len(per_check) * 0.95)],
+        'messages': getattr(backend, 'messages', 0) / (len(pairs) * repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-check time with and without the debug trace")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Checks per pair, best time is kept (default: 3)")
+    parser.add_argument("--pairs", type=int, default=0,
+                        help="Only the first N pairs (default: all)")
+    parser.add_argument("--timeout", type=float, default=5.0,
+                        help="Budget per check when screening pairs (default: 5s)")
+    args = parser.parse_args()
+
+    pairs, dropped = screen(load_pairs(args.pairs), args.timeout)
+
+    setups = {
+        'debug': (CountingConsole(), DEBUG),
+        'default': (CountingConsole(), WARNING),
+        'silent': (None, WARNING),
+    }
+    results = {name: time_checks(pairs, backend, level, args.repeat)
+               for name, (backend, level) in setups.items()}
+
+    print(f"{'='*60}")
+    print(f"📊 Answer Check Benchmark ({len(pairs)} pairs, best of {args.repeat})")
+    print(f"{'='*60}")
+    for expected, answer in dropped:
+        print(f"  ⏱ Skipped (could not verify in {args.timeout:.0f}s): {expected}  vs  {answer}")
+    for name, r in results.items():
+        print(f"\n{name}:")
+        print(f"  Per check: mean {r['mean_ms']:.2f}ms, p50 {r['p50_ms']:.2f}ms, p95 {r['p95_ms']:.2f}ms")
+        print(f"  Total: {r['total_ms']:.0f}ms, {r['messages']:.1f} log messages per check")
+
+    debug, default = results['debug'], results['default']
+    print(f"\nSpeedup (debug -> default): {debug['total_ms'] / default['total_ms']:.2f}x")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
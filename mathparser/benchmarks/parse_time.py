@@ -0,0 +1,126 @@
+"""
+Parse Benchmark - Earley vs Prebuilt LALR
+-----------------------------------------
+Times the LaTeX grammar on a corpus of student answers (answers.txt,
+preprocessed the way MathParser.parse_latex does it) with:
+
+- earley: the grammar as it was before the LALR switch
+  (earley_grammar.lark), built at startup with Lark(parser="earley") as
+  the pages used to (needs lark installed)
+- lalr: the standalone parser generated by embed_mathparser.py from the
+  current grammar
+
+Reports parser construction time and per-answer parse time (parse only,
+the SymPy transform is the same for both). Fails (exit code 1) when the
+prebuilt parser is slower to construct or to parse, or rejects an answer
+that Earley accepts.
+
+Usage:
+    python mathparser/benchmarks/parse_time.py
+    python mathparser/benchmarks/parse_time.py --repeat 20
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from mathparser import MathParser
+from mathparser._lalr_parser import Lark_StandAlone
+
+BENCH_DIR = Path(__file__).resolve().parent
+CORPUS_FILE = BENCH_DIR / "answers.txt"
+EARLEY_GRAMMAR_FILE = BENCH_DIR / "earley_grammar.lark"
+
+
+def load_corpus(mp: MathParser):
+    """Preprocessed answers, as the grammar sees them."""
+    answers = []
+    for line in CORPUS_FILE.read_text(encoding="utf-8").splitlines():
+        if line and not line.startswith("#"):
+            fixed, _ = mp.auto_fix_common_errors(line)
+            answers.append(mp.prepare_latex(fixed))
+    return answers
+
+
+def time_parser(build, answers, repeat: int) -> dict:
+    start = time.perf_counter()
+    parser = build()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    per_answer, accepted = [], set()
+    for i, text in enumerate(answers):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                parser.parse(text)
+                accepted.add(i)
+            except Exception:
+                pass
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        per_answer.append(best)
+
+    per_answer.sort()
+    return {
+        'build_ms': build_ms,
+        'total_ms': sum(per_answer),
+        'mean_ms': statistics.mean(per_answer),
+        'p50_ms': per_answer[len(per_answer) // 2],
+        'p95_ms': per_answer[int(len(per_answer) * 0.95)],
+        'max_ms': per_answer[-1],
+        'accepted': accepted,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Earley vs prebuilt LALR parse benchmark")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Parses per answer, best time is kept (default: 5)")
+    args = parser.parse_args()
+
+    answers = load_corpus(MathParser())
+    builders = {'lalr': Lark_StandAlone}
+    try:
+        from lark import Lark
+        earley_grammar = EARLEY_GRAMMAR_FILE.read_text(encoding="utf-8")
+        builders = {'earley': lambda: Lark(earley_grammar, parser="earley", start="start"), **builders}
+    except ImportError:
+        print("⚠️ lark is not installed, timing the prebuilt parser only")
+
+    results = {name: time_parser(build, answers, args.repeat) for name, build in builders.items()}
+
+    print(f"{'='*60}")
+    print(f"🧮 Parse Benchmark ({len(answers)} student answers, best of {args.repeat})")
+    print(f"{'='*60}")
+    for name, r in results.items():
+        print(f"\n{name}:")
+        print(f"  Construction: {r['build_ms']:.1f}ms")
+        print(f"  Parse: total {r['total_ms']:.1f}ms, mean {r['mean_ms']:.3f}ms, "
+              f"p50 {r['p50_ms']:.3f}ms, p95 {r['p95_ms']:.3f}ms, max {r['max_ms']:.3f}ms")
+        print(f"  Accepted: {len(r['accepted'])}/{len(answers)}")
+
+    ok = True
+    if 'earley' in results:
+        earley, lalr = results['earley'], results['lalr']
+        rejected = sorted(earley['accepted'] - lalr['accepted'])
+        for i in rejected:
+            print(f"  ❌ Rejected by LALR, accepted by Earley: {answers[i]}")
+        print(f"\nSpeedup: construction {earley['build_ms'] / lalr['build_ms']:.0f}x, "
+              f"parse {earley['total_ms'] / lalr['total_ms']:.1f}x")
+        ok = (not rejected and lalr['build_ms'] <= earley['build_ms']
+              and lalr['total_ms'] <= earley['total_ms'])
+
+    print(f"\n{'='*60}")
+    print("✅ Prebuilt LALR parser is faster" if ok else "❌ LALR regression")
+    print(f"{'='*60}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
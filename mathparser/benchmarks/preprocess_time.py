@@ -0,0 +1,135 @@
+"""
+Preprocessing Benchmark - Pinned Outputs and Per-Answer Cost
+------------------------------------------------------------
+Runs the LaTeX preprocessing stages (mathparser.preprocess) over
+answers.txt plus preprocess_inputs.txt, which exercises every rewrite
+rule, and:
+
+- checks each stage's output against preprocess_pinned.json (exit
+  code 1 on any difference), so a faster pipeline provably rewrites
+  the same way
+- reports the time per answer of each stage and of the whole chain
+  parse_latex runs before the grammar (auto_fix_common_errors +
+  prepare_latex)
+
+preprocess_pinned.json is regenerated with --pin; only do that when a
+rewrite is meant to change.
+
+Usage:
+    python mathparser/benchmarks/preprocess_time.py
+    python mathparser/benchmarks/preprocess_time.py --repeat 50
+    python mathparser/benchmarks/preprocess_time.py --pin
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from mathparser import MathParser
+from mathparser import preprocess
+
+BENCH_DIR = Path(__file__).resolve().parent
+CORPUS_FILES = [BENCH_DIR / "answers.txt", BENCH_DIR / "preprocess_inputs.txt"]
+PINNED_FILE = BENCH_DIR / "preprocess_pinned.json"
+
+
+def load_inputs():
+    inputs = []
+    for path in CORPUS_FILES:
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line and not line.startswith("#") and line not in inputs:
+                inputs.append(line)
+    return inputs
+
+
+def full_chain(mp: MathParser, latex: str) -> str:
+    """The string parse_latex hands to the grammar"""
+    fixed, _ = mp.auto_fix_common_errors(latex)
+    return mp.prepare_latex(fixed)
+
+
+def stages(mp: MathParser):
+    return {
+        'auto_fix_common_errors': lambda s: list(preprocess.auto_fix_common_errors(s)),
+        'clean_latex': preprocess.clean_latex,
+        'preprocess_derivatives': preprocess.preprocess_derivatives,
+        'expression_has_matrix_operations': preprocess.expression_has_matrix_operations,
+        'preprocess_row_operations': preprocess.preprocess_row_operations,
+        'full_chain': lambda s: full_chain(mp, s),
+    }
+
+
+def outputs(mp: MathParser, inputs):
+    return {latex: {name: stage(latex) for name, stage in stages(mp).items()} for latex in inputs}
+
+
+def mismatches(current, pinned):
+    for latex, expected in pinned.items():
+        got = current.get(latex)
+        for name, value in expected.items():
+            if got is None or got[name] != value:
+                yield latex, name, value, None if got is None else got[name]
+
+
+def time_stage(stage, inputs, repeat: int) -> dict:
+    per_answer = []
+    for latex in inputs:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            stage(latex)
+            elapsed = (time.perf_counter() - start) * 1e6
+            best = elapsed if best is None else min(best, elapsed)
+        per_answer.append(best)
+    return {
+        'total_us': sum(per_answer),
+        'mean_us': statistics.mean(per_answer),
+        'p95_us': sorted(per_answer)[int(len(per_answer) * 0.95)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocessing outputs vs the pinned corpus, and time per answer")
+    parser.add_argument("--repeat", type=int, default=20,
+                        help="Runs per answer and stage, best time is kept (default: 20)")
+    parser.add_argument("--pin", action="store_true",
+                        help=f"Rewrite {PINNED_FILE.name} from the current outputs")
+    args = parser.parse_args()
+
+    mp = MathParser(cache_size=0)
+    inputs = load_inputs()
+    current = outputs(mp, inputs)
+
+    if args.pin:
+        PINNED_FILE.write_text(json.dumps(current, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"📌 Pinned {len(current)} inputs to {PINNED_FILE.name}")
+        return
+
+    pinned = json.loads(PINNED_FILE.read_text(encoding="utf-8"))
+    diffs = list(mismatches(current, pinned))
+
+    print(f"{'='*60}")
+    print(f"📊 Preprocessing Benchmark ({len(inputs)} inputs, best of {args.repeat})")
+    print(f"{'='*60}")
+    for name, stage in stages(mp).items():
+        r = time_stage(stage, inputs, args.repeat)
+        print(f"\n{name}:")
+        print(f"  Per answer: mean {r['mean_us']:.1f}µs, p95 {r['p95_us']:.1f}µs (total {r['total_us'] / 1000:.2f}ms)")
+
+    print(f"\n{'='*60}")
+    if diffs:
+        for latex, name, expected, got in diffs[:20]:
+            print(f"❌ {name}({latex!r}): pinned {expected!r}, got {got!r}")
+        print(f"❌ {len(diffs)} output(s) differ from {PINNED_FILE.name}")
+        sys.exit(1)
+    print(f"✅ All outputs match {PINNED_FILE.name} ({len(pinned)} inputs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Answer checks in a Web Worker
+-----------------------------
+Pyodide runs the page's Python on the main thread, so a runaway
+simplify() froze the whole page. WorkerChecker runs check_answer()
+(mathparser.check) in a Web Worker with its own Pyodide instead:
+
+- the worker is created from a Blob (no extra file to deploy), loads
+  Pyodide + sympy and receives this package's sources from the page
+- each check gets `timeout` seconds from the moment the worker starts
+  it; past that (plus a grace period) the worker is terminated and a
+  fresh one is started in the background, and the check resolves to
+  a 'timeout' outcome ("could not verify in time")
+- if workers are unavailable or the worker fails to start, checks run
+  in the page as before, still bounded by the cooperative Deadline
+
+Only importable in Pyodide (uses js / pyodide.ffi).
+
+Usage (in the page):
+    checker = WorkerChecker()             # Starts loading the worker
+    result = await checker.check(expected_latex, answer_latex)
+    result["status"]                      # 'correct', 'timeout', ...
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from .check import DEFAULT_CHECK_TIMEOUT, TIMEOUT, TIMEOUT_MESSAGE, check_answer, outcome
+from .log import console
+
+PYODIDE_INDEX_URL = 'https://cdn.jsdelivr.net/pyodide/v0.24.1/full/'
+WORKER_START_TIMEOUT = 120.0  # Seconds to load Pyodide + sympy in the worker
+
+WORKER_JS = r"""
+let ready = null;
+
+self.onmessage = async (event) => {
+  const msg = event.data;
+  if (msg.type === 'init') {
+    ready = (async () => {
+      importScripts(msg.indexURL + 'pyodide.js');
+      const pyodide = await loadPyodide({ indexURL: msg.indexURL });
+      await pyodide.loadPackage(['sympy']);
+      pyodide.FS.mkdirTree('/mathparser_worker/mathparser');
+      for (const [name, source] of Object.entries(msg.sources)) {
+        pyodide.FS.writeFile('/mathparser_worker/mathparser/' + name, source);
+      }
+      pyodide.runPython(
+        "import sys\n" +
+        "sys.path.insert(0, '/mathparser_worker')\n" +
+        "from mathparser.check import check_answer, _default_parser\n" +
+        "_default_parser()\n"
+      );
+      return pyodide.globals.get('check_answer');
+    })();
+    ready.then(
+      () => self.postMessage({ type: 'ready' }),
+      (err) => self.postMessage({ type: 'failed', error: String(err) })
+    );
+    return;
+  }
+  if (msg.type === 'check') {
+    const checkAnswer = await ready;
+    self.postMessage({ type: 'started', id: msg.id });
+    let result;
+    try {
+      const proxy = checkAnswer(msg.expected, msg.answer, msg.timeout, null, msg.answerKey);
+      result = proxy.toJs({ dict_converter: Object.fromEntries });
+      proxy.destroy();
+    } catch (err) {
+      result = { status: 'error', correct: false, stage: 'worker', message: String(err),
+                 corrected_latex: null, elapsed_ms: 0 };
+    }
+    self.postMessage({ type: 'result', id: msg.id, result: result });
+  }
+};
+"""
+
+
+def package_sources():
+    """This package's .py files as {name: source}, for the worker's file system"""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    sources = {}
+    for name in sorted(os.listdir(package_dir)):
+        if name.endswith('.py'):
+            with open(os.path.join(package_dir, name), encoding='utf-8') as f:
+                sources[name] = f.read()
+    return sources
+
+
+class WorkerChecker:
+    """check_answer() in a Web Worker, terminated when a check overruns"""
+
+    def __init__(self, timeout=DEFAULT_CHECK_TIMEOUT, grace=1.0, index_url=PYODIDE_INDEX_URL, parser=None):
+        self.timeout = timeout
+        self.grace = grace
+        self.index_url = index_url
+        self.parser = parser  # Used for in-page checks when the worker is unavailable
+        self._worker = None
+        self._ready = None
+        self._pending = {}  # id -> {'started': Future, 'done': Future}
+        self._next_id = 0
+        self._handlers = None
+        self._unavailable = False  # Workers unsupported or the worker never started
+        self._spawn()
+
+    # Worker lifecycle
+
+    def _spawn(self):
+        loop = asyncio.get_event_loop()
+        self._ready = loop.create_future()
+        try:
+            from js import Blob, Object, URL, Worker
+            from pyodide.ffi import create_proxy, to_js
+
+            blob = Blob.new(to_js([WORKER_JS]), to_js({'type': 'application/javascript'},
+                                                      dict_converter=Object.fromEntries))
+            self._worker = Worker.new(URL.createObjectURL(blob))
+            if self._handlers is None:
+                self._handlers = (create_proxy(self._on_message), create_proxy(self._on_error))
+            self._worker.onmessage, self._worker.onerror = self._handlers
+            self._worker.postMessage(to_js(
+                {'type': 'init', 'indexURL': self.index_url, 'sources': package_sources()},
+                dict_converter=Object.fromEntries,
+            ))
+            console.info("🧵 Answer check worker starting...")
+        except Exception as e:
+            console.warn("⚠️ Answer check worker unavailable, checking in the page: %s", e)
+            self._worker = None
+            self._unavailable = True
+            self._ready.set_result(False)
+
+    def _terminate(self):
+        if self._worker is not None:
+            self._worker.terminate()
+            self._worker = None
+        # Checks still queued on this worker get None and are resent to the next one
+        for futures in self._pending.values():
+            for future in futures.values():
+                if not future.done():
+                    future.set_result(None)
+        self._pending.clear()
+
+    def _on_message(self, event):
+        msg = event.data.to_py() if hasattr(event.data, 'to_py') else event.data
+        kind = msg.get('type')
+        if kind == 'ready':
+            console.info("✅ Answer check worker ready")
+            if not self._ready.done():
+                self._ready.set_result(True)
+        elif kind == 'failed':
+            console.warn("⚠️ Answer check worker failed to start, checking in the page: %s", msg.get('error'))
+            self._unavailable = True
+            self._terminate()
+            if not self._ready.done():
+                self._ready.set_result(False)
+        elif kind in ('started', 'result'):
+            futures = self._pending.get(msg.get('id'))
+            if futures is None:
+                return  # Check already given up on
+            if kind == 'started':
+                futures['started'].set_result(True)
+            elif not futures['done'].done():
+                futures['done'].set_result(msg.get('result'))
+
+    def _on_error(self, event):
+        console.warn("⚠️ Answer check worker error: %s", getattr(event, 'message', event))
+        if not self._ready.done():
+            self._unavailable = True
+            self._ready.set_result(False)
+        self._terminate()  # Queued checks are resent to a fresh worker
+
+    async def _worker_ready(self):
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._ready), WORKER_START_TIMEOUT)
+        except asyncio.TimeoutError:
+            console.warn("⚠️ Answer check worker is taking too long to start, checking in the page")
+            self._unavailable = True
+            self._terminate()
+            return False
+
+    # Checks
+
+    async def check(self, expected_latex, answer_latex, answer_key=None):
+        """Outcome dict (see mathparser.check) for one answer; answer_key: the step's precompiled key"""
+        if not self._unavailable and self._worker is None:
+            self._spawn()  # Replace a worker terminated by an earlier timeout
+        if self._unavailable or not await self._worker_ready():
+            return check_answer(expected_latex, answer_latex, self.timeout, self.parser, answer_key)
+
+        loop = asyncio.get_event_loop()
+        check_id = self._next_id
+        self._next_id += 1
+        futures = {'started': loop.create_future(), 'done': loop.create_future()}
+        self._pending[check_id] = futures
+
+        from js import Object
+        from pyodide.ffi import to_js
+        self._worker.postMessage(to_js(
+            {'type': 'check', 'id': check_id, 'expected': expected_latex,
+             'answer': answer_latex, 'timeout': self.timeout,
+             'answerKey': json.dumps(answer_key) if answer_key else None},
+            dict_converter=Object.fromEntries,
+        ))
+
+        try:
+            # The clock starts when the worker picks the check up, not while it waits in line
+            started = await futures['started']
+            if started is None:
+                return await self.check(expected_latex, answer_latex, answer_key)
+            start = time.perf_counter()
+            limit = None if self.timeout is None else self.timeout + self.grace
+            result = await asyncio.wait_for(futures['done'], limit)
+            if result is None:
+                return await self.check(expected_latex, answer_latex, answer_key)
+            return result
+        except asyncio.TimeoutError:
+            elapsed = (time.perf_counter() - start) * 1000
+            console.warn("⏱ %s: terminating the answer check worker", TIMEOUT_MESSAGE)
+            self._terminate()
+            self._spawn()
+            return outcome(TIMEOUT, 'killed', TIMEOUT_MESSAGE, None, elapsed)
+        finally:
+            self._pending.pop(check_id, None)
+
+    def close(self):
+        self._terminate()
@@ -0,0 +1,78 @@
+"""
+Answer check caches
+-------------------
+Bounded LRU caches for MathParser, so re-checking an unchanged answer
+(re-scoring, edits elsewhere in the problem) skips the SymPy work:
+
+- parse: prepared LaTeX (after auto-fix and preprocessing) -> SymPy value
+- normalize: srepr -> normalize_expr result
+- final_eq: (srepr, srepr) -> verdict
+
+SymPy expressions are immutable and shared as-is. Matrices are not, so
+they are stored and handed out as copies (keeping the row-operation
+metadata that extract_structure reads).
+"""
+
+import copy
+from collections import OrderedDict
+
+import sympy as sp
+
+DEFAULT_CACHE_SIZE = 512
+
+
+class LRUCache:
+    """Least-recently-used mapping with hit/miss counters; maxsize 0 disables it."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        """Cached value or None."""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0 or value is None:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+def detached(value):
+    """`value`, or a copy of it if it is a mutable matrix."""
+    if isinstance(value, sp.MutableDenseMatrix):
+        clone = value.copy()
+        metadata = getattr(value, '_matrix_op_metadata', None)
+        if metadata is not None:
+            clone._matrix_op_metadata = copy.deepcopy(metadata)
+        return clone
+    return value
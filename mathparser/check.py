@@ -0,0 +1,198 @@
+"""
+Time-boxed answer checks
+------------------------
+check_answer() runs one whole check (parse both sides, normalize,
+final_eq) under a Deadline and returns a plain dict, so the result can
+cross a process or Web Worker boundary:
+
+    {'status': 'correct' | 'incorrect' | 'unparseable' | 'timeout' | 'error',
+     'correct': bool, 'stage': str, 'message': str,
+     'corrected_latex': str | None, 'elapsed_ms': float}
+
+'timeout' means "could not verify in time". It is not a wrong answer.
+
+With the step's precompiled answer key (mathparser.answer_key) the
+expected side is loaded instead of parsed and normalized.
+
+A pathological answer can keep a single SymPy call busy for minutes, and
+the Deadline can't stop that, so the check runs somewhere it can be
+killed:
+
+- CPython (batch grading): SubprocessChecker runs checks in a child
+  process and kills it past the budget
+- Browser: mathparser.browser.WorkerChecker runs them in a Web Worker
+  and terminates it past the budget
+
+Usage:
+    checker = SubprocessChecker(timeout=10)
+    checker.check(r"\\frac{1}{2}x", r"0.5x")["status"]    # 'correct'
+    checker.close()
+"""
+
+import time
+import traceback
+
+from .deadline import CheckTimeout, Deadline
+from .log import console, lazy
+
+DEFAULT_CHECK_TIMEOUT = 10.0  # Seconds per answer check
+
+# Outcomes
+CORRECT = 'correct'
+INCORRECT = 'incorrect'
+UNPARSEABLE = 'unparseable'
+TIMEOUT = 'timeout'
+ERROR = 'error'
+
+TIMEOUT_MESSAGE = "Could not verify the answer in time"
+
+_parser = None
+
+
+def _default_parser():
+    """One MathParser per process, so its caches carry over between checks"""
+    global _parser
+    if _parser is None:
+        from .parser import MathParser
+        _parser = MathParser()
+    return _parser
+
+
+def outcome(status, stage='', message='', corrected_latex=None, elapsed_ms=0.0):
+    return {
+        'status': status,
+        'correct': status == CORRECT,
+        'stage': stage,
+        'message': message,
+        'corrected_latex': corrected_latex,
+        'elapsed_ms': round(elapsed_ms, 3),
+    }
+
+
+def check_answer(expected_latex, answer_latex, timeout=DEFAULT_CHECK_TIMEOUT, parser=None, answer_key=None):
+    """
+    Check `answer_latex` against `expected_latex` within `timeout` seconds
+    (None: no limit). answer_key: the step's "answer_key" (dict or JSON).
+    """
+    parser = parser or _default_parser()
+    budget = Deadline(timeout)
+    start = time.perf_counter()
+    stage = 'parse'
+    corrected = None
+
+    def elapsed():
+        return (time.perf_counter() - start) * 1000
+
+    try:
+        answer = parser.parse_latex(answer_latex)
+        corrected = parser.last_corrected_latex
+        if answer is None:
+            return outcome(UNPARSEABLE, 'answer', "Could not parse the answer", corrected, elapsed())
+        key = parser.load_answer_key(answer_key, expected_latex) if answer_key else None
+        if key is None:
+            expected = parser.parse_latex(expected_latex)
+            if expected is None:
+                return outcome(UNPARSEABLE, 'expected', "Could not parse the expected answer", corrected, elapsed())
+        budget.check(stage)
+
+        stage = 'normalize'
+        answer_normalized = parser.normalize_expr(answer)
+        budget.check(stage)
+        expected_normalized = key.expected if key else parser.normalize_expr(expected)
+        budget.check(stage)
+
+        stage = 'final_eq'
+        is_correct = parser.final_eq(answer_normalized, expected_normalized, budget=budget,
+                                     probes=key.probes if key else None)
+        return outcome(CORRECT if is_correct else INCORRECT, stage, '', corrected, elapsed())
+
+    except CheckTimeout as e:
+        console.warn("⏱ %s (%s, %.0fms)", TIMEOUT_MESSAGE, e.stage, elapsed())
+        return outcome(TIMEOUT, e.stage, TIMEOUT_MESSAGE, corrected, elapsed())
+    except Exception as e:
+        console.error("❌ Answer check failed in %s: %s", stage, e)
+        console.error("%s", lazy(traceback.format_exc))
+        return outcome(ERROR, stage, str(e), corrected, elapsed())
+
+
+def _serve(conn):
+    """Child process loop: (expected, answer, timeout, answer_key) in, outcome dict out"""
+    _default_parser()
+    conn.send('ready')
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        expected_latex, answer_latex, timeout, answer_key = request
+        conn.send(check_answer(expected_latex, answer_latex, timeout, answer_key=answer_key))
+
+
+class SubprocessChecker:
+    """
+    check_answer in a long-lived child process with a hard time limit.
+
+    The child checks the budget itself (Deadline) and reports 'timeout';
+    if it is still busy `grace` seconds after the budget, it is killed
+    and a fresh one is started on the next check.
+    """
+
+    def __init__(self, timeout=DEFAULT_CHECK_TIMEOUT, grace=1.0):
+        self.timeout = timeout
+        self.grace = grace
+        self._process = None
+        self._conn = None
+
+    def _start(self):
+        import multiprocessing
+
+        parent_conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_serve, args=(child_conn,), daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self._conn.recv()  # 'ready': imports and parser setup don't count against a check
+
+    def _kill(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.join()
+        if self._conn is not None:
+            self._conn.close()
+        self._process = self._conn = None
+
+    def check(self, expected_latex, answer_latex, answer_key=None):
+        if self._process is None or not self._process.is_alive():
+            self._start()
+        start = time.perf_counter()
+        self._conn.send((expected_latex, answer_latex, self.timeout, answer_key))
+        limit = None if self.timeout is None else self.timeout + self.grace
+        if self._conn.poll(limit):
+            try:
+                return self._conn.recv()
+            except EOFError:
+                # The child died (e.g. out of memory)
+                self._kill()
+                elapsed = (time.perf_counter() - start) * 1000
+                return outcome(ERROR, 'process', "Answer check process exited", None, elapsed)
+        self._kill()
+        elapsed = (time.perf_counter() - start) * 1000
+        return outcome(TIMEOUT, 'killed', TIMEOUT_MESSAGE, None, elapsed)
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        if self._process is not None:
+            self._process.join(timeout=1)
+        self._kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,43 @@
+"""
+Per-check time budget
+---------------------
+A Deadline is handed down through an answer check (see mathparser.check)
+and tested between stages: parse, normalize, each final_eq tier and
+strategy. Running out raises CheckTimeout, which callers report as
+"could not verify in time" rather than as a wrong answer.
+
+This is the cooperative half of cancellation: a single SymPy call is
+never interrupted. The hard half is the process or Web Worker that runs
+the check, which is killed when it overruns (see mathparser.check and
+mathparser.browser).
+"""
+
+import time
+
+
+class CheckTimeout(Exception):
+    """The check ran out of time in `stage`."""
+
+    def __init__(self, stage):
+        super().__init__(f"Could not verify in time (stage: {stage})")
+        self.stage = stage
+
+
+class Deadline:
+    """Wall-clock budget in seconds; None means unlimited."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = None if seconds is None else time.perf_counter() + seconds
+
+    def remaining(self):
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.perf_counter())
+
+    def expired(self):
+        return self.expires is not None and time.perf_counter() > self.expires
+
+    def check(self, stage):
+        if self.expired():
+            raise CheckTimeout(stage)
@@ -0,0 +1,146 @@
+"""
+Problem difficulty
+------------------
+problem_difficulty() rates a parsed expression 1-5 from the operations
+it contains (calculus, advanced functions, powers) and how many and how
+deeply nested they are. solve_problem.html prices freestyle problems in
+credits with it, and create_problem.html stores it in each step's
+precompiled answer key (mathparser.answer_key).
+"""
+
+import sympy as sp
+
+from .log import console
+
+TRIG_FUNCTIONS = ('sin', 'cos', 'tan', 'cot', 'sec', 'csc',
+                  'asin', 'acos', 'atan', 'acot', 'asec', 'acsc', 'atan2')
+HYPERBOLIC_FUNCTIONS = ('sinh', 'cosh', 'tanh', 'coth', 'sech', 'csch',
+                        'asinh', 'acosh', 'atanh', 'acoth', 'asech', 'acsch')
+
+
+def count_operations(expr):
+    """Count different types of operations"""
+    counts = {
+        'Add': 0, 'Mul': 0, 'Pow': 0, 'Sqrt': 0,
+        'Log': 0, 'Exp': 0, 'Trig': 0, 'Hyperbolic': 0,
+        'Derivative': 0, 'Integral': 0, 'Limit': 0,
+        'Abs': 0, 'Factorial': 0, 'Complex': 0,
+        'Total': 0
+    }
+
+    def count(kind):
+        counts[kind] += 1
+        counts['Total'] += 1
+
+    def traverse(e):
+        class_name = type(e).__name__
+
+        if isinstance(e, sp.Add):
+            count('Add')
+        elif isinstance(e, sp.Mul):
+            count('Mul')
+        elif isinstance(e, sp.Pow):
+            count('Pow')
+        elif class_name == 'sqrt':
+            count('Sqrt')
+        elif class_name in ('log', 'ln'):
+            count('Log')
+        elif class_name == 'exp':
+            count('Exp')
+        elif class_name in TRIG_FUNCTIONS:
+            count('Trig')
+        elif class_name in HYPERBOLIC_FUNCTIONS:
+            count('Hyperbolic')
+        elif isinstance(e, sp.Derivative):
+            count('Derivative')
+        elif isinstance(e, sp.Integral):
+            count('Integral')
+        elif isinstance(e, sp.Limit):
+            count('Limit')
+        elif isinstance(e, sp.Abs):
+            count('Abs')
+        elif class_name in ('factorial', 'factorial2', 'binomial'):
+            count('Factorial')
+        elif class_name in ('re', 'im', 'conjugate', 'arg'):
+            count('Complex')
+
+        if hasattr(e, 'args'):
+            for arg in e.args:
+                traverse(arg)
+
+    traverse(expr)
+    return counts
+
+
+def expr_depth(expr):
+    """Calculate the nesting depth of an expression"""
+    if not hasattr(expr, 'args') or not expr.args:
+        return 1
+    return 1 + max(expr_depth(arg) for arg in expr.args)
+
+
+def problem_difficulty(parsed_expr):
+    """Calculate problem difficulty (1-5) based on expression complexity"""
+    try:
+        difficulty = 1  # Base difficulty
+        ops = count_operations(parsed_expr)
+
+        # Calculus operations - highest difficulty boost
+        if ops['Limit'] > 0:
+            difficulty += 4  # Limits are very difficult
+        elif ops['Integral'] > 0:
+            difficulty += 3  # Integrals are difficult
+        elif ops['Derivative'] > 0:
+            difficulty += 2  # Derivatives are moderately difficult
+
+        # Advanced functions - significant difficulty
+        if ops['Hyperbolic'] > 0:
+            difficulty += 2  # Hyperbolic functions are advanced
+        if ops['Complex'] > 0:
+            difficulty += 2  # Complex operations are advanced
+
+        # Standard functions - moderate difficulty
+        if ops['Trig'] > 0:
+            difficulty += 1  # Trigonometric functions
+        if ops['Log'] > 0:
+            difficulty += 1  # Logarithms
+        if ops['Exp'] > 0:
+            difficulty += 1  # Exponentials
+
+        # Special operations
+        if ops['Factorial'] > 0:
+            difficulty += 1  # Factorials
+        if ops['Abs'] > 0:
+            difficulty += 1  # Absolute values
+
+        # Powers and roots
+        if ops['Pow'] > 2:  # More than 2 powers
+            difficulty += 1
+        if ops['Sqrt'] > 0:
+            difficulty += 1
+
+        # Total operation count matters
+        total_ops = ops['Total']
+        if total_ops > 10:
+            difficulty += 2
+        elif total_ops > 3:
+            difficulty += 1
+
+        # Expression depth/nesting
+        depth = expr_depth(parsed_expr)
+        if depth > 6:
+            difficulty += 2
+        elif depth > 2:
+            difficulty += 1
+
+        # Between 1 and 5
+        difficulty = max(min(difficulty, 5), 1)
+
+        console.debug("Difficulty calculation: %s (Total ops: %s, Depth: %s)", difficulty, total_ops, depth)
+        console.debug("Operation breakdown: Limit=%s, Integral=%s, Derivative=%s, Trig=%s, Log=%s, Exp=%s",
+                      ops['Limit'], ops['Integral'], ops['Derivative'], ops['Trig'], ops['Log'], ops['Exp'])
+        return difficulty
+
+    except Exception as e:
+        console.error("Error calculating difficulty: %s", e)
+        return 2  # Default to medium difficulty
@@ -0,0 +1,656 @@
+"""
+Answer equivalence
+------------------
+- normalize_expr: doit() + simplify, with a numeric sanity check that
+  falls back to the unsimplified form if simplify changed the value
+- final_eq: mathematical equality of scalars, equations and matrices in
+  three tiers: structural equality, seeded numeric probes (lambdify)
+  that reject non-equivalent answers without simplify, then the
+  symbolic simplify strategies; each tier has a time budget
+  (TIER_TIMEOUTS) and StrategyTimings shows where the time goes; an
+  optional Deadline caps the whole comparison (mathparser.deadline);
+  running out of time raises CheckTimeout, it never means "not equal"
+- structural_match: same form, not just same value (strict / loose / math)
+- validate_limit: rejects limits unsuitable for students
+"""
+
+import random
+import time
+import traceback
+
+import mpmath
+import sympy as sp
+from sympy.core.function import AppliedUndef
+from sympy.core.relational import Relational
+from sympy.logic.boolalg import BooleanFunction
+
+from .deadline import CheckTimeout
+from .log import DEBUG, console, lazy
+from .structure import extract_structure
+
+
+def normalize_expr(expr):
+    """Normalize and simplify expressions - with better sanity check"""
+
+    if expr is None:
+        return None
+
+    try:
+        console.debug("🔧 NORMALIZE INPUT: %s", expr)
+        console.debug("🔧 NORMALIZE INPUT (srepr): %s", lazy(sp.srepr, expr))
+
+        # Store original for comparison
+        original_expr = expr
+
+        if hasattr(expr, "doit"):
+            console.debug("DEBUG: Expression has doit, calling it...") 
+            expr = expr.doit()
+            console.debug("DEBUG: After doit: %s", expr)
+            console.debug("DEBUG: After doit (srepr): %s", lazy(sp.srepr, expr))
+
+        if isinstance(expr, list):
+            expr = sp.Matrix(expr)
+        if isinstance(expr, sp.Matrix):
+            expr = expr.applyfunc(sp.simplify)
+        else:
+            if isinstance(expr, sp.Mul) and not expr.is_Number:
+                args = expr.args
+                has_matrix = any(isinstance(a, sp.Matrix) for a in args)
+                has_scalar = any(not isinstance(a, sp.Matrix) for a in args)
+                if has_matrix and has_scalar:
+                    return sp.Mul(*args, evaluate=True)
+
+            # Store expression after doit but before simplify
+            after_doit = expr
+            console.debug("🔧 Before simplify: %s", after_doit)
+
+            # ✅ LIGHT normalization
+            expr = sp.simplify(expr)
+            console.debug("🔧 NORMALIZE OUTPUT: %s", expr)
+            console.debug("🔧 NORMALIZE OUTPUT (srepr): %s", lazy(sp.srepr, expr))
+
+            # ✅ IMPROVED SANITY CHECK: Test multiple values
+            try:
+                free_syms = list(original_expr.free_symbols)
+                if free_syms:
+                    # Test with multiple values including 2.5, 3.7, -1.5
+                    test_values = [2.5, 3.7, -1.5, 10.0]
+
+                    for test_x in test_values:
+                        test_subs = {sym: test_x for sym in free_syms}
+
+                        # Evaluate both
+                        try:
+                            original_numeric = complex(original_expr.subs(test_subs))
+                            normalized_numeric = complex(expr.subs(test_subs))
+                            after_doit_numeric = complex(after_doit.subs(test_subs))
+
+                            diff_orig_norm = abs(original_numeric - normalized_numeric)
+                            diff_doit_norm = abs(after_doit_numeric - normalized_numeric)
+
+                            console.debug("Test @ x=%s:", test_x)
+                            console.debug("  Original: %s", original_numeric)
+                            console.debug("  After doit: %s", after_doit_numeric)
+                            console.debug("  After simplify: %s", normalized_numeric)
+                            console.debug("  Diff (orig vs norm): %s", diff_orig_norm)
+                            console.debug("  Diff (doit vs norm): %s", diff_doit_norm)
+
+                            if diff_orig_norm > 1e-6:
+                                console.error("⚠️ NORMALIZATION BROKE EXPRESSION at x=%s!", test_x)
+                                console.error("   Difference: %s", diff_orig_norm)
+                                # Return the expression after doit, not after simplify
+                                console.error("   Returning after-doit version instead")
+                                return after_doit
+
+                        except (ZeroDivisionError, OverflowError) as e:
+                            console.debug("  Skipping x=%s due to: %s", test_x, e)
+                            continue
+
+                    console.debug("✓ Sanity check passed all test values")
+            except Exception as sanity_err:
+                console.warn("⚠️ Sanity check failed (non-fatal): %s", sanity_err)
+
+    except Exception as e:
+        console.error("ERROR inside normalize: %s", e)
+        console.error("%s", lazy(traceback.format_exc))
+        return expr
+
+    return expr
+
+
+# Seconds each final_eq tier may spend on one comparison. Checked between
+# strategies / probe points: a single SymPy call can't be interrupted here,
+# so a tier can overrun by at most one step. None means no limit.
+TIER_TIMEOUTS = {
+    'structural': None,
+    'numeric': 0.5,
+    'symbolic': 5.0,
+}
+
+NUMERIC_PROBES = 6          # Sample points per comparison
+NUMERIC_MIN_AGREEING = 2    # Valid points needed before "agree" counts
+NUMERIC_REL_TOL = 1e-9
+NUMERIC_DPS = 30            # mpmath working precision for the probes
+NUMERIC_SEED = 20240601     # Fixed, so a verdict never depends on the run
+
+# Values lambdify can't evaluate point-wise: leave those to simplify
+_NOT_PROBEABLE = (
+    sp.Integral, sp.Derivative, sp.Limit, sp.Sum, sp.Product,
+    sp.MatrixBase, Relational, BooleanFunction,
+)
+
+
+class StrategyTimings:
+    """Per-strategy counters for final_eq: calls, verdicts decided, time, timeouts"""
+
+    def __init__(self):
+        self.counters = {}
+
+    def record(self, name, seconds, decided=False, timed_out=False):
+        c = self.counters.setdefault(name, {'calls': 0, 'decided': 0, 'seconds': 0.0, 'timeouts': 0})
+        c['calls'] += 1
+        c['seconds'] += seconds
+        c['decided'] += bool(decided)
+        c['timeouts'] += bool(timed_out)
+
+    def stats(self):
+        return {
+            name: {
+                'calls': c['calls'],
+                'decided': c['decided'],
+                'timeouts': c['timeouts'],
+                'total_ms': round(c['seconds'] * 1000, 3),
+                'mean_ms': round(c['seconds'] * 1000 / c['calls'], 3),
+            }
+            for name, c in self.counters.items()
+        }
+
+    def reset(self):
+        self.counters.clear()
+
+
+def _deadline(tier, timeouts, budget=None):
+    """End of this tier's time: its own limit, or the check's budget if sooner"""
+    limit = (timeouts or TIER_TIMEOUTS).get(tier)
+    end = None if limit is None else time.perf_counter() + limit
+    if budget is not None and budget.expires is not None:
+        end = budget.expires if end is None else min(end, budget.expires)
+    return end
+
+
+def _expired(deadline):
+    return deadline is not None and time.perf_counter() > deadline
+
+
+def _probeable(expr):
+    if not isinstance(expr, sp.Basic):
+        return False
+    if isinstance(expr, _NOT_PROBEABLE) or expr.has(*_NOT_PROBEABLE):
+        return False
+    return not expr.atoms(AppliedUndef)
+
+
+def probe_points(count):
+    """The probe points for `count` symbols: seeded, so always the same ones"""
+    rng = random.Random(NUMERIC_SEED)
+    return [[mpmath.mpf(rng.choice((-1, 1)) * rng.uniform(0.2, 3.0)) for _ in range(count)]
+            for _ in range(NUMERIC_PROBES if count else 1)]
+
+
+def probe_values(expr):
+    """
+    (symbol names, values at probe_points) of `expr`, None for points
+    where it is undefined; precomputed for the expected side of a check
+    (see mathparser.answer_key). None if `expr` can't be probed.
+    """
+    if not _probeable(expr):
+        return None
+    symbols = sorted(expr.free_symbols, key=str)
+    try:
+        f = sp.lambdify(symbols, expr, modules='mpmath')
+    except Exception:
+        return None
+    values = []
+    with mpmath.workdps(NUMERIC_DPS):
+        for point in probe_points(len(symbols)):
+            try:
+                value = mpmath.mpmathify(f(*point))
+            except Exception:
+                value = None
+            values.append(value if value is not None and mpmath.isfinite(value) else None)
+    return tuple(str(s) for s in symbols), values
+
+
+def numeric_probe(a, b, deadline=None, known_b=None):
+    """
+    Evaluate a and b at seeded random points (lambdify + mpmath).
+
+    Returns 'differ' as soon as one point disagrees, 'agree' when every
+    valid point matched, 'inconclusive' when the values can't be probed
+    or too few points were defined (poles, domain errors, deadline).
+    Symbols are plain (complex) SymPy symbols, so a point where the values
+    differ is a real counterexample, never a branch artefact of simplify.
+
+    known_b: b's probe_values(), used instead of evaluating b when a has
+    no symbols of its own.
+    """
+    if not _probeable(a) or (known_b is None and not _probeable(b)):
+        return 'inconclusive'
+
+    symbols = sorted(a.free_symbols | b.free_symbols, key=str)
+    if known_b is not None and known_b[0] != tuple(str(s) for s in symbols):
+        if not _probeable(b):
+            return 'inconclusive'
+        known_b = None  # Different points: evaluate b as well
+    try:
+        f = sp.lambdify(symbols, [a] if known_b is not None else [a, b], modules='mpmath')
+    except Exception as e:
+        console.debug("🎲 Numeric probe: lambdify failed (%s)", e)
+        return 'inconclusive'
+
+    points = probe_points(len(symbols))
+    agreeing = 0
+    with mpmath.workdps(NUMERIC_DPS):
+        for i, point in enumerate(points):
+            if _expired(deadline):
+                break
+            try:
+                values = [mpmath.mpmathify(v) for v in f(*point)]
+            except Exception:
+                continue  # Pole or outside the domain: try the next point
+            if known_b is not None:
+                values.append(known_b[1][i])
+            va, vb = values
+            if vb is None or not (mpmath.isfinite(va) and mpmath.isfinite(vb)):
+                continue
+            if abs(va - vb) > NUMERIC_REL_TOL * max(1, abs(va), abs(vb)):
+                console.debug("🎲 Numeric probe: differ at %s: %s vs %s", dict(zip(symbols, point)), va, vb)
+                return 'differ'
+            agreeing += 1
+
+    if agreeing >= min(NUMERIC_MIN_AGREEING, len(points)):
+        return 'agree'
+    return 'inconclusive'
+
+
+def _scalar_strategies(a, b):
+    """Symbolic tier for scalars, cheapest first"""
+
+    def simplify_difference():
+        return sp.simplify(a - b) == 0
+
+    def expand_simplify():
+        return sp.simplify(sp.expand(a) - sp.expand(b)) == 0
+
+    def normalized():
+        # Apply multiple simplification passes
+        a_norm = sp.simplify(sp.expand(a))
+        b_norm = sp.simplify(sp.expand(b))
+        return sp.simplify(a_norm - b_norm) == 0 or a_norm == b_norm
+
+    def powsimp():
+        # Handles nested powers and like terms
+        a_processed = sp.simplify(sp.powsimp(sp.expand(a), force=True))
+        b_processed = sp.simplify(sp.powsimp(sp.expand(b), force=True))
+        return sp.simplify(a_processed - b_processed) == 0
+
+    def equals():
+        # SymPy's equals method (most robust but slowest)
+        return bool(a.equals(b))
+
+    return [
+        ('simplify_difference', simplify_difference),
+        ('expand_simplify', expand_simplify),
+        ('normalized', normalized),
+        ('powsimp', powsimp),
+        ('equals', equals),
+    ]
+
+
+def _canonical_scalar(x):
+    if not isinstance(x, sp.Basic):
+        try:
+            x = sp.sympify(x)
+        except Exception:
+            return x
+    if isinstance(x, sp.Float):
+        try:
+            x = sp.Rational(str(x))
+        except Exception:
+            pass
+    x = sp.simplify(x)
+    try:
+        x = x.doit()
+    except Exception:
+        pass
+    return sp.simplify(x)
+
+
+def _element_strategies(a, b):
+    """Symbolic tier for matrix elements: canonical forms, then their difference"""
+
+    def canonical_difference():
+        diff = sp.simplify(_canonical_scalar(a) - _canonical_scalar(b))
+        if diff != 0:
+            console.debug("Matrix element mismatch: %s vs %s, diff=%s", a, b, diff)
+        return diff == 0
+
+    return [('canonical_difference', canonical_difference)]
+
+
+def _timed(timings, name, fn, deadline=None):
+    """Run one strategy; (result, timed_out). Exceptions count as no result."""
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except Exception:
+        result = None
+    elapsed = time.perf_counter() - start
+    timed_out = _expired(deadline)
+    if timings is not None:
+        timings.record(name, elapsed, decided=bool(result), timed_out=timed_out)
+    return result, timed_out
+
+
+def _tiered_eq(a, b, symbolic, timings=None, timeouts=None, budget=None, probes=None, timed_out=None):
+    """
+    structural -> numeric -> symbolic.
+
+    1. structural: a == b on the canonical (normalized) forms
+    2. numeric: seeded multi-point evaluation, rejects on a counterexample
+    3. symbolic: the simplify strategies, only reached when the probes
+       agreed or could not decide
+
+    The symbolic tier running out of its own time, or the check running
+    out of its budget (a Deadline), raises CheckTimeout: an answer that
+    could not be verified in time is not a wrong answer. Tiers that ran
+    out of time are added to the timed_out set. probes maps expected-side
+    values to their precomputed probe_values.
+    """
+    # Tier 1: structural
+    same, _ = _timed(timings, 'structural', lambda: a == b)
+    if same:
+        console.debug("✓ Tier 1: Structural equality")
+        return True
+
+    # Tier 2: numeric probes
+    deadline = _deadline('numeric', timeouts, budget)
+    known_b = probes.get(b) if probes and isinstance(b, sp.Basic) else None
+    probe, probe_timed_out = _timed(timings, 'numeric', lambda: numeric_probe(a, b, deadline, known_b) == 'differ', deadline)
+    if probe:
+        console.debug("✗ Tier 2: Numeric probes differ, skipping simplify")
+        return False
+    if probe_timed_out:
+        console.warn("⏱ Tier 2: Numeric probes ran out of time")
+        if timed_out is not None:
+            timed_out.add('numeric')
+    if budget is not None:
+        budget.check('numeric')
+
+    # Tier 3: symbolic
+    deadline = _deadline('symbolic', timeouts, budget)
+    for name, strategy in symbolic(a, b):
+        if budget is not None:
+            budget.check(name)
+        if _expired(deadline):
+            console.warn("⏱ Tier 3: Out of time before %s, giving up", name)
+            if timings is not None:
+                timings.record(name, 0.0, timed_out=True)
+            if timed_out is not None:
+                timed_out.add('symbolic')
+            raise CheckTimeout('symbolic')
+        result, _ = _timed(timings, name, strategy, deadline)
+        if result:
+            console.debug("✓ Tier 3: %s succeeded", name)
+            return True
+    return False
+
+
+def _any_true(*checks):
+    """
+    First of `checks` (thunks) that is True. A CheckTimeout in one only
+    propagates when none of the others is True: one side of an equation
+    that can't be verified in time doesn't hide a match on the other.
+    """
+    timeout = None
+    for check in checks:
+        try:
+            if check():
+                return True
+        except CheckTimeout as e:
+            timeout = timeout or e
+    if timeout is not None:
+        raise timeout
+    return False
+
+
+def final_eq(a, b, timings=None, timeouts=None, budget=None, probes=None, timed_out=None):
+    """
+    Check equality for scalar or matrix expressions with tiered strategies.
+
+    timings: optional StrategyTimings collecting per-strategy counters
+    timeouts: per-tier seconds, defaults to TIER_TIMEOUTS
+    budget: optional Deadline for the whole check
+    probes: {sub-expression of b: probe_values}, from a precompiled answer
+    key, so the numeric tier only evaluates a
+    timed_out: optional set, receives the tiers that ran out of time
+
+    Raises CheckTimeout (never returns False) when the answer could not
+    be verified in time: the budget ran out or the symbolic tier did.
+    """
+    kw = {'timings': timings, 'timeouts': timeouts, 'budget': budget, 'probes': probes, 'timed_out': timed_out}
+    try:
+        # Handle equation comparisons
+        if isinstance(a, sp.Equality) and isinstance(b, sp.Equality):
+            # Both are equations: compare both sides
+            return _any_true(
+                lambda: final_eq(a.lhs, b.lhs, **kw) and final_eq(a.rhs, b.rhs, **kw),
+                lambda: final_eq(a.lhs, b.rhs, **kw) and final_eq(a.rhs, b.lhs, **kw),
+            )
+        elif isinstance(a, sp.Equality) and not isinstance(b, sp.Equality):
+            # a is equation, b is plain expression
+            # Check if b matches either side of the equation
+            return _any_true(lambda: final_eq(a.lhs, b, **kw), lambda: final_eq(a.rhs, b, **kw))
+        elif isinstance(b, sp.Equality) and not isinstance(a, sp.Equality):
+            # b is equation, a is plain expression
+            # Check if a matches either side of the equation
+            return _any_true(lambda: final_eq(a, b.lhs, **kw), lambda: final_eq(a, b.rhs, **kw))
+
+        # Handle matrix comparisons
+        if isinstance(a, sp.MatrixBase) and isinstance(b, sp.MatrixBase):
+            if a.shape != b.shape:
+                return False
+            # Element by element, each through the same tiers; an element that
+            # can't be verified in time only matters if no other one differs
+            timeout = None
+            for i in range(a.rows):
+                for j in range(a.cols):
+                    try:
+                        if not _tiered_eq(a[i, j], b[i, j], _element_strategies, **kw):
+                            console.debug("Matrix element mismatch at [%s,%s]", i, j)
+                            return False
+                    except CheckTimeout as e:
+                        if budget is not None and budget.expired():
+                            raise
+                        timeout = timeout or e
+            if timeout is not None:
+                raise timeout
+            return True
+        if isinstance(a, sp.MatrixBase) and isinstance(b, list):
+            return final_eq(a, sp.Matrix(b), **kw)
+        if isinstance(b, sp.MatrixBase) and isinstance(a, list):
+            return final_eq(sp.Matrix(a), b, **kw)
+
+        if _tiered_eq(a, b, _scalar_strategies, **kw):
+            return True
+
+        # All strategies failed - provide detailed diagnostic information
+        if console.enabled(DEBUG):
+            console.debug("=" * 60)
+            console.debug("✗ All comparison strategies failed")
+            console.debug("=" * 60)
+            console.debug("Expression A: %s", a)
+            console.debug("Expression B: %s", b)
+            console.debug("Type A: %s", type(a))
+            console.debug("Type B: %s", type(b))
+            console.debug("srepr(A): %s", lazy(sp.srepr, a))
+            console.debug("srepr(B): %s", lazy(sp.srepr, b))
+            console.debug("=" * 60)
+        return False
+
+    except CheckTimeout:
+        raise
+    except Exception as e:
+        console.error("final_eq error: %s", e)
+        # Last resort: try equals method
+        try:
+            return a.equals(b)
+        except:
+            return False
+
+
+def structural_match(expr1, expr2, tolerance='strict'):
+    """
+    Compare expressions structurally, not just mathematically.
+
+    tolerance levels:
+    - 'strict': Must have identical structure
+    - 'loose': Allow minor differences (commutativity, associativity)
+    - 'math': Full mathematical equivalence (same as final_eq)
+    """
+
+    if expr1 is None or expr2 is None:
+        return False
+
+    console.debug("🔍 Structural match check (tolerance=%s)", tolerance)
+    console.debug("   expr1: %s", expr1)
+    console.debug("   expr2: %s", expr2)
+    console.debug("   expr1 srepr: %s", lazy(sp.srepr, expr1))
+    console.debug("   expr2 srepr: %s", lazy(sp.srepr, expr2))
+
+    if tolerance == 'math':
+        # Use full mathematical equivalence
+        return final_eq(expr1, expr2)
+
+    # Extract structures
+    struct1 = extract_structure(expr1)
+    struct2 = extract_structure(expr2)
+
+    console.debug("   struct1 operators: %s", struct1['operators'])
+    console.debug("   struct2 operators: %s", struct2['operators'])
+    console.debug("   struct1 operands: %s", struct1['operands'])
+    console.debug("   struct2 operands: %s", struct2['operands'])
+
+    if tolerance == 'strict':
+        # Strict: operators and operands must match exactly
+        operators_match = struct1['operators'] == struct2['operators']
+        operands_match = struct1['operands'] == struct2['operands']
+
+        console.debug("   operators_match: %s", operators_match)
+        console.debug("   operands_match: %s", operands_match)
+
+        if operators_match and operands_match:
+            console.debug("✅ Strict structural match: PASS")
+            return True
+        else:
+            console.debug("❌ Strict structural match: FAIL")
+            # Try mathematical equivalence as fallback (diagnostic only)
+            try:
+                math_eq = final_eq(expr1, expr2)
+            except CheckTimeout:
+                math_eq = False
+            if math_eq:
+                console.debug("⚠️ Expressions are mathematically equivalent but structurally different")
+            return False
+
+    elif tolerance == 'loose':
+        # Loose: Allow some flexibility but check overall structure
+        # Check if operator counts are similar
+        ops1_total = struct1['total_ops']
+        ops2_total = struct2['total_ops']
+
+        # Allow ±1 difference in operator count
+        if abs(ops1_total - ops2_total) > 1:
+            console.debug("❌ Loose structural match: operator count difference too large")
+            return False
+
+        # Check if main operators are present
+        ops1_set = set(struct1['operators'].keys())
+        ops2_set = set(struct2['operators'].keys())
+
+        if ops1_set != ops2_set:
+            console.debug("❌ Loose structural match: different operator types")
+            return False
+
+        console.debug("✅ Loose structural match: PASS")
+        return True
+
+    return False
+
+
+def validate_limit(limit_expr):
+    """
+    Validate if a limit problem is suitable for students.
+    Returns (is_valid, error_message)
+
+    Invalid cases:
+    1. Different left and right limit values (discontinuity)
+    2. Oscillating limits (e.g., sin(1/x) as x->0)
+    3. Limits that evaluate to infinity
+    """
+
+    if not isinstance(limit_expr, sp.Limit):
+        return (True, None)  # Not a limit, skip validation
+
+    try:
+        # Get the limit components
+        expr = limit_expr.args[0]
+        var = limit_expr.args[1]
+        point = limit_expr.args[2]
+
+        # Evaluate the limit
+        limit_value = limit_expr.doit()
+
+        # Check 1: Limit evaluates to infinity
+        if limit_value.has(sp.oo) or limit_value == sp.oo or limit_value == -sp.oo:
+            return (False, f"Limit evaluates to infinity: {limit_value}")
+
+        # Check 2: Limit does not exist (returns unevaluated or NaN)
+        if isinstance(limit_value, sp.Limit) or limit_value is sp.nan:
+            return (False, "Limit does not exist or cannot be determined")
+
+        # Check 3: Different left and right limits (if approaching a finite point)
+        if point != sp.oo and point != -sp.oo:
+            try:
+                left_limit = sp.limit(expr, var, point, '-')
+                right_limit = sp.limit(expr, var, point, '+')
+
+                # Simplify both limits
+                left_simplified = sp.simplify(left_limit)
+                right_simplified = sp.simplify(right_limit)
+
+                # Check if they're different
+                if not sp.simplify(left_simplified - right_simplified) == 0:
+                    return (False, f"Left and right limits differ: left={left_simplified}, right={right_simplified}")
+            except:
+                pass
+
+        # Check 4: Oscillating behavior (limit doesn't exist due to oscillation)
+        # This is tricky - we check if the limit is AccumBounds or contains zoo
+        if hasattr(limit_value, 'is_finite') and not limit_value.is_finite:
+            if limit_value != sp.oo and limit_value != -sp.oo:
+                return (False, "Limit oscillates or is undefined")
+
+        # Check for AccumBounds (accumulated bounds, indicates oscillation)
+        if 'AccumBounds' in str(type(limit_value)):
+            return (False, "Limit oscillates between multiple values")
+
+        # Check for zoo (complex infinity, often from oscillation)
+        if limit_value == sp.zoo:
+            return (False, "Limit is complex infinity (oscillation or undefined)")
+
+        return (True, None)
+
+    except Exception as e:
+        console.error("Error validating limit: %s", e)
+        return (False, f"Error evaluating limit: {str(e)}")
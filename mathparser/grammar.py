@@ -0,0 +1,180 @@
+"""
+LaTeX grammar
+-------------
+Lark grammar for the answers students type in MathQuill: arithmetic,
+equations, functions, limits, integrals, sums/products, matrices and
+row operations (`[[1,2],[3,4]]|R_2 \\to R_2-3R_1`).
+
+Input is preprocessed first (mathparser.preprocess), so derivatives
+arrive as `__derivative(x, ...)` and implicit products are explicit
+where the grammar can't tell them apart.
+
+The grammar is LALR(1): embed_mathparser.py compiles it ahead of time
+with Lark's standalone generator into mathparser/_lalr_parser.py, so
+nothing builds a parser at runtime. The places an Earley grammar would
+leave ambiguous are decided by the rules themselves:
+
+- A leading "-" is always `neg`; NUMBER is unsigned (signed numbers
+  only appear as the unbraced bounds of \\int, \\sum and \\prod)
+- Implicit multiplication never takes a "-" factor, so `x-1` is `sub`
+- Inside |...| an implicit product can't start another |...|, so a
+  "|" there always closes (`|x|-1`, `2|x|`)
+- The body of \\int, \\lim, \\sum, \\prod and \\log_b is a product: it
+  ends at the next + or -
+- A "|" after a matrix starts row operations
+
+Shift/reduce conflicts left in the grammar are all "keep extending the
+body/product" and are resolved as shift.
+"""
+
+GRAMMAR = r"""
+start: equation
+     | expr
+
+?equation: expr "=" expr    -> equation
+
+?expr: sum
+
+?sum: sum "+" product   -> add
+    | sum "-" product   -> sub
+    | product
+
+?product: product ("*" | "\\cdot" | "\\times" | "\\ast") power   -> mul
+        | product "/" power                                        -> div
+        | implicit
+
+?implicit: implicit factor       -> implicit_mul
+         | power
+
+?power: "-" power                -> neg
+      | factor
+
+?factor: atom_degree             -> atom_to_degree
+       | atom "^" power          -> power
+       | atom
+
+?atom: atom_noabs
+     | abs_function
+
+// Inside |...|: the same chain, but an implicit product can't open
+// another |...| (so the next "|" closes this one)
+?abs_sum: abs_sum "+" abs_product   -> add
+        | abs_sum "-" abs_product   -> sub
+        | abs_product
+
+?abs_product: abs_product ("*" | "\\cdot" | "\\times" | "\\ast") power   -> mul
+            | abs_product "/" power                                        -> div
+            | abs_implicit
+
+?abs_implicit: abs_implicit factor_noabs   -> implicit_mul
+             | abs_power
+
+?abs_power: "-" abs_power        -> neg
+          | factor
+
+?factor_noabs: atom_degree_noabs -> atom_to_degree
+             | atom_noabs "^" power   -> power
+             | atom_noabs
+
+?atom_noabs: NUMBER              -> number
+   | derivative_function
+   | partial_derivative_function
+   | trig_function
+   | log_function
+   | limit
+   | integral
+   | summation
+   | product_notation
+   | sqrt_function
+   | fraction
+   | matrix_ops
+   | matrix
+   | matrix_env
+   | "(" expr ")"              -> paren_expr
+   | "{" expr "}"              -> braces_expr
+   | PI                        -> pi_symbol
+   | INFTY                     -> infty_symbol
+   | SYMBOL                    -> symbol
+
+trig_function: TRIG_NAME "(" expr ")"    -> trig_func
+
+log_function: "\\log_" "{" expr "}" product         -> log_func_with_base
+            | "\\log_" NUMBER product               -> log_func_with_base_no_braces
+            | LOG_NAME "(" expr ")"                 -> log_func
+
+limit: "\\lim" "_" "{" SYMBOL "\\to" expr "}" product -> limit_expr
+
+integral: "\\int" "_" "{" expr "}" "^" "{" expr "}" product        -> integral_definite
+        | "\\int" "_" SIGNED_NUMBER "^" SIGNED_NUMBER product      -> integral_definite_no_braces
+        | "\\int" "_" "{" "}" "^" "{" "}" product                  -> integral_indefinite
+        | "\\int" product                                          -> integral_indefinite_simple
+
+summation: "\\sum" "_" "{" SYMBOL "=" expr "}" "^" "{" expr "}" product     -> sum_expr
+         | "\\sum" "_" "{" SYMBOL "=" expr "}" "^" "{" expr "}"             -> sum_expr_no_body
+         | "\\sum" "_" SYMBOL "=" SIGNED_NUMBER "^" SIGNED_NUMBER product   -> sum_expr_no_braces
+         | "\\sum" "_" SYMBOL "=" SIGNED_NUMBER "^" SIGNED_NUMBER           -> sum_expr_no_braces_no_body
+
+product_notation: "\\prod" "_" "{" SYMBOL "=" expr "}" "^" "{" expr "}" product     -> prod_expr
+                | "\\prod" "_" "{" SYMBOL "=" expr "}" "^" "{" expr "}"             -> prod_expr_no_body
+                | "\\prod" "_" SYMBOL "=" SIGNED_NUMBER "^" SIGNED_NUMBER product   -> prod_expr_no_braces
+                | "\\prod" "_" SYMBOL "=" SIGNED_NUMBER "^" SIGNED_NUMBER           -> prod_expr_no_braces_no_body
+
+sqrt_function: "\\sqrt" "{" expr "}"           -> sqrt_func
+             | "\\sqrt" "[" expr "]" "{" expr "}" -> nthroot_func
+
+derivative_function: "__derivative" "(" SYMBOL "," expr ")" -> derivative_func
+
+partial_derivative_function: "__partial_derivative" "(" SYMBOL "," expr ")" -> partial_derivative_func
+
+fraction: "\\frac" "{" expr "}" "{" expr "}" -> frac
+
+abs_function: "\\left" "|" abs_sum "\\right" "|"     -> abs_func
+            | "|" abs_sum "|"                        -> abs_func
+
+atom_degree: atom "^" degree_expr
+atom_degree_noabs: atom_noabs "^" degree_expr -> atom_degree
+
+degree_expr: "{" CIRC "}"
+
+matrix: "[" matrix_rows "]" -> matrix_rows
+matrix_rows: row ("," row)* -> matrix_rows
+row: "[" elements "]" -> row
+elements: expr ("," expr)* -> elements
+
+matrix_env: "\\begin" "{" /(bmatrix|pmatrix|matrix)/ "}" matrix_env_body "\\end" "{" /(bmatrix|pmatrix|matrix)/ "}" -> matrix_env
+
+matrix_env_body: matrix_env_row ( "\\\\" matrix_env_row )*
+matrix_env_row: expr ( "&" expr )*
+
+matrix_ops: matrix ("|" row_op)+ -> matrix_apply_ops
+
+row_op: _ROW INT arrow row_expr                 -> row_replace
+      | _ROW INT swap_arrow _ROW INT            -> row_swap
+
+arrow: "\\to" | "\\leftarrow" | "\\rightarrow" | "->" | "<-"
+swap_arrow: "\\leftrightarrow" | "<->"
+
+row_expr: _ROW INT                     -> row_reference
+        | expr _ROW INT                -> row_scale
+        | _ROW INT op expr _ROW INT    -> row_combine
+
+op: "+" | "-"
+
+_ROW: "R_"
+CIRC: "\\circ"
+// Function names are only names when a letter/digit doesn't follow
+// ("\\sinx" stays one SYMBOL, as SYMBOL's own exclusion list implies)
+TRIG_NAME: /\\(?:arcsin|arccos|arctan|sin|cos|tan|cot|sec|csc)(?![a-zA-Z0-9])/
+LOG_NAME: /\\(?:log|ln|exp)(?![a-zA-Z0-9])/
+NUMBER: /\d+(\.\d*)?|\.\d+/
+SIGNED_NUMBER: /[+-]?(\d+(\.\d*)?|\.\d+)/
+INT: /\d+/
+PI: "\\pi"
+INFTY: "\\infty"
+// Lowest priority: wherever a command or R_ is also acceptable, it wins
+// (whitespace is gone by now, so "\\cdot y" arrives as "\\cdoty")
+SYMBOL.-1: /\\?(?!(?:sin|cos|tan|cot|sec|csc|arcsin|arccos|arctan|log|ln|exp|frac|left|right|begin|end|pi|infty|lim|to|leftarrow|rightarrow|leftrightarrow|lvert|rvert|sqrt|sum|prod|int)(?![a-zA-Z0-9]))[a-zA-Z][a-zA-Z0-9]*/
+
+%import common.WS_INLINE
+%ignore WS_INLINE
+"""
@@ -0,0 +1,275 @@
+"""
+MathParser
+----------
+LaTeX answer -> SymPy, plus the equivalence and structure checks, as one
+object. Headless: diagnostics go through mathparser.log and the three
+_show_*_popup hooks only log; the Pyodide pages subclass MathParser and
+override the hooks with their error popups.
+
+parse_latex, normalize_expr and final_eq are memoized in bounded LRU
+caches (mathparser.cache), so checking an unchanged answer again is a
+dictionary lookup; cache_stats() reports hits and misses. final_eq is
+tiered (structural, numeric probes, simplify) and strategy_stats() shows
+the time spent in each strategy. load_answer_key() turns a step's
+precompiled answer key (mathparser.answer_key) into the normalized
+expected answer without parsing it.
+
+Usage:
+    parser = MathParser()
+    expected = parser.normalize_expr(parser.parse_latex(r"\\frac{1}{2}x"))
+    answer = parser.normalize_expr(parser.parse_latex(r"0.5x"))
+    parser.final_eq(expected, answer)          # True
+"""
+
+import copy
+import json
+import re
+import traceback
+
+import sympy as sp
+
+from . import answer_key, equivalence, preprocess, structure
+from .difficulty import problem_difficulty
+from ._lalr_parser import Lark_StandAlone, UnexpectedToken, UnexpectedCharacters, UnexpectedEOF
+from .cache import DEFAULT_CACHE_SIZE, LRUCache, detached
+from .log import console
+from .transformer import Latex2Sympy
+
+
+class MathParser:
+    """Handles LaTeX parsing, structural comparison, and error reporting"""
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        # Prebuilt LALR tables (see embed_mathparser.py), nothing is compiled here
+        self.parser = Lark_StandAlone()
+        self.transformer = self._create_transformer()
+        self.last_corrected_latex = None
+        # cache_size=0 turns memoization off
+        self._parse_cache = LRUCache(cache_size)
+        self._normalize_cache = LRUCache(cache_size)
+        self._final_eq_cache = LRUCache(cache_size)
+        self._answer_key_cache = LRUCache(cache_size)
+        self.strategy_timings = equivalence.StrategyTimings()
+
+    def _create_transformer(self):
+        return Latex2Sympy()
+
+    # Pipeline stages (see mathparser.preprocess / equivalence / structure)
+    auto_fix_common_errors = staticmethod(preprocess.auto_fix_common_errors)
+    clean_latex = staticmethod(preprocess.clean_latex)
+    expression_has_matrix_operations = staticmethod(preprocess.expression_has_matrix_operations)
+    _preprocess_derivatives = staticmethod(preprocess.preprocess_derivatives)
+    _preprocess_row_operations = staticmethod(preprocess.preprocess_row_operations)
+    structural_match = staticmethod(equivalence.structural_match)
+    validate_limit = staticmethod(equivalence.validate_limit)
+    extract_structure = staticmethod(structure.extract_structure)
+    structure_to_json_serializable = staticmethod(structure.structure_to_json_serializable)
+    sympy_to_json_serializable = staticmethod(structure.sympy_to_json_serializable)
+    problem_difficulty = staticmethod(problem_difficulty)
+
+    # Memoized checks
+
+    def normalize_expr(self, expr):
+        """equivalence.normalize_expr, cached by srepr"""
+        if expr is None:
+            return equivalence.normalize_expr(expr)
+        key = sp.srepr(expr)
+        cached = self._normalize_cache.get(key)
+        if cached is not None:
+            return detached(cached)
+        result = equivalence.normalize_expr(expr)
+        self._normalize_cache.put(key, detached(result))
+        return result
+
+    def final_eq(self, a, b, budget=None, probes=None):
+        """equivalence.final_eq, cached by the (srepr, srepr) pair"""
+        if a is None or b is None:
+            return equivalence.final_eq(a, b)
+        key = (sp.srepr(a), sp.srepr(b))
+        cached = self._final_eq_cache.get(key)
+        if cached is not None:
+            return cached
+        # A CheckTimeout propagates, so nothing is cached; a verdict reached after
+        # a tier ran out of time isn't cached either (it may differ on a faster run)
+        timed_out = set()
+        verdict = equivalence.final_eq(a, b, timings=self.strategy_timings, budget=budget, probes=probes,
+                                       timed_out=timed_out)
+        if timed_out:
+            console.debug("⏱ final_eq verdict not cached, tiers out of time: %s", timed_out)
+        else:
+            self._final_eq_cache.put(key, verdict)
+        return verdict
+
+    def compile_answer_key(self, expected_latex):
+        """answer_key.compile_answer_key with this parser (create_problem export)"""
+        return answer_key.compile_answer_key(expected_latex, self)
+
+    def load_answer_key(self, data, expected_latex=None):
+        """answer_key.load_answer_key, cached by the key's srepr"""
+        if isinstance(data, str):
+            try:
+                data = json.loads(data)
+            except ValueError:
+                return None
+        if not isinstance(data, dict) or 'srepr' not in data:
+            return None
+        cache_key = (data['srepr'], data.get('version'), data.get('expected'), expected_latex)
+        cached = self._answer_key_cache.get(cache_key)
+        if cached is None:
+            cached = answer_key.load_answer_key(data, expected_latex)
+            if cached is None:
+                return None
+            self._answer_key_cache.put(cache_key, cached)
+        loaded = copy.copy(cached)
+        loaded.expected = detached(cached.expected)
+        return loaded
+
+    def cache_stats(self):
+        """Hits, misses and size of the parse / normalize / final_eq caches"""
+        return {
+            'parse': self._parse_cache.stats(),
+            'normalize': self._normalize_cache.stats(),
+            'final_eq': self._final_eq_cache.stats(),
+            'answer_key': self._answer_key_cache.stats(),
+        }
+
+    def strategy_stats(self):
+        """final_eq time per strategy (structural / numeric / each simplify pass)"""
+        return self.strategy_timings.stats()
+
+    def clear_caches(self):
+        for cache in (self._parse_cache, self._normalize_cache, self._final_eq_cache, self._answer_key_cache):
+            cache.clear()
+
+    # UI hooks: the pages override these with popups
+
+    def _show_info_popup(self, message):
+        console.info(message)
+
+    def _show_error_popup(self, message):
+        pass  # Already logged by the caller
+
+    def _show_enhanced_error_popup(self, latex_expr, error_pos, error_type, error_msg):
+        pass  # Already logged by the caller
+
+    def prepare_latex(self, latex):
+        """The string the grammar parses: clean_latex, derivatives, row operations"""
+        cleaned = self.clean_latex(latex)
+        console.debug("🔍 [DEBUG 2] After clean_latex: %s", cleaned)
+
+        clean = self._preprocess_derivatives(cleaned)
+        console.debug("🔍 [DEBUG 3] After preprocess_derivatives: %s", clean)
+
+        # ✅ FIX: Only preprocess row operations if they actually exist
+        if self.expression_has_matrix_operations(clean):
+            clean = self._preprocess_row_operations(clean)
+            console.debug("🔍 [DEBUG 4] After preprocess_row_operations: %s", clean)
+        else:
+            console.debug("🔍 [DEBUG 4] No row operations detected, skipping preprocessing")
+        return clean
+
+    def parse_latex(self, latex):
+        """Parse LaTeX to SymPy expression with error popup display and auto-fix"""
+        console.debug("🔍 [DEBUG 1] Original LaTeX: %s", latex)
+
+        # 🆕 AUTO-FIX: Try to fix common errors first
+        fixed_latex, fixes = self.auto_fix_common_errors(latex)
+        if fixes:
+            console.info("🔧 Auto-fixes applied: %s", ', '.join(fixes))
+            console.debug("🔧 Fixed LaTeX: %s", fixed_latex)
+            # Store corrected latex for caller to update MathQuill field
+            self.last_corrected_latex = fixed_latex
+            # Show a subtle notification to user
+            self._show_info_popup(f"✨ Auto-corrected: {', '.join(fixes)}")
+            latex = fixed_latex
+        else:
+            self.last_corrected_latex = None
+
+        clean = self.prepare_latex(latex)
+        console.debug("Cleaned LaTeX: %s", clean)
+
+        cached = self._parse_cache.get(clean)
+        if cached is not None:
+            console.debug("♻️ Parse cache hit: %s", clean)
+            return detached(cached)
+
+        try:
+            console.debug("🔍 [DEBUG 5] About to call parser.parse()...")
+            tree = self.parser.parse(clean)
+            console.debug("🔍 [DEBUG 6] Parse successful, tree type: %s", type(tree))
+
+            console.debug("🔍 [DEBUG 7] About to call transformer.transform()...")
+            result = self.transformer.transform(tree)
+            console.debug("🔍 Transformed result: %s", result)
+            self._parse_cache.put(clean, detached(result))
+            return result
+
+        except (UnexpectedToken, UnexpectedCharacters, UnexpectedEOF) as e:
+            # 🆕 RETRY: Try more aggressive fixes on first failure
+            console.debug("⚠️ Initial parse failed, attempting aggressive auto-fix...")
+
+            # Try removing extra spaces around operators
+            retry_clean = re.sub(r'\s*([+\-*/=])\s*', r'\1', clean)
+
+            # Try fixing common matrix issues in the cleaned string
+            retry_clean = re.sub(r',\s*,', ',', retry_clean)  # Remove double commas
+            retry_clean = re.sub(r'\[\s*,', '[', retry_clean)  # Remove leading comma in row
+            retry_clean = re.sub(r',\s*\]', ']', retry_clean)  # Remove trailing comma in row
+
+            if retry_clean != clean:
+                try:
+                    console.debug("🔧 Retry with aggressive fixes: %s", retry_clean)
+                    tree = self.parser.parse(retry_clean)
+                    result = self.transformer.transform(tree)
+                    self._show_info_popup("✨ Fixed parsing error with aggressive corrections")
+                    console.debug("✅ Retry successful: %s", result)
+                    self._parse_cache.put(clean, detached(result))
+                    return result
+                except Exception as retry_error:
+                    console.debug("❌ Retry also failed: %s", retry_error)
+
+            # If retry also failed, show original error with visual highlighting
+            pos = getattr(e, "pos_in_stream", None)
+            line = getattr(e, "line", "?")
+            col = getattr(e, "column", "?")
+
+            # Remove "Expected …" section from Lark message
+            raw_msg = str(e)
+            simplified_msg = re.sub(r"Expected one of:.*", "", raw_msg, flags=re.DOTALL).strip()
+
+            # Build context with caret pointing to error
+            try:
+                span = 35
+                start = max(0, (pos or 0) - span)
+                end = min(len(clean), (pos or 0) + span)
+                snippet = clean[start:end]
+                caret_pos = (pos or 0) - start
+                caret_line = " " * caret_pos + "↑"
+                context = f"{snippet}\n{caret_line}"
+            except Exception:
+                context = clean
+
+            # 🆕 Show enhanced error with MathJax rendering and highlighting
+            self._show_enhanced_error_popup(clean, pos, type(e).__name__, simplified_msg)
+
+            # Also log to console
+            msg = (
+                f"❌ Parse error in LaTeX:\n\n"
+                f"Line: {line}, Column: {col}\n"
+                f"Type: {type(e).__name__}\n"
+                f"Message: {simplified_msg}\n\n"
+                f"Context:\n{context}"
+            )
+            console.error(msg)
+            return None
+
+        except Exception as e:
+            console.error("❌ [DEBUG ERROR] Exception type: %s", type(e).__name__)
+            console.error("❌ [DEBUG ERROR] Exception message: %s", str(e))
+            tb_str = traceback.format_exc()
+            console.error("❌ [DEBUG ERROR] Traceback:\n%s", tb_str)
+
+            msg = f"❌ General parse error: {e}"
+            console.error(msg)
+            self._show_error_popup(msg)
+            return None
\ No newline at end of file
@@ -0,0 +1,554 @@
+"""
+LaTeX preprocessing
+-------------------
+String rewrites applied before parsing, in this order:
+
+1. auto_fix_common_errors: repairs typical MathQuill input mistakes and
+   reports what it changed (missing brackets, double operators, R1 -> R_1)
+2. clean_latex: drops \\left/\\right and spacing macros, makes implicit
+   multiplication explicit
+3. preprocess_derivatives: \\frac{d}{dx}(...) -> __derivative(x, ...)
+4. preprocess_row_operations: only when expression_has_matrix_operations()
+
+Every answer check runs these stages on both sides, so the patterns are
+compiled once at import, and rule groups whose trigger characters are
+absent (no 'R' -> no row-notation fixes, no '^' -> no exponent fixes, ...)
+are skipped without running their regexes. Rules that feed into each
+other stay separate passes in their original order; the outputs are
+pinned by benchmarks/preprocess_pinned.json (see preprocess_time.py).
+"""
+
+import re
+
+from .log import console
+
+# auto_fix_common_errors
+_RIGHT_PIPE_BEFORE_ROW = re.compile(r'\\right\|(\s*R_)')
+_PERIOD_BETWEEN_ROWS = re.compile(r'(\]|\\\right\])\s*\.\s*(\[|\\left\[)')
+_LEFT_ROWS_SEPARATOR = re.compile(r'\\right\]\s*,\s*\\left\[')
+_SPACED_DIGITS = re.compile(r'(\d)\s+(\d)')
+_LATEX_BRACES = re.compile(r'\\(frac|sqrt|text|mathrm|mathbf|mathit|overline|underline|hat|bar|vec|dot|ddot|tilde|acute|grave|breve|check)\{[^{}]*\}(\{[^{}]*\})?')
+_SQUARE_CLOSED_BY_CURLY = re.compile(r'\[([^[\]]*)\}')
+_CURLY_CLOSED_BY_SQUARE = re.compile(r'\{([^[\]{}]*)\]')
+_MISSING_PIPE = re.compile(r'\]\](\s*R_\d+)')
+_DOUBLE_OPERATOR = re.compile(r'[+-]\s*[+-]')
+_PLUS_MINUS = re.compile(r'\+\s*-')
+_MINUS_PLUS = re.compile(r'-\s*\+')
+_MINUS_MINUS = re.compile(r'-\s*-')
+_PLUS_PLUS = re.compile(r'\+\s*\+')
+_FRAC_DIGITS = re.compile(r'\\frac(\d)(\d)')
+_TRAILING_OPERATOR = re.compile(r'[+\-*/]\s*$')
+_DANGLING_POWER = re.compile(r'\^(?=\s*[,\]\)|\|]|\s*$)')
+_EMPTY_EXPONENT = re.compile(r'\^\{\s*\}')
+_ROW_NO_UNDERSCORE = re.compile(r'R(\d+)')
+_ROW_BRACED_OPERATOR = re.compile(r'R_\{(\d+)([+\-])\}')
+_ROW_ARROW_TO = re.compile(r'(R_\d+)\s*->\s*')
+_ROW_ARROW_SWAP = re.compile(r'(R_\d+)\s*<->\s*')
+_ROW_ARROW_FROM = re.compile(r'(R_\d+)\s*<-\s*')
+
+# clean_latex
+# One pass for the eight \left/\right removals. "\right\left|" is listed
+# because the sequential replaces turned it into "|" (\left| first, which
+# leaves a fresh \right|).
+_LEFT_RIGHT = re.compile(r'\\right\\left\||\\left\(|\\right\)|\\left\[|\\right\]|\\left\\\{|\\right\\\}|\\left\||\\right\|')
+_LEFT_RIGHT_DELIMITERS = {
+    r'\right\left|': '|',
+    r'\left(': '(', r'\right)': ')',
+    r'\left[': '[', r'\right]': ']',
+    r'\left\{': '{', r'\right\}': '}',
+    r'\left|': '|', r'\right|': '|',
+}
+_SPACING_MACROS = re.compile(r"\\(?:,|;|:|!|quad|qquad)")
+_ROW_SEPARATOR = re.compile(r"\\\\\s*")
+_AMPERSAND = re.compile(r"\s*&\s*")
+_WHITESPACE = re.compile(r"\s+")
+_PAREN_PAREN = re.compile(r'\)\s*\(')
+_PAREN_DIGIT = re.compile(r'\)(\d)')
+_PAREN_LETTER = re.compile(r'\)([a-zA-Z])(?!_)')
+_DIGIT_PAREN = re.compile(r'(?<![\^])(\d)\(')
+_LETTER_PAREN = re.compile(r'(?<![a-zA-Z])([a-zA-Z])\(')
+_DIGIT_LETTER = re.compile(r'(?<![\^])(\d)([a-zA-Z])(?!_)')
+
+# preprocess_derivatives
+_TOTAL_DERIVATIVE = re.compile(r"\\frac\{d\}\{d([a-zA-Z]+)\}\(([^)]+)\)")
+_PARTIAL_DERIVATIVE = re.compile(r"\\frac\{\\partial\}\{\\partial\s*([a-zA-Z]+)\}\(([^)]+)\)")
+
+# preprocess_row_operations
+_ARROW = re.compile(r'(\\to|\\rightarrow|->|<-)')
+_MINUS_SPACE_FRAC = re.compile(r'-\s+\\frac')
+_MINUS_SPACE_DIGIT = re.compile(r'-\s+(\d)')
+_SPACE_AFTER_BRACE = re.compile(r'(\{)\s+')
+_SPACE_BEFORE_BRACE = re.compile(r'\s+(\})')
+_SPACE_AFTER_BRACKET = re.compile(r'\[\s+')
+_SPACE_BEFORE_BRACKET = re.compile(r'\s+\]')
+_SIMPLE_FRAC = re.compile(r'\\frac\{([^{}]+)\}\{([^{}]+)\}')
+_TO_NO_SPACE = re.compile(r'\\to(?=\S)')
+_RIGHTARROW_NO_SPACE = re.compile(r'\\rightarrow(?=\S)')
+_ASCII_TO_NO_SPACE = re.compile(r'->(?=\S)')
+_ASCII_FROM_NO_SPACE = re.compile(r'<-(?=\S)')
+_FRAC_ROW_DENOMINATOR = re.compile(r'\\frac\{([^{}]+)\}\{\(?(\d+)\)?R_(\d+)\}')
+_FRAC_BEFORE_ROW = re.compile(r'\\frac\{([^{}]+)\}\{\(?([^{}]+?)\)?\}R_')
+_NEG_FRAC_BEFORE_ROW = re.compile(r'-\\frac\{([^{}]+)\}\{\(?([^{}]+?)\)?\}R_')
+_PAREN_NEG_FRAC_ROW = re.compile(r'\(-\\frac\{([^{}]+)\}\{([^{}]+)\}\)R_')
+_PAREN_FRAC_ROW = re.compile(r'\(\\frac\{([^{}]+)\}\{([^{}]+)\}\)R_')
+_SIGNED_FRAC_ROW = re.compile(r'([+\-])\\frac\{([^{}]+)\}\{\(?([^{}]+?)\)?\}R_')
+_WRAPPED_SCALE = re.compile(r'\((-?\([^)]+\)R_\d+)\)')
+_WRAPPED_TARGET = re.compile(r'(R_\d+\s*(?:\\to|\\rightarrow|->)\s*)\(([^()]+R_\d+)\)(?=\s*(?:\||$))')
+_WRAPPED_ROW = re.compile(r'\((R_\d+)\)')
+_PAREN_NUMBER_ROW = re.compile(r'\((\d+)\)R_')
+_PAREN_NEG_NUMBER_ROW = re.compile(r'\((-\d+)\)R_')
+_IMPLICIT_ONE = re.compile(r'(R_\d+)\s*([+\-])\s*R_')
+_ROW_SIGN_DIGIT = re.compile(r'(R_\d+)\s*([+\-])\s*(\d)')
+_ROW_SIGN_PAREN = re.compile(r'(R_\d+)\s*([+\-])\s*\(')
+_OPS_PLUS_PLUS = re.compile(r'\+\s*\+')
+_OPS_MINUS_MINUS = re.compile(r'-\s*-')
+_OPS_MIXED_SIGNS = re.compile(r'\+\s*-|-\s*\+')
+_STRAY_BACKSLASH = re.compile(r'\\([A-Z()])')
+_REPEATED_PIPES = re.compile(r'\|{2,}')
+_TRAILING_PIPE = re.compile(r'\|\s*$')
+_ROW_PLUS_SCALED_ROW = re.compile(r'(R_(\d+))\s*\+\s*([0-9]+)R_(\d+)')
+_ROW_PLUS_ROW = re.compile(r'(R_(\d+))\s*\+\s*R_(\d+)')
+
+
+def auto_fix_common_errors(latex_str):
+    """
+    Attempt to automatically fix common LaTeX syntax errors.
+    Returns (fixed_string, list_of_fixes_applied)
+    """
+
+    fixes_applied = []
+    s = latex_str
+
+    # 0. Fix \right| when it should be \right]| in matrix context
+    #    \right|R_1 → \right]|R_1
+    if '\\right|' in s:
+        before = s
+        s = _RIGHT_PIPE_BEFORE_ROW.sub(r'\\right]|\1', s)
+        if s != before:
+            fixes_applied.append("Fixed pipe delimiter (\\right| → \\right]|)")
+
+    # 0.5. Fix period instead of comma between matrix rows
+    #    ]\right].\left[ → ]\right],\left[
+    if '.' in s:
+        before = s
+        s = _PERIOD_BETWEEN_ROWS.sub(r'\1,\2', s)
+        if s != before:
+            fixes_applied.append("Fixed period to comma between matrix rows")
+
+    # 0.6. Fix missing outer brackets for comma-separated matrix rows
+    #    [1,0],[0,1] → [[1,0],[0,1]]
+    #    \left[1,0\right],\left[0,1\right] → \left[\left[1,0\right],\left[0,1\right]\right]
+    # For \left\right notation
+    if s.startswith(r'\left[') and not s.startswith(r'\left[\left['):
+        if _LEFT_ROWS_SEPARATOR.search(s):
+            s = r'\left[' + s + r'\right]'
+            fixes_applied.append("Added outer brackets for matrix rows (\\left notation)")
+    # For simple bracket notation
+    elif s.startswith('[') and not s.startswith('[['):
+        if '],[' in s:
+            s = '[' + s + ']'
+            fixes_applied.append("Added outer brackets for matrix rows")
+
+    # 1. Fix missing commas between numbers in matrices (space-separated)
+    #    [[1 2 3],[4 5 6]] → [[1,2,3],[4,5,6]]
+    before = s
+    s = _SPACED_DIGITS.sub(r'\1,\2', s)
+    if s != before:
+        fixes_applied.append("Added missing commas between numbers")
+
+    # 2. Fix unbalanced square brackets in matrices
+    #    Count opening and closing brackets, add missing ones
+    open_count = s.count('[')
+    close_count = s.count(']')
+    if open_count > close_count:
+        s = s + (']' * (open_count - close_count))
+        fixes_applied.append(f"Added {open_count - close_count} missing closing bracket(s)")
+    elif close_count > open_count:
+        s = ('[' * (close_count - open_count)) + s
+        fixes_applied.append(f"Added {close_count - open_count} missing opening bracket(s)")
+
+    # 3. Fix mismatched brackets in matrices (curly/square)
+    #    [[1,2,3},[4,5,6]] → [[1,2,3],[4,5,6]]
+    #    BUT: Preserve LaTeX command braces like \frac{1}{3}, \sqrt{x}, etc.
+    #    Only possible when a [ meets a } or a { meets a ]
+    if ('[' in s and '}' in s) or ('{' in s and ']' in s) or '__LATEX_BRACE_' in s:
+        before = s
+        # Only replace mismatched brackets that are NOT part of LaTeX commands
+        # First, temporarily protect LaTeX command braces by replacing them with placeholders
+        protected_patterns = []
+        placeholder_counter = [0]
+
+        def protect_latex_braces(match):
+            placeholder = f"__LATEX_BRACE_{placeholder_counter[0]}__"
+            protected_patterns.append((placeholder, match.group(0)))
+            placeholder_counter[0] += 1
+            return placeholder
+
+        # Protect common LaTeX commands that use braces: \frac{}{}, \sqrt{}, \text{}, etc.
+        temp_s = _LATEX_BRACES.sub(protect_latex_braces, s)
+
+        # Now do the mismatched bracket fix on the unprotected content
+        # Replace } with ] if it appears after [ and before ]
+        temp_s = _SQUARE_CLOSED_BY_CURLY.sub(r'[\1]', temp_s)
+        # Replace { with [ if it appears in matrix context
+        temp_s = _CURLY_CLOSED_BY_SQUARE.sub(r'[\1]', temp_s)
+
+        # Restore protected LaTeX braces
+        for placeholder, original in protected_patterns:
+            temp_s = temp_s.replace(placeholder, original)
+
+        s = temp_s
+        if s != before:
+            fixes_applied.append("Fixed mismatched brackets (changed {} to [])")
+
+    # 4. Fix missing pipe before row operations
+    #    [[1,2]]R_1 → [[1,2]]|R_1
+    if ']]' in s:
+        before = s
+        s = _MISSING_PIPE.sub(r']]|\1', s)
+        if s != before:
+            fixes_applied.append("Added missing pipe before row operation")
+
+    # 5. Fix double operators
+    #    2+-3 → 2-3,  2-+3 → 2-3,  2--3 → 2+3,  2++3 → 2+3
+    #    (kept as four passes: "1---2" → "1+-2" depends on their order)
+    if _DOUBLE_OPERATOR.search(s):
+        before = s
+        s = _PLUS_MINUS.sub('-', s)
+        s = _MINUS_PLUS.sub('-', s)
+        s = _MINUS_MINUS.sub('+', s)
+        s = _PLUS_PLUS.sub('+', s)
+        if s != before:
+            fixes_applied.append("Fixed double operators")
+
+    # 6. Fix unbalanced parentheses
+    open_paren = s.count('(')
+    close_paren = s.count(')')
+    if open_paren > close_paren:
+        s = s + (')' * (open_paren - close_paren))
+        fixes_applied.append(f"Added {open_paren - close_paren} missing closing parenthesis")
+    elif close_paren > open_paren:
+        s = ('(' * (close_paren - open_paren)) + s
+        fixes_applied.append(f"Added {close_paren - open_paren} missing opening parenthesis")
+
+    # 7. Fix missing asterisk in fraction notation
+    #    \frac12 → \frac{1}{2}
+    if '\\frac' in s:
+        before = s
+        s = _FRAC_DIGITS.sub(r'\\frac{\1}{\2}', s)
+        if s != before:
+            fixes_applied.append("Fixed fraction notation (added braces)")
+
+    # 8. Remove stray trailing operators
+    #    2+3+ → 2+3,  5*7* → 5*7
+    before = s
+    s = _TRAILING_OPERATOR.sub('', s)
+    if s != before:
+        fixes_applied.append("Removed trailing operator")
+
+    if '^' in s:
+        # 9. Remove dangling power operators (forgotten exponent)
+        #    2^ → 2,  x^ → x,  (2+3)^ → (2+3)
+        before = s
+        s = _DANGLING_POWER.sub('', s)  # Remove ^ before comma, ], ), |, or end
+        if s != before:
+            fixes_applied.append("Removed incomplete power notation (missing exponent)")
+
+        # 10. Fix empty exponents in braces
+        #    x^{} → x,  2^{} → 2
+        before = s
+        s = _EMPTY_EXPONENT.sub('', s)
+        if s != before:
+            fixes_applied.append("Removed empty exponent braces")
+
+    if 'R' in s:
+        # 11. Fix missing underscore in row operations
+        #    R1 → R_1,  R2 → R_2,  R123 → R_123
+        before = s
+        s = _ROW_NO_UNDERSCORE.sub(r'R_\1', s)
+        if s != before:
+            fixes_applied.append("Added missing underscore in row notation (R1 → R_1)")
+
+        # 11.5. Fix operator stuck inside row subscript braces
+        #    R_{2-} → R_2-,  R_{1+} → R_1+,  R_{2-}2R_1 → R_2-2R_1
+        before = s
+        s = _ROW_BRACED_OPERATOR.sub(r'R_\1\2', s)
+        if s != before:
+            fixes_applied.append("Fixed operator inside row subscript (R_{2-} → R_2-)")
+
+        # 12. Normalize arrow notation in row operations
+        #    -> → \to,  <- → \leftarrow
+        # Only replace arrows that appear in row operation context (after R_digit)
+        if '-' in s:
+            before = s
+            s = _ROW_ARROW_TO.sub(r'\1\\to ', s)
+            s = _ROW_ARROW_SWAP.sub(r'\1\\leftrightarrow ', s)
+            s = _ROW_ARROW_FROM.sub(r'\1\\leftarrow ', s)
+            if s != before:
+                fixes_applied.append("Normalized arrow notation (-> → \\to)")
+
+    return (s, fixes_applied)
+
+
+def clean_latex(tex):
+    """Normalize LaTeX string for parsing"""
+    if not tex:
+        return ""
+    t = str(tex)
+
+    # Remove \left and \right but keep the parentheses
+    if '\\left' in t or '\\right' in t:
+        t = _LEFT_RIGHT.sub(lambda m: _LEFT_RIGHT_DELIMITERS[m.group(0)], t)
+
+    # Replace mathrm{d} with d
+    t = t.replace("\\mathrm{d}", "d")
+
+    if '\\' in t:
+        # Remove spacing macros (but NOT backslash-space, which is handled by _preprocess_row_operations)
+        t = _SPACING_MACROS.sub("", t)
+
+        # Protect matrix row separators
+        t = _ROW_SEPARATOR.sub("\\\\", t)
+
+    # Ensure & separators have no surrounding whitespace
+    if '&' in t:
+        t = _AMPERSAND.sub("&", t)
+
+    # ⭐ CRITICAL: Replace backslash-space BEFORE removing all whitespace
+    # This prevents "\ R" from becoming "\R" when whitespace is removed
+    t = t.replace(r"\ ", "<<SPACE>>")
+
+    # Remove whitespace
+    t = _WHITESPACE.sub("", t)
+
+    # Restore the spaces that were marked by backslash-space
+    t = t.replace("<<SPACE>>", " ")
+
+    # ⭐ CRITICAL FIX: Add explicit multiplication for implicit cases
+    # IMPORTANT: Apply these BEFORE the digit-letter rule to avoid conflicts
+
+    if ')' in t:
+        # 1. Between closing paren and opening paren: )( -> )*(
+        t = _PAREN_PAREN.sub(')*(', t)
+
+        # 2. Between closing paren and digit: )2 -> )*2
+        t = _PAREN_DIGIT.sub(r')*\1', t)
+
+        # 3. Between closing paren and letter: )x -> )*x
+        # BUT NOT before R_ (row references like (1/2)R_1 must stay as implicit multiplication)
+        t = _PAREN_LETTER.sub(r')*\1', t)
+
+    if '(' in t:
+        # 4. Between digit and opening paren: 2( -> 2*(
+        # BUT NOT after integral bounds: \int_1^3( should stay as is
+        t = _DIGIT_PAREN.sub(r'\1*(', t)
+
+        # 5. Between single letter and opening paren: x( -> x*(, but not for function names like sin(
+        t = _LETTER_PAREN.sub(r'\1*(', t)
+
+    # 6. Between digit and letter: 2x -> 2*x (original rule, kept last)
+    # BUT NOT after integral bounds: \int_1^3x should stay as is for cases like \int_0^1x
+    # IMPORTANT: Do NOT add * before R_ (row references like 2R_1 must stay as implicit multiplication)
+    t = _DIGIT_LETTER.sub(r'\1*\2', t)
+
+    return t.strip()
+
+
+def preprocess_derivatives(latex_str):
+    r"""
+    Rewrites \frac{d}{dx}(...) and \frac{\partial}{\partial x}(...)
+    patterns into unique function calls before parsing.
+    """
+    if '\\frac' not in latex_str:
+        return latex_str
+
+    # 1. Handle total derivatives: \frac{d}{dx}(...)
+    processed_str = _TOTAL_DERIVATIVE.sub(r"__derivative(\1, \2)", latex_str)
+
+    # 2. Handle partial derivatives: \frac{\partial}{\partial x}(...)
+    # This regex is slightly different to handle the \partial command and optional space.
+    return _PARTIAL_DERIVATIVE.sub(r"__partial_derivative(\1, \2)", processed_str)
+
+
+def expression_has_matrix_operations(latex_str):
+    """
+    Quick check if a LaTeX expression contains matrix row operations.
+    Must have BOTH a pipe AND row operation indicators.
+    """
+    if not latex_str:
+        return False
+
+    # ✅ CRITICAL FIX: Matrix operations MUST have a pipe character
+    # This prevents false positives with limits that use \to
+    if '|' not in latex_str:
+        return False
+
+    # Now check for row operation indicators AFTER the pipe
+    indicators = [
+        "R_",            # Row reference (most reliable)
+        "\\leftarrow",   # Left arrow
+        "\\leftrightarrow"  # Swap arrow
+    ]
+
+    # Check if any indicator appears after a pipe
+    pipe_index = latex_str.find('|')
+    if pipe_index >= 0:
+        after_pipe = latex_str[pipe_index:]
+        return any(ind in after_pipe for ind in indicators)
+
+    return False
+
+
+def preprocess_row_operations(latex_str):
+    """
+    Safe preprocessing: only apply row-operation regexes to the operation part.
+    Normalizes matrix numbers separately so matrix content is not mangled.
+    """
+
+    # ✅ VALIDATION: Check for balanced brackets in row operations
+    # Row operations should be in format: [[matrix]]|ops| or [[matrix]]|ops
+    if '|' in latex_str and 'R_' in latex_str:
+        # Count pipes
+        pipe_count = latex_str.count('|') + latex_str.count(r'\left|') + latex_str.count(r'\right|')
+        # For proper row operations, we expect either:
+        # 1. Two pipes: \left[\matrix\right]\left|ops\right|
+        # 2. One pipe (lenient): \left[\matrix\right|ops (missing closing)
+        # Warn if structure looks wrong
+        if pipe_count == 1:
+            console.warn("⚠️ Row operation may be missing closing pipe |")
+
+        # Check for balanced brackets
+        open_brackets = latex_str.count('[') + latex_str.count(r'\left[')
+        close_brackets = latex_str.count(']') + latex_str.count(r'\right]')
+        if open_brackets != close_brackets:
+            console.warn("⚠️ Unbalanced brackets: %s open, %s close", open_brackets, close_brackets)
+
+    # 0. Quick generic cleanups that are safe everywhere
+    s = latex_str.replace(r'\ ', ' ')
+    s = s.replace(r'\left(', '(').replace(r'\right)', ')')
+    s = s.replace(r'\left[', '[').replace(r'\right]', ']')
+    s = s.replace(r'\left\{', '{').replace(r'\right\}', '}')
+    s = s.replace(r'\left|', '|').replace(r'\right|', '|')
+    s = s.replace(r'\cdot', '*')
+
+    # Split into matrix part and operations part.
+    # Prefer explicit '|' split. If no pipe, attempt to split at arrow (\to or ->).
+    if '|' in s:
+        matrix_part, ops_part = s.split('|', 1)
+    else:
+        # attempt to split at first arrow occurrence
+        m = _ARROW.search(s)
+        if m:
+            # split so matrix_part includes everything before arrow, ops_part includes arrow+rest
+            idx = m.start()
+            matrix_part = s[:idx]
+            ops_part = s[idx:]
+        else:
+            # nothing to do: treat entire string as matrix_part (no row op)
+            matrix_part, ops_part = s, ''
+
+    # -------------------------
+    # Normalize matrix_part (do NOT run row-op rewrites here)
+    # -------------------------
+    # 1) collapse repeated spaces
+    matrix_part = _WHITESPACE.sub(' ', matrix_part).strip()
+
+    # 2) Remove stray spaces between minus and number/fraction inside matrix
+    #    Examples: [0, - 1, - \frac{1}{2}] -> [0, -1, -\frac{1}{2}]
+    matrix_part = _MINUS_SPACE_FRAC.sub(r'-\\frac', matrix_part)  # - \frac -> -\frac
+    matrix_part = _MINUS_SPACE_DIGIT.sub(r'-\1', matrix_part)  # - 1 -> -1
+    matrix_part = _SPACE_AFTER_BRACE.sub(r'\1', matrix_part)  # remove space after { 
+    matrix_part = _SPACE_BEFORE_BRACE.sub(r'\1', matrix_part)  # remove space before }
+    matrix_part = _SPACE_AFTER_BRACKET.sub('[', matrix_part)
+    matrix_part = _SPACE_BEFORE_BRACKET.sub(']', matrix_part)
+
+    # 3) (Optional) convert simple LaTeX fractions in matrix to explicit form so parser sees them consistently
+    #    e.g. replace \frac{1}{2} with (1/2) — only inside matrix part
+    #    If you prefer leaving \frac for parser, skip this.
+    if '\\frac' in matrix_part:
+        matrix_part = _SIMPLE_FRAC.sub(r'(\1/\2)', matrix_part)
+
+    # -------------------------
+    # Now operate on ops_part only (row-operation specific rewrites)
+    # -------------------------
+    ops = ops_part  # local alias for clarity
+
+    if ops:
+        # 1) Ensure there's a space after arrows so tokenizer can separate parts
+        ops = _TO_NO_SPACE.sub(r'\\to ', ops)
+        ops = _RIGHTARROW_NO_SPACE.sub(r'\\rightarrow ', ops)
+        ops = _ASCII_TO_NO_SPACE.sub(r'-> ', ops)
+        ops = _ASCII_FROM_NO_SPACE.sub(r'<- ', ops)
+
+        if '\\frac' in ops:
+            # 2) Fix fractions with row reference in denominator: \frac{1}{2R_3} -> (1/2)R_3
+            ops = _FRAC_ROW_DENOMINATOR.sub(r'(\1/\2)R_\3', ops)
+
+            # 3) Fix fractions before row reference: \frac{1}{2}R_ -> (1/2)R_
+            ops = _FRAC_BEFORE_ROW.sub(r'(\1/\2)R_', ops)
+
+            # 4) Negative fractions -\frac{...}R_ -> (-1/2)R_
+            ops = _NEG_FRAC_BEFORE_ROW.sub(r'(-\1/\2)R_', ops)
+
+            # 4.5) Negative fractions wrapped in parens: (-\frac{1}{3})R_ -> (-1/3)R_
+            ops = _PAREN_NEG_FRAC_ROW.sub(r'(-\1/\2)R_', ops)
+
+            # 4.6) Positive fractions wrapped in parens: (\frac{1}{3})R_ -> (1/3)R_
+            ops = _PAREN_FRAC_ROW.sub(r'(\1/\2)R_', ops)
+
+            # 5) Fix fractions in combines: R_2+\frac{1}{2}R_3 -> R_2+(1/2)R_3
+            ops = _SIGNED_FRAC_ROW.sub(r'\1(\2/\3)R_', ops)
+
+        # 6) Remove outer wrapping parentheses from row scale expressions
+        ops = _WRAPPED_SCALE.sub(r'\1', ops)
+        ops = _WRAPPED_TARGET.sub(r'\1\2', ops)
+        ops = _WRAPPED_ROW.sub(r'\1', ops)
+
+        # 7) Remove single-number parentheses before R_: (2)R_1 -> 2R_1; (-2)R_1 -> -2R_1
+        ops = _PAREN_NUMBER_ROW.sub(r'\1R_', ops)
+        ops = _PAREN_NEG_NUMBER_ROW.sub(r'\1R_', ops)
+
+        # 7.5 Insert implicit coefficient 1 in row combinations (ONLY in ops_part)
+        # Handles: R_2-R_1 -> R_2-1R_1 ; R_2+R_1 -> R_2+1R_1
+        ops = _IMPLICIT_ONE.sub(r'\1\g<2>1R_', ops)
+
+        # 7c. Force spaces around + and - ONLY when they're operators between row references
+        # Don't add spaces inside parentheses like (-1/3)
+        # Only add spaces when +/- is between R_ references or after R_ followed by a number
+        ops = _ROW_SIGN_DIGIT.sub(r'\1 \2 \3', ops)
+        ops = _ROW_SIGN_PAREN.sub(r'\1 \2 (', ops)
+
+        # 7d. Canonicalize multiple +/- combos: "--"->"+", "+-"|"-+"->"-"
+        ops = _OPS_PLUS_PLUS.sub(' + ', ops)
+        ops = _OPS_MINUS_MINUS.sub(' + ', ops)
+        ops = _OPS_MIXED_SIGNS.sub(' - ', ops)
+
+        # 8) Remove stray backslashes before UPPERCASE letters and parentheses only
+        #    Fixes: \R -> R, \( -> (, \) -> )
+        #    Preserves: \to, \rightarrow, \frac, etc. (lowercase commands)
+        ops = _STRAY_BACKSLASH.sub(r'\1', ops)
+
+        # 9) Clean up multiple spaces in ops
+        ops = _WHITESPACE.sub(' ', ops).strip()
+
+    # -------------------------
+    # Recombine matrix_part and ops_part (if ops existed)
+    # -------------------------
+    if ops:
+        # Ensure single pipe between matrix and ops
+        out = matrix_part.strip() + '|' + ops
+    else:
+        out = matrix_part.strip()
+
+    # Final cleanup (a little extra safety)
+    out = _REPEATED_PIPES.sub('|', out)
+    out = _WHITESPACE.sub(' ', out).strip()
+    out = _TRAILING_PIPE.sub('', out)  # remove trailing pipe
+    # --- Step 7: Final rewrite for all "+" row operations ---
+    # Convert any R_n1 + nR_n2 → R_n1 - (-n)R_n2
+    # Convert any R_n1 + R_n2 → R_n1 - (-1)R_n2
+    if 'R_' in out and '+' in out:
+        out = _ROW_PLUS_SCALED_ROW.sub(r'\1 - (-\3)R_\4', out)
+        out = _ROW_PLUS_ROW.sub(r'\1 - (-1)R_\3', out)
+
+    return out
@@ -0,0 +1,351 @@
+"""
+Structure fingerprints
+----------------------
+extract_structure() counts the operators and operands of a SymPy
+expression (numbers normalized to one string form) and records matrix
+row operations, so an answer can be checked for form, not just value.
+The *_json_serializable helpers turn fingerprints and SymPy values into
+plain JSON for problem files.
+"""
+
+import traceback
+
+import sympy as sp
+
+from .log import console, lazy
+
+
+def extract_structure(expr):
+    """
+    Extract structural fingerprint of expression INCLUDING matrix operations.
+    Normalizes all numeric values to consistent float representation for reliable comparison.
+    """
+    operators, operands, matrix_ops = {}, {}, []
+
+    def normalize_numeric_to_string(node):
+        """
+        Convert any numeric value to normalized string representation.
+        Rational(1, 2) → "0.5"
+        Integer(2) → "2.0" 
+        Float(0.5) → "0.5"
+        """
+        try:
+            # Check if it's a SymPy numeric type
+            if isinstance(node, sp.Basic):
+                if hasattr(node, 'is_number') and node.is_number:
+                    # Convert to float for consistency
+                    float_val = float(node.evalf())
+                    # Check if it's effectively an integer
+                    if float_val == int(float_val):
+                        return str(int(float_val))
+                    else:
+                        return str(float_val)
+
+            # Check if it's a Python numeric type
+            if isinstance(node, (int, float)):
+                if isinstance(node, int) or float(node) == int(float(node)):
+                    return str(int(node))
+                else:
+                    return str(float(node))
+
+            # Try to parse as number from string
+            node_str = str(node)
+            if '/' in node_str:
+                # Handle fraction strings like "1/2"
+                parts = node_str.split('/')
+                if len(parts) == 2:
+                    try:
+                        num = float(parts[0].strip())
+                        denom = float(parts[1].strip())
+                        if denom != 0:
+                            result = num / denom
+                            if result == int(result):
+                                return str(int(result))
+                            else:
+                                return str(result)
+                    except:
+                        pass
+
+            # Try direct float conversion
+            try:
+                float_val = float(node_str)
+                if float_val == int(float_val):
+                    return str(int(float_val))
+                else:
+                    return str(float_val)
+            except:
+                pass
+
+        except Exception as e:
+            console.debug("normalize_numeric_to_string error: %s", e)
+
+        # If all else fails, return string representation
+        return str(node).strip().replace(" ", "")
+
+    def normalize_matrix_metadata(metadata):
+        """
+        Normalize matrix operation metadata to ensure consistent numeric representation.
+        """
+        if not metadata or not isinstance(metadata, dict):
+            return metadata
+
+        normalized = {
+            "type": metadata.get("type"),
+            "operations": [],
+            "original_shape": metadata.get("original_shape")
+        }
+
+        for operation in metadata.get("operations", []):
+            normalized_op = {
+                "type": operation.get("type"),
+                "details": normalize_details_list(operation.get("details", []))
+            }
+            normalized["operations"].append(normalized_op)
+
+        return normalized
+
+    def normalize_details_list(details):
+        """
+        Recursively normalize a list/tuple of operation details.
+        Converts nested structures and numeric values.
+        """
+        if details is None:
+            return []
+
+        if not isinstance(details, (list, tuple)):
+            details = [details]
+
+        normalized = []
+        for item in details:
+            if isinstance(item, (list, tuple)):
+                # Recursively normalize nested structures
+                normalized.append(normalize_details_list(item))
+            elif isinstance(item, str):
+                # Keep strings as-is (like "scale", "swap", etc.)
+                normalized.append(item)
+            else:
+                # Normalize numeric values
+                normalized.append(normalize_numeric_to_string(item))
+
+        return normalized
+
+    def process(node, parent_op=None):
+        nonlocal matrix_ops
+
+        if node is None:
+            return
+
+        # Skip tuple coordinates from matrix indexing
+        if isinstance(node, (tuple, list)) and all(isinstance(i, sp.Integer) for i in node):
+            return
+
+        # ✅ CRITICAL: Detect matrix operations by checking for metadata
+        if isinstance(node, sp.MatrixBase):
+            # Check if this matrix has row operation metadata
+            if hasattr(node, '_matrix_op_metadata'):
+                metadata = node._matrix_op_metadata
+
+                # Normalize the metadata before storing
+                normalized_metadata = normalize_matrix_metadata(metadata)
+
+                matrix_ops.append({
+                    "type": "matrix_with_row_ops",
+                    "operations": normalized_metadata["operations"],
+                    "original_shape": normalized_metadata["original_shape"]
+                })
+
+                console.debug("✅ Found matrix with %s operation(s)", len(metadata['operations']))
+                console.debug("   Normalized operations: %s", normalized_metadata['operations'])
+            else:
+                console.debug("ℹ️ Matrix has no _matrix_op_metadata attribute")
+
+            # Process matrix elements
+            for el in node:
+                process(el, parent_op)
+            return
+
+        # Handle MatrixExpr (symbolic matrix operations)
+        if isinstance(node, sp.MatrixExpr) and not isinstance(node, sp.MatrixBase):
+            val = normalize_numeric_to_string(node)
+            operands[val] = operands.get(val, 0) + 1
+            return
+
+        # Check if this is a Mul(-1, x) pattern (negation)
+        if isinstance(node, sp.Mul) and len(node.args) == 2:
+            a, b = node.args
+            if a == sp.Integer(-1) and isinstance(b, (sp.Symbol, sp.Number)):
+                # Simplify Mul(-1, x) to -x
+                simplified = sp.simplify(node)
+                val = normalize_numeric_to_string(simplified)
+                operands[val] = operands.get(val, 0) + 1
+                console.debug("✅ Simplified Mul(-1, %s) -> %s", b, val)
+                return
+
+        # Handle nodes with arguments (operators)
+        if hasattr(node, "args") and len(node.args) > 0:
+            op_name = type(node).__name__
+
+            # Skip Tuple nodes
+            if op_name == "Tuple":
+                for c in node.args:
+                    process(c, parent_op)
+                return
+
+            # Don't double-count nested Mul operations
+            if not (op_name == "Mul" and (parent_op == "Mul" or len(node.args) == 1)):
+                operators[op_name] = operators.get(op_name, 0) + 1
+
+            # Recursively process children
+            for c in node.args:
+                process(c, op_name)
+            return
+
+        # Handle leaf nodes (operands) - NORMALIZE HERE
+        val = normalize_numeric_to_string(node)
+
+        # Skip -1 as it's usually part of subtraction/negation
+        if val == "-1":
+            return
+
+        operands[val] = operands.get(val, 0) + 1
+
+    try:
+        process(expr)
+    except Exception as e:
+        console.debug("extract_structure error: %s", e)
+        console.debug("%s", lazy(traceback.format_exc))
+
+    result = {
+        "operators": operators,
+        "operands": operands,
+        "matrix_ops": matrix_ops,
+        "total_ops": sum(operators.values()),
+        "total_operands": sum(operands.values())
+    }
+
+    console.debug("📊 Extracted structure: %s matrix operation(s)", len(matrix_ops))
+    if matrix_ops:
+        console.debug("   Matrix ops details: %s", matrix_ops)
+
+    return result
+
+
+def structure_to_json_serializable(structure):
+    """
+    Convert extracted structure (which may contain SymPy objects) 
+    to fully JSON-serializable format
+    """
+    if not isinstance(structure, dict):
+        return structure
+
+    result = {}
+
+    # Convert operators
+    if "operators" in structure:
+        result["operators"] = dict(structure["operators"])
+
+    # Convert operands (may contain SymPy objects)
+    if "operands" in structure:
+        result["operands"] = {
+            str(key): value 
+            for key, value in structure["operands"].items()
+        }
+
+    # ✅ Convert matrix_ops
+    if "matrix_ops" in structure:
+        result["matrix_ops"] = []
+        for op in structure["matrix_ops"]:
+            serialized_op = {
+                "type": op.get("type", "unknown"),
+                "operations": sympy_to_json_serializable(op.get("operations", [])),
+                "original_shape": op.get("original_shape", (0, 0))
+            }
+            result["matrix_ops"].append(serialized_op)
+
+    # Copy other fields
+    if "total_ops" in structure:
+        result["total_ops"] = structure["total_ops"]
+    if "total_operands" in structure:
+        result["total_operands"] = structure["total_operands"]
+
+    return result
+
+
+def sympy_to_json_serializable(obj):
+    """Convert SymPy objects to JSON-serializable format"""
+
+    if obj is None:
+        return None
+
+    # ✅ Handle tuples FIRST (convert to lists and process recursively)
+    if isinstance(obj, tuple):
+        return [sympy_to_json_serializable(item) for item in obj]
+
+    # ✅ Handle SymPy expressions EARLY (before checking Basic/Matrix)
+    # This catches Mul, Add, Pow, Rational, etc.
+    if isinstance(obj, sp.Expr) and not isinstance(obj, sp.MatrixBase):
+        # Try to simplify to a number first
+        try:
+            simplified = sp.simplify(obj)
+            if simplified.is_Integer:
+                return int(simplified)
+            elif simplified.is_Rational:
+                return float(simplified)
+            elif simplified.is_Float:
+                return float(simplified)
+        except:
+            pass
+        # Fall back to string representation
+        return str(obj)
+
+    # Handle specific SymPy number types
+    if isinstance(obj, (sp.core.numbers.One, sp.core.numbers.Zero, 
+                       sp.core.numbers.NegativeOne)):
+        return int(obj)
+
+    if isinstance(obj, sp.Integer):
+        return int(obj)
+
+    if isinstance(obj, sp.Rational):
+        return float(obj)
+
+    if isinstance(obj, sp.Float):
+        return float(obj)
+
+    # ✅ Handle SymPy matrices with metadata
+    if isinstance(obj, sp.MatrixBase):
+        matrix_data = [[sympy_to_json_serializable(cell) for cell in row] 
+                for row in obj.tolist()]
+
+        # Check if matrix has operation metadata
+        if hasattr(obj, '_matrix_op_metadata'):
+            metadata = obj._matrix_op_metadata
+            console.debug("✅ Serializing matrix with %s operation(s)", len(metadata['operations']))
+
+            # ✅ CRITICAL: Recursively serialize all metadata content
+            return {
+                "_type": "matrix_with_ops",
+                "data": matrix_data,
+                "metadata": {
+                    "operations": sympy_to_json_serializable(metadata["operations"]),
+                    "original_shape": metadata["original_shape"]
+                }
+            }
+
+        return matrix_data
+
+    # Handle any other Basic (catch-all for SymPy objects)
+    if isinstance(obj, sp.Basic):
+        return str(obj)
+
+    # Handle lists recursively
+    if isinstance(obj, list):
+        return [sympy_to_json_serializable(item) for item in obj]
+
+    # Handle dicts recursively
+    if isinstance(obj, dict):
+        return {key: sympy_to_json_serializable(value) 
+                for key, value in obj.items()}
+
+    # Return as-is for primitive types (str, int, float, bool)
+    return obj
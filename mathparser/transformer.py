@@ -0,0 +1,402 @@
+"""
+LaTeX parse tree -> SymPy
+-------------------------
+Latex2Sympy turns the Lark tree of mathparser.grammar into SymPy
+objects. Arithmetic is built with evaluate=False where the student's
+form matters (structure checks), matrices with row operations are
+evaluated and carry the operations as `_matrix_op_metadata`.
+"""
+
+import sympy as sp
+
+from ._lalr_parser import Transformer, v_args
+from .log import console
+
+
+def canonical_scalar(x):
+    """Convert/normalize a value to a canonical SymPy scalar (Integer/Rational/Float simplified)."""
+    if not isinstance(x, sp.Basic):
+        try:
+            x = sp.sympify(x)
+        except Exception:
+            return x
+    # Prefer exact rationals for floats represented as strings
+    if isinstance(x, sp.Float):
+        try:
+            x = sp.Rational(str(x))
+        except Exception:
+            pass
+    # Simplify and evaluate any Mul/Add wrappers (handles Mul(-1,n) -> -n)
+    x = sp.simplify(x)
+    try:
+        x = x.doit()
+    except Exception:
+        pass
+    return sp.simplify(x)
+
+
+@v_args(inline=True)
+class Latex2Sympy(Transformer):
+    def paren_expr(self, expr):
+        return expr
+
+    def braces_expr(self, expr):
+        return expr
+
+    def equation(self, lhs, rhs):
+        """Handle equations like x=3 by returning an Eq object"""
+        return sp.Eq(lhs, rhs, evaluate=False)
+
+    def number(self, tok):
+        s = str(tok)
+        return sp.Integer(s) if '.' not in s else sp.Float(s)
+
+    def symbol(self, tok):
+        s = str(tok).strip()
+        return sp.Symbol(s[1:] if s.startswith("\\") else s)
+
+    def pi_symbol(self, _):
+        return sp.pi
+
+    def infty_symbol(self, _):
+        return sp.oo
+
+    def infinity(self, tok):
+        s = str(tok)
+        return -sp.oo if s.startswith('-') else sp.oo
+
+    def abs_func(self, expr):
+        return sp.Abs(expr)
+
+    def neg(self, v):
+        return sp.Mul(-1, v, evaluate=False)
+
+    def add(self, a, b):
+        return sp.Add(a, b, evaluate=False)
+
+    def sub(self, a, b):
+        return sp.Add(a, sp.Mul(-1, b, evaluate=False), evaluate=False)
+
+    def mul(self, a, b):
+        if isinstance(a, (sp.MatrixBase, sp.MatrixExpr)) or isinstance(b, (sp.MatrixBase, sp.MatrixExpr)):
+            a_ = sp.UnevaluatedExpr(a) if isinstance(a, (sp.MatrixBase, sp.MatrixExpr)) else a
+            b_ = sp.UnevaluatedExpr(b) if isinstance(b, (sp.MatrixBase, sp.MatrixExpr)) else b
+            return sp.Mul(a_, b_, evaluate=False)
+        return sp.Mul(a, b, evaluate=True)
+
+    def div(self, a, b):
+        return sp.Mul(a, sp.Pow(b, -1, evaluate=False), evaluate=False)
+
+    def frac(self, numerator, denominator):
+        return sp.Mul(numerator, sp.Pow(denominator, -1, evaluate=False), evaluate=False)
+
+    def trig_func(self, func_name, expr):
+        func_str = str(func_name).strip().replace("\\", "")
+        func_map = {
+            "sin": sp.sin,
+            "cos": sp.cos,
+            "tan": sp.tan,
+            "cot": sp.cot,
+            "sec": sp.sec,
+            "csc": sp.csc,
+            "arcsin": sp.asin,
+            "arccos": sp.acos,
+            "arctan": sp.atan,
+        }
+        func = func_map.get(func_str)
+        if func:
+            return func(expr)
+        return sp.Function(func_str)(expr)
+
+    def log_func(self, func_name, expr):
+        func_str = str(func_name).strip().replace("\\", "")
+        if func_str == "ln":
+            return sp.ln(expr)
+        elif func_str == "log":
+            return sp.log(expr, 10)
+        elif func_str == "exp":
+            return sp.exp(expr)
+        return sp.Function(func_str)(expr)
+
+    def log_func_with_base(self, base, expr):
+        r"""Handle logarithm with base like \log_{10}100"""
+        return sp.log(expr, base)
+
+    def log_func_with_base_no_braces(self, base, expr):
+        r"""Handle logarithm with base without braces like \log_10 100"""
+        base_val = sp.sympify(str(base))
+        return sp.log(expr, base_val)
+
+    def limit_expr(self, var, value, expr):
+        return sp.Limit(expr, sp.Symbol(str(var)), value)
+
+    def integral_definite(self, lower, upper, integrand):
+        r"""Handle definite integrals like \int_{1}^{3}(2x) dx with braces"""
+        # Extract the integration variable from the integrand
+        # Usually it's the free symbol in the expression
+        free_symbols = integrand.free_symbols
+        if free_symbols:
+            # Use the first free symbol as the integration variable
+            # For more complex cases, we might need smarter heuristics
+            var = sorted(free_symbols, key=str)[0]
+        else:
+            # If no free symbols, use x as default
+            var = sp.Symbol('x')
+        return sp.Integral(integrand, (var, lower, upper))
+
+    def integral_definite_no_braces(self, lower, upper, integrand):
+        r"""Handle definite integrals like \int _1^3(2x) dx without braces around bounds"""
+        # Convert NUMBER tokens to SymPy expressions
+        lower_val = sp.sympify(str(lower))
+        upper_val = sp.sympify(str(upper))
+
+        # Extract the integration variable from the integrand
+        free_symbols = integrand.free_symbols
+        if free_symbols:
+            var = sorted(free_symbols, key=str)[0]
+        else:
+            var = sp.Symbol('x')
+        return sp.Integral(integrand, (var, lower_val, upper_val))
+
+    def integral_indefinite(self, integrand):
+        r"""Handle indefinite integrals like \int _{ }^{ }(2x) dx with empty braces"""
+        # Extract the integration variable from the integrand
+        free_symbols = integrand.free_symbols
+        if free_symbols:
+            var = sorted(free_symbols, key=str)[0]
+        else:
+            var = sp.Symbol('x')
+        return sp.Integral(integrand, var)
+
+    def integral_indefinite_simple(self, integrand):
+        r"""Handle indefinite integrals like \int (2x) dx without bounds"""
+        # Extract the integration variable from the integrand
+        free_symbols = integrand.free_symbols
+        if free_symbols:
+            var = sorted(free_symbols, key=str)[0]
+        else:
+            var = sp.Symbol('x')
+        return sp.Integral(integrand, var)
+
+    def sum_expr(self, var, lower, upper, body):
+        r"""Handle summation like \sum_{i=1}^{n} expr"""
+        var_sym = sp.Symbol(str(var))
+        return sp.Sum(body, (var_sym, lower, upper))
+
+    def sum_expr_no_body(self, var, lower, upper):
+        r"""Handle summation without body like \sum_{i=1}^{n}"""
+        # Return a symbolic sum with a placeholder variable
+        var_sym = sp.Symbol(str(var))
+        # Use the variable itself as the body when no body is provided
+        return sp.Sum(var_sym, (var_sym, lower, upper))
+
+    def sum_expr_no_braces(self, var, lower, upper, body):
+        r"""Handle summation like \sum _i=1^n expr without braces"""
+        var_sym = sp.Symbol(str(var))
+        lower_val = sp.sympify(str(lower))
+        upper_val = sp.sympify(str(upper))
+        return sp.Sum(body, (var_sym, lower_val, upper_val))
+
+    def sum_expr_no_braces_no_body(self, var, lower, upper):
+        r"""Handle summation like \sum _i=1^n without braces or body"""
+        var_sym = sp.Symbol(str(var))
+        lower_val = sp.sympify(str(lower))
+        upper_val = sp.sympify(str(upper))
+        return sp.Sum(var_sym, (var_sym, lower_val, upper_val))
+
+    def prod_expr(self, var, lower, upper, body):
+        r"""Handle product like \prod_{i=1}^{n} expr"""
+        var_sym = sp.Symbol(str(var))
+        return sp.Product(body, (var_sym, lower, upper))
+
+    def prod_expr_no_body(self, var, lower, upper):
+        r"""Handle product without body like \prod_{i=1}^{n}"""
+        var_sym = sp.Symbol(str(var))
+        return sp.Product(var_sym, (var_sym, lower, upper))
+
+    def prod_expr_no_braces(self, var, lower, upper, body):
+        r"""Handle product like \prod _i=1^n expr without braces"""
+        var_sym = sp.Symbol(str(var))
+        lower_val = sp.sympify(str(lower))
+        upper_val = sp.sympify(str(upper))
+        return sp.Product(body, (var_sym, lower_val, upper_val))
+
+    def prod_expr_no_braces_no_body(self, var, lower, upper):
+        r"""Handle product like \prod _i=1^n without braces or body"""
+        var_sym = sp.Symbol(str(var))
+        lower_val = sp.sympify(str(lower))
+        upper_val = sp.sympify(str(upper))
+        return sp.Product(var_sym, (var_sym, lower_val, upper_val))
+
+    def sqrt_func(self, expr):
+        r"""Handle square root like \sqrt{x}"""
+        return sp.sqrt(expr)
+
+    def nthroot_func(self, n, expr):
+        r"""Handle nth root like \sqrt[3]{x} for cube root"""
+        return sp.Pow(expr, sp.Rational(1, n))
+
+    def implicit_mul(self, a, b):
+        if isinstance(a, sp.Matrix) or isinstance(b, sp.Matrix):
+            return sp.Mul(a, b, evaluate=False)
+        return sp.Mul(a, b, evaluate=False)
+
+    def power(self, a, b):
+        """
+        Handle right-associative power like 10^100^0 correctly.
+        Lark gives us nested trees due to right recursion.
+        """
+        # If right child is another power, handle it recursively.
+        # Example: a=10, b=Pow(100, 0) -> Pow(10, (100**0))
+        if isinstance(b, sp.Pow):
+            return sp.Pow(a, b, evaluate=False)
+
+        return sp.Pow(a, b, evaluate=False)
+
+    # --- NEW METHOD FOR DEGREES ---
+    def atom_to_degree(self, tree):
+        r"""
+        Handles expressions like 90^\circ.
+        Converts degrees to radians by multiplying by pi/180.
+        """
+        # tree.children[0] is the already-transformed atom (e.g., the number 90)
+        atom = tree.children[0]
+        # We don't need tree.children[1] which is the degree_expr
+        return sp.pi * atom / 180
+
+    def elements(self, *items):
+        return list(items)
+
+    def row(self, elements):
+        return list(elements) if isinstance(elements, (list, tuple)) else [elements]
+
+    def matrix_rows(self, *rows):
+        row_list = [list(r) if isinstance(r, (list, tuple)) else [r] for r in rows]
+        return sp.Matrix(row_list)
+
+    def matrix_env(self, *args):
+        rows = []
+        for a in args:
+            if a is None:
+                continue
+            if isinstance(a, list) and a and all(isinstance(x, (list, tuple)) for x in a):
+                rows.extend([list(r) for r in a])
+            elif isinstance(a, (list, tuple)):
+                rows.append(list(a))
+            else:
+                rows.append([a])
+        return sp.Matrix(rows)
+
+    def scalar_matrix_mul(self, scalar, matrix):
+        return sp.Mul(scalar, matrix, evaluate=False)
+
+    def row_reference(self, i):
+        return ("ref", int(i))
+
+    def row_scale(self, factor, i):
+        return ("scale", int(i), factor)
+
+    def row_replace(self, target, arrow, expr):
+        """Row replacement operation - arrow parameter is captured but not used"""
+        return ("replace", int(target), expr)
+
+    def row_swap(self, i, swap_arrow, j):
+        """Row swap operation - swap_arrow parameter is captured but not used"""
+        return ("swap", int(i), int(j))
+
+    # The `op` subtree is always empty (its +/- token is filtered out; the
+    # sign is folded into the factor by preprocess_row_operations). Answer
+    # keys store the repr the Earley parser gave it, so keep emitting that.
+    _COMBINE_OP = "Tree(Token('RULE', 'op'), [])"
+
+    def row_combine(self, i, op, factor, j):
+        return ("combine", int(i), self._COMBINE_OP, factor, int(j))
+
+    def matrix_apply_ops(self, matrix, *ops):
+        # Ensure we have a writable SymPy Matrix copy
+        m = sp.Matrix(matrix) if not isinstance(matrix, sp.Matrix) else matrix.copy()
+
+        # ✅ Store original matrix and track operations
+        original_matrix = m.copy()
+        operations_list = []
+
+        # Canonicalize input matrix elements up-front (avoids '- 1' split issues)
+        m = m.applyfunc(canonical_scalar)
+
+        for op in ops:
+            # ✅ Record each operation BEFORE applying it
+            operations_list.append({
+                "type": op[0],
+                "details": list(op[1:]) if len(op) > 1 else []
+            })
+
+            if op[0] == "replace":
+                _, target, expr = op
+                tgt = int(target) - 1  # 0-based
+
+                if expr[0] == "ref":
+                    _, src = expr
+                    # copy row to avoid aliasing
+                    m[tgt, :] = m[int(src)-1, :].copy()
+
+                elif expr[0] == "scale":
+                    _, src, factor = expr
+                    src_row = [canonical_scalar(v) for v in list(m[int(src)-1, :].copy())]
+                    factor_sym = canonical_scalar(factor)
+                    new_elems = [ canonical_scalar(factor_sym * v) for v in src_row ]
+                    m[tgt, :] = sp.Matrix([ new_elems ]).reshape(1, m.cols)
+
+                elif expr[0] == "combine":
+                    _, src, op_str, factor, other = expr
+                    src_idx = int(src) - 1
+                    other_idx = int(other) - 1
+
+                    # CRITICAL: copy both source rows so we compute from originals
+                    src_row = [ canonical_scalar(v) for v in list(m[src_idx, :].copy()) ]
+                    other_row = [ canonical_scalar(v) for v in list(m[other_idx, :].copy()) ]
+
+                    factor_sym = canonical_scalar(factor)
+
+                    new_elems = []
+                    for a, b in zip(src_row, other_row):
+                        if op_str == "+":
+                            val = canonical_scalar(a + factor_sym * b)
+                        else:
+                            val = canonical_scalar(a - factor_sym * b)
+                        new_elems.append(val)
+
+                    m[tgt, :] = sp.Matrix([ new_elems ]).reshape(1, m.cols)
+
+            elif op[0] == "swap":
+                _, i, j = op
+                i0, j0 = int(i)-1, int(j)-1
+                temp = m[i0, :].copy()
+                m[i0, :] = m[j0, :].copy()
+                m[j0, :] = temp
+
+        # final pass to ensure everything canonicalized
+        result = m.applyfunc(canonical_scalar)
+
+        # ✅ CRITICAL: Store metadata on the FINAL result matrix
+        # This preserves the operation history even after canonicalization
+        result._matrix_op_metadata = {
+            "operations": operations_list,
+            "original_shape": (original_matrix.rows, original_matrix.cols)
+        }
+
+        console.debug("✅ Stored metadata on matrix with %s operation(s)", len(operations_list))
+
+        return result
+
+    # --- METHODS FOR PREPROCESSED DERIVATIVES ---
+    def derivative_func(self, var, expr):
+        """Handles the preprocessed __derivative(var, expr) call."""
+        return sp.Derivative(expr, sp.Symbol(str(var)))
+
+    def partial_derivative_func(self, var, expr):
+        """Handles the preprocessed __partial_derivative(var, expr) call."""
+        return sp.Derivative(expr, sp.Symbol(str(var)))
+
+    def start(self, e):
+        return e
+